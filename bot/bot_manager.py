@@ -12,9 +12,17 @@ from typing import Optional, Dict
 import asyncio
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
+from bot.config import BOT_MODE
+from bot.context import (
+    build_company_context,
+    register_company_context,
+    unregister_company_context,
+)
 from bot.database.connection import get_async_session, engine
+from bot.dispatcher import get_dispatcher, run_polling
+from bot.subscription_snapshot import update_subscription_snapshot
+from bot.webhook import get_webhook_multiplexer
 from app.models.public_models import Company
 
 logger = logging.getLogger(__name__)
@@ -37,13 +45,6 @@ class BotInstance:
         self.dispatcher = dispatcher
         self.task = task
         
-        # Сохраняем контекст в диспетчере
-        self.dispatcher['company_id'] = company_id
-        self.dispatcher['company_name'] = None  # Будет загружен из БД
-        self.dispatcher['schema_name'] = f'tenant_{company_id:03d}'
-        self.dispatcher['can_create_bookings'] = True  # Будет загружен из БД
-        self.dispatcher['subscription_status'] = None  # Будет загружен из БД
-        
         logger.info(f"BotInstance создан для компании {company_id}")
 
 
@@ -80,7 +81,7 @@ class BotManager:
             companies = result.scalars().all()
         
         logger.info(f"Загружено {len(companies)} активных компаний")
-            return companies
+        return companies
     
     async def create_bot_instance(self, company: Company) -> BotInstance:
         """
@@ -102,22 +103,16 @@ class BotManager:
         # Создаем бота
         bot = Bot(token=company.telegram_bot_token)
         
-        # Создаем диспетчер
-        dp = Dispatcher(storage=MemoryStorage())
-        
-        # Сохраняем контекст в диспетчере
-        dp['company_id'] = company.id
-        dp['company_name'] = company.name
-        dp['schema_name'] = f'tenant_{company.id:03d}'
-        dp['can_create_bookings'] = company.can_create_bookings
-        dp['subscription_status'] = company.subscription_status
+        # Контекст компании определяется по ID бота, диспетчер общий
+        register_company_context(bot, build_company_context(company))
+        update_subscription_snapshot(company)
         
         logger.info(f"Экземпляр бота создан для компании {company.id}")
         
         return BotInstance(
             company_id=company.id,
             bot=bot,
-            dispatcher=dp
+            dispatcher=get_dispatcher()
         )
     
     async def start_bot(self, bot_instance: BotInstance):
@@ -137,31 +132,16 @@ class BotManager:
             logger.info(f"Запуск бота для компании {company_id}")
             
             try:
-                # Импортируем все хендлеры
-                from bot.handlers.client.start import router as start_router
-                from bot.handlers.client.booking import router as booking_router
-                from bot.handlers.client.calendar import router as calendar_router
-                from bot.handlers.client.my_bookings import router as my_bookings_router
-                from bot.handlers.client.profile import router as profile_router
-                from bot.handlers.admin.menu import router as admin_menu_router
-                from bot.handlers.admin.bookings import router as admin_bookings_router
-                from bot.handlers.master.work_order import router as master_router
+                if BOT_MODE == 'webhook':
+                    # Обновления приходят через общий мультиплексор вебхуков
+                    await get_webhook_multiplexer().register(
+                        bot_instance.bot,
+                        bot_instance.dispatcher
+                    )
+                    return
                 
-                # Регистрируем роутеры в диспетчере
-                bot_instance.dispatcher.include_router(start_router)
-                bot_instance.dispatcher.include_router(booking_router)
-                bot_instance.dispatcher.include_router(calendar_router)
-                bot_instance.dispatcher.include_router(my_bookings_router)
-                bot_instance.dispatcher.include_router(profile_router)
-                bot_instance.dispatcher.include_router(admin_menu_router)
-                bot_instance.dispatcher.include_router(admin_bookings_router)
-                bot_instance.dispatcher.include_router(master_router)
-                
-                # Запускаем polling
-                await bot_instance.dispatcher.start_polling(
-                    bot_instance.bot,
-                    skip_updates=True
-                )
+                # Запускаем polling через общий диспетчер
+                await run_polling(bot_instance.dispatcher, bot_instance.bot)
                 
             except Exception as e:
                 logger.error(f"Критическая ошибка бота {company_id}: {e}", exc_info=True)
@@ -187,6 +167,10 @@ class BotManager:
             bot_instance.task.cancel()
             logger.info(f"Бот для компании {bot_instance.company_id} остановлен")
         
+        if BOT_MODE == 'webhook':
+            await get_webhook_multiplexer().unregister(bot_instance.bot)
+        unregister_company_context(bot_instance.bot)
+        
         try:
             await bot_instance.bot.session.close()
         except Exception as e:
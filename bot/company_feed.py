@@ -0,0 +1,150 @@
+"""
+Лента изменений компаний на основе PostgreSQL LISTEN/NOTIFY.
+
+Триггер companies_change_notify (миграция 004_company_change_notify)
+отправляет в канал company_changes JSON вида
+``{"id": 5, "op": "UPDATE", "changed": ["can_create_bookings"]}``.
+Лента слушает канал отдельным соединением asyncpg и вызывает обработчик
+только для изменившейся компании. После потери соединения выполняется
+полная синхронизация, так как уведомления за время разрыва теряются.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import asyncpg
+
+from bot.config import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "company_changes"
+
+# Пауза перед переподключением после разрыва соединения
+RECONNECT_DELAY_SECONDS = 5
+
+
+class CompanyChangeFeed:
+    """
+    Подписка на изменения public.companies.
+
+    Args:
+        on_change: Обработчик изменения компании (company_id, op, changed)
+        on_resync: Полная синхронизация после переподключения
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[int, str, Set[str]], Awaitable[None]],
+        on_resync: Callable[[], Awaitable[None]],
+    ):
+        self._on_change = on_change
+        self._on_resync = on_resync
+        self._queue: "asyncio.Queue[Dict]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._connection: Optional[asyncpg.Connection] = None
+        self._connection_lost = asyncio.Event()
+
+    def _listener(self, connection, pid, channel, payload: str) -> None:
+        """Колбэк asyncpg: разобрать уведомление и поставить в очередь."""
+        try:
+            event = json.loads(payload)
+            self._queue.put_nowait(event)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Некорректное уведомление {CHANNEL}: {payload!r} ({e})")
+
+    def _on_termination(self, connection) -> None:
+        """Колбэк asyncpg: соединение LISTEN закрыто."""
+        self._connection_lost.set()
+
+    async def _connect(self) -> None:
+        """Открыть соединение и подписаться на канал."""
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self._connection = await asyncpg.connect(dsn)
+        self._connection.add_termination_listener(self._on_termination)
+        await self._connection.add_listener(CHANNEL, self._listener)
+        self._connection_lost.clear()
+        logger.info(f"Подписка на канал {CHANNEL} активна")
+
+    async def _drain(self) -> None:
+        """
+        Применить накопившиеся изменения.
+
+        Несколько уведомлений об одной компании объединяются, изменения
+        применяются последовательно, чтобы не запускать бота дважды.
+        """
+        event = await self._queue.get()
+        pending: Dict[int, Dict] = {}
+        while True:
+            company_id = event.get("id")
+            if isinstance(company_id, int):
+                merged = pending.setdefault(company_id, {"op": event.get("op"), "changed": set()})
+                merged["op"] = event.get("op")
+                merged["changed"].update(event.get("changed") or [])
+            try:
+                event = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+        for company_id, change in pending.items():
+            try:
+                await self._on_change(company_id, change["op"], change["changed"])
+            except Exception as e:
+                logger.error(f"Ошибка применения изменения компании {company_id}: {e}", exc_info=True)
+
+    async def _run(self) -> None:
+        """Основной цикл: подключение, прием уведомлений, переподключение."""
+        reconnect = False
+        while True:
+            try:
+                await self._connect()
+                if reconnect:
+                    # Уведомления за время разрыва потеряны
+                    await self._on_resync()
+
+                while not self._connection_lost.is_set():
+                    drain = asyncio.create_task(self._drain())
+                    lost = asyncio.create_task(self._connection_lost.wait())
+                    done, _ = await asyncio.wait({drain, lost}, return_when=asyncio.FIRST_COMPLETED)
+                    if drain not in done:
+                        drain.cancel()
+                    if lost not in done:
+                        lost.cancel()
+
+                logger.warning(f"Соединение LISTEN {CHANNEL} потеряно, переподключение")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка ленты изменений компаний: {e}", exc_info=True)
+            finally:
+                await self._close_connection()
+                reconnect = True
+
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _close_connection(self) -> None:
+        """Закрыть соединение LISTEN, если оно открыто."""
+        if self._connection is not None and not self._connection.is_closed():
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+        self._connection = None
+
+    def start(self) -> None:
+        """Запустить ленту в фоновой задаче."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить ленту и закрыть соединение."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_connection()
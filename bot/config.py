@@ -21,8 +21,17 @@ REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 
+# FSM хранилище: memory или redis
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory").lower()
+FSM_REDIS_DB = int(os.getenv("FSM_REDIS_DB", str(REDIS_DB)))
+# TTL незавершенных диалогов в секундах (0 — без ограничения)
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", "86400"))
+FSM_DATA_TTL = int(os.getenv("FSM_DATA_TTL", "86400"))
+
 # App Settings
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+# Уровень логирования (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
 TIMEZONE = os.getenv("TIMEZONE", "Europe/Moscow")
 
 # Work Schedule
@@ -48,3 +57,42 @@ DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 
 
 
+
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8081"))
+
+# Шардирование ботов по процессам-воркерам (bot.supervisor)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+WORKER_RESTART_BACKOFF_MAX = int(os.getenv("WORKER_RESTART_BACKOFF_MAX", "60"))
+WORKER_LOAD_REPORT_INTERVAL = int(os.getenv("WORKER_LOAD_REPORT_INTERVAL", "30"))
+
+# Лента изменений компаний (LISTEN company_changes) и страховочная полная проверка
+COMPANY_FEED_ENABLED = os.getenv("COMPANY_FEED_ENABLED", "true").lower() == "true"
+COMPANY_SYNC_INTERVAL = int(os.getenv("COMPANY_SYNC_INTERVAL", "1800"))
+
+# Запуск ботов: сколько собирается параллельно и интервал между стартами (мс)
+BOT_STARTUP_CONCURRENCY = int(os.getenv("BOT_STARTUP_CONCURRENCY", "20"))
+BOT_STARTUP_STAGGER_MS = int(os.getenv("BOT_STARTUP_STAGGER_MS", "50"))
+
+# Обработка обновлений: общий лимит параллельности и размеры очередей
+UPDATE_MAX_IN_FLIGHT = int(os.getenv("UPDATE_MAX_IN_FLIGHT", "100"))
+UPDATE_MAX_QUEUE = int(os.getenv("UPDATE_MAX_QUEUE", "2000"))
+UPDATE_MAX_CHAT_QUEUE = int(os.getenv("UPDATE_MAX_CHAT_QUEUE", "20"))
+
+# Защита от повторных нажатий inline-кнопок: окно (секунды) и хранилище (memory/redis)
+CALLBACK_DEDUP_TTL = float(os.getenv("CALLBACK_DEDUP_TTL", "3"))
+CALLBACK_DEDUP_STORAGE = os.getenv("CALLBACK_DEDUP_STORAGE", FSM_STORAGE).lower()
+
+# Метрики Prometheus: HTTP порт (+ индекс шарда) и интервал подсчета состояний FSM (секунды)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_FSM_INTERVAL = float(os.getenv("METRICS_FSM_INTERVAL", "60"))
+
+# Каталог приветственных фото салонов: настройка welcome_image_path
+# задает имя файла внутри него, пути вне каталога игнорируются
+WELCOME_MEDIA_DIR = os.getenv("WELCOME_MEDIA_DIR", "/app/bot/media/welcome")
@@ -0,0 +1,140 @@
+"""
+Контекст компании для обработчиков бота.
+
+Каждый бот принадлежит одной компании, поэтому контекст определяется
+по ID бота (он вычисляется из токена без обращения к сети и к БД).
+Реестр заполняется при запуске бота и обновляется при изменении
+компании; обработчики получают неизменяемый CompanyContext:
+- аргументом ``company`` через CompanyContextMiddleware
+- или явно через get_company_context(bot) во вспомогательных функциях
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompanyContext:
+    """Неизменяемый контекст компании, обслуживаемой ботом."""
+    company_id: int
+    company_name: str
+    admin_telegram_id: Optional[int]
+    admin_telegram_ids: Tuple[int, ...]
+
+    @property
+    def schema_name(self) -> str:
+        """Имя tenant схемы компании."""
+        return f"tenant_{self.company_id}"
+
+    def is_admin(self, telegram_id: int) -> bool:
+        """
+        Проверить, является ли пользователь админом компании.
+
+        Args:
+            telegram_id: Telegram ID пользователя
+
+        Returns:
+            True, если пользователь указан в админах компании
+        """
+        return telegram_id in self.admin_telegram_ids
+
+
+# Реестр контекстов: ID бота -> контекст компании
+_contexts: Dict[int, CompanyContext] = {}
+
+
+def build_company_context(company: Any) -> CompanyContext:
+    """
+    Создать контекст из объекта компании (public.companies).
+
+    Args:
+        company: Объект Company
+
+    Returns:
+        Контекст компании
+    """
+    admin_ids = []
+    if company.admin_telegram_id:
+        admin_ids.append(company.admin_telegram_id)
+    if company.telegram_admin_ids:
+        admin_ids.extend(company.telegram_admin_ids)
+
+    return CompanyContext(
+        company_id=company.id,
+        company_name=company.name,
+        admin_telegram_id=company.admin_telegram_id,
+        admin_telegram_ids=tuple(admin_ids),
+    )
+
+
+def register_company_context(bot: Bot, context: CompanyContext) -> None:
+    """
+    Зарегистрировать (или заменить) контекст компании для бота.
+
+    Args:
+        bot: Экземпляр бота компании
+        context: Контекст компании
+    """
+    _contexts[bot.id] = context
+
+
+def unregister_company_context(bot: Bot) -> None:
+    """
+    Удалить контекст бота из реестра.
+
+    Args:
+        bot: Экземпляр бота компании
+    """
+    _contexts.pop(bot.id, None)
+
+
+def get_company_context(bot: Bot) -> Optional[CompanyContext]:
+    """
+    Получить контекст компании по боту.
+
+    Args:
+        bot: Экземпляр бота
+
+    Returns:
+        Контекст компании или None, если бот не зарегистрирован
+    """
+    return _contexts.get(bot.id)
+
+
+def get_company_id(bot: Bot) -> Optional[int]:
+    """
+    Получить ID компании по боту.
+
+    Args:
+        bot: Экземпляр бота
+
+    Returns:
+        ID компании или None, если бот не зарегистрирован
+    """
+    context = _contexts.get(bot.id)
+    return context.company_id if context else None
+
+
+class CompanyContextMiddleware(BaseMiddleware):
+    """
+    Middleware, передающее обработчикам контекст компании.
+
+    Устанавливается как outer middleware на dp.update и добавляет
+    в данные обработчика ключ ``company`` (CompanyContext или None).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        bot: Optional[Bot] = data.get("bot")
+        data["company"] = _contexts.get(bot.id) if bot is not None else None
+        return await handler(event, data)
@@ -4,9 +4,9 @@ import logging
 import os
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 
+from bot.fsm_storage import get_fsm_storage
 from bot.handlers.contract import router as contract_router
 
 
@@ -25,7 +25,7 @@ async def main() -> None:
         raise RuntimeError("CONTRACT_BOT_TOKEN не задан")
     
     bot = Bot(token=token)
-    dp = Dispatcher(storage=MemoryStorage())
+    dp = Dispatcher(storage=get_fsm_storage())
     dp.include_router(contract_router)
     
     logger.info("Запуск бота генерации договоров...")
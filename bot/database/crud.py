@@ -9,6 +9,11 @@ from shared.database.models import (
     User, Client, Service, Booking, Master, Post
 )
 from bot.config import ADMIN_IDS
+from app.services.reminders import (
+    cancel_booking_reminders,
+    reschedule_booking_reminders,
+    schedule_booking_reminders,
+)
 
 
 async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int, company_id: Optional[int] = None) -> Optional[User]:
@@ -656,6 +661,16 @@ async def update_client_car_brand(
     return None
 
 
+async def get_setting_value(session: AsyncSession, key: str) -> Optional[str]:
+    """Получить значение настройки компании по ключу (None, если не задана)"""
+    from shared.database.models import Setting
+    
+    result = await session.execute(
+        select(Setting.value).where(Setting.key == key)
+    )
+    return result.scalar_one_or_none()
+
+
 async def get_available_dates(
     session: AsyncSession,
     start_date: date,
@@ -1576,6 +1591,15 @@ async def update_booking_status(
         text(f"UPDATE bookings SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = :booking_id"),
         params
     )
+    
+    # Напоминания меняются в одной транзакции со статусом записи
+    if company_id and status != old_status:
+        if status == "confirmed":
+            await schedule_booking_reminders(session, company_id, booking_id, booking.service_date, booking.time)
+            logger.info(f"📅 [CRUD] Напоминания запланированы для записи {booking_id}")
+        elif old_status == "confirmed":
+            await cancel_booking_reminders(session, company_id, booking_id)
+    
     await session.commit()
     
     logger.info(f"✅ [CRUD] Статус записи {booking_id} обновлен на '{status}'")
@@ -1593,39 +1617,6 @@ async def update_booking_status(
         booking.master_id = master_id
         booking.post_id = post_id
     
-    # Планируем напоминания при подтверждении записи (только если статус изменился с другого на confirmed)
-    if status == "confirmed" and old_status != "confirmed" and company_id and booking:
-        try:
-            # Импортируем функцию планирования из веб-бэкенда
-            import sys
-            import os
-            from pathlib import Path
-            
-            # Получаем путь к корню проекта
-            current_file = Path(__file__)
-            project_root = current_file.parent.parent.parent
-            backend_path = project_root / "web" / "backend"
-            
-            if backend_path.exists() and str(backend_path) not in sys.path:
-                sys.path.insert(0, str(backend_path))
-            
-            try:
-                from app.tasks.notifications import schedule_booking_reminders
-                schedule_booking_reminders(
-                    company_id=company_id,
-                    booking_id=booking_id,
-                    booking_date=booking.service_date,
-                    booking_time=booking.time
-                )
-                logger.info(f"📅 [CRUD] Напоминания запланированы для записи {booking_id}")
-            except ImportError as e:
-                logger.warning(f"⚠️ [CRUD] Не удалось импортировать schedule_booking_reminders: {e}")
-            except Exception as e:
-                logger.error(f"❌ [CRUD] Ошибка планирования напоминаний для записи {booking_id}: {e}", exc_info=True)
-                
-        except Exception as e:
-            logger.error(f"❌ [CRUD] Ошибка планирования напоминаний для записи {booking_id}: {e}", exc_info=True)
-    
     return booking
 
 
@@ -1747,6 +1738,8 @@ async def update_booking_service_date(
         text("UPDATE bookings SET service_date = :service_date, updated_at = CURRENT_TIMESTAMP WHERE id = :booking_id"),
         {"service_date": new_service_date, "booking_id": booking_id}
     )
+    if company_id and booking.status == "confirmed":
+        await reschedule_booking_reminders(session, company_id, booking_id, new_service_date, booking.time)
     await session.commit()
     
     logger.info(f"✅ Дата услуги записи {booking_id} обновлена на {new_service_date}")
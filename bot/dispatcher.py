@@ -0,0 +1,182 @@
+"""
+Общий диспетчер для всех ботов компаний.
+
+Один Dispatcher с одним набором роутеров обслуживает все токены:
+aiogram передает обработчикам экземпляр бота, а контекст компании
+(company_id, админы, подписка) определяется по ID бота через реестр
+bot.context и снимок bot.subscription_snapshot. Поэтому память на
+компанию сводится к объекту Bot и записи в реестре.
+
+Роутер aiogram можно подключить только к одному родителю, так что
+отдельный диспетчер на компанию с общими модулями обработчиков
+невозможен — диспетчер создается один раз на процесс.
+"""
+
+import logging
+from functools import partial
+from typing import AsyncIterator, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from bot.config import METRICS_ENABLED
+from bot.context import CompanyContextMiddleware
+from bot.fsm_storage import get_fsm_storage
+from bot.metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from bot.update_executor import get_update_executor
+
+logger = logging.getLogger(__name__)
+
+# Таймаут long-polling запроса getUpdates (секунды)
+POLLING_TIMEOUT = 30
+
+_dispatcher: Optional[Dispatcher] = None
+
+
+def build_dispatcher() -> Dispatcher:
+    """
+    Создать диспетчер с middleware и всеми роутерами бота.
+
+    Returns:
+        Новый экземпляр Dispatcher
+    """
+    from bot.handlers.client.start import router as start_router
+    from bot.handlers.client.booking import router as booking_router
+    from bot.handlers.client.calendar import router as calendar_router
+    from bot.handlers.client.my_bookings import router as my_bookings_router
+    from bot.handlers.client.profile import router as profile_router
+    from bot.handlers.admin.menu import router as admin_menu_router
+    from bot.handlers.admin.bookings import router as admin_bookings_router
+    from bot.handlers.admin.bookings_edit import router as admin_bookings_edit_router
+    from bot.handlers.master.work_order import router as master_router
+    from bot.middleware.callback_dedup import get_callback_dedup_middleware
+    from bot.middleware.subscription import SubscriptionMiddleware
+
+    dp = Dispatcher(storage=get_fsm_storage())
+
+    # Метрики обновлений (первым, чтобы учитывать время всех middleware)
+    if METRICS_ENABLED:
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+
+    # Контекст компании передается обработчикам аргументом company
+    dp.update.outer_middleware(CompanyContextMiddleware())
+
+    # Повторные нажатия inline-кнопок отбрасываются до фильтров и обработчиков
+    dp.callback_query.outer_middleware(get_callback_dedup_middleware())
+
+    # Проверка статуса подписки
+    subscription_middleware = SubscriptionMiddleware()
+    dp.message.middleware(subscription_middleware)
+    dp.callback_query.middleware(subscription_middleware)
+
+    # Метрики обработчиков (метки роутера и обработчика определяются автоматически)
+    if METRICS_ENABLED:
+        handler_metrics = HandlerMetricsMiddleware()
+        dp.message.middleware(handler_metrics)
+        dp.callback_query.middleware(handler_metrics)
+
+    # ВАЖНО: Admin роутеры регистрируем ПЕРВЫМИ, чтобы они имели приоритет
+    # bookings_edit_router должен быть ПЕРЕД bookings_router, чтобы обработчики с состояниями имели приоритет
+    dp.include_router(admin_menu_router)
+    dp.include_router(admin_bookings_edit_router)
+    dp.include_router(admin_bookings_router)
+    dp.include_router(master_router)
+    # Client роутеры регистрируем после admin, чтобы не перехватывали админские кнопки
+    dp.include_router(start_router)
+    dp.include_router(booking_router)
+    dp.include_router(calendar_router)
+    dp.include_router(my_bookings_router)
+    dp.include_router(profile_router)
+
+    return dp
+
+
+def get_dispatcher() -> Dispatcher:
+    """
+    Получить общий диспетчер процесса.
+
+    Returns:
+        Экземпляр Dispatcher
+    """
+    global _dispatcher
+
+    if _dispatcher is None:
+        _dispatcher = build_dispatcher()
+        logger.info("Общий диспетчер ботов создан")
+
+    return _dispatcher
+
+
+async def process_update(dp: Dispatcher, bot: Bot, update: Update) -> None:
+    """
+    Передать обновление в диспетчер и выполнить возвращенный метод.
+
+    Общий путь обработки для polling и webhook (публичный API aiogram).
+
+    Args:
+        dp: Общий диспетчер
+        bot: Бот компании
+        update: Обновление Telegram
+    """
+    try:
+        result = await dp.feed_update(bot, update)
+        if isinstance(result, TelegramMethod):
+            await dp.silent_call_request(bot, result)
+    except Exception as e:
+        logger.error(f"Ошибка обработки обновления бота {bot.id}: {e}", exc_info=True)
+
+
+def listen_updates(dp: Dispatcher, bot: Bot) -> AsyncIterator[Update]:
+    """
+    Поток обновлений getUpdates одного бота.
+
+    Публичного API для получения обновлений без start_polling в aiogram нет,
+    поэтому используется приватный Dispatcher._listen_updates (сигнатура
+    aiogram 3.3.0). При обновлении aiogram проверить здесь.
+
+    Args:
+        dp: Общий диспетчер
+        bot: Бот компании
+
+    Returns:
+        Асинхронный итератор обновлений
+    """
+    return dp._listen_updates(
+        bot,
+        polling_timeout=POLLING_TIMEOUT,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+
+async def run_polling(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Long-polling одного бота через общий диспетчер.
+
+    Dispatcher.start_polling нельзя запускать параллельно на одном
+    диспетчере, поэтому каждый бот опрашивается своей задачей,
+    а остановка бота — это отмена этой задачи. Полученные обновления
+    обрабатывает общий UpdateExecutor (порядок внутри чата, общий лимит).
+
+    Args:
+        dp: Общий диспетчер
+        bot: Бот компании
+    """
+    user = await bot.me()
+    logger.info(f"Polling бота @{user.username} (id={bot.id}) запущен")
+    executor = get_update_executor()
+    try:
+        async for update in listen_updates(dp, bot):
+            executor.submit(bot, update, partial(process_update, dp, bot, update))
+    finally:
+        logger.info(f"Polling бота @{user.username} (id={bot.id}) остановлен")
+
+
+async def wait_for_updates(timeout: float = 10) -> None:
+    """
+    Дождаться завершения обработки уже полученных обновлений.
+
+    Args:
+        timeout: Максимальное время ожидания (секунды)
+    """
+    await get_update_executor().wait(timeout)
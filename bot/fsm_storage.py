@@ -0,0 +1,160 @@
+"""
+Хранилище FSM для ботов компаний.
+
+При FSM_STORAGE=redis состояния диалогов (запись, редактирование записи,
+оформление договора) хранятся в Redis и переживают перезапуск процесса,
+а несколько воркеров бота могут обслуживать одни и те же чаты.
+
+Ключи строятся по (bot_id, chat_id, user_id), поэтому одно хранилище
+используется всеми ботами. Данные состояния сериализуются в компактный
+JSON: даты и время сохраняются ISO-строками с тегом типа и восстанавливаются
+при чтении.
+"""
+
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
+
+from bot.config import (
+    FSM_DATA_TTL,
+    FSM_STATE_TTL,
+    FSM_STORAGE,
+    FSM_REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ключ с типом значения в сериализованном объекте
+_TYPE_KEY = "__t"
+
+
+def _encode_value(obj: Any) -> Dict[str, str]:
+    """Преобразовать не-JSON значение в словарь с тегом типа."""
+    # datetime — подкласс date, поэтому проверяется первым
+    if isinstance(obj, datetime):
+        return {_TYPE_KEY: "dt", "v": obj.isoformat()}
+    if isinstance(obj, date):
+        return {_TYPE_KEY: "d", "v": obj.isoformat()}
+    if isinstance(obj, time):
+        return {_TYPE_KEY: "t", "v": obj.isoformat()}
+    if isinstance(obj, Decimal):
+        return {_TYPE_KEY: "dec", "v": str(obj)}
+    raise TypeError(f"Тип {type(obj).__name__} не поддерживается в данных FSM")
+
+
+_DECODERS = {
+    "dt": datetime.fromisoformat,
+    "d": date.fromisoformat,
+    "t": time.fromisoformat,
+    "dec": Decimal,
+}
+
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    """Восстановить значение из словаря с тегом типа."""
+    if len(obj) == 2 and obj.get(_TYPE_KEY) in _DECODERS and "v" in obj:
+        return _DECODERS[obj[_TYPE_KEY]](obj["v"])
+    return obj
+
+
+def fsm_json_dumps(data: Any) -> str:
+    """
+    Сериализовать данные FSM в компактный JSON.
+
+    Args:
+        data: Данные состояния
+
+    Returns:
+        JSON-строка
+    """
+    return json.dumps(data, default=_encode_value, separators=(",", ":"), ensure_ascii=False)
+
+
+def fsm_json_loads(raw: Any) -> Any:
+    """
+    Десериализовать данные FSM, восстанавливая даты и время.
+
+    Args:
+        raw: JSON-строка или bytes из Redis
+
+    Returns:
+        Данные состояния
+    """
+    return json.loads(raw, object_hook=_decode_object)
+
+
+class SharedRedisStorage(RedisStorage):
+    """
+    RedisStorage, общий для диспетчеров всех ботов.
+
+    Dispatcher закрывает хранилище при остановке polling, поэтому close()
+    здесь ничего не делает: остановка одного бота не должна разрывать
+    соединения остальных. Соединения закрываются через close_fsm_storage().
+    """
+
+    async def close(self) -> None:
+        pass
+
+    async def close_connections(self) -> None:
+        """Закрыть пул соединений Redis."""
+        await super().close()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+    Создать хранилище FSM согласно настройке FSM_STORAGE.
+
+    Returns:
+        SharedRedisStorage при FSM_STORAGE=redis, иначе MemoryStorage
+    """
+    if FSM_STORAGE != "redis":
+        return MemoryStorage()
+
+    redis = Redis(host=REDIS_HOST, port=REDIS_PORT, db=FSM_REDIS_DB)
+    logger.info(f"FSM хранилище: Redis {REDIS_HOST}:{REDIS_PORT}/{FSM_REDIS_DB}")
+
+    return SharedRedisStorage(
+        redis=redis,
+        key_builder=DefaultKeyBuilder(with_bot_id=True),
+        state_ttl=FSM_STATE_TTL or None,
+        data_ttl=FSM_DATA_TTL or None,
+        json_loads=fsm_json_loads,
+        json_dumps=fsm_json_dumps,
+    )
+
+
+# Глобальное хранилище (ключи содержат bot_id, поэтому оно общее для всех ботов)
+_fsm_storage: Optional[BaseStorage] = None
+
+
+def get_fsm_storage() -> BaseStorage:
+    """
+    Получить глобальное хранилище FSM.
+
+    Returns:
+        Экземпляр хранилища FSM
+    """
+    global _fsm_storage
+
+    if _fsm_storage is None:
+        _fsm_storage = create_fsm_storage()
+
+    return _fsm_storage
+
+
+async def close_fsm_storage() -> None:
+    """Закрыть соединения глобального хранилища FSM."""
+    global _fsm_storage
+
+    if isinstance(_fsm_storage, SharedRedisStorage):
+        await _fsm_storage.close_connections()
+    _fsm_storage = None
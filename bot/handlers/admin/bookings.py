@@ -4,6 +4,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 
+from bot.context import get_company_context
 from bot.database.connection import get_session
 from bot.database.crud import (
     get_user_by_telegram_id,
@@ -28,6 +29,7 @@ from datetime import date, time, timedelta
 from bot.states.admin_states import AdminBookingStates, AdminEditBookingStates
 from bot.utils.calendar import generate_calendar, get_available_dates
 from bot.utils.time_slots import generate_time_slots
+from app.services.telegram_gateway import get_telegram_gateway
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -35,22 +37,19 @@ router = Router()
 
 def get_company_context_from_bot(bot):
     """
-    Получить контекст компании из диспетчера бота.
+    Получить контекст компании из реестра контекстов ботов.
     
     Returns:
         dict с ключами: company_id, admin_telegram_id, admin_telegram_ids
     """
-    try:
-        dp = getattr(bot, '_dispatcher', None)
-        if dp:
-            return {
-                'company_id': dp.get('company_id'),
-                'admin_telegram_id': dp.get('admin_telegram_id'),
-                'admin_telegram_ids': dp.get('admin_telegram_ids', []),
-                'schema_name': dp.get('schema_name'),
-            }
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения контекста компании: {e}")
+    company = get_company_context(bot)
+    if company:
+        return {
+            'company_id': company.company_id,
+            'admin_telegram_id': company.admin_telegram_id,
+            'admin_telegram_ids': list(company.admin_telegram_ids),
+            'schema_name': company.schema_name,
+        }
     return {}
 
 
@@ -729,7 +728,8 @@ async def assign_post_to_booking(callback: CallbackQuery, state: FSMContext):
                         f"🏢 Рабочее место: {post_name}\n\n"
                         f"Пожалуйста, подтвердите явку:"
                     )
-                    await callback.bot.send_message(
+                    await get_telegram_gateway().send_message(
+                        callback.bot,
                         chat_id=client_telegram_id,
                         text=client_message,
                         reply_markup=get_confirm_attendance_keyboard(booking_id)
@@ -5,6 +5,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from datetime import date, time, timedelta, datetime
 
+from bot.context import get_company_context, get_company_id
 from bot.database.connection import get_session
 from bot.database.crud import (
     get_user_by_telegram_id,
@@ -29,23 +30,21 @@ from bot.states.admin_states import AdminBookingStates, AdminEditBookingStates
 from bot.utils.calendar import generate_calendar
 from bot.utils.time_slots import generate_time_slots
 from sqlalchemy import text
+from app.services.reminders import reschedule_booking_reminders
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 
 def get_company_context_from_bot(bot):
-    """Получить контекст компании из диспетчера бота"""
-    try:
-        dp = getattr(bot, '_dispatcher', None)
-        if dp:
-            return {
-                'company_id': dp.get('company_id'),
-                'admin_telegram_id': dp.get('admin_telegram_id'),
-                'admin_telegram_ids': dp.get('admin_telegram_ids', []),
-            }
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения контекста компании: {e}")
+    """Получить контекст компании из реестра контекстов ботов"""
+    company = get_company_context(bot)
+    if company:
+        return {
+            'company_id': company.company_id,
+            'admin_telegram_id': company.admin_telegram_id,
+            'admin_telegram_ids': list(company.admin_telegram_ids),
+        }
     return {}
 
 
@@ -415,6 +414,8 @@ async def process_datetime_time_selection(callback: CallbackQuery, state: FSMCon
                 "booking_id": booking_id,
             },
         )
+        # Напоминания подтвержденной записи сдвигаются на новое время
+        await reschedule_booking_reminders(session, company_id, booking_id, booking_date, start_time)
         await session.commit()
         
         await callback.message.edit_text(
@@ -490,6 +491,8 @@ async def process_datetime_time_selection_simple(callback: CallbackQuery, state:
                 "booking_id": booking_id,
             },
         )
+        # Напоминания подтвержденной записи сдвигаются на новое время
+        await reschedule_booking_reminders(session, company_id, booking_id, booking_date, start_time)
         await session.commit()
 
         await callback.message.edit_text(
@@ -1197,25 +1200,8 @@ async def admin_create_client_phone(message: Message, state: FSMContext):
     elif not phone_clean.startswith('+7'):
         phone_clean = '+7' + phone_clean
     
-    # Получаем company_id из диспетчера
-    try:
-        dp = getattr(message.bot, '_dispatcher', None)
-        if dp:
-            company_id = dp.get('company_id')
-        else:
-            await message.answer("❌ Ошибка конфигурации бота")
-            await state.clear()
-            return
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения company_id: {e}")
-        await message.answer("❌ Ошибка конфигурации бота")
-        await state.clear()
-        return
-    
-    if not company_id:
-        await message.answer("❌ Ошибка конфигурации бота")
-        await state.clear()
-        return
+    # Получаем company_id из реестра контекстов ботов
+    company_id = get_company_id(message.bot)
     
     if not company_id:
         await message.answer("❌ Ошибка конфигурации бота")
@@ -4,6 +4,7 @@ from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
+from bot.context import get_company_context as get_bot_company_context
 from bot.database.connection import get_session
 from bot.database.crud import get_user_by_telegram_id, get_bookings_by_status, get_all_clients, get_services
 from bot.keyboards.admin import get_admin_main_keyboard, get_bookings_keyboard
@@ -21,23 +22,19 @@ router = Router()
 
 def get_company_context(message: Message):
     """
-    Получить контекст компании из диспетчера бота.
+    Получить контекст компании из реестра контекстов ботов.
     
     Returns:
         dict с ключами: company_id, admin_telegram_id, admin_telegram_ids
     """
-    try:
-        # Получаем диспетчер из бота
-        dp = getattr(message.bot, '_dispatcher', None)
-        if dp:
-            return {
-                'company_id': dp.get('company_id'),
-                'admin_telegram_id': dp.get('admin_telegram_id'),
-                'admin_telegram_ids': dp.get('admin_telegram_ids', []),
-                'schema_name': dp.get('schema_name'),
-            }
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения контекста компании: {e}")
+    company = get_bot_company_context(message.bot)
+    if company:
+        return {
+            'company_id': company.company_id,
+            'admin_telegram_id': company.admin_telegram_id,
+            'admin_telegram_ids': list(company.admin_telegram_ids),
+            'schema_name': company.schema_name,
+        }
     return {}
 
 
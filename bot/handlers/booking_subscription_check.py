@@ -2,7 +2,7 @@
 Helper функции для проверки подписки компании перед созданием записей.
 
 Этот модуль обеспечивает:
-- Проверку статуса подписки из контекста диспетчера
+- Проверку статуса подписки по актуальному снимку подписки компании
 - Блокировку создания записей, если подписка неактивна
 - Информирование пользователей о необходимости продления подписки
 """
@@ -12,6 +12,9 @@ import logging
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 
+from bot.context import get_company_id
+from bot.subscription_snapshot import get_subscription_snapshot
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,24 +33,20 @@ async def check_subscription_before_booking(
         True, если можно создавать записи, False если подписка неактивна
     """
     try:
-        # Получаем контекст диспетчера через message.bot
         bot = message.bot
         can_create_bookings = True
         company_name = ''
         subscription_status = ''
         subscription_end_date = None
         
-        try:
-            # В aiogram 3.x диспетчер может быть доступен через bot._dispatcher
-            if hasattr(bot, '_dispatcher'):
-                dp = bot._dispatcher
-                if hasattr(dp, 'get'):
-                    can_create_bookings = dp.get('can_create_bookings', True)
-                    company_name = dp.get('company_name', '')
-                    subscription_status = dp.get('subscription_status', '')
-                    subscription_end_date = dp.get('subscription_end_date', None)
-        except:
-            pass
+        # Актуальный снимок подписки (обновляется при изменении компании)
+        company_id = get_company_id(bot)
+        snapshot = get_subscription_snapshot(company_id) if company_id else None
+        if snapshot:
+            can_create_bookings = snapshot.can_create_bookings
+            company_name = snapshot.company_name
+            subscription_status = snapshot.subscription_status or ''
+            subscription_end_date = snapshot.subscription_end_date
         
         logger.info(
             f"Проверка подписки для компании '{company_name}': "
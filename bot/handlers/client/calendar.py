@@ -6,6 +6,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
+from bot.context import get_company_id
 from bot.database.connection import get_session
 from bot.database.crud import get_available_dates, get_service_by_id
 from bot.states.client_states import BookingStates
@@ -15,24 +16,9 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
-async def get_company_id_from_callback(callback: CallbackQuery) -> Optional[int]:
-    """Получить company_id из токена бота"""
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import get_session
-        bot_token = callback.bot.token
-        async for session in get_session():
-            result = await session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                return row[0]
-            break
-    except:
-        pass
-    return None
+def get_company_id_from_callback(callback: CallbackQuery) -> Optional[int]:
+    """Получить company_id из реестра контекстов ботов (без запроса к БД)"""
+    return get_company_id(callback.bot)
 
 
 @router.callback_query(F.data.startswith("calendar_date_"), BookingStates.choosing_date)
@@ -59,7 +45,7 @@ async def process_date_selection(callback: CallbackQuery, state: FSMContext):
     service_duration = data.get("service_duration", 60)
 
     # Получаем company_id из токена бота
-    company_id = await get_company_id_from_callback(callback)
+    company_id = get_company_id_from_callback(callback)
     
     async for session in get_session():
         # Устанавливаем search_path для tenant схемы
@@ -137,7 +123,7 @@ async def change_month(callback: CallbackQuery, state: FSMContext):
         service_id = data.get("service_id")
 
         # Получаем company_id из токена бота
-        company_id = await get_company_id_from_callback(callback)
+        company_id = get_company_id_from_callback(callback)
         
         if service_id:
             service = await get_service_by_id(session, service_id, company_id=company_id)
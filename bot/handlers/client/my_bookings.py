@@ -1,11 +1,13 @@
 """Обработчик "Мои записи" для клиентов"""
 import logging
 from datetime import date
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 
+from bot.context import CompanyContext
 from bot.database.connection import get_session
 from bot.database.crud import get_user_by_telegram_id, get_client_by_user_id
 from shared.database.models import Booking, Client, Service, Master
@@ -16,25 +18,10 @@ router = Router()
 
 
 @router.message(F.text == "📋 Мои записи")
-async def show_my_bookings(message: Message):
+async def show_my_bookings(message: Message, company: Optional[CompanyContext] = None):
     """Показать записи клиента"""
-    # Получаем company_id из токена бота
-    company_id = None
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import async_session_maker
-        bot_token = message.bot.token
-        async with async_session_maker() as temp_session:
-            result = await temp_session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                company_id = row[0]
-    except Exception as e:
-        logger.error(f"Ошибка получения company_id: {e}")
-        pass
+    # Получаем company_id из контекста компании
+    company_id = company.company_id if company else None
     
     async for session in get_session():
         if company_id:
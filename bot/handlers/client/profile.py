@@ -1,7 +1,10 @@
 """Обработчики профиля и информации о сервисе"""
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup
 
+from bot.context import CompanyContext
 from bot.database.connection import get_session
 from bot.database.crud import get_user_by_telegram_id, get_client_by_user_id
 from shared.database.models import ClientHistory, Booking, Client
@@ -12,27 +15,10 @@ router = Router()
 
 
 @router.message(F.text == "👤 Профиль")
-async def show_profile(message: Message):
+async def show_profile(message: Message, company: Optional[CompanyContext] = None):
     """Показать профиль клиента"""
-    # Получаем company_id из токена бота
-    company_id = None
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import async_session_maker
-        bot_token = message.bot.token
-        async with async_session_maker() as temp_session:
-            result = await temp_session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                company_id = row[0]
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Ошибка получения company_id: {e}")
-        pass
+    # Получаем company_id из контекста компании
+    company_id = company.company_id if company else None
     
     async for session in get_session():
         if company_id:
@@ -93,27 +79,10 @@ async def show_profile(message: Message):
 
 
 @router.callback_query(F.data == "show_full_history")
-async def show_full_history(callback):
+async def show_full_history(callback, company: Optional[CompanyContext] = None):
     """Показать полную историю обслуживания"""
-    # Получаем company_id из токена бота
-    company_id = None
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import async_session_maker
-        bot_token = callback.bot.token
-        async with async_session_maker() as temp_session:
-            result = await temp_session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                company_id = row[0]
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Ошибка получения company_id: {e}")
-        pass
+    # Получаем company_id из контекста компании
+    company_id = company.company_id if company else None
     
     async for session in get_session():
         if company_id:
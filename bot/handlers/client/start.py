@@ -1,46 +1,63 @@
 """Обработчик /start и регистрация"""
+import os
+from typing import Optional
+
 from aiogram import Router, F
-from aiogram.types import FSInputFile, Message, ReplyKeyboardMarkup
+from aiogram.types import Message, ReplyKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.config import WELCOME_MEDIA_DIR
+from bot.context import CompanyContext
 from bot.database.connection import get_session
-from bot.database.crud import get_or_create_user, get_or_create_client
+from bot.database.crud import get_or_create_user, get_or_create_client, get_setting_value
 from bot.keyboards.client import get_client_main_keyboard, get_cancel_keyboard
 from bot.states.client_states import RegistrationStates
+from app.services.telegram_media import get_media_registry
 
 router = Router()
 
+# Приветственное фото по умолчанию (салон может задать свое в настройке welcome_image_path)
+DEFAULT_WELCOME_IMAGE = "/app/bot/salon.jpg"
+WELCOME_IMAGE_SETTING = "welcome_image_path"
+
+
+def resolve_welcome_image(value: Optional[str], media_dir: str = WELCOME_MEDIA_DIR) -> str:
+    """
+    Путь к приветственному фото салона.
+
+    Настройка задает имя файла в каталоге WELCOME_MEDIA_DIR; путь,
+    который после разрешения ссылок выходит за пределы каталога,
+    заменяется фото по умолчанию, чтобы бот не отправлял в Telegram
+    произвольные файлы сервера.
+
+    Args:
+        value: Значение настройки welcome_image_path
+        media_dir: Каталог приветственных фото
+
+    Returns:
+        Путь к файлу фото
+    """
+    if not value:
+        return DEFAULT_WELCOME_IMAGE
+
+    root = os.path.realpath(media_dir)
+    path = os.path.realpath(os.path.join(root, value.strip()))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return DEFAULT_WELCOME_IMAGE
+    return path
+
 
 @router.message(F.text == "/start")
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, company: Optional[CompanyContext] = None):
     """Обработчик команды /start"""
     import logging
     logger = logging.getLogger(__name__)
     logger.info(f"🔵 Получена команда /start от пользователя {message.from_user.id} (@{message.from_user.username})")
     
-    # Получаем company_id из токена бота
-    company_id = None
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import async_session_maker
-        bot_token = message.bot.token
-        logger.info(f"🔑 Получаем company_id для токена: {bot_token[:20]}...")
-        async with async_session_maker() as temp_session:
-            result = await temp_session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                company_id = row[0]
-                logger.info(f"✅ Найден company_id: {company_id}")
-            else:
-                logger.error(f"❌ Компания с таким токеном не найдена!")
-    except Exception as e:
-        logger.error(f"❌ Ошибка получения company_id: {e}", exc_info=True)
-        pass
+    # Получаем company_id из контекста компании (CompanyContextMiddleware)
+    company_id = company.company_id if company else None
     
     if not company_id:
         logger.error("❌ Не удалось получить company_id!")
@@ -49,12 +66,19 @@ async def cmd_start(message: Message, state: FSMContext):
     
     logger.info(f"📋 Начинаем обработку /start для company_id={company_id}, telegram_id={message.from_user.id}")
     
-    async def send_welcome_photo(caption: str, reply_markup: ReplyKeyboardMarkup | None = None) -> None:
-        """Отправить приветствие с фото."""
+    async def send_welcome_photo(
+        caption: str,
+        reply_markup: ReplyKeyboardMarkup | None = None,
+        image_path: str = DEFAULT_WELCOME_IMAGE,
+    ) -> None:
+        """Отправить приветствие с фото (загружается в Telegram один раз на бота)."""
         try:
-            photo = FSInputFile("/app/bot/salon.jpg")
             logger.info("🖼️ Отправляем приветственное фото")
-            await message.answer_photo(photo=photo, caption=caption, reply_markup=reply_markup)
+            await get_media_registry().send_file(
+                message.bot,
+                image_path,
+                lambda photo: message.answer_photo(photo=photo, caption=caption, reply_markup=reply_markup),
+            )
             logger.info("✅ Приветственное фото отправлено")
         except Exception as e:
             logger.warning(f"⚠️ Не удалось отправить фото приветствия: {e}")
@@ -68,6 +92,9 @@ async def cmd_start(message: Message, state: FSMContext):
             await session.execute(text(f'SET LOCAL search_path TO "{schema_name}", public'))
             logger.info(f"✅ Установлен search_path: {schema_name}")
             
+            # Свое приветственное фото салона, если файл есть в WELCOME_MEDIA_DIR
+            welcome_image = resolve_welcome_image(await get_setting_value(session, WELCOME_IMAGE_SETTING))
+            
             # Получаем или создаем пользователя
             logger.info(f"👤 Получаем или создаем пользователя telegram_id={message.from_user.id}")
             user = await get_or_create_user(
@@ -95,7 +122,8 @@ async def cmd_start(message: Message, state: FSMContext):
                     "Здесь вы можете за 1 минуту записаться на наши услуги!\n\n"
                     "Для начала работы необходимо пройти регистрацию.\n"
                     "Введите ваше ФИО:",
-                    reply_markup=get_cancel_keyboard()
+                    reply_markup=get_cancel_keyboard(),
+                    image_path=welcome_image,
                 )
                 logger.info(f"✅ Сообщение о регистрации отправлено")
             else:
@@ -105,7 +133,8 @@ async def cmd_start(message: Message, state: FSMContext):
                     f"👋 Здравствуйте, {client.full_name}!\n\n"
                     "Здесь вы можете за 1 минуту записаться на наши услуги!\n\n"
                     "Выберите действие:",
-                    reply_markup=get_client_main_keyboard()
+                    reply_markup=get_client_main_keyboard(),
+                    image_path=welcome_image,
                 )
                 await state.clear()
                 logger.info(f"✅ Главное меню отправлено")
@@ -132,7 +161,7 @@ async def process_full_name(message: Message, state: FSMContext):
 
 
 @router.message(RegistrationStates.waiting_phone, F.text != "❌ Отмена")
-async def process_phone(message: Message, state: FSMContext):
+async def process_phone(message: Message, state: FSMContext, company: Optional[CompanyContext] = None):
     """Обработка ввода телефона"""
     phone = message.text.strip()
     # Простая валидация телефона
@@ -144,25 +173,8 @@ async def process_phone(message: Message, state: FSMContext):
     data = await state.get_data()
     full_name = data.get("full_name")
 
-    # Получаем company_id из токена бота
-    company_id = None
-    try:
-        from sqlalchemy import text
-        from bot.database.connection import async_session_maker
-        bot_token = message.bot.token
-        async with async_session_maker() as temp_session:
-            result = await temp_session.execute(
-                text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-                {"token": bot_token}
-            )
-            row = result.fetchone()
-            if row:
-                company_id = row[0]
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Ошибка получения company_id: {e}")
-        pass
+    # Получаем company_id из контекста компании
+    company_id = company.company_id if company else None
     
     if not company_id:
         await message.answer("❌ Ошибка конфигурации бота. Обратитесь к администратору.")
@@ -4,11 +4,12 @@ from calendar import monthrange
 from datetime import date
 from typing import Optional
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.filters import Command
 from sqlalchemy import select, and_, text, or_
 
-from bot.database.connection import get_session, async_session_maker, AsyncSession
+from bot.context import get_company_id
+from bot.database.connection import get_session, AsyncSession
 from bot.database.crud import get_user_by_telegram_id
 from shared.database.models import Master, Booking
 from bot.keyboards.master import get_work_order_keyboard, get_booking_actions_keyboard, get_master_main_keyboard
@@ -18,19 +19,6 @@ logger = logging.getLogger(__name__)
 router = Router()
 
 
-async def get_company_id_by_bot_token(bot_token: str) -> Optional[int]:
-    """Получить company_id по токену бота."""
-    async with async_session_maker() as session:
-        result = await session.execute(
-            text("SELECT id FROM public.companies WHERE telegram_bot_token = :token"),
-            {"token": bot_token},
-        )
-        row = result.fetchone()
-        if row:
-            return row[0]
-    return None
-
-
 async def get_master_for_telegram(
     session: AsyncSession,
     telegram_id: int,
@@ -55,7 +43,7 @@ async def get_master_for_telegram(
 @router.message(Command("master"))
 async def cmd_master(message: Message):
     """Команда /master"""
-    company_id = await get_company_id_by_bot_token(message.bot.token)
+    company_id = get_company_id(message.bot)
     if not company_id:
         await message.answer("❌ Ошибка конфигурации бота. Обратитесь к администратору.")
         return
@@ -81,7 +69,7 @@ async def cmd_master(message: Message):
 @router.message(F.text == "📋 Лист-наряд")
 async def show_work_order_today(message: Message):
     """Показать лист-наряд на сегодня"""
-    company_id = await get_company_id_by_bot_token(message.bot.token)
+    company_id = get_company_id(message.bot)
     if not company_id:
         await message.answer("❌ Ошибка конфигурации бота. Обратитесь к администратору.")
         return
@@ -240,16 +228,18 @@ async def build_master_calendar(
         month_callback_prefix="master_calendar_month",
         cancel_callback="master_calendar_close",
     )
-    calendar.inline_keyboard.append(
-        [InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_work_order")]
-    )
+    # Клавиатура календаря общая (из кеша), поэтому кнопку добавляем в копию
+    calendar = InlineKeyboardMarkup(inline_keyboard=[
+        *calendar.inline_keyboard,
+        [InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_work_order")],
+    ])
     return calendar, available_dates
 
 
 @router.callback_query(F.data == "master_calendar_open")
 async def open_master_calendar(callback: CallbackQuery):
     """Открыть календарь лист-нарядов мастера."""
-    company_id = await get_company_id_by_bot_token(callback.bot.token)
+    company_id = get_company_id(callback.bot)
     if not company_id:
         await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
         return
@@ -288,7 +278,7 @@ async def change_master_calendar_month(callback: CallbackQuery):
         await callback.answer("❌ Ошибка", show_alert=True)
         return
 
-    company_id = await get_company_id_by_bot_token(callback.bot.token)
+    company_id = get_company_id(callback.bot)
     if not company_id:
         await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
         return
@@ -328,7 +318,7 @@ async def select_master_calendar_date(callback: CallbackQuery):
         await callback.answer("❌ Ошибка выбора даты", show_alert=True)
         return
 
-    company_id = await get_company_id_by_bot_token(callback.bot.token)
+    company_id = get_company_id(callback.bot)
     if not company_id:
         await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
         return
@@ -359,7 +349,7 @@ async def show_booking_for_master(callback: CallbackQuery):
         return
 
     async for session in get_session():
-        company_id = await get_company_id_by_bot_token(callback.bot.token)
+        company_id = get_company_id(callback.bot)
         if not company_id:
             await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
             return
@@ -453,7 +443,7 @@ async def complete_booking(callback: CallbackQuery):
 @router.callback_query(F.data == "refresh_work_order")
 async def refresh_work_order(callback: CallbackQuery):
     """Обновить лист-наряд"""
-    company_id = await get_company_id_by_bot_token(callback.bot.token)
+    company_id = get_company_id(callback.bot)
     if not company_id:
         await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
         return
@@ -472,7 +462,7 @@ async def refresh_work_order(callback: CallbackQuery):
 @router.callback_query(F.data == "back_to_work_order")
 async def back_to_work_order(callback: CallbackQuery):
     """Вернуться к лист-наряду"""
-    company_id = await get_company_id_by_bot_token(callback.bot.token)
+    company_id = get_company_id(callback.bot)
     if not company_id:
         await callback.answer("❌ Ошибка конфигурации бота", show_alert=True)
         return
@@ -549,7 +539,7 @@ async def back_to_work_order(callback: CallbackQuery):
 @router.message(F.text == "🚪 Выход из панели мастера")
 async def exit_master_panel(message: Message):
     """Выход из панели мастера"""
-    company_id = await get_company_id_by_bot_token(message.bot.token)
+    company_id = get_company_id(message.bot)
     if not company_id:
         await message.answer("❌ Ошибка конфигурации бота. Обратитесь к администратору.")
         return
@@ -1,6 +1,18 @@
-"""Клавиатуры для клиентов"""
+"""
+Клавиатуры для клиентов.
+
+Клавиатуры выбора услуги и времени кешируются по их содержимому
+(услуги, слоты): одинаковые списки у разных клиентов дают один и тот же
+объект InlineKeyboardMarkup. Такие клавиатуры нельзя изменять на месте.
+"""
+from functools import lru_cache
+from typing import Tuple
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+# Максимум закешированных клавиатур каждого вида
+KEYBOARD_CACHE_SIZE = 512
+
 
 def get_client_main_keyboard() -> ReplyKeyboardMarkup:
     """Главное меню клиента"""
@@ -18,12 +30,20 @@ def get_client_main_keyboard() -> ReplyKeyboardMarkup:
 
 def get_services_keyboard(services) -> InlineKeyboardMarkup:
     """Клавиатура выбора услуги"""
+    return _build_services_keyboard(
+        tuple((service.id, service.name, service.duration) for service in services)
+    )
+
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _build_services_keyboard(services: Tuple[Tuple[int, str, int], ...]) -> InlineKeyboardMarkup:
+    """Собрать клавиатуру выбора услуги по (id, название, длительность)"""
     buttons = []
-    for service in services:
+    for service_id, name, duration in services:
         buttons.append([
             InlineKeyboardButton(
-                text=f"{service.name} ({service.duration} мин)",
-                callback_data=f"service_{service.id}"
+                text=f"{name} ({duration} мин)",
+                callback_data=f"service_{service_id}"
             )
         ])
     buttons.append([InlineKeyboardButton(text="❌ Отмена", callback_data="cancel")])
@@ -41,12 +61,23 @@ def get_cancel_keyboard() -> ReplyKeyboardMarkup:
 
 def get_time_slots_keyboard(time_slots) -> InlineKeyboardMarkup:
     """Клавиатура выбора времени"""
+    return _build_time_slots_keyboard(
+        tuple(
+            (start_time.hour, start_time.minute, end_time.hour, end_time.minute)
+            for start_time, end_time in time_slots
+        )
+    )
+
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _build_time_slots_keyboard(time_slots: Tuple[Tuple[int, int, int, int], ...]) -> InlineKeyboardMarkup:
+    """Собрать клавиатуру выбора времени по (час, минута) начала и конца слотов"""
     buttons = []
-    for start_time, end_time in time_slots:
+    for start_hour, start_minute, end_hour, end_minute in time_slots:
         buttons.append([
             InlineKeyboardButton(
-                text=f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}",
-                callback_data=f"time_{start_time.hour}_{start_time.minute}"
+                text=f"{start_hour:02d}:{start_minute:02d} - {end_hour:02d}:{end_minute:02d}",
+                callback_data=f"time_{start_hour}_{start_minute}"
             )
         ])
     buttons.append([InlineKeyboardButton(text="❌ Отмена", callback_data="cancel")])
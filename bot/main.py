@@ -3,76 +3,78 @@
 
 Этот модуль реализует мульти-бот систему для SaaS архитектуры:
 - Каждый бот работает только со своей схемой БД (tenant)
-- Контекст компании сохраняется в диспетчере
+- Контекст компании определяется по ID бота (bot.context)
 - Проверка подписки перед созданием записей
-- Отдельный Dispatcher для каждой компании
+- Один общий Dispatcher для всех ботов (bot.dispatcher)
 - Изоляция данных между ботами
 """
 
 import asyncio
 import logging
+import os
 import signal
-from typing import Dict, Optional
+import time
+from typing import Any, Dict, Optional, Set
 
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram import Bot
 
 from bot.database.connection import init_db, get_session
 from bot.database.connection import AsyncSession
-from bot.config import ADMIN_IDS
+from bot.config import (
+    ADMIN_IDS,
+    BOT_MODE,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PORT,
+    WORKER_LOAD_REPORT_INTERVAL,
+    COMPANY_FEED_ENABLED,
+    COMPANY_SYNC_INTERVAL,
+    BOT_STARTUP_CONCURRENCY,
+    BOT_STARTUP_STAGGER_MS,
+    LOG_LEVEL,
+    METRICS_ENABLED,
+    METRICS_PORT,
+)
+from bot.company_feed import CompanyChangeFeed
+from bot.context import (
+    build_company_context,
+    register_company_context,
+    unregister_company_context,
+)
+from bot.dispatcher import get_dispatcher, run_polling, wait_for_updates
+from bot.fsm_storage import close_fsm_storage, get_fsm_storage
+from bot.metrics import MetricsServer, instrument_bot
+from bot.middleware.callback_dedup import close_callback_dedup
+from bot.update_executor import get_update_executor
+from bot.sharding import get_shard_index, owns_company
+from bot.subscription_snapshot import drop_subscription_snapshot, update_subscription_snapshot
+from bot.webhook import get_webhook_multiplexer
+from bot.services.admin_digest import get_admin_digest
 
 from app.models.public_models import Company
 from app.services.tenant_service import TenantService
 
 # Настройка логирования
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=LOG_LEVEL,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S',
 )
 logger = logging.getLogger(__name__)
 
-# Регистрируем роутеры
-from bot.handlers.client.start import router as start_router
-from bot.handlers.client.booking import router as booking_router
-from bot.handlers.client.calendar import router as calendar_router
-from bot.handlers.client.my_bookings import router as my_bookings_router
-from bot.handlers.client.profile import router as profile_router
-from bot.handlers.admin.menu import router as admin_menu_router
-from bot.handlers.admin.bookings import router as admin_bookings_router
-from bot.handlers.admin.bookings_edit import router as admin_bookings_edit_router
-from bot.handlers.master.work_order import router as master_router
-
-# Импортируем middleware
-from bot.middleware.subscription import SubscriptionMiddleware
 from aiogram import F
 from aiogram.types import CallbackQuery
 
 # Инициализируем сервис tenant
 tenant_service = TenantService()
 
-# Глобальный словарь для хранения диспетчеров по токену бота
-_dispatchers_by_token: Dict[str, Dispatcher] = {}
-
-def get_dispatcher_by_token(token: str) -> Optional[Dispatcher]:
-    """Получить диспетчер по токену бота"""
-    return _dispatchers_by_token.get(token)
-
 # Глобальный словарь для хранения активных ботов
 active_bots: Dict[int, Dict[str, any]] = {}
 
 # Флаг graceful shutdown
 shutdown_event = asyncio.Event()
 
-# Настраиваем логирование
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-)
-
-logger = logging.getLogger(__name__)
-
+# Сериализует запуск/остановку ботов между лентой изменений и полной проверкой
+_companies_lock = asyncio.Lock()
 
 # ==================== Helper функции ====================
 
@@ -94,132 +96,257 @@ async def load_companies() -> list[Company]:
                 )
             )
         )
-        companies = result.scalars().all()
-        logger.info(f"Загружено {len(companies)} компаний")
+        # Воркер обслуживает только компании своего шарда
+        companies = [c for c in result.scalars().all() if owns_company(c.id)]
+        logger.info(f"Загружено {len(companies)} компаний (шард {get_shard_index()})")
         return companies
 
 
-async def run_bot_for_company(company: Company) -> Optional[Dict[str, any]]:
+async def load_company(company_id: int) -> Optional[Company]:
     """
-    Запустить бота для конкретной компании.
+    Загрузить одну компанию из public схемы.
+    
+    Args:
+        company_id: ID компании
+        
+    Returns:
+        Компания или None, если она удалена
+    """
+    async for session in get_session():
+        return await session.get(Company, company_id)
+
+
+def company_requires_bot(company: Company) -> bool:
+    """
+    Проверить, должен ли для компании работать бот.
     
     Args:
         company: Объект компании
         
     Returns:
-        Словарь с информацией о боте или None при ошибке
+        True, если компания активна, с подпиской и токеном
+    """
+    return bool(
+        company.is_active
+        and company.subscription_status in ['active', 'overdue']
+        and company.telegram_bot_token
+    )
+
+
+def apply_company_context(bot: Bot, company: Company) -> None:
+    """
+    Записать контекст компании в реестр контекстов и снимок подписки.
+    
+    Вызывается при создании бота и при изменении компании
+    (без перезапуска бота). Диспетчер общий, поэтому данные компании
+    в нем не хранятся.
+    
+    Args:
+        bot: Бот компании
+        company: Объект компании
+    """
+    register_company_context(bot, build_company_context(company))
+    update_subscription_snapshot(company)
+
+
+async def build_bot_for_company(
+    company: Company,
+    schema_exists: Optional[bool] = None,
+) -> Optional[Dict[str, any]]:
+    """
+    Создать бота для конкретной компании (без запуска).
+    
+    Args:
+        company: Объект компании
+        schema_exists: Результат пакетной проверки tenant схемы
+            (None - проверить отдельным запросом)
+        
+    Returns:
+        Словарь с информацией о боте или None, если бота запускать не нужно
     """
     bot_id = company.id
     
+    # Проверяем наличие токена
+    if not company.telegram_bot_token:
+        logger.warning(f"Компания {company.name} (ID: {bot_id}) не имеет токена бота")
+        return None
+    
+    # Проверяем активность компании
+    if not company.is_active:
+        logger.warning(f"Компания {company.name} (ID: {bot_id}) не активна")
+        return None
+    
+    # Проверяем статус подписки
+    if company.subscription_status not in ['active', 'overdue']:
+        logger.warning(
+            f"Компания {company.name} (ID: {bot_id}) имеет статус подписки: {company.subscription_status}"
+        )
+        return None
+    
+    # Проверяем, существует ли tenant схема
+    if schema_exists is None:
+        schema_exists = await tenant_service.tenancy_schema_exists(company.id)
+    if not schema_exists:
+        logger.warning(f"Tenant схема для компании {company.name} (ID: {bot_id}) не существует")
+        return None
+    
+    # Создаем бота с токеном компании; обновления обрабатывает общий диспетчер
+    bot = Bot(token=company.telegram_bot_token)
+    apply_company_context(bot, company)
+    if METRICS_ENABLED:
+        instrument_bot(bot)
+    
+    logger.debug(
+        f"Контекст бота '{company.name}': "
+        f"company_id={company.id}, "
+        f"schema=tenant_{company.id}, "
+        f"can_create_bookings={company.can_create_bookings}, "
+        f"subscription_status={company.subscription_status}, "
+        f"admin_telegram_id={company.admin_telegram_id}"
+    )
+    
+    return {
+        'company_id': company.id,
+        'company_name': company.name,
+        'token': company.telegram_bot_token,
+        'bot': bot,
+        'dispatcher': get_dispatcher(),
+        'task': None,
+    }
+
+
+async def _run_polling(bot_info: Dict[str, any]) -> None:
+    """
+    Long-polling цикл бота (используется при BOT_MODE=polling).
+    
+    Args:
+        bot_info: Информация о боте
+    """
     try:
-        logger.info(f"Запуск бота для компании '{company.name}' (ID: {bot_id})")
-        
-        # Проверяем наличие токена
-        if not company.telegram_bot_token:
-            logger.warning(f"Компания {company.name} (ID: {bot_id}) не имеет токена бота")
-            return None
-        
-        # Проверяем активность компании
-        if not company.is_active:
-            logger.warning(f"Компания {company.name} (ID: {bot_id}) не активна")
-            return None
+        await run_polling(bot_info['dispatcher'], bot_info['bot'])
+        logger.info(f"Бот для компании '{bot_info['company_name']}' остановлен")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка в боте компании '{bot_info['company_name']}': {e}", exc_info=True)
+
+
+async def start_bot_updates(bot_info: Dict[str, any]) -> None:
+    """
+    Начать прием обновлений ботом в зависимости от BOT_MODE.
+    
+    В режиме webhook бот регистрируется в общем мультиплексоре и получает
+    setWebhook; в режиме polling запускается фоновая задача long-polling.
+    
+    Args:
+        bot_info: Информация о боте
+    """
+    if BOT_MODE == 'webhook':
+        await get_webhook_multiplexer().register(bot_info['bot'], bot_info['dispatcher'])
+    else:
+        bot_info['task'] = asyncio.create_task(_run_polling(bot_info))
+
+
+async def run_bot_for_company(company: Company) -> Optional[Dict[str, any]]:
+    """
+    Запустить бота для конкретной компании.
+    
+    Возвращает управление сразу после запуска приема обновлений
+    (polling работает в фоновой задаче, webhook — в общем сервере).
+    
+    Args:
+        company: Объект компании
         
-        # Проверяем статус подписки
-        if company.subscription_status not in ['active', 'overdue']:
-            logger.warning(
-                f"Компания {company.name} (ID: {bot_id}) имеет статус подписки: {company.subscription_status}"
-            )
-            return None
+    Returns:
+        Словарь с информацией о боте или None при ошибке
+    """
+    try:
+        logger.info(f"Запуск бота для компании '{company.name}' (ID: {company.id})")
         
-        # Проверяем, существует ли tenant схема
-        if not await tenant_service.tenancy_schema_exists(company.id):
-            logger.warning(f"Tenant схема для компании {company.name} (ID: {bot_id}) не существует")
+        bot_info = await build_bot_for_company(company)
+        if not bot_info:
             return None
         
-        # Создаем бота с токеном компании
-        bot = Bot(token=company.telegram_bot_token)
-        dp = Dispatcher(storage=MemoryStorage())
-        
-        # Формируем список админов компании
-        admin_ids = []
-        if company.admin_telegram_id:
-            admin_ids.append(company.admin_telegram_id)
-        if company.telegram_admin_ids:
-            admin_ids.extend(company.telegram_admin_ids)
-        
-        # Сохраняем контекст компании в диспетчере
-        dp['company_id'] = company.id
-        dp['company_name'] = company.name
-        dp['schema_name'] = f'tenant_{company.id}'
-        dp['can_create_bookings'] = company.can_create_bookings
-        dp['subscription_status'] = company.subscription_status
-        dp['subscription_end_date'] = company.subscription_end_date
-        dp['admin_telegram_ids'] = admin_ids
-        dp['admin_telegram_id'] = company.admin_telegram_id  # Основной админ
-        
-        # Сохраняем диспетчер как атрибут бота (для доступа в хендлерах)
-        bot._dispatcher = dp
-        
-        # Сохраняем диспетчер в глобальном словаре по токену
-        _dispatchers_by_token[company.telegram_bot_token] = dp
-        logger.info(f"💾 Диспетчер сохранен: token={company.telegram_bot_token[:20]}..., всего диспетчеров={len(_dispatchers_by_token)}, admin_telegram_id={company.admin_telegram_id}")
-        
-        logger.info(
-            f"Контекст бота '{company.name}': "
-            f"company_id={company.id}, "
-            f"schema=tenant_{company.id}, "
-            f"can_create_bookings={company.can_create_bookings}, "
-            f"subscription_status={company.subscription_status}, "
-            f"admin_telegram_id={company.admin_telegram_id}, "
-            f"admin_telegram_ids={admin_ids}"
-        )
-        
-        # Применяем middleware для проверки статуса подписки
-        subscription_middleware = SubscriptionMiddleware()
-        dp.message.middleware(subscription_middleware)
-        dp.callback_query.middleware(subscription_middleware)
-        
-        logger.info(f"SubscriptionMiddleware применен для компании '{company.name}'")
-        
-        # Регистрируем роутеры
-        # ВАЖНО: Admin роутеры регистрируем ПЕРВЫМИ, чтобы они имели приоритет
-        # bookings_edit_router должен быть ПЕРЕД bookings_router, чтобы обработчики с состояниями имели приоритет
-        dp.include_router(admin_menu_router)
-        dp.include_router(admin_bookings_edit_router)  # Более специфичные обработчики с состояниями - первыми
-        dp.include_router(admin_bookings_router)
-        dp.include_router(master_router)
-        # Client роутеры регистрируем после admin, чтобы не перехватывали админские кнопки
-        dp.include_router(start_router)
-        dp.include_router(booking_router)
-        dp.include_router(calendar_router)
-        dp.include_router(my_bookings_router)
-        dp.include_router(profile_router)
-
-        # Фоллбек и явный логгер убираем, чтобы не перехватывать валидные callback'и.
-        
-        # Убеждаемся, что диспетчер сохранен перед запуском polling
-        logger.info(f"🔍 Проверка перед polling: диспетчеров в словаре={len(_dispatchers_by_token)}, bot._dispatcher установлен={hasattr(bot, '_dispatcher')}")
-        
-        # Запускаем polling с обработкой ошибок
-        try:
-            await dp.start_polling(bot, skip_updates=True)
-            logger.info(f"Бот для компании '{company.name}' остановлен")
-        except Exception as e:
-            logger.error(f"Ошибка в боте компании '{company.name}': {e}", exc_info=True)
-        
-        # Возвращаем информацию о боте
-        return {
-            'company_id': company.id,
-            'company_name': company.name,
-            'bot': bot,
-            'dispatcher': dp,
-        }
+        await start_bot_updates(bot_info)
+        return bot_info
         
     except Exception as e:
         logger.error(f"Ошибка при запуске бота для компании '{company.name}': {e}", exc_info=True)
         return None
 
 
+async def start_bots(companies: list[Company]) -> Dict[int, Dict[str, any]]:
+    """
+    Запустить ботов для списка компаний.
+    
+    Tenant схемы всех компаний проверяются одним запросом, боты собираются
+    параллельно (не более BOT_STARTUP_CONCURRENCY одновременно), а прием
+    обновлений стартует с интервалом BOT_STARTUP_STAGGER_MS, чтобы не
+    упираться в ограничения Telegram на getMe/setWebhook.
+    
+    Args:
+        companies: Компании для запуска
+        
+    Returns:
+        Словарь запущенных ботов по ID компании
+    """
+    started_at = time.monotonic()
+    timings = {'schemas': 0.0, 'build': 0.0, 'start': 0.0}
+    
+    candidates = [company for company in companies if company_requires_bot(company)]
+    if not candidates:
+        return {}
+    
+    existing_schemas = await tenant_service.existing_tenant_schemas(c.id for c in candidates)
+    timings['schemas'] = time.monotonic() - started_at
+    
+    for company in candidates:
+        if company.id not in existing_schemas:
+            logger.warning(f"Tenant схема для компании {company.name} (ID: {company.id}) не существует")
+    candidates = [company for company in candidates if company.id in existing_schemas]
+    
+    semaphore = asyncio.Semaphore(BOT_STARTUP_CONCURRENCY)
+    stagger = BOT_STARTUP_STAGGER_MS / 1000
+    pipeline_started_at = time.monotonic()
+    
+    async def start_one(index: int, company: Company) -> Optional[Dict[str, any]]:
+        async with semaphore:
+            try:
+                build_started_at = time.monotonic()
+                bot_info = await build_bot_for_company(company, schema_exists=True)
+                timings['build'] += time.monotonic() - build_started_at
+                if not bot_info:
+                    return None
+                
+                # Разносим старт ботов во времени
+                delay = pipeline_started_at + index * stagger - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                updates_started_at = time.monotonic()
+                await start_bot_updates(bot_info)
+                timings['start'] += time.monotonic() - updates_started_at
+                return bot_info
+            except Exception as e:
+                logger.error(f"Ошибка при запуске бота для компании '{company.name}': {e}", exc_info=True)
+                return None
+    
+    results = await asyncio.gather(*(
+        start_one(index, company) for index, company in enumerate(candidates)
+    ))
+    started = {bot_info['company_id']: bot_info for bot_info in results if bot_info}
+    
+    logger.info(
+        f"Запущено {len(started)} ботов из {len(companies)} компаний "
+        f"за {time.monotonic() - started_at:.2f} сек: "
+        f"проверка схем {timings['schemas']:.2f} сек, "
+        f"сборка {timings['build']:.2f} сек (сумма), "
+        f"старт обновлений {timings['start']:.2f} сек (сумма), "
+        f"пропущено {len(companies) - len(started)}"
+    )
+    return started
+
+
 async def stop_bot_for_company(bot_info: Dict[str, any]) -> None:
     """
     Остановить бота для конкретной компании.
@@ -229,13 +356,23 @@ async def stop_bot_for_company(bot_info: Dict[str, any]) -> None:
     """
     try:
         bot = bot_info['bot']
-        dispatcher = bot_info['dispatcher']
         
         logger.info(f"Остановка бота для компании '{bot_info['company_name']}'")
         
-        # Отменяем все текущие задачи
-        for task in asyncio.all_tasks():
+        if BOT_MODE == 'webhook':
+            await get_webhook_multiplexer().unregister(bot)
+        
+        # Отменяем только задачу polling этого бота
+        task = bot_info.get('task')
+        if task and not task.done():
             task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        
+        unregister_company_context(bot)
+        drop_subscription_snapshot(bot_info['company_id'])
         
         # Закрываем сессию бота
         await bot.session.close()
@@ -250,6 +387,13 @@ async def stop_all_bots():
     """Остановить всех активных ботов."""
     logger.info(f"Остановка {len(active_bots)} активных ботов...")
     
+    # Прекращаем polling всех ботов и даем обработать уже полученные обновления
+    for bot_info in active_bots.values():
+        task = bot_info.get('task')
+        if task and not task.done():
+            task.cancel()
+    await wait_for_updates()
+    
     for bot_id, bot_info in active_bots.items():
         await stop_bot_for_company(bot_info)
     
@@ -261,10 +405,17 @@ async def check_and_update_companies() -> None:
     """
     Проверить активные компании и остановить/запустить боты по необходимости.
     
-    Эта функция вызывается периодически для динамического управления ботами.
+    Эта функция вызывается периодически как страховка к ленте изменений
+    (и после переподключения ленты).
     """
     global active_bots
     
+    async with _companies_lock:
+        await _check_and_update_companies()
+
+
+async def _check_and_update_companies() -> None:
+    """Полная синхронизация ботов с public.companies (под _companies_lock)."""
     try:
         # Загружаем компании из БД
         companies = await load_companies()
@@ -276,9 +427,7 @@ async def check_and_update_companies() -> None:
         required_company_ids = {
             company.id
             for company in companies
-            if company.is_active
-            and company.subscription_status in ['active', 'overdue']
-            and company.telegram_bot_token
+            if company_requires_bot(company)
         }
         
         # Боты для остановки (компании деактивированы или без подписки)
@@ -287,6 +436,15 @@ async def check_and_update_companies() -> None:
         # Боты для запуска (новые или реактивированные компании)
         bots_to_start = required_company_ids - active_company_ids
         
+        # Боты с замененным токеном перезапускаем (старый вебхук снимается)
+        companies_by_id = {company.id: company for company in companies}
+        for bot_id in active_company_ids & required_company_ids:
+            if active_bots[bot_id].get('token') != companies_by_id[bot_id].telegram_bot_token:
+                await stop_bot_for_company(active_bots[bot_id])
+                del active_bots[bot_id]
+                bots_to_start.add(bot_id)
+                logger.info(f"Токен бота компании {bot_id} изменен, бот будет перезапущен")
+        
         # Останавливаем боты
         for bot_id in bots_to_stop:
             if bot_id in active_bots:
@@ -295,18 +453,57 @@ async def check_and_update_companies() -> None:
                 logger.info(f"Бот компании {bot_id} остановлен (компания деактивирована)")
         
         # Запускаем новые боты
-        for bot_id in bots_to_start:
-            company = next((c for c in companies if c.id == bot_id), None)
-            if company:
-                bot_info = await run_bot_for_company(company)
-                if bot_info:
-                    active_bots[bot_id] = company.id
-                    logger.info(f"Бот компании {bot_id} запущен (новая или реактивированная компания)")
+        if bots_to_start:
+            started = await start_bots([c for c in companies if c.id in bots_to_start])
+            active_bots.update(started)
+            for bot_id in started:
+                logger.info(f"Бот компании {bot_id} запущен (новая или реактивированная компания)")
         
     except Exception as e:
         logger.error(f"Ошибка при проверке компаний: {e}", exc_info=True)
 
 
+async def apply_company_change(company_id: int, op: str, changed: Set[str]) -> None:
+    """
+    Применить изменение одной компании из ленты изменений.
+    
+    Args:
+        company_id: ID компании
+        op: Операция (INSERT, UPDATE, DELETE)
+        changed: Измененные поля
+    """
+    if not owns_company(company_id):
+        return
+    
+    async with _companies_lock:
+        company = None if op == 'DELETE' else await load_company(company_id)
+        bot_info = active_bots.get(company_id)
+        required = company is not None and company_requires_bot(company)
+        
+        if bot_info and not required:
+            await stop_bot_for_company(bot_info)
+            del active_bots[company_id]
+            logger.info(f"Бот компании {company_id} остановлен по изменению {sorted(changed)}")
+            return
+        
+        if bot_info and bot_info.get('token') != company.telegram_bot_token:
+            await stop_bot_for_company(bot_info)
+            del active_bots[company_id]
+            bot_info = None
+            logger.info(f"Токен бота компании {company_id} изменен, бот будет перезапущен")
+        
+        if bot_info:
+            # Бот продолжает работать, обновляем только контекст
+            apply_company_context(bot_info['bot'], company)
+            bot_info['company_name'] = company.name
+            logger.info(f"Контекст компании {company_id} обновлен: {sorted(changed)}")
+        elif required:
+            bot_info = await run_bot_for_company(company)
+            if bot_info:
+                active_bots[company_id] = bot_info
+                logger.info(f"Бот компании {company_id} запущен по изменению {op}")
+
+
 async def start_all_bots():
     """Запустить боты для всех активных компаний."""
     global active_bots
@@ -314,35 +511,22 @@ async def start_all_bots():
     logger.info("Запуск системы Multi-Tenant Bot")
     
     try:
+        started_at = time.monotonic()
+        
         # Инициализируем БД
         await init_db()
         
         # Загружаем компании
         companies = await load_companies()
+        logger.info(f"Инициализация БД и загрузка компаний: {time.monotonic() - started_at:.2f} сек")
         
         if not companies:
             logger.warning("Нет активных компаний для запуска ботов")
             return
         
-        # Запускаем ботов для каждой компании в параллельных задачах
-        tasks = []
-        for company in companies:
-            task = asyncio.create_task(run_bot_for_company(company))
-            tasks.append((company.id, task))
-        
-        # Ждем запуска всех ботов
-        for company_id, task in tasks:
-            try:
-                bot_info = await task
-                if bot_info:
-                    active_bots[company_id] = bot_info
-            except Exception as e:
-                logger.error(f"Ошибка запуска бота для компании {company_id}: {e}")
-        
-        logger.info(f"Запущено {len(active_bots)} ботов для {len(companies)} компаний")
-        
-        # Создаем задачу для периодической проверки компаний
-        asyncio.create_task(periodic_company_check())
+        # Прием обновлений идет в фоне, start_bots возвращает управление после старта
+        async with _companies_lock:
+            active_bots.update(await start_bots(companies))
         
     except Exception as e:
         logger.error(f"Критическая ошибка при запуске ботов: {e}", exc_info=True)
@@ -350,9 +534,10 @@ async def start_all_bots():
 
 async def periodic_company_check():
     """
-    Периодическая проверка компаний каждые 5 минут.
+    Периодическая полная проверка компаний (раз в COMPANY_SYNC_INTERVAL секунд).
     
-    Эта задача проверяет:
+    Основной источник изменений — лента company_changes; эта проверка
+    страхует от потерянных уведомлений и проверяет:
     - Появление новых компаний
     - Изменение статуса подписок
     - Деактивацию компаний
@@ -361,14 +546,40 @@ async def periodic_company_check():
     
     while not shutdown_event.is_set():
         try:
-            await asyncio.sleep(300)  # 5 минут
+            await asyncio.sleep(COMPANY_SYNC_INTERVAL)
             await check_and_update_companies()
         except asyncio.CancelledError:
             logger.info("Периодическая проверка компаний остановлена")
             break
         except Exception as e:
             logger.error(f"Ошибка в периодической проверке компаний: {e}", exc_info=True)
-            await asyncio.sleep(300)  # Продолжаем несмотря на ошибку
+            await asyncio.sleep(COMPANY_SYNC_INTERVAL)  # Продолжаем несмотря на ошибку
+
+
+async def report_load(load_queue: Any, interval: float) -> None:
+    """
+    Периодически отправлять супервизору нагрузку воркера.
+    
+    Args:
+        load_queue: Очередь multiprocessing супервизора
+        interval: Интервал отчетов в секундах
+    """
+    while not shutdown_event.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        # Насколько позже запланированного проснулся цикл событий
+        loop_lag = max(0.0, time.monotonic() - started - interval)
+        try:
+            load_queue.put_nowait({
+                'worker': get_shard_index(),
+                'pid': os.getpid(),
+                'bots': len(active_bots),
+                'tasks': len(asyncio.all_tasks()),
+                'loop_lag_ms': loop_lag * 1000,
+                **get_update_executor().stats(),
+            })
+        except Exception as e:
+            logger.warning(f"Не удалось отправить отчет о нагрузке: {e}")
 
 
 def handle_shutdown(signum, frame):
@@ -385,11 +596,14 @@ def handle_shutdown(signum, frame):
 
 # ==================== Главная функция ====================
 
-async def main():
+async def main(load_queue: Any = None):
     """
     Главная функция запуска системы Multi-Tenant Bot.
     
     Запускает всех ботов для активных компаний с подписками.
+    
+    Args:
+        load_queue: Очередь супервизора для отчетов о нагрузке (если запущен воркером)
     """
     # Регистрируем обработчики сигналов
     signal.signal(signal.SIGINT, handle_shutdown)
@@ -401,9 +615,38 @@ async def main():
     logger.info("")
     
     try:
+        # В режиме webhook один сервер принимает обновления всех ботов
+        if BOT_MODE == 'webhook':
+            if not WEBHOOK_BASE_URL:
+                raise RuntimeError("WEBHOOK_BASE_URL не задан для BOT_MODE=webhook")
+            # Каждый воркер слушает свой порт: WEBHOOK_PORT + индекс шарда
+            await get_webhook_multiplexer().start(port=WEBHOOK_PORT + get_shard_index())
+        
+        # Метрики Prometheus: каждый воркер на своем порту METRICS_PORT + индекс шарда
+        metrics_server = None
+        if METRICS_ENABLED:
+            metrics_server = MetricsServer(storage=get_fsm_storage())
+            await metrics_server.start(port=METRICS_PORT + get_shard_index())
+        
+        # Подписываемся на изменения компаний до загрузки, чтобы не пропустить их;
+        # накопившиеся уведомления применятся после запуска ботов
+        company_feed = None
+        if COMPANY_FEED_ENABLED:
+            company_feed = CompanyChangeFeed(
+                on_change=apply_company_change,
+                on_resync=check_and_update_companies,
+            )
+            company_feed.start()
+        
         # Запускаем боты
         await start_all_bots()
         
+        # Полная проверка компаний как страховка к ленте изменений
+        asyncio.create_task(periodic_company_check())
+        
+        if load_queue is not None:
+            asyncio.create_task(report_load(load_queue, WORKER_LOAD_REPORT_INTERVAL))
+        
         # Ждем сигнала завершения
         logger.info("Система работает. Нажмите Ctrl+C для завершения.")
         
@@ -411,8 +654,21 @@ async def main():
             await asyncio.sleep(1)
         
         logger.info("Получен сигнал завершения...")
+        if company_feed is not None:
+            await company_feed.stop()
+        # Открытые сводки новых записей отправляются, пока боты еще доступны
+        await get_admin_digest().flush_all()
         await stop_all_bots()
         
+        if BOT_MODE == 'webhook':
+            await get_webhook_multiplexer().stop()
+        
+        if metrics_server is not None:
+            await metrics_server.stop()
+        
+        await close_fsm_storage()
+        await close_callback_dedup()
+        
         logger.info("Multi-Tenant Bot System остановлен.")
         
     except asyncio.CancelledError:
@@ -0,0 +1,356 @@
+"""
+Метрики Prometheus для ботов компаний.
+
+Каждый процесс ботов (воркер супервизора) отдает метрики по HTTP
+на METRICS_PORT + индекс шарда (``/metrics``):
+- bot_updates_total — обновления по компаниям и типам
+- bot_update_duration_seconds, bot_update_errors_total — обработка обновления целиком
+- bot_update_lag_seconds — задержка между отправкой сообщения и началом обработки
+- bot_handler_duration_seconds, bot_handler_errors_total — по роутерам и обработчикам
+- bot_db_queries_per_update — число SQL запросов на одно обновление
+- bot_telegram_api_duration_seconds, bot_telegram_api_errors_total — вызовы Bot API
+- bot_fsm_states — число пользователей в каждом состоянии FSM (для общего
+  Redis считает только воркер шарда 0, иначе сумма по воркерам кратна их числу)
+- bot_updates_queued, bot_updates_in_flight — очереди UpdateExecutor
+
+Метки роутера и обработчика берутся из HandlerObject, который aiogram
+передает в middleware, поэтому новые обработчики попадают в метрики
+без дополнительной разметки.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter as StateCounter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import Message, TelegramObject, Update
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from bot.config import METRICS_FSM_INTERVAL, METRICS_HOST, METRICS_PORT
+from bot.context import get_company_id
+from bot.sharding import get_shard_index
+from bot.update_executor import get_update_executor
+
+logger = logging.getLogger(__name__)
+
+UPDATES_TOTAL = Counter(
+    "bot_updates_total",
+    "Полученные обновления Telegram",
+    ["company_id", "update_type"],
+)
+UPDATE_ERRORS = Counter(
+    "bot_update_errors_total",
+    "Обновления, обработка которых завершилась исключением",
+    ["company_id", "update_type"],
+)
+UPDATE_DURATION = Histogram(
+    "bot_update_duration_seconds",
+    "Время обработки обновления (все middleware и обработчик)",
+    ["update_type"],
+)
+UPDATE_LAG = Histogram(
+    "bot_update_lag_seconds",
+    "Задержка между отправкой сообщения пользователем и началом его обработки",
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 300),
+)
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds",
+    "Время выполнения обработчика",
+    ["router", "handler"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Исключения в обработчиках",
+    ["router", "handler"],
+)
+DB_QUERIES = Histogram(
+    "bot_db_queries_per_update",
+    "Число SQL запросов при обработке одного обновления",
+    ["update_type"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+TELEGRAM_API_DURATION = Histogram(
+    "bot_telegram_api_duration_seconds",
+    "Время вызова метода Bot API",
+    ["method"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+TELEGRAM_API_ERRORS = Counter(
+    "bot_telegram_api_errors_total",
+    "Ошибки вызовов Bot API по кодам",
+    ["method", "code"],
+)
+FSM_STATES = Gauge(
+    "bot_fsm_states",
+    "Число пользователей в состоянии FSM",
+    ["state"],
+)
+UPDATES_QUEUED = Gauge("bot_updates_queued", "Обновления, ожидающие обработки")
+UPDATES_IN_FLIGHT = Gauge("bot_updates_in_flight", "Обновления в обработке")
+UPDATES_QUEUED.set_function(lambda: get_update_executor().queued)
+UPDATES_IN_FLIGHT.set_function(lambda: get_update_executor().in_flight)
+
+# Коды ошибок Bot API по классам исключений aiogram
+TELEGRAM_ERROR_CODES = (
+    (TelegramRetryAfter, "429"),
+    (TelegramBadRequest, "400"),
+    (TelegramUnauthorizedError, "401"),
+    (TelegramForbiddenError, "403"),
+    (TelegramNotFound, "404"),
+    (TelegramConflictError, "409"),
+    (TelegramEntityTooLarge, "413"),
+    (TelegramServerError, "5xx"),
+    (TelegramNetworkError, "network"),
+)
+
+# Счетчик SQL запросов текущего обновления (None вне обработки обновления)
+_db_queries: ContextVar[Optional[List[int]]] = ContextVar("bot_db_queries", default=None)
+
+
+def telegram_error_code(error: Exception) -> str:
+    """
+    Код ошибки Bot API для метки метрики.
+
+    Args:
+        error: Исключение вызова Bot API
+
+    Returns:
+        HTTP код ошибки Telegram, "5xx", "network" или имя класса исключения
+    """
+    for error_class, code in TELEGRAM_ERROR_CODES:
+        if isinstance(error, error_class):
+            return code
+    return type(error).__name__
+
+
+def _count_db_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Учесть SQL запрос в счетчике текущего обновления."""
+    counter = _db_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_db_query_counter() -> None:
+    """Подключить подсчет SQL запросов ко всем движкам SQLAlchemy процесса."""
+    if not event.contains(Engine, "before_cursor_execute", _count_db_query):
+        event.listen(Engine, "before_cursor_execute", _count_db_query)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware для dp.update: число, длительность и ошибки обновлений,
+    задержка сообщений и число SQL запросов на обновление.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        bot: Optional[Bot] = data.get("bot")
+        company_id = get_company_id(bot) if bot is not None else None
+        company_label = str(company_id) if company_id is not None else "unknown"
+        update_type = event.event_type
+
+        UPDATES_TOTAL.labels(company_label, update_type).inc()
+        message = event.event
+        if isinstance(message, Message):
+            UPDATE_LAG.observe(max(0.0, time.time() - message.date.timestamp()))
+
+        counter = [0]
+        token = _db_queries.set(counter)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            UPDATE_ERRORS.labels(company_label, update_type).inc()
+            raise
+        finally:
+            UPDATE_DURATION.labels(update_type).observe(time.perf_counter() - started)
+            DB_QUERIES.labels(update_type).observe(counter[0])
+            _db_queries.reset(token)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware для сообщений и callback'ов: длительность и ошибки
+    по роутеру (модуль обработчика) и имени функции обработчика.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        router = getattr(callback, "__module__", None) or "unknown"
+        name = getattr(callback, "__name__", None) or "unknown"
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(router, name).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(router, name).observe(time.perf_counter() - started)
+
+
+class TelegramApiMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: длительность и ошибки вызовов Bot API."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.labels(api_method, telegram_error_code(e)).inc()
+            raise
+        finally:
+            TELEGRAM_API_DURATION.labels(api_method).observe(time.perf_counter() - started)
+
+
+_telegram_api_metrics = TelegramApiMetricsMiddleware()
+
+
+def instrument_bot(bot: Bot) -> None:
+    """
+    Подключить метрики вызовов Bot API к сессии бота.
+
+    Args:
+        bot: Экземпляр бота
+    """
+    bot.session.middleware(_telegram_api_metrics)
+
+
+async def count_fsm_states(storage: BaseStorage) -> Dict[str, int]:
+    """
+    Посчитать пользователей в каждом состоянии FSM.
+
+    Args:
+        storage: Хранилище FSM диспетчера
+
+    Returns:
+        Словарь {состояние: число пользователей}
+    """
+    counts: StateCounter = StateCounter()
+
+    if isinstance(storage, MemoryStorage):
+        for record in list(storage.storage.values()):
+            if record.state:
+                counts[record.state] += 1
+    elif isinstance(storage, RedisStorage):
+        # Ключи DefaultKeyBuilder: fsm:<bot_id>:<chat_id>:<user_id>:state
+        keys = [key async for key in storage.redis.scan_iter(match="fsm:*:state", count=1000)]
+        for offset in range(0, len(keys), 1000):
+            for value in await storage.redis.mget(keys[offset:offset + 1000]):
+                if value:
+                    counts[value.decode() if isinstance(value, bytes) else value] += 1
+
+    return dict(counts)
+
+
+class MetricsServer:
+    """
+    HTTP сервер ``/metrics`` и периодический подсчет состояний FSM.
+
+    Args:
+        storage: Хранилище FSM (None — без метрики состояний)
+        fsm_interval: Интервал подсчета состояний FSM (секунды)
+    """
+
+    def __init__(self, storage: Optional[BaseStorage] = None, fsm_interval: float = METRICS_FSM_INTERVAL):
+        self.storage = storage
+        self.fsm_interval = fsm_interval
+        self._runner: Optional[web.AppRunner] = None
+        self._fsm_task: Optional[asyncio.Task] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Отдать метрики в формате Prometheus."""
+        response = web.Response(body=generate_latest())
+        response.headers["Content-Type"] = CONTENT_TYPE_LATEST
+        return response
+
+    def _counts_fsm_states(self) -> bool:
+        """
+        Считать ли состояния FSM в этом процессе.
+
+        Redis общий для всех воркеров, поэтому его ключи сканирует только
+        шард 0; MemoryStorage у каждого воркера свое.
+        """
+        if self.storage is None:
+            return False
+        return not isinstance(self.storage, RedisStorage) or get_shard_index() == 0
+
+    async def _refresh_fsm_states(self) -> None:
+        """Периодически обновлять bot_fsm_states."""
+        while True:
+            try:
+                counts = await count_fsm_states(self.storage)
+                FSM_STATES.clear()
+                for state, count in counts.items():
+                    FSM_STATES.labels(state).set(count)
+            except Exception as e:
+                logger.warning(f"Не удалось посчитать состояния FSM: {e}")
+            await asyncio.sleep(self.fsm_interval)
+
+    async def start(self, host: str = METRICS_HOST, port: int = METRICS_PORT) -> None:
+        """
+        Запустить HTTP сервер метрик.
+
+        Args:
+            host: Адрес для прослушивания
+            port: Порт для прослушивания
+        """
+        install_db_query_counter()
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+        if self._counts_fsm_states():
+            self._fsm_task = asyncio.create_task(self._refresh_fsm_states())
+
+        logger.info(f"Метрики Prometheus доступны на http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        """Остановить HTTP сервер метрик."""
+        if self._fsm_task is not None:
+            self._fsm_task.cancel()
+            self._fsm_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,205 @@
+"""
+Middleware для защиты от повторных нажатий inline-кнопок.
+
+Клиенты часто нажимают кнопку календаря, слота или «✅ Подтверждаю»
+два-три раза подряд. Каждое нажатие заново выполняло запросы к БД
+и могло создать дубликат записи. Middleware:
+- Отбрасывает повтор callback'а с теми же (бот, чат, сообщение, data)
+  в течение CALLBACK_DEDUP_TTL секунд и сразу отвечает callback.answer()
+- Не допускает параллельного выполнения изменяющих действий
+  (создание записи, подтверждение, отмена) одного пользователя
+
+Отметки о нажатиях хранятся в памяти процесса или в Redis (SET NX EX),
+если CALLBACK_DEDUP_STORAGE=redis.
+"""
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+from redis.asyncio import Redis
+
+from bot.config import (
+    CALLBACK_DEDUP_STORAGE,
+    CALLBACK_DEDUP_TTL,
+    FSM_REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Callback'и, изменяющие данные (выполняются не более одного одновременно на пользователя)
+STATEFUL_CALLBACK_PREFIXES = (
+    "time_",  # Выбор времени завершает создание записи
+    "confirm_attendance_",
+    "cancel_booking_",
+    "confirm_",
+    "reject_",
+    "assign_master_",
+    "complete_booking_",
+)
+
+IN_FLIGHT_TEXT = "⏳ Обрабатываем предыдущее действие..."
+
+# Очистка просроченных отметок в памяти раз в столько вставок
+MEMORY_CLEANUP_EVERY = 1000
+
+
+class MemoryCallbackDedupStore:
+    """Отметки о нажатиях в памяти процесса."""
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self._inserts = 0
+
+    async def mark(self, key: str, ttl: float) -> bool:
+        """
+        Отметить нажатие.
+
+        Args:
+            key: Ключ нажатия
+            ttl: Время жизни отметки (секунды)
+
+        Returns:
+            True, если нажатие новое, False, если это повтор
+        """
+        now = time.monotonic()
+        expires = self._expires.get(key)
+        if expires is not None and expires > now:
+            return False
+
+        self._expires[key] = now + ttl
+        self._inserts += 1
+        if self._inserts % MEMORY_CLEANUP_EVERY == 0:
+            self._expires = {k: t for k, t in self._expires.items() if t > now}
+        return True
+
+    async def close(self) -> None:
+        """Хранилище в памяти не требует закрытия."""
+
+
+class RedisCallbackDedupStore:
+    """
+    Отметки о нажатиях в Redis (общие для всех процессов).
+
+    Args:
+        redis: Клиент Redis
+        prefix: Префикс ключей
+    """
+
+    def __init__(self, redis: Redis, prefix: str = "cbdedup"):
+        self._redis = redis
+        self._prefix = prefix
+
+    async def mark(self, key: str, ttl: float) -> bool:
+        """
+        Отметить нажатие (SET NX с временем жизни).
+
+        Args:
+            key: Ключ нажатия
+            ttl: Время жизни отметки (секунды)
+
+        Returns:
+            True, если нажатие новое, False, если это повтор
+        """
+        return bool(await self._redis.set(f"{self._prefix}:{key}", 1, nx=True, px=int(ttl * 1000)))
+
+    async def close(self) -> None:
+        """Закрыть соединения Redis."""
+        await self._redis.close()
+
+
+def create_callback_dedup_store():
+    """
+    Создать хранилище отметок согласно CALLBACK_DEDUP_STORAGE.
+
+    Returns:
+        RedisCallbackDedupStore при CALLBACK_DEDUP_STORAGE=redis, иначе MemoryCallbackDedupStore
+    """
+    if CALLBACK_DEDUP_STORAGE != "redis":
+        return MemoryCallbackDedupStore()
+
+    logger.info(f"Защита от повторных нажатий: Redis {REDIS_HOST}:{REDIS_PORT}/{FSM_REDIS_DB}")
+    return RedisCallbackDedupStore(Redis(host=REDIS_HOST, port=REDIS_PORT, db=FSM_REDIS_DB))
+
+
+class CallbackDedupMiddleware(BaseMiddleware):
+    """
+    Outer middleware для dp.callback_query: отбрасывает повторные нажатия
+    и блокирует параллельные изменяющие действия пользователя.
+
+    Args:
+        store: Хранилище отметок о нажатиях
+        ttl: Окно, в течение которого нажатие считается повтором (секунды)
+    """
+
+    def __init__(self, store=None, ttl: float = CALLBACK_DEDUP_TTL):
+        self.store = store or create_callback_dedup_store()
+        self.ttl = ttl
+        self._in_flight: Set[Tuple[int, int]] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+    ) -> Any:
+        bot = data.get("bot")
+        message = event.message
+        if bot is None or message is None or not event.data:
+            return await handler(event, data)
+
+        key = f"{bot.id}:{message.chat.id}:{message.message_id}:{event.data}"
+        if not await self.store.mark(key, self.ttl):
+            logger.debug(f"Повторное нажатие пропущено: {key}")
+            await event.answer()
+            return None
+
+        if not event.data.startswith(STATEFUL_CALLBACK_PREFIXES):
+            return await handler(event, data)
+
+        user_key = (bot.id, event.from_user.id)
+        if user_key in self._in_flight:
+            await event.answer(IN_FLIGHT_TEXT)
+            return None
+
+        self._in_flight.add(user_key)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(user_key)
+
+    async def close(self) -> None:
+        """Закрыть хранилище отметок."""
+        await self.store.close()
+
+
+# Глобальный экземпляр middleware (общий для диспетчера процесса)
+_callback_dedup: Optional[CallbackDedupMiddleware] = None
+
+
+def get_callback_dedup_middleware() -> CallbackDedupMiddleware:
+    """
+    Получить глобальный экземпляр CallbackDedupMiddleware.
+
+    Returns:
+        Экземпляр CallbackDedupMiddleware
+    """
+    global _callback_dedup
+
+    if _callback_dedup is None:
+        _callback_dedup = CallbackDedupMiddleware()
+
+    return _callback_dedup
+
+
+async def close_callback_dedup() -> None:
+    """Закрыть соединения глобального middleware."""
+    global _callback_dedup
+
+    if _callback_dedup is not None:
+        await _callback_dedup.close()
+    _callback_dedup = None
@@ -0,0 +1,179 @@
+"""
+Накопление новых записей для сводки администраторам.
+
+Вместо сообщения каждому администратору на каждую запись новые записи
+компании копятся в окне: первая запись открывает окно длиной
+notify_admin_delay_minutes (не меньше ADMIN_DIGEST_MIN_WINDOW секунд),
+по его окончании администраторы получают одну сводку со всеми
+записями окна (app.services.admin_digest).
+
+Буфер хранится в памяти процесса. Записи, которые не попали в сводку
+(процесс остановлен аварийно), отправляет периодическая задача по
+журналу доставки. При штатной остановке открытые окна отправляются сразу.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+
+from bot.database.connection import get_session
+from app.services.admin_digest import (
+    digest_window_seconds,
+    load_digest_bookings,
+    read_delay_minutes,
+    send_admin_digest,
+)
+from app.services.notification_ledger import tenant_schema
+
+logger = logging.getLogger(__name__)
+
+# Ключ буфера: (ID бота, ID компании)
+DigestKey = Tuple[int, int]
+
+
+@dataclass
+class _PendingDigest:
+    """Открытое окно сводки компании."""
+    bot: Bot
+    company_id: int
+    booking_ids: List[int] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+
+async def read_window_seconds(company_id: int) -> float:
+    """
+    Окно накопления записей компании по ее настройкам.
+
+    Args:
+        company_id: ID компании
+
+    Returns:
+        Окно в секундах
+    """
+    async for session in get_session():
+        return digest_window_seconds(await read_delay_minutes(session, tenant_schema(company_id)))
+    return digest_window_seconds(0)
+
+
+async def deliver_digest(bot: Bot, company_id: int, booking_ids: List[int]) -> None:
+    """
+    Отправить сводку по накопленным записям компании.
+
+    Args:
+        bot: Бот компании
+        company_id: ID компании
+        booking_ids: ID записей окна
+    """
+    schema_name = tenant_schema(company_id)
+    async for session in get_session():
+        rows = await load_digest_bookings(session, schema_name, booking_ids)
+        if not rows:
+            return
+        await send_admin_digest(session, schema_name, bot, rows)
+        await session.commit()
+
+
+class AdminDigest:
+    """Буфер новых записей по компаниям с отложенной отправкой сводки."""
+
+    def __init__(
+        self,
+        window: Callable[[int], Awaitable[float]] = read_window_seconds,
+        deliver: Callable[[Bot, int, List[int]], Awaitable[None]] = deliver_digest,
+    ):
+        """
+        Args:
+            window: Корутина, возвращающая окно компании (секунды)
+            deliver: Корутина отправки сводки (бот, ID компании, ID записей)
+        """
+        self._window = window
+        self._deliver = deliver
+        self._pending: Dict[DigestKey, _PendingDigest] = {}
+
+    @property
+    def pending_count(self) -> int:
+        """Количество записей, ожидающих отправки."""
+        return sum(len(digest.booking_ids) for digest in self._pending.values())
+
+    def add(self, bot: Bot, company_id: int, booking_id: int) -> None:
+        """
+        Добавить новую запись в сводку компании.
+
+        Не ждет БД и Telegram: первая запись открывает окно, сводка
+        отправляется фоновой задачей по его окончании.
+
+        Args:
+            bot: Бот компании
+            company_id: ID компании
+            booking_id: ID записи
+        """
+        key = (bot.id, company_id)
+        digest = self._pending.get(key)
+        if digest is None:
+            digest = _PendingDigest(bot=bot, company_id=company_id)
+            self._pending[key] = digest
+            digest.task = asyncio.create_task(self._flush_later(key, digest))
+        digest.booking_ids.append(booking_id)
+
+    async def _flush_later(self, key: DigestKey, digest: _PendingDigest) -> None:
+        """Дождаться окончания окна и отправить сводку."""
+        try:
+            delay = await self._window(digest.company_id)
+        except Exception as e:
+            logger.error(f"Не удалось получить задержку уведомлений компании {digest.company_id}: {e}")
+            delay = digest_window_seconds(0)
+
+        await asyncio.sleep(delay)
+        if self._pending.get(key) is digest:
+            del self._pending[key]
+        await self._send(digest)
+
+    async def _send(self, digest: _PendingDigest) -> None:
+        """Отправить сводку; ошибка не прерывает работу бота."""
+        try:
+            await self._deliver(digest.bot, digest.company_id, list(digest.booking_ids))
+        except Exception as e:
+            logger.error(
+                f"Ошибка отправки сводки новых записей компании {digest.company_id} "
+                f"({len(digest.booking_ids)} записей): {e}",
+                exc_info=True,
+            )
+
+    async def flush_all(self) -> None:
+        """Отправить все открытые окна сразу (остановка бота)."""
+        pending = list(self._pending.values())
+        self._pending.clear()
+
+        for digest in pending:
+            if digest.task is not None:
+                digest.task.cancel()
+        await asyncio.gather(
+            *(digest.task for digest in pending if digest.task is not None),
+            return_exceptions=True,
+        )
+
+        await asyncio.gather(*(self._send(digest) for digest in pending))
+        if pending:
+            logger.info(f"Отправлены сводки новых записей при остановке: {len(pending)}")
+
+
+# Глобальный экземпляр буфера
+_admin_digest: Optional[AdminDigest] = None
+
+
+def get_admin_digest() -> AdminDigest:
+    """
+    Получить глобальный экземпляр AdminDigest.
+
+    Returns:
+        Экземпляр AdminDigest
+    """
+    global _admin_digest
+
+    if _admin_digest is None:
+        _admin_digest = AdminDigest()
+
+    return _admin_digest
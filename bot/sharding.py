@@ -0,0 +1,106 @@
+"""
+Распределение компаний между воркерами бота.
+
+Компании назначаются воркерам консистентным хешированием по company_id:
+каждый воркер представлен на кольце набором виртуальных узлов, поэтому
+при изменении числа воркеров переезжает только ~1/K компаний, а назначение
+новой компании не затрагивает остальные.
+"""
+
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+# Количество виртуальных узлов на воркер (сглаживает распределение)
+VIRTUAL_NODES = 128
+
+
+def _hash(key: str) -> int:
+    """Стабильный между процессами хеш (встроенный hash() рандомизирован)."""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Консистентное хеш-кольцо воркеров.
+
+    Args:
+        nodes: Идентификаторы воркеров
+        virtual_nodes: Количество виртуальных узлов на воркер
+    """
+
+    def __init__(self, nodes: Iterable[int], virtual_nodes: int = VIRTUAL_NODES):
+        self._virtual_nodes = virtual_nodes
+        self._ring: Dict[int, int] = {}
+        self._keys: List[int] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: int) -> None:
+        """Добавить воркер на кольцо."""
+        for replica in range(self._virtual_nodes):
+            point = _hash(f"worker-{node}#{replica}")
+            self._ring[point] = node
+            bisect.insort(self._keys, point)
+
+    def remove_node(self, node: int) -> None:
+        """Убрать воркер с кольца."""
+        for replica in range(self._virtual_nodes):
+            point = _hash(f"worker-{node}#{replica}")
+            if self._ring.pop(point, None) is not None:
+                self._keys.remove(point)
+
+    def get_node(self, company_id: int) -> int:
+        """
+        Получить воркер, обслуживающий компанию.
+
+        Args:
+            company_id: ID компании
+
+        Returns:
+            Идентификатор воркера
+        """
+        if not self._keys:
+            raise ValueError("На кольце нет воркеров")
+        point = _hash(f"company-{company_id}")
+        index = bisect.bisect(self._keys, point) % len(self._keys)
+        return self._ring[self._keys[index]]
+
+
+# Шард текущего процесса: (индекс воркера, кольцо); None — без шардирования
+_shard_index: int = 0
+_shard_ring: Optional[HashRing] = None
+
+
+def configure_shard(index: int, count: int) -> None:
+    """
+    Настроить шард текущего процесса.
+
+    Args:
+        index: Индекс воркера (0..count-1)
+        count: Общее количество воркеров
+    """
+    global _shard_index, _shard_ring
+
+    _shard_index = index
+    _shard_ring = HashRing(range(count)) if count > 1 else None
+
+
+def get_shard_index() -> int:
+    """Индекс воркера текущего процесса."""
+    return _shard_index
+
+
+def owns_company(company_id: int) -> bool:
+    """
+    Проверить, обслуживает ли текущий воркер компанию.
+
+    Args:
+        company_id: ID компании
+
+    Returns:
+        True, если компания назначена этому воркеру
+    """
+    if _shard_ring is None:
+        return True
+    return _shard_ring.get_node(company_id) == _shard_index
@@ -22,3 +22,4 @@ class AdminEditBookingStates(StatesGroup):
     editing_payment = State()  # Изменение оплаты
     editing_master = State()  # Изменение мастера
     editing_post = State()  # Изменение поста
+    editing_datetime = State()  # Изменение даты и времени записи
@@ -0,0 +1,104 @@
+"""
+Актуальный снимок подписки компаний для бота.
+
+Снимок хранится в памяти процесса и заменяется целиком при каждом
+изменении компании: оплата (webhook ЮKassa), задачи Celery по истечению
+подписки и правки супер-админа пишут в public.companies, триггер
+отправляет pg_notify, и лента изменений (bot.company_feed) обновляет снимок.
+Чтение снимка — одно обращение к словарю, без I/O и логирования.
+"""
+
+import itertools
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Optional
+
+# Глобальный счетчик версий снимков (монотонный в пределах процесса)
+_versions = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class SubscriptionSnapshot:
+    """Неизменяемый снимок подписки компании."""
+    company_id: int
+    company_name: str
+    can_create_bookings: bool
+    subscription_status: Optional[str]
+    subscription_end_date: Optional[date]
+    version: int
+
+    def days_left(self, today: Optional[date] = None) -> Optional[int]:
+        """
+        Количество дней до окончания подписки.
+
+        Args:
+            today: Текущая дата (по умолчанию date.today())
+
+        Returns:
+            Количество дней или None, если дата окончания не задана
+        """
+        if self.subscription_end_date is None:
+            return None
+        return (self.subscription_end_date - (today or date.today())).days
+
+
+# Снимки по ID компании
+_snapshots: Dict[int, SubscriptionSnapshot] = {}
+
+
+def update_subscription_snapshot(company: Any) -> SubscriptionSnapshot:
+    """
+    Обновить снимок подписки из объекта компании.
+
+    Версия увеличивается, только если данные подписки изменились.
+
+    Args:
+        company: Объект Company (public.companies)
+
+    Returns:
+        Актуальный снимок
+    """
+    current = _snapshots.get(company.id)
+    can_create_bookings = bool(company.can_create_bookings) if company.can_create_bookings is not None else True
+    if (
+        current is not None
+        and current.company_name == company.name
+        and current.can_create_bookings == can_create_bookings
+        and current.subscription_status == company.subscription_status
+        and current.subscription_end_date == company.subscription_end_date
+    ):
+        return current
+
+    snapshot = SubscriptionSnapshot(
+        company_id=company.id,
+        company_name=company.name,
+        can_create_bookings=can_create_bookings,
+        subscription_status=company.subscription_status,
+        subscription_end_date=company.subscription_end_date,
+        version=next(_versions),
+    )
+    _snapshots[company.id] = snapshot
+    return snapshot
+
+
+def get_subscription_snapshot(company_id: int) -> Optional[SubscriptionSnapshot]:
+    """
+    Получить снимок подписки компании.
+
+    Args:
+        company_id: ID компании
+
+    Returns:
+        Снимок или None, если компания не обслуживается этим процессом
+    """
+    return _snapshots.get(company_id)
+
+
+def drop_subscription_snapshot(company_id: int) -> None:
+    """
+    Удалить снимок подписки (бот компании остановлен).
+
+    Args:
+        company_id: ID компании
+    """
+    _snapshots.pop(company_id, None)
@@ -23,17 +23,18 @@ from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, types, F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, ReplyKeyboardMarkup, KeyboardButton
 
 from sqlalchemy import text, select, func, and_, extract
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import selectinload
 
+from bot.fsm_storage import get_fsm_storage
 from shared.database.models import Base
 from app.models.public_models import Company, Subscription, Payment, Plan, SuperAdmin
 from app.database import async_session_maker
 from app.config import settings
+from app.services.telegram_gateway import get_telegram_gateway
 
 logging.basicConfig(
     level=logging.INFO,
@@ -54,7 +55,7 @@ class SuperAdminState(StatesGroup):
 
 # Инициализация бота
 bot = Bot(token=os.getenv("SUPER_ADMIN_BOT_TOKEN"))
-dp = Dispatcher(storage=MemoryStorage())
+dp = Dispatcher(storage=get_fsm_storage())
 router = Router()
 
 
@@ -506,7 +507,8 @@ async def cmd_send_expiration_reminders(message: types.Message, state: FSMContex
                         f"Пожалуйста, продлите подписку для продолжения работы сервиса."
                     )
                     
-                    await bot.send_message(
+                    await get_telegram_gateway().send_message(
+                        bot,
                         chat_id=company.admin_telegram_id,
                         text=reminder_text
                     )
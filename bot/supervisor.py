@@ -0,0 +1,219 @@
+"""
+Супервизор воркеров мульти-бот системы.
+
+Запускает BOT_WORKERS процессов, каждый из которых обслуживает свою часть
+компаний (консистентное хеширование по company_id, см. bot.sharding):
+- Новые и удаленные компании подхватываются воркером-владельцем
+  при проверке компаний, остальные воркеры их не трогают
+- Упавший воркер перезапускается с экспоненциальной задержкой
+- Воркеры периодически присылают свою нагрузку, супервизор логирует
+  сводку и отмечает перегруженные шарды
+"""
+
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from bot.config import (
+    BOT_WORKERS,
+    WORKER_RESTART_BACKOFF_MAX,
+    WORKER_LOAD_REPORT_INTERVAL,
+    LOG_LEVEL,
+)
+
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S',
+)
+logger = logging.getLogger(__name__)
+
+# Воркер, проработавший дольше этого времени, считается стабильным,
+# и задержка перезапуска сбрасывается
+STABLE_UPTIME_SECONDS = 60
+
+# Шард считается горячим, если его нагрузка выше средней в это число раз
+HOT_SHARD_FACTOR = 1.5
+
+# Используем spawn: дочерний процесс не наследует event loop и соединения
+_mp = multiprocessing.get_context("spawn")
+
+
+def run_worker(index: int, count: int, load_queue: Any) -> None:
+    """
+    Точка входа процесса-воркера.
+
+    Args:
+        index: Индекс воркера
+        count: Общее количество воркеров
+        load_queue: Очередь для отчетов о нагрузке
+    """
+    import asyncio
+
+    from bot.sharding import configure_shard
+
+    configure_shard(index, count)
+
+    from bot.main import main
+
+    asyncio.run(main(load_queue=load_queue))
+
+
+@dataclass
+class WorkerSlot:
+    """Состояние слота воркера в супервизоре."""
+    index: int
+    process: Optional[Any] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    backoff: float = 1.0
+    restart_at: Optional[float] = None
+    load: Dict[str, Any] = field(default_factory=dict)
+
+
+class Supervisor:
+    """
+    Супервизор процессов-воркеров.
+
+    Args:
+        workers: Количество воркеров
+    """
+
+    def __init__(self, workers: int = BOT_WORKERS):
+        self.workers = max(1, workers)
+        self.slots = [WorkerSlot(index=i) for i in range(self.workers)]
+        self.load_queue = _mp.Queue()
+        self._stopping = False
+        self._last_report = time.monotonic()
+
+    def _start_worker(self, slot: WorkerSlot) -> None:
+        """Запустить процесс воркера в слоте."""
+        process = _mp.Process(
+            target=run_worker,
+            args=(slot.index, self.workers, self.load_queue),
+            name=f"bot-worker-{slot.index}",
+        )
+        process.start()
+        slot.process = process
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+        logger.info(f"Воркер {slot.index} запущен (pid={process.pid})")
+
+    def _check_workers(self) -> None:
+        """Перезапустить упавшие воркеры с экспоненциальной задержкой."""
+        now = time.monotonic()
+        for slot in self.slots:
+            if slot.process is not None and slot.process.is_alive():
+                continue
+
+            if slot.restart_at is None:
+                exitcode = slot.process.exitcode if slot.process else None
+                if now - slot.started_at >= STABLE_UPTIME_SECONDS:
+                    slot.backoff = 1.0
+                slot.restart_at = now + slot.backoff
+                logger.error(
+                    f"Воркер {slot.index} завершился (exitcode={exitcode}), "
+                    f"перезапуск через {slot.backoff:.0f} сек"
+                )
+                slot.backoff = min(slot.backoff * 2, WORKER_RESTART_BACKOFF_MAX)
+            elif now >= slot.restart_at:
+                slot.restarts += 1
+                self._start_worker(slot)
+
+    def _drain_load_reports(self, timeout: float) -> None:
+        """Прочитать отчеты о нагрузке от воркеров."""
+        try:
+            report = self.load_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            index = report.get("worker")
+            if index is not None and 0 <= index < self.workers:
+                self.slots[index].load = report
+            try:
+                report = self.load_queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def get_load(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Получить последнюю известную нагрузку воркеров.
+
+        Returns:
+            Словарь {индекс воркера: отчет о нагрузке}
+        """
+        return {
+            slot.index: {
+                **slot.load,
+                "alive": slot.process is not None and slot.process.is_alive(),
+                "restarts": slot.restarts,
+            }
+            for slot in self.slots
+        }
+
+    def _log_load(self) -> None:
+        """Залогировать сводку нагрузки и отметить горячие шарды."""
+        load = self.get_load()
+        bots = [item.get("bots", 0) for item in load.values()]
+        average = sum(bots) / len(bots) if bots else 0
+        for index, item in load.items():
+            hot = average and item.get("bots", 0) > average * HOT_SHARD_FACTOR
+            logger.info(
+                f"Воркер {index}: pid={item.get('pid')}, alive={item['alive']}, "
+                f"ботов={item.get('bots', 0)}, задач={item.get('tasks', 0)}, "
+                f"лаг цикла={item.get('loop_lag_ms', 0):.1f} мс, "
+                f"обновлений в очереди={item.get('updates_queued', 0)}, "
+                f"в работе={item.get('updates_in_flight', 0)}, "
+                f"отброшено={item.get('updates_shed', 0)}, "
+                f"перезапусков={item['restarts']}"
+                + (" — горячий шард" if hot else "")
+            )
+
+    def stop(self, *args: Any) -> None:
+        """Инициировать остановку супервизора (обработчик сигналов)."""
+        self._stopping = True
+
+    def run(self) -> None:
+        """Запустить воркеры и следить за ними до сигнала завершения."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        logger.info(f"Супервизор запускает {self.workers} воркеров")
+        for slot in self.slots:
+            self._start_worker(slot)
+
+        while not self._stopping:
+            self._drain_load_reports(timeout=1.0)
+            self._check_workers()
+            if time.monotonic() - self._last_report >= WORKER_LOAD_REPORT_INTERVAL:
+                self._last_report = time.monotonic()
+                self._log_load()
+
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        """Корректно остановить воркеры (SIGTERM, затем kill)."""
+        logger.info("Остановка воркеров...")
+        for slot in self.slots:
+            if slot.process is not None and slot.process.is_alive():
+                slot.process.terminate()
+        for slot in self.slots:
+            if slot.process is not None:
+                slot.process.join(timeout=30)
+                if slot.process.is_alive():
+                    logger.warning(f"Воркер {slot.index} не завершился, принудительная остановка")
+                    slot.process.kill()
+        logger.info("Все воркеры остановлены")
+
+
+def main() -> None:
+    """Запустить супервизор воркеров."""
+    Supervisor().run()
+
+
+if __name__ == '__main__':
+    main()
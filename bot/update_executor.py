@@ -0,0 +1,229 @@
+"""
+Исполнитель обновлений Telegram с порядком внутри чата и общим лимитом.
+
+Обновления разных чатов обрабатываются параллельно, а обновления одного
+чата (бот + чат) — строго по очереди, чтобы переходы FSM не перемешивались.
+Общее число одновременно выполняемых обработчиков ограничено
+UPDATE_MAX_IN_FLIGHT для всех ботов процесса. Если очередь переполнена
+(в целом или у одного чата), обновление отбрасывается, а пользователь
+получает ответ «бот занят, попробуйте еще раз».
+
+Медленный обработчик (например, тяжелый отчет админа) задерживает
+только свой чат и занимает один слот из общего лимита.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.types import CallbackQuery, Message, Update
+
+from bot.config import UPDATE_MAX_CHAT_QUEUE, UPDATE_MAX_IN_FLIGHT, UPDATE_MAX_QUEUE
+
+logger = logging.getLogger(__name__)
+
+BUSY_TEXT = "⏳ Бот сейчас перегружен, попробуйте еще раз через несколько секунд."
+
+# Не чаще одного ответа «занят» в чат за этот интервал (секунды)
+BUSY_NOTICE_INTERVAL = 10
+
+ProcessUpdate = Callable[[], Awaitable[Any]]
+
+
+def get_update_chat_key(update: Update) -> Optional[int]:
+    """
+    Определить чат (или пользователя), к которому относится обновление.
+
+    Args:
+        update: Обновление Telegram
+
+    Returns:
+        ID чата, ID пользователя или None, если порядок не важен
+    """
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is not None:
+        return chat.id
+    message = getattr(event, "message", None)
+    if isinstance(message, Message):
+        return message.chat.id
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    return None
+
+
+class UpdateExecutor:
+    """
+    Очереди обновлений по чатам с общим лимитом параллельности.
+
+    Args:
+        max_in_flight: Максимум одновременно выполняемых обработчиков
+        max_queued: Максимум принятых, но не начатых обновлений
+        max_chat_queued: Максимум обновлений в очереди одного чата
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = UPDATE_MAX_IN_FLIGHT,
+        max_queued: int = UPDATE_MAX_QUEUE,
+        max_chat_queued: int = UPDATE_MAX_CHAT_QUEUE,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_chat_queued = max_chat_queued
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queues: Dict[Tuple[int, Hashable], Deque[ProcessUpdate]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._busy_noticed: Dict[Tuple[int, Hashable], float] = {}
+
+        # Счетчики для метрик
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queued_seen = 0
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        """Запустить фоновую задачу и держать ссылку до ее завершения."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def submit(self, bot: Bot, update: Update, process: ProcessUpdate) -> bool:
+        """
+        Поставить обновление в очередь его чата.
+
+        Args:
+            bot: Бот, получивший обновление
+            update: Обновление Telegram
+            process: Фабрика корутины обработки обновления
+
+        Returns:
+            True, если обновление принято, False, если отброшено
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        chat_key = get_update_chat_key(update)
+        # Обновления без чата не упорядочиваем
+        key = (bot.id, chat_key if chat_key is not None else ("update", update.update_id))
+        queue = self._queues.get(key)
+
+        if self.queued >= self.max_queued or (queue is not None and len(queue) >= self.max_chat_queued):
+            self.shed += 1
+            logger.warning(
+                f"Обновление {update.update_id} бота {bot.id} отброшено: "
+                f"в очереди {self.queued}, в чате {len(queue) if queue else 0}"
+            )
+            self._spawn(self._reject(bot, update, key))
+            return False
+
+        self.queued += 1
+        self.max_queued_seen = max(self.max_queued_seen, self.queued)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            queue.append(process)
+            self._spawn(self._drain(key, queue))
+        else:
+            queue.append(process)
+        return True
+
+    async def _drain(self, key: Tuple[int, Hashable], queue: Deque[ProcessUpdate]) -> None:
+        """Последовательно обработать очередь одного чата."""
+        try:
+            while queue:
+                process = queue.popleft()
+                started = False
+                try:
+                    async with self._semaphore:
+                        started = True
+                        self.queued -= 1
+                        self.in_flight += 1
+                        try:
+                            await process()
+                        except Exception as e:
+                            self.failed += 1
+                            logger.error(f"Ошибка обработки обновления (бот {key[0]}): {e}", exc_info=True)
+                        finally:
+                            self.in_flight -= 1
+                            self.processed += 1
+                finally:
+                    if not started:
+                        self.queued -= 1
+        finally:
+            self._queues.pop(key, None)
+            # Оставшиеся обновления (задача отменена) больше не ждут обработки
+            self.queued -= len(queue)
+
+    async def _reject(self, bot: Bot, update: Update, key: Tuple[int, Hashable]) -> None:
+        """Ответить пользователю, что бот занят (не чаще BUSY_NOTICE_INTERVAL)."""
+        now = time.monotonic()
+        if now - self._busy_noticed.get(key, 0.0) < BUSY_NOTICE_INTERVAL:
+            return
+        self._busy_noticed[key] = now
+        if len(self._busy_noticed) > self.max_queued:
+            self._busy_noticed = {
+                k: t for k, t in self._busy_noticed.items() if now - t < BUSY_NOTICE_INTERVAL
+            }
+
+        event = update.event
+        try:
+            if isinstance(event, CallbackQuery):
+                await bot.answer_callback_query(event.id, text=BUSY_TEXT)
+            elif isinstance(event, Message):
+                await bot.send_message(chat_id=event.chat.id, text=BUSY_TEXT)
+        except Exception as e:
+            logger.debug(f"Не удалось отправить ответ о перегрузке: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Текущие показатели очередей.
+
+        Returns:
+            Словарь с числом обновлений в очереди и в работе,
+            активных чатов и счетчиками обработанных/отброшенных
+        """
+        return {
+            'updates_queued': self.queued,
+            'updates_in_flight': self.in_flight,
+            'updates_max_queued': self.max_queued_seen,
+            'update_chats': len(self._queues),
+            'updates_processed': self.processed,
+            'updates_failed': self.failed,
+            'updates_shed': self.shed,
+        }
+
+    async def wait(self, timeout: float = 10) -> None:
+        """
+        Дождаться обработки принятых обновлений.
+
+        Args:
+            timeout: Максимальное время ожидания (секунды)
+        """
+        tasks = list(self._tasks)
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+
+# Глобальный экземпляр исполнителя
+_update_executor: Optional[UpdateExecutor] = None
+
+
+def get_update_executor() -> UpdateExecutor:
+    """
+    Получить глобальный экземпляр UpdateExecutor.
+
+    Returns:
+        Экземпляр UpdateExecutor
+    """
+    global _update_executor
+
+    if _update_executor is None:
+        _update_executor = UpdateExecutor()
+
+    return _update_executor
@@ -1,9 +1,57 @@
-"""Утилиты для работы с календарем"""
+"""
+Утилиты для работы с календарем.
+
+Клавиатура календаря (около 40 кнопок) собирается один раз для набора
+(год, месяц, битовая маска доступных дней, сегодняшний день, префиксы
+callback) и дальше берется из кеша: переключение месяцев у разных
+клиентов с одинаковой доступностью не создает новых объектов pydantic.
+Маска доступности входит в ключ, поэтому изменение свободных дат
+сразу дает новую клавиатуру.
+
+ВАЖНО: возвращаемая клавиатура общая — ее нельзя изменять на месте,
+для дополнительных кнопок нужно создавать новую InlineKeyboardMarkup.
+"""
 from datetime import date, timedelta
 from calendar import monthrange
-from typing import List, Set
+from functools import lru_cache
+from typing import Set
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+# Максимум закешированных клавиатур календаря
+CALENDAR_CACHE_SIZE = 1024
+
+# Названия месяцев
+MONTH_NAMES = [
+    "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+    "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
+]
+
+# Дни недели
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+
+def get_availability_mask(year: int, month: int, available_dates: Set[date], today: date) -> int:
+    """
+    Битовая маска доступных дней месяца (бит day - 1 для дня day).
+
+    Прошедшие даты считаются недоступными.
+
+    Args:
+        year: Год
+        month: Месяц
+        available_dates: Доступные даты
+        today: Сегодняшняя дата
+
+    Returns:
+        Целое число с установленными битами доступных дней
+    """
+    mask = 0
+    for day in range(1, monthrange(year, month)[1] + 1):
+        current_date_obj = date(year, month, day)
+        if current_date_obj >= today and current_date_obj in available_dates:
+            mask |= 1 << (day - 1)
+    return mask
+
 
 def generate_calendar(
     year: int,
@@ -14,19 +62,33 @@ def generate_calendar(
     month_callback_prefix: str = "calendar_month",
     cancel_callback: str = "cancel",
 ) -> InlineKeyboardMarkup:
-    """Генерация календаря на месяц"""
-    if current_date is None:
-        current_date = date.today()
-    
-    # Названия месяцев
-    month_names = [
-        "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
-        "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
-    ]
-    
-    # Дни недели
-    weekdays = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
-    
+    """Генерация календаря на месяц (из кеша клавиатур)"""
+    today = date.today()
+    mask = get_availability_mask(year, month, available_dates, today)
+    # Отметка сегодняшнего дня нужна только в текущем месяце
+    today_day = today.day if (today.year, today.month) == (year, month) else 0
+    return _build_calendar(
+        year,
+        month,
+        mask,
+        today_day,
+        date_callback_prefix,
+        month_callback_prefix,
+        cancel_callback,
+    )
+
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def _build_calendar(
+    year: int,
+    month: int,
+    mask: int,
+    today_day: int,
+    date_callback_prefix: str,
+    month_callback_prefix: str,
+    cancel_callback: str,
+) -> InlineKeyboardMarkup:
+    """Собрать клавиатуру календаря по маске доступных дней"""
     # Получаем первый день месяца и количество дней
     first_day, days_in_month = monthrange(year, month)
     # first_day - это день недели (0 = понедельник, 6 = воскресенье)
@@ -34,7 +96,7 @@ def generate_calendar(
     buttons = []
     
     # Заголовок с месяцем и годом
-    header = f"{month_names[month - 1]} {year}"
+    header = f"{MONTH_NAMES[month - 1]} {year}"
     buttons.append([
         InlineKeyboardButton(text=header, callback_data="calendar_header")
     ])
@@ -42,43 +104,26 @@ def generate_calendar(
     # Дни недели
     buttons.append([
         InlineKeyboardButton(text=day, callback_data="calendar_weekday")
-        for day in weekdays
+        for day in WEEKDAYS
     ])
     
+    # Пустая ячейка одна на всю клавиатуру (объекты неизменяемые)
+    empty = InlineKeyboardButton(text=" ", callback_data="calendar_empty")
+    
     # Календарная сетка
     current_row = []
     # Пустые ячейки до первого дня месяца
     for _ in range(first_day):
-        current_row.append(InlineKeyboardButton(text=" ", callback_data="calendar_empty"))
+        current_row.append(empty)
     
     # Дни месяца
-    today = date.today()
     for day in range(1, days_in_month + 1):
-        current_date_obj = date(year, month, day)
-        
-        # Проверяем, доступна ли дата
-        is_available = current_date_obj in available_dates
-        is_past = current_date_obj < today
-        
-        if is_past:
-            # Прошлые даты - пустые
-            current_row.append(
-                InlineKeyboardButton(
-                    text=" ",
-                    callback_data="calendar_empty"
-                )
-            )
-        elif not is_available:
-            # Недоступные даты - пустые
-            current_row.append(
-                InlineKeyboardButton(
-                    text=" ",
-                    callback_data="calendar_empty"
-                )
-            )
+        if not mask & (1 << (day - 1)):
+            # Прошлые и недоступные даты - пустые
+            current_row.append(empty)
         else:
             # Доступные даты - кнопкой
-            if current_date_obj == today:
+            if day == today_day:
                 text = f"•{day}•"
             else:
                 text = str(day)
@@ -97,7 +142,7 @@ def generate_calendar(
     
     # Заполняем оставшиеся ячейки
     while len(current_row) < 7:
-        current_row.append(InlineKeyboardButton(text=" ", callback_data="calendar_empty"))
+        current_row.append(empty)
     if current_row:
         buttons.append(current_row)
     
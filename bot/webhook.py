@@ -0,0 +1,221 @@
+"""
+Webhook-мультиплексор для всех ботов компаний.
+
+Вместо отдельного long-polling цикла на каждую компанию поднимается
+один aiohttp сервер с маршрутом ``/tg/{secret}/{bot_id}``:
+- ``secret`` в пути и заголовок ``X-Telegram-Bot-Api-Secret-Token`` проверяются
+  до разбора тела запроса
+- ``bot_id`` определяет бота и диспетчер, в который передается обновление
+- Telegram получает ответ сразу, обработка идет через общий UpdateExecutor
+
+Простаивающие боты не держат открытых соединений с api.telegram.org.
+"""
+
+import hashlib
+import hmac
+import logging
+from functools import partial
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from pydantic import ValidationError
+
+from bot.config import (
+    WEBHOOK_BASE_URL,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+)
+from bot.dispatcher import process_update
+from bot.sharding import get_shard_index
+from bot.update_executor import get_update_executor
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+WEBHOOK_ROUTE = "/tg/{secret}/{bot_id}"
+
+
+def get_secret_token(bot_id: int, secret: str = WEBHOOK_SECRET) -> str:
+    """
+    Получить секретный токен заголовка для конкретного бота.
+
+    Токен выводится из общего секрета, поэтому у каждого бота он свой,
+    и утечка одного токена не открывает доступ к вебхукам других ботов.
+
+    Args:
+        bot_id: ID бота в Telegram
+        secret: Общий секрет вебхуков
+
+    Returns:
+        Строка из символов [0-9a-f], допустимая для secret_token
+    """
+    return hmac.new(secret.encode(), str(bot_id).encode(), hashlib.sha256).hexdigest()
+
+
+def get_webhook_url(bot_id: int) -> str:
+    """
+    Сформировать URL вебхука для бота.
+
+    Плейсхолдер ``{worker}`` в WEBHOOK_BASE_URL заменяется индексом
+    шарда, чтобы прокси мог направить запрос воркеру-владельцу бота.
+
+    Args:
+        bot_id: ID бота в Telegram
+
+    Returns:
+        Полный URL вида {WEBHOOK_BASE_URL}/tg/{secret}/{bot_id}
+    """
+    base_url = WEBHOOK_BASE_URL.replace("{worker}", str(get_shard_index())).rstrip('/')
+    return f"{base_url}/tg/{WEBHOOK_SECRET}/{bot_id}"
+
+
+class WebhookMultiplexer:
+    """
+    Единая точка приема обновлений для всех ботов.
+
+    Хранит реестр ``bot_id -> (Bot, Dispatcher)``; регистрация и снятие
+    ботов происходит без перезапуска сервера.
+    """
+
+    def __init__(self, secret: str = WEBHOOK_SECRET):
+        if not secret:
+            raise ValueError("WEBHOOK_SECRET не задан")
+        self._secret = secret
+        self._bots: Dict[int, Tuple[Bot, Dispatcher]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def bots_count(self) -> int:
+        """Количество зарегистрированных ботов."""
+        return len(self._bots)
+
+    async def register(self, bot: Bot, dispatcher: Dispatcher, drop_pending_updates: bool = True) -> None:
+        """
+        Зарегистрировать бота и установить ему вебхук.
+
+        Args:
+            bot: Экземпляр бота
+            dispatcher: Диспетчер, обрабатывающий обновления бота
+            drop_pending_updates: Пропустить накопившиеся обновления
+        """
+        self._bots[bot.id] = (bot, dispatcher)
+        await bot.set_webhook(
+            url=get_webhook_url(bot.id),
+            secret_token=get_secret_token(bot.id, self._secret),
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=drop_pending_updates,
+        )
+        logger.info(f"Вебхук установлен для бота {bot.id}")
+
+    async def unregister(self, bot: Bot, delete_webhook: bool = True) -> None:
+        """
+        Снять бота с приема обновлений.
+
+        Args:
+            bot: Экземпляр бота
+            delete_webhook: Удалить вебхук в Telegram (False, если токен уже отозван)
+        """
+        self._bots.pop(bot.id, None)
+        if delete_webhook:
+            try:
+                await bot.delete_webhook()
+                logger.info(f"Вебхук удален для бота {bot.id}")
+            except Exception as e:
+                logger.warning(f"Не удалось удалить вебхук бота {bot.id}: {e}")
+
+    def _check_secret(self, request: web.Request, bot_id: int) -> bool:
+        """Проверить секрет в пути и в заголовке запроса."""
+        path_secret = request.match_info.get("secret", "")
+        if not hmac.compare_digest(path_secret, self._secret):
+            return False
+        header_secret = request.headers.get(SECRET_HEADER, "")
+        return hmac.compare_digest(header_secret, get_secret_token(bot_id, self._secret))
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Обработать входящий запрос от Telegram.
+
+        Args:
+            request: HTTP запрос aiohttp
+
+        Returns:
+            HTTP ответ (200 — обновление принято)
+        """
+        try:
+            bot_id = int(request.match_info["bot_id"])
+        except (KeyError, ValueError):
+            return web.Response(status=404)
+
+        if not self._check_secret(request, bot_id):
+            logger.warning(f"Отклонен запрос вебхука с неверным секретом (bot_id={bot_id})")
+            return web.Response(status=401)
+
+        entry = self._bots.get(bot_id)
+        if entry is None:
+            # Бот уже снят (например, после ротации токена): отвечаем 200,
+            # чтобы Telegram не повторял доставку
+            logger.debug(f"Обновление для незарегистрированного бота {bot_id} пропущено")
+            return web.Response()
+
+        bot, dispatcher = entry
+        try:
+            data = await request.json(loads=bot.session.json_loads)
+            update = Update.model_validate(data, context={"bot": bot})
+        except (ValueError, ValidationError) as e:
+            # Некорректное тело: отвечаем 200, чтобы Telegram не повторял
+            # доставку и не задерживал следующие обновления бота
+            logger.warning(f"Некорректное обновление для бота {bot_id} пропущено: {e}")
+            return web.Response()
+
+        # Обработка идет через общий исполнитель: порядок внутри чата, общий лимит
+        get_update_executor().submit(bot, update, partial(process_update, dispatcher, bot, update))
+        return web.Response()
+
+    def create_app(self) -> web.Application:
+        """Создать aiohttp приложение с маршрутом вебхука."""
+        app = web.Application()
+        app.router.add_post(WEBHOOK_ROUTE, self.handle)
+        return app
+
+    async def start(self, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT) -> None:
+        """
+        Запустить HTTP сервер вебхуков.
+
+        Args:
+            host: Адрес для прослушивания
+            port: Порт для прослушивания
+        """
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Сервер вебхуков запущен на {host}:{port}")
+
+    async def stop(self) -> None:
+        """Остановить сервер и дождаться обработки принятых обновлений."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await get_update_executor().wait()
+        logger.info("Сервер вебхуков остановлен")
+
+
+# Глобальный экземпляр мультиплексора
+_webhook_multiplexer: Optional[WebhookMultiplexer] = None
+
+
+def get_webhook_multiplexer() -> WebhookMultiplexer:
+    """
+    Получить глобальный экземпляр WebhookMultiplexer.
+
+    Returns:
+        Экземпляр WebhookMultiplexer
+    """
+    global _webhook_multiplexer
+
+    if _webhook_multiplexer is None:
+        _webhook_multiplexer = WebhookMultiplexer()
+
+    return _webhook_multiplexer
@@ -0,0 +1,177 @@
+"""
+Бенчмарк памяти ботов: общий диспетчер против диспетчера на компанию.
+
+Для каждого количества компаний в отдельном процессе создаются боты
+и измеряется прирост памяти (tracemalloc) после импорта обработчиков:
+- shared: один Dispatcher (bot.dispatcher) и Bot на компанию
+- per_bot: Dispatcher, middleware и свой набор роутеров на компанию
+  (роутер aiogram подключается только к одному диспетчеру, поэтому
+  модули обработчиков загружаются заново для каждой компании)
+
+Использование:
+    python scripts/benchmark_dispatcher_memory.py [количество ...]
+
+Пример:
+    python scripts/benchmark_dispatcher_memory.py 10 100 1000
+"""
+import gc
+import importlib.util
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).parent.parent
+
+# Добавляем путь к корневой директории проекта
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "web" / "backend"))
+
+# Бенчмарк не должен обращаться к Redis
+os.environ["FSM_STORAGE"] = "memory"
+
+HANDLER_MODULES = [
+    "bot.handlers.admin.menu",
+    "bot.handlers.admin.bookings_edit",
+    "bot.handlers.admin.bookings",
+    "bot.handlers.master.work_order",
+    "bot.handlers.client.start",
+    "bot.handlers.client.booking",
+    "bot.handlers.client.calendar",
+    "bot.handlers.client.my_bookings",
+    "bot.handlers.client.profile",
+]
+
+DEFAULT_COUNTS = [10, 100, 1000]
+
+
+def make_company(index: int) -> SimpleNamespace:
+    """Тестовая компания (поля, которые читает контекст бота)."""
+    return SimpleNamespace(
+        id=index,
+        name=f"Салон {index}",
+        admin_telegram_id=1_000_000 + index,
+        telegram_admin_ids=[],
+        can_create_bookings=True,
+        subscription_status="active",
+        subscription_end_date=None,
+    )
+
+
+def make_token(index: int) -> str:
+    """Синтаксически корректный токен бота."""
+    return f"{100_000 + index}:AA{'x' * 33}"
+
+
+def load_fresh_routers(suffix: int) -> list:
+    """Загрузить новые копии модулей обработчиков и вернуть их роутеры."""
+    routers = []
+    for name in HANDLER_MODULES:
+        spec = importlib.util.find_spec(name)
+        module_spec = importlib.util.spec_from_file_location(f"{name}__bench_{suffix}", spec.origin)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        routers.append(module.router)
+    return routers
+
+
+def build_shared(count: int) -> list:
+    """Общий диспетчер и бот на каждую компанию."""
+    from aiogram import Bot
+    from bot.context import build_company_context, register_company_context
+    from bot.dispatcher import get_dispatcher
+    from bot.subscription_snapshot import update_subscription_snapshot
+
+    dp = get_dispatcher()
+    bots = []
+    for index in range(count):
+        company = make_company(index)
+        bot = Bot(token=make_token(index))
+        register_company_context(bot, build_company_context(company))
+        update_subscription_snapshot(company)
+        bots.append(bot)
+    return [dp, bots]
+
+
+def build_per_bot(count: int) -> list:
+    """Отдельный диспетчер с роутерами на каждую компанию."""
+    from aiogram import Bot, Dispatcher
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from bot.context import CompanyContextMiddleware, build_company_context, register_company_context
+    from bot.middleware.subscription import SubscriptionMiddleware
+    from bot.subscription_snapshot import update_subscription_snapshot
+
+    instances = []
+    for index in range(count):
+        company = make_company(index)
+        bot = Bot(token=make_token(index))
+        dp = Dispatcher(storage=MemoryStorage())
+        dp.update.outer_middleware(CompanyContextMiddleware())
+        subscription_middleware = SubscriptionMiddleware()
+        dp.message.middleware(subscription_middleware)
+        dp.callback_query.middleware(subscription_middleware)
+        for router in load_fresh_routers(index):
+            dp.include_router(router)
+        register_company_context(bot, build_company_context(company))
+        update_subscription_snapshot(company)
+        instances.append((bot, dp))
+    return instances
+
+
+def measure(mode: str, count: int) -> int:
+    """
+    Измерить прирост памяти для режима и количества компаний.
+
+    Returns:
+        Прирост памяти в байтах
+    """
+    # Импорт обработчиков не зависит от количества компаний и не учитывается
+    for name in HANDLER_MODULES:
+        importlib.import_module(name)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    objects = build_shared(count) if mode == "shared" else build_per_bot(count)
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def main():
+    """Запустить измерения в отдельных процессах и вывести таблицу."""
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        print(measure(sys.argv[2], int(sys.argv[3])))
+        return
+
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS
+
+    print(f"{'компаний':>10} {'shared, МБ':>12} {'per_bot, МБ':>12} {'на компанию, КБ':>24}")
+    for count in counts:
+        results = {}
+        for mode in ("shared", "per_bot"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", mode, str(count)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[mode] = int(output.strip().splitlines()[-1])
+
+        per_company = f"{results['shared'] / count / 1024:.1f} / {results['per_bot'] / count / 1024:.1f}"
+        print(
+            f"{count:>10} "
+            f"{results['shared'] / 1024 / 1024:>12.2f} "
+            f"{results['per_bot'] / 1024 / 1024:>12.2f} "
+            f"{per_company:>24}"
+        )
+
+
+if __name__ == "__main__":
+    main()
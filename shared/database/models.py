@@ -373,9 +373,10 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)  # NULL - уведомление нескольким администраторам
     booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True, index=True)
-    notification_type = Column(String(50), nullable=False, index=True)  # reminder_day, reminder_hour, status_change, etc.
+    notification_type = Column(String(50), nullable=False, index=True)  # reminder_day, reminder_3_hours, status_change, admin_new_booking
+    channel = Column(String(20), default="telegram", server_default="telegram", nullable=False)
     message = Column(Text, nullable=False)
     is_sent = Column(Boolean, default=False, nullable=False, index=True)
     sent_at = Column(DateTime, nullable=True)
@@ -386,6 +387,11 @@ class Notification(Base):
     user = relationship("User", back_populates="notifications")
     booking = relationship("Booking", back_populates="notifications")
 
+    __table_args__ = (
+        # Журнал доставки: одна строка на запись, вид уведомления и канал
+        Index("uq_notifications_booking_kind_channel", "booking_id", "notification_type", "channel", unique=True),
+    )
+
 
 class Broadcast(Base):
     """Рассылки"""
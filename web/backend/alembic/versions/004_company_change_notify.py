@@ -0,0 +1,92 @@
+"""Уведомления об изменениях компаний через pg_notify.
+
+Триггер на public.companies отправляет в канал company_changes JSON
+с id компании, операцией и списком измененных полей. Бот применяет
+изменение сразу, не дожидаясь периодической перезагрузки компаний.
+Значения полей (в том числе токен бота) в уведомление не попадают.
+
+Revision ID: 004_company_change_notify
+Revises: 003_create_contract_requests, 003_update_bookings_dates
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "004_company_change_notify"
+down_revision = ("003_create_contract_requests", "003_update_bookings_dates")
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создать функцию и триггер уведомлений."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION public.notify_company_change() RETURNS trigger AS $$
+        DECLARE
+            changed TEXT[] := ARRAY[]::TEXT[];
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NEW.name IS DISTINCT FROM OLD.name THEN
+                    changed := changed || 'name'::TEXT;
+                END IF;
+                IF NEW.telegram_bot_token IS DISTINCT FROM OLD.telegram_bot_token THEN
+                    changed := changed || 'telegram_bot_token'::TEXT;
+                END IF;
+                IF NEW.is_active IS DISTINCT FROM OLD.is_active THEN
+                    changed := changed || 'is_active'::TEXT;
+                END IF;
+                IF NEW.can_create_bookings IS DISTINCT FROM OLD.can_create_bookings THEN
+                    changed := changed || 'can_create_bookings'::TEXT;
+                END IF;
+                IF NEW.subscription_status IS DISTINCT FROM OLD.subscription_status THEN
+                    changed := changed || 'subscription_status'::TEXT;
+                END IF;
+                IF NEW.subscription_end_date IS DISTINCT FROM OLD.subscription_end_date THEN
+                    changed := changed || 'subscription_end_date'::TEXT;
+                END IF;
+                IF NEW.admin_telegram_id IS DISTINCT FROM OLD.admin_telegram_id THEN
+                    changed := changed || 'admin_telegram_id'::TEXT;
+                END IF;
+                IF NEW.telegram_admin_ids IS DISTINCT FROM OLD.telegram_admin_ids THEN
+                    changed := changed || 'telegram_admin_ids'::TEXT;
+                END IF;
+
+                -- Изменения, не влияющие на бота, не рассылаем
+                IF array_length(changed, 1) IS NULL THEN
+                    RETURN NEW;
+                END IF;
+            END IF;
+
+            PERFORM pg_notify(
+                'company_changes',
+                json_build_object(
+                    'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+                    'op', TG_OP,
+                    'changed', changed
+                )::text
+            );
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS companies_change_notify ON public.companies")
+    op.execute(
+        """
+        CREATE TRIGGER companies_change_notify
+        AFTER INSERT OR UPDATE OR DELETE ON public.companies
+        FOR EACH ROW EXECUTE FUNCTION public.notify_company_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Удалить триггер и функцию уведомлений."""
+    op.execute("DROP TRIGGER IF EXISTS companies_change_notify ON public.companies")
+    op.execute("DROP FUNCTION IF EXISTS public.notify_company_change()")
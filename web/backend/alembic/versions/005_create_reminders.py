@@ -0,0 +1,57 @@
+"""Очередь напоминаний о записях в public схеме.
+
+Вместо отложенных задач Celery (apply_async с eta) на каждую запись
+напоминания хранятся строками public.reminders и отправляются
+периодической задачей, которая забирает наступившие строки пачками.
+
+Revision ID: 005_create_reminders
+Revises: 004_company_change_notify
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "005_create_reminders"
+down_revision = "004_company_change_notify"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создать таблицу public.reminders."""
+    op.create_table(
+        "reminders",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "company_id",
+            sa.Integer(),
+            sa.ForeignKey("public.companies.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("booking_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(32), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("company_id", "booking_id", "kind", name="uq_reminders_booking_kind"),
+        schema="public",
+    )
+    # Частичный индекс: диспетчер ищет только ожидающие и зависшие напоминания
+    op.create_index(
+        "ix_reminders_due_pending",
+        "reminders",
+        ["due_at"],
+        schema="public",
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+
+
+def downgrade() -> None:
+    """Удалить таблицу public.reminders."""
+    op.drop_index("ix_reminders_due_pending", table_name="reminders", schema="public")
+    op.drop_table("reminders", schema="public")
@@ -0,0 +1,77 @@
+"""Outbox уведомлений в tenant схемах.
+
+Уведомления о смене статуса записи пишутся в "tenant_{id}".notification_outbox
+в одной транзакции с изменением записи и отправляются периодической
+задачей (relay), а не из обработчика запроса.
+
+Новые компании получают таблицу при инициализации tenant схемы
+(app.services.notification_outbox.outbox_ddl).
+
+Revision ID: 006_create_notification_outbox
+Revises: 005_create_reminders
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "006_create_notification_outbox"
+down_revision = "005_create_reminders"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создать notification_outbox во всех tenant схемах."""
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            schema_name TEXT;
+        BEGIN
+            FOR schema_name IN
+                SELECT nspname FROM pg_namespace WHERE nspname LIKE 'tenant_%'
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I.notification_outbox (
+                        id BIGSERIAL PRIMARY KEY,
+                        event_type VARCHAR(32) NOT NULL,
+                        booking_id INTEGER,
+                        payload JSONB NOT NULL DEFAULT ''{}''::jsonb,
+                        status VARCHAR(16) NOT NULL DEFAULT ''pending'',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        available_at TIMESTAMP NOT NULL DEFAULT now(),
+                        last_error TEXT,
+                        created_at TIMESTAMP NOT NULL DEFAULT now(),
+                        sent_at TIMESTAMP
+                    )',
+                    schema_name
+                );
+                -- Частичный индекс: relay ищет только ожидающие строки
+                EXECUTE format(
+                    'CREATE INDEX IF NOT EXISTS ix_notification_outbox_pending
+                     ON %I.notification_outbox (available_at) WHERE status = ''pending''',
+                    schema_name
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Удалить notification_outbox из tenant схем."""
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            schema_name TEXT;
+        BEGIN
+            FOR schema_name IN
+                SELECT nspname FROM pg_namespace WHERE nspname LIKE 'tenant_%'
+            LOOP
+                EXECUTE format('DROP TABLE IF EXISTS %I.notification_outbox', schema_name);
+            END LOOP;
+        END $$;
+        """
+    )
@@ -0,0 +1,87 @@
+"""Журнал доставки уведомлений: канал и уникальный индекс.
+
+Таблица notifications (public и tenant схемы) становится журналом:
+одна строка на (booking_id, notification_type, channel). Задачи
+проверяют журнал anti-join запросом и записывают итоги пачкой через
+INSERT ... ON CONFLICT. Дубликаты, накопленные до индекса, удаляются:
+остается отправленная строка, а среди них - самая новая.
+
+Revision ID: 007_notification_ledger
+Revises: 006_create_notification_outbox
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "007_notification_ledger"
+down_revision = "006_create_notification_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Добавить channel и уникальный индекс во всех схемах."""
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            schema_name TEXT;
+        BEGIN
+            FOR schema_name IN
+                SELECT table_schema
+                FROM information_schema.tables
+                WHERE table_name = 'notifications'
+                  AND (table_schema = 'public' OR table_schema LIKE 'tenant_%')
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE %I.notifications ADD COLUMN IF NOT EXISTS channel VARCHAR(20) NOT NULL DEFAULT ''telegram''',
+                    schema_name
+                );
+                -- Уведомления нескольким администраторам не привязаны к одному пользователю
+                EXECUTE format('ALTER TABLE %I.notifications ALTER COLUMN user_id DROP NOT NULL', schema_name);
+                -- ctid: у клонированных tenant таблиц id может быть не заполнен
+                EXECUTE format(
+                    'DELETE FROM %I.notifications n
+                     USING (
+                         SELECT ctid, row_number() OVER (
+                             PARTITION BY booking_id, notification_type, channel
+                             ORDER BY is_sent DESC, created_at DESC
+                         ) AS rn
+                         FROM %I.notifications
+                         WHERE booking_id IS NOT NULL
+                     ) d
+                     WHERE n.ctid = d.ctid AND d.rn > 1',
+                    schema_name, schema_name
+                );
+                EXECUTE format(
+                    'CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_booking_kind_channel
+                     ON %I.notifications (booking_id, notification_type, channel)',
+                    schema_name
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Удалить уникальный индекс и channel."""
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            schema_name TEXT;
+        BEGIN
+            FOR schema_name IN
+                SELECT table_schema
+                FROM information_schema.tables
+                WHERE table_name = 'notifications'
+                  AND (table_schema = 'public' OR table_schema LIKE 'tenant_%')
+            LOOP
+                EXECUTE format('DROP INDEX IF EXISTS %I.uq_notifications_booking_kind_channel', schema_name);
+                EXECUTE format('ALTER TABLE %I.notifications DROP COLUMN IF EXISTS channel', schema_name);
+            END LOOP;
+        END $$;
+        """
+    )
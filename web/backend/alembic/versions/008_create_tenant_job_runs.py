@@ -0,0 +1,42 @@
+"""Отметки ежедневных запусков задач по компаниям.
+
+Лист-наряды отправляются во время из настроек компании (work_order_time):
+задача проверяет компании каждые несколько минут, а public.tenant_job_runs
+хранит дату последней отправки, чтобы каждая компания получала
+лист-наряды один раз в день.
+
+Revision ID: 008_create_tenant_job_runs
+Revises: 007_notification_ledger
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "008_create_tenant_job_runs"
+down_revision = "007_notification_ledger"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создать таблицу public.tenant_job_runs."""
+    op.create_table(
+        "tenant_job_runs",
+        sa.Column(
+            "company_id",
+            sa.Integer(),
+            sa.ForeignKey("public.companies.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("job", sa.String(32), primary_key=True),
+        sa.Column("last_run_on", sa.Date(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        schema="public",
+    )
+
+
+def downgrade() -> None:
+    """Удалить таблицу public.tenant_job_runs."""
+    op.drop_table("tenant_job_runs", schema="public")
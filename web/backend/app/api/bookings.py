@@ -14,10 +14,18 @@ from shared.database.models import Booking, User, Client, Service, Master, Post
 from app.models.public_models import Company
 from sqlalchemy.orm import selectinload, load_only
 from app.services.tenant_service import get_tenant_service
+from app.services.bot_pool import get_pooled_bot
+from app.services.notification_ledger import KIND_ADMIN_NEW_BOOKING, delivery, record_deliveries
+from app.services.notification_outbox import enqueue_booking_status_notification
+from app.services.reminders import (
+    cancel_booking_reminders,
+    reschedule_booking_reminders,
+    schedule_booking_reminders,
+)
+from app.services.telegram_gateway import get_telegram_gateway
 from jose import jwt
 from app.config import settings
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from aiogram import Bot
 
 logger = logging.getLogger(__name__)
 
@@ -187,42 +195,37 @@ async def notify_admins_about_new_booking(company_id: int, booking_id: int, tena
         logger.info(f"📤 [NOTIFY_ADMIN] company_id={company_id}, booking_id={booking_id}")
         logger.info(f"📤 [NOTIFY_ADMIN] Количество админов: {len(admin_rows)}")
         
-        bot = Bot(token=bot_token)
+        bot = get_pooled_bot(bot_token)
         sent_count = 0
         failed_count = 0
         
-        try:
-            for admin_row in admin_rows:
-                admin_telegram_id = admin_row[1]
-                admin_id = admin_row[0]
-                admin_name = admin_row[3] or "Администратор"
-                
-                try:
-                    logger.info(f"📤 [NOTIFY_ADMIN] Отправляем уведомление админу: user_id={admin_id}, telegram_id={admin_telegram_id}, full_name={admin_name}")
-                    result = await bot.send_message(
-                        chat_id=admin_telegram_id,
-                        text=message_text
-                    )
-                    sent_count += 1
-                    logger.info(f"✅ [NOTIFY_ADMIN] Уведомление отправлено успешно: user_id={admin_id}, telegram_id={admin_telegram_id}, message_id={result.message_id}")
-                except Exception as e:
-                    error_msg = str(e)
-                    failed_count += 1
-                    logger.error(f"❌ [NOTIFY_ADMIN] Ошибка отправки админу {admin_id} (telegram_id={admin_telegram_id}): {error_msg}")
-                    
-                    # Проверяем специфичные ошибки Telegram API
-                    error_lower = error_msg.lower()
-                    if "chat not found" in error_lower or "user not found" in error_lower:
-                        logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Админ {admin_id} не начал диалог с ботом")
-                    elif "blocked" in error_lower:
-                        logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Админ {admin_id} заблокировал бота")
-                    elif "forbidden" in error_lower:
-                        logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Бот не может отправить сообщение админу {admin_id}")
-        finally:
+        for admin_row in admin_rows:
+            admin_telegram_id = admin_row[1]
+            admin_id = admin_row[0]
+            admin_name = admin_row[3] or "Администратор"
+            
             try:
-                await bot.session.close()
+                logger.info(f"📤 [NOTIFY_ADMIN] Отправляем уведомление админу: user_id={admin_id}, telegram_id={admin_telegram_id}, full_name={admin_name}")
+                result = await get_telegram_gateway().send_message(
+                    bot,
+                    chat_id=admin_telegram_id,
+                    text=message_text
+                )
+                sent_count += 1
+                logger.info(f"✅ [NOTIFY_ADMIN] Уведомление отправлено успешно: user_id={admin_id}, telegram_id={admin_telegram_id}, message_id={result.message_id}")
             except Exception as e:
-                logger.warning(f"⚠️ [NOTIFY_ADMIN] Ошибка закрытия bot session: {e}")
+                error_msg = str(e)
+                failed_count += 1
+                logger.error(f"❌ [NOTIFY_ADMIN] Ошибка отправки админу {admin_id} (telegram_id={admin_telegram_id}): {error_msg}")
+                
+                # Проверяем специфичные ошибки Telegram API
+                error_lower = error_msg.lower()
+                if "chat not found" in error_lower or "user not found" in error_lower:
+                    logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Админ {admin_id} не начал диалог с ботом")
+                elif "blocked" in error_lower:
+                    logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Админ {admin_id} заблокировал бота")
+                elif "forbidden" in error_lower:
+                    logger.warning(f"⚠️ [NOTIFY_ADMIN] Причина: Бот не может отправить сообщение админу {admin_id}")
         
         logger.info(f"✅ [NOTIFY_ADMIN] === ИТОГИ ОТПРАВКИ ===")
         logger.info(f"✅ [NOTIFY_ADMIN] company_id={company_id}, booking_id={booking_id}")
@@ -230,6 +233,11 @@ async def notify_admins_about_new_booking(company_id: int, booking_id: int, tena
         if failed_count > 0:
             logger.warning(f"⚠️ [NOTIFY_ADMIN] Не отправлено: {failed_count} из {len(admin_rows)}")
         
+        # Журнал доставки: периодическая задача не отправит это уведомление повторно
+        if sent_count > 0:
+            await record_deliveries(tenant_session, schema_name, KIND_ADMIN_NEW_BOOKING, [delivery(booking_id, message_text)])
+            await tenant_session.commit()
+        
         return sent_count > 0
         
     except Exception as e:
@@ -248,174 +256,6 @@ async def notify_admins_about_new_booking(company_id: int, booking_id: int, tena
             logger.warning(f"⚠️ [NOTIFY_ADMIN] Ошибка восстановления search_path: {e}")
 
 
-async def send_booking_status_notification(company_id: int, booking_id: int, new_status: str, tenant_session: AsyncSession) -> bool:
-    """Отправить уведомление об изменении статуса записи клиенту через Telegram
-    
-    Returns:
-        True если уведомление отправлено успешно, False в противном случае
-    """
-    # ВАЖНО: не используем имя `text` для строковых переменных в этой функции,
-    # так как `text()` используется для SQLAlchemy (иначе будет UnboundLocalError).
-    from sqlalchemy import text as sql_text
-
-    logger.info(f"📤 [NOTIFICATION] Начало отправки уведомления: company_id={company_id}, booking_id={booking_id}, status={new_status}")
-    
-    # Сохраняем текущий search_path
-    original_search_path = None
-    try:
-        # Получаем текущий search_path
-        path_result = await tenant_session.execute(sql_text("SHOW search_path"))
-        original_search_path = path_result.scalar()
-        logger.info(f"📤 [NOTIFICATION] Текущий search_path: {original_search_path}")
-        
-        # Получаем компанию и bot token из public схемы
-        await tenant_session.execute(sql_text('SET search_path TO public'))
-        company_result = await tenant_session.execute(
-            sql_text('SELECT id, name, telegram_bot_token FROM public.companies WHERE id = :company_id'),
-            {"company_id": company_id}
-        )
-        company_row = company_result.fetchone()
-        
-        if not company_row or not company_row[2]:
-            logger.warning(f"⚠️ [NOTIFICATION] Компания {company_id} не найдена или нет bot token")
-            return False
-        
-        bot_token = company_row[2]
-        company_name = company_row[1]
-        logger.info(f"📤 [NOTIFICATION] Компания найдена: name={company_name}, bot_token={bot_token[:10]}...")
-        
-        # Возвращаем search_path для tenant схемы
-        await tenant_session.execute(sql_text(f'SET search_path TO "tenant_{company_id}", public'))
-        
-        # Получаем запись через прямой SQL (избегаем ORM проблем с total_visits)
-        booking_result = await tenant_session.execute(
-            sql_text(f"""
-                SELECT b.id, b.booking_number, b.service_date, b.time, b.client_id, b.service_id
-                FROM "tenant_{company_id}".bookings b
-                WHERE b.id = :booking_id
-            """),
-            {"booking_id": booking_id}
-        )
-        booking_row = booking_result.fetchone()
-        
-        if not booking_row:
-            logger.warning(f"⚠️ [NOTIFICATION] Запись {booking_id} не найдена в tenant_{company_id}")
-            return False
-        
-        booking_id_db = booking_row[0]
-        booking_number = booking_row[1]
-        booking_date = booking_row[2]
-        booking_time = booking_row[3]
-        client_id = booking_row[4]
-        service_id = booking_row[5]
-        
-        logger.info(f"📤 [NOTIFICATION] Запись найдена: booking_number={booking_number}, client_id={client_id}")
-        
-        # Получаем client.user_id через прямой SQL
-        client_result = await tenant_session.execute(
-            sql_text(f'SELECT user_id FROM "tenant_{company_id}".clients WHERE id = :client_id'),
-            {"client_id": client_id}
-        )
-        client_row = client_result.fetchone()
-        
-        if not client_row or not client_row[0]:
-            logger.warning(f"⚠️ [NOTIFICATION] Клиент {client_id} не найден или нет user_id")
-            return False
-        
-        user_id = client_row[0]
-        logger.info(f"📤 [NOTIFICATION] Ищем telegram_id для user_id={user_id}")
-        
-        # Получаем telegram_id из users
-        user_result = await tenant_session.execute(
-            sql_text(f'SELECT telegram_id FROM "tenant_{company_id}".users WHERE id = :user_id'),
-            {"user_id": user_id}
-        )
-        user_row = user_result.fetchone()
-        
-        telegram_id = None
-        if user_row and user_row[0]:
-            telegram_id = user_row[0]
-            logger.info(f"✅ [NOTIFICATION] telegram_id найден: {telegram_id}")
-        else:
-            logger.warning(f"⚠️ [NOTIFICATION] telegram_id не найден для user_id={user_id}")
-            return False
-        
-        # Получаем название услуги
-        service_result = await tenant_session.execute(
-            sql_text(f'SELECT name FROM "tenant_{company_id}".services WHERE id = :service_id'),
-            {"service_id": service_id}
-        )
-        service_row = service_result.fetchone()
-        service_name = service_row[0] if service_row else "Услуга"
-        
-        # Формируем сообщение
-        status_messages = {
-            "new": "🆕 Ваша запись создана и ожидает подтверждения.",
-            "confirmed": "✅ Ваша запись подтверждена!",
-            "completed": "✔️ Запись завершена. Спасибо за визит!",
-            "cancelled": "❌ Запись отменена",
-            "no_show": "⚠️ Вы не явились на запись",
-        }
-        
-        message = status_messages.get(new_status, f"Статус записи изменен: {new_status}")
-        
-        date_str = booking_date.strftime("%d.%m.%Y")
-        time_str = booking_time.strftime("%H:%M")
-        
-        message_text = f"{message}\n\n"
-        message_text += f"Номер записи: {booking_number}\n"
-        message_text += f"Дата: {date_str}\n"
-        message_text += f"Время: {time_str}\n"
-        message_text += f"Услуга: {service_name}\n"
-        
-        logger.info(f"📤 [NOTIFICATION] Отправляем сообщение в Telegram: company_id={company_id}, chat_id={telegram_id}, text_length={len(message_text)}")
-        logger.info(f"📤 [NOTIFICATION] Текст сообщения: {message_text[:100]}...")
-        
-        # Создаем бота с токеном компании
-        logger.info(f"📤 [NOTIFICATION] Создаем Bot объект с токеном: {bot_token[:10]}...")
-        bot = Bot(token=bot_token)
-        try:
-            logger.info(f"📤 [NOTIFICATION] Пытаемся отправить сообщение: chat_id={telegram_id}, text_length={len(message_text)}")
-            result = await bot.send_message(
-                chat_id=telegram_id,
-                text=message_text
-            )
-            logger.info(f"✅ [NOTIFICATION] Сообщение отправлено успешно: message_id={result.message_id}, chat_id={telegram_id}, date={result.date}")
-            return True
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"❌ [NOTIFICATION] Ошибка отправки сообщения в Telegram: {error_msg}", exc_info=True)
-            
-            # Проверяем специфичные ошибки Telegram API
-            if "chat not found" in error_msg.lower() or "user not found" in error_msg.lower():
-                logger.warning(f"⚠️ [NOTIFICATION] Клиент {telegram_id} не найден или не начал диалог с ботом. Нужно отправить /start боту.")
-            elif "blocked" in error_msg.lower():
-                logger.warning(f"⚠️ [NOTIFICATION] Клиент {telegram_id} заблокировал бота.")
-            elif "forbidden" in error_msg.lower():
-                logger.warning(f"⚠️ [NOTIFICATION] Бот не может отправить сообщение клиенту {telegram_id} (возможно, клиент не начал диалог).")
-            
-            return False
-        finally:
-            try:
-                await bot.session.close()
-                logger.debug(f"🔒 [NOTIFICATION] Bot session закрыт")
-            except Exception as e:
-                logger.warning(f"⚠️ [NOTIFICATION] Ошибка закрытия bot session: {e}")
-            
-    except Exception as e:
-        logger.error(f"❌ [NOTIFICATION] Ошибка отправки уведомления об изменении статуса для записи {booking_id}: {e}", exc_info=True)
-        return False
-    finally:
-        # Восстанавливаем search_path
-        try:
-            if original_search_path:
-                await tenant_session.execute(sql_text(f'SET search_path TO {original_search_path}'))
-            else:
-                await tenant_session.execute(sql_text(f'SET search_path TO "tenant_{company_id}", public'))
-        except Exception as e:
-            logger.warning(f"⚠️ [NOTIFICATION] Ошибка восстановления search_path: {e}")
-
-
 @router.get("", response_model=BookingListResponse)
 async def get_bookings(
     request: Request,
@@ -977,6 +817,10 @@ async def create_booking(
     await tenant_session.flush()  # Получаем ID без коммита
     booking_id = booking.id
     
+    # Запись создана сразу подтвержденной - планируем напоминания в той же транзакции
+    if booking.status == "confirmed":
+        await schedule_booking_reminders(tenant_session, company_id, booking_id, booking.service_date, booking.time)
+    
     await tenant_session.commit()
     
     # Убеждаемся, что search_path установлен для tenant схемы перед загрузкой
@@ -1164,36 +1008,25 @@ async def update_booking(
         elif booking_data.status == "cancelled" and old_status != "cancelled":
             booking.cancelled_at = now
     
-    await tenant_session.commit()
-    
-    # Планируем напоминания при подтверждении записи
-    if booking_data.status is not None and booking_data.status == "confirmed" and old_status != "confirmed":
-        try:
-            from app.tasks.notifications import schedule_booking_reminders
-            schedule_booking_reminders(
-                company_id=company_id,
-                booking_id=booking_id,
-                booking_date=booking.service_date,
-                booking_time=booking.time
-            )
-            logger.info(f"📅 Напоминания запланированы для записи {booking_id}")
-        except Exception as e:
-            logger.error(f"❌ Ошибка планирования напоминаний для записи {booking_id}: {e}", exc_info=True)
-    
-    # Отправляем уведомление клиенту при смене статуса
-    notification_sent = False
+    # Напоминания меняются в одной транзакции с записью:
+    # подтверждение - планируем, снятие подтверждения - отменяем, перенос - сдвигаем
+    if booking.status == "confirmed" and old_status != "confirmed":
+        await schedule_booking_reminders(tenant_session, company_id, booking_id, booking.service_date, booking.time)
+        logger.info(f"📅 Напоминания запланированы для записи {booking_id}")
+    elif old_status == "confirmed" and booking.status != "confirmed":
+        await cancel_booking_reminders(tenant_session, company_id, booking_id)
+    elif booking.status == "confirmed" and (booking_data.service_date is not None or booking_data.time is not None):
+        await reschedule_booking_reminders(tenant_session, company_id, booking_id, booking.service_date, booking.time)
+    
+    # Уведомление клиенту о смене статуса пишется в outbox той же транзакцией,
+    # отправляет его relay (app.tasks.notifications.relay_notification_outbox_task)
+    notification_queued = False
     if booking_data.status is not None and booking_data.status != old_status:
-        logger.info(f"📤 [UPDATE] Статус изменился: {old_status} -> {booking_data.status}, отправляем уведомление")
-        try:
-            # Отправляем уведомление напрямую (без Celery, так как worker может быть не запущен)
-            notification_sent = await send_booking_status_notification(company_id, booking_id, booking_data.status, tenant_session)
-            if notification_sent:
-                logger.info(f"✅ [UPDATE] Уведомление отправлено успешно: company_id={company_id}, booking_id={booking_id}, status={booking_data.status}")
-            else:
-                logger.warning(f"⚠️ [UPDATE] Уведомление не отправлено: company_id={company_id}, booking_id={booking_id}, status={booking_data.status}")
-        except Exception as e:
-            logger.error(f"❌ [UPDATE] Ошибка отправки уведомления: {e}", exc_info=True)
-            notification_sent = False
+        await enqueue_booking_status_notification(tenant_session, company_id, booking_id, booking_data.status)
+        notification_queued = True
+        logger.info(f"📤 [UPDATE] Статус изменился: {old_status} -> {booking_data.status}, уведомление поставлено в outbox")
+    
+    await tenant_session.commit()
     
     # Убеждаемся, что search_path установлен для tenant схемы
     await tenant_session.execute(text(f'SET search_path TO "tenant_{company_id}", public'))
@@ -1243,7 +1076,7 @@ async def update_booking(
         "service_name": None,
         "master_name": None,
         "post_number": None,
-        "notification_sent": notification_sent,
+        "notification_sent": False,
     }
     
     if booking.client:
@@ -1262,6 +1095,9 @@ async def update_booking(
     if booking.post:
         booking_dict["post_number"] = booking.post.number
     
-    logger.info(f"📤 [UPDATE] Возвращаем ответ: booking_id={booking_id}, notification_sent={notification_sent}, client_telegram_id={booking_dict.get('client_telegram_id')}")
+    # Уведомление поставлено в очередь и у клиента есть Telegram - relay его доставит
+    booking_dict["notification_sent"] = notification_queued and bool(booking_dict["client_telegram_id"])
+    
+    logger.info(f"📤 [UPDATE] Возвращаем ответ: booking_id={booking_id}, notification_sent={booking_dict['notification_sent']}, client_telegram_id={booking_dict.get('client_telegram_id')}")
     
     return BookingResponse.model_validate(booking_dict)
@@ -15,10 +15,11 @@ from sqlalchemy.orm import selectinload
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram import Bot
 
 from app.database import get_db
 from app.services.tenant_service import get_tenant_service
+from app.services.bot_pool import get_pooled_bot
+from app.services.telegram_gateway import get_telegram_gateway
 from app.models.public_models import Company, Subscription
 from app.schemas.public_schemas import CompanyResponse, SubscriptionResponse
 from bot.bot_manager import get_bot_manager
@@ -514,16 +515,16 @@ async def send_notification_to_company(
     
     # Отправляем уведомление через Telegram Bot API
     try:
-        bot = Bot(token=company.telegram_bot_token)
+        bot = get_pooled_bot(company.telegram_bot_token)
         
-        await bot.send_message(
+        await get_telegram_gateway().send_message(
+            bot,
             chat_id=chat_id,
             text=message,
             parse_mode="HTML"
         )
         
-        await bot.session.close()
-        
+
         logger.info(f"Уведомление отправлено компании {company.name} (ID: {company_id})")
         
         return {
@@ -14,7 +14,9 @@ from app.deps.tenant import get_tenant_db
 from .auth import get_current_user
 from shared.database.models import User, Broadcast, Client, Booking
 from ..schemas.broadcast import BroadcastResponse, BroadcastListResponse, BroadcastCreateRequest
-from aiogram import Bot
+from app.services.bot_pool import get_pooled_bot
+from app.services.telegram_gateway import Priority, get_telegram_gateway
+from app.services.telegram_media import get_media_registry
 
 router = APIRouter(prefix="/api/broadcasts", tags=["broadcasts"])
 
@@ -29,7 +31,7 @@ async def send_broadcast_task(company_id: int, broadcast_id: int, db_url: str):
     # Создаем движок для этой задачи
     engine = create_async_engine(db_url, echo=False)
     async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    bot = Bot(token=BOT_TOKEN)
+    bot = get_pooled_bot(BOT_TOKEN)
     
     try:
         async with async_session_maker() as session:
@@ -132,18 +134,25 @@ async def send_broadcast_task(company_id: int, broadcast_id: int, db_url: str):
                     # Отправляем текст
                     if broadcast.image_path:
                         # Если есть изображение, отправляем фото с подписью
-                        from aiogram.types import FSInputFile
-                        photo = FSInputFile(broadcast.image_path)
-                        await bot.send_photo(
-                            chat_id=user.telegram_id,
-                            photo=photo,
-                            caption=broadcast.text
+                        # (файл загружается один раз, дальше отправляется file_id)
+                        await get_media_registry().send_file(
+                            bot,
+                            broadcast.image_path,
+                            lambda photo: get_telegram_gateway().send_photo(
+                                bot,
+                                chat_id=user.telegram_id,
+                                photo=photo,
+                                caption=broadcast.text,
+                                priority=Priority.BULK
+                            ),
                         )
                     else:
                         # Отправляем только текст
-                        await bot.send_message(
+                        await get_telegram_gateway().send_message(
+                            bot,
                             chat_id=user.telegram_id,
-                            text=broadcast.text
+                            text=broadcast.text,
+                            priority=Priority.BULK
                         )
                     
                     broadcast.total_sent += 1
@@ -170,7 +179,6 @@ async def send_broadcast_task(company_id: int, broadcast_id: int, db_url: str):
                 broadcast.status = "failed"
                 await session.commit()
     finally:
-        await bot.session.close()
         await engine.dispose()
 
 @router.get("", response_model=BroadcastListResponse)
@@ -299,7 +299,7 @@ async def yookassa_webhook(
                         plan_name=plan.name,
                         subscription_end_date=company.subscription_end_date
                     )
-                    logger.info(f"Приветственное email отправлено на {company.email}")
+                    logger.info(f"Приветственное email поставлено в очередь на {company.email}")
                     
                     # Telegram уведомление владельцу
                     await send_activation_notification(
@@ -506,7 +506,7 @@ async def simulate_payment_success(
             plan_name=plan.name,
             subscription_end_date=company.subscription_end_date
         )
-        logger.info(f"Приветственное email отправлено на {company.email}")
+        logger.info(f"Приветственное email поставлено в очередь на {company.email}")
     except Exception as email_error:
         logger.error(f"Ошибка отправки email: {email_error}")
     
@@ -1,12 +1,54 @@
-"""Конфигурация Celery"""
+"""
+Конфигурация Celery (единая для worker и beat).
+
+Задачи разделены по очередям, каждую очередь обслуживает свой пул worker
+(см. docker-compose.yml), поэтому массовая рассылка или ежедневный проход
+по подпискам не задерживают срочные уведомления:
+- realtime: напоминания из очереди, outbox статусов, уведомления по одной записи
+- scheduled: периодические задачи по компаниям (лист-наряды, сводки админам)
+- bulk: массовые рассылки
+- maintenance: обслуживание (подписки компаний)
+
+Результаты задач не сохраняются: все задачи запускаются без ожидания
+результата, итоги пишутся в лог и в БД.
+"""
 from celery import Celery
+from kombu import Queue
+
 from app.config import settings
 
+QUEUE_REALTIME = "realtime"
+QUEUE_SCHEDULED = "scheduled"
+QUEUE_BULK = "bulk"
+QUEUE_MAINTENANCE = "maintenance"
+
+# Маршрутизация задач по очередям (имя задачи или шаблон)
+TASK_ROUTES = {
+    "app.tasks.notifications.dispatch_due_reminders_task": {"queue": QUEUE_REALTIME},
+    "app.tasks.notifications.relay_notification_outbox_task": {"queue": QUEUE_REALTIME},
+    "app.tasks.notifications.send_status_change_notification_task": {"queue": QUEUE_REALTIME},
+    "app.tasks.notifications.send_single_reminder_day_before_task": {"queue": QUEUE_REALTIME},
+    "app.tasks.notifications.send_single_reminder_3_hours_before_task": {"queue": QUEUE_REALTIME},
+    "app.tasks.notifications.send_work_orders_to_masters_task": {"queue": QUEUE_SCHEDULED},
+    "app.tasks.notifications.notify_admin_new_bookings_task": {"queue": QUEUE_SCHEDULED},
+    "app.tasks.notifications.send_reminder_day_before_task": {"queue": QUEUE_BULK},
+    "app.tasks.notifications.send_reminder_3_hours_before_task": {"queue": QUEUE_BULK},
+    "app.tasks.subscription_notifications.*": {"queue": QUEUE_MAINTENANCE},
+}
+
+
+def broker_url() -> str:
+    """URL брокера: CELERY_BROKER_URL или Redis из настроек."""
+    return settings.CELERY_BROKER_URL or f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+
+
 celery_app = Celery(
-    "barber",
-    broker=f"redis://redis:6379/0",
-    backend=f"redis://redis:6379/0",
-    include=["app.tasks.notifications", "app.tasks.subscription_notifications"]
+    "barber_saas",
+    broker=broker_url(),
+    include=[
+        "app.tasks.notifications",
+        "app.tasks.subscription_notifications",
+    ]
 )
 
 celery_app.conf.update(
@@ -15,13 +57,21 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
-    task_track_started=True,
     task_time_limit=30 * 60,  # 30 минут
     task_soft_time_limit=25 * 60,  # 25 минут
+    # Очереди и маршруты; задачи без маршрута попадают в scheduled
+    task_queues=[Queue(name) for name in (QUEUE_REALTIME, QUEUE_SCHEDULED, QUEUE_BULK, QUEUE_MAINTENANCE)],
+    task_default_queue=QUEUE_SCHEDULED,
+    task_routes=TASK_ROUTES,
+    # Результаты не нужны: задачи запускаются без ожидания результата
+    task_ignore_result=True,
+    # Worker берет по одной задаче на процесс (--prefetch-multiplier переопределяет для bulk),
+    # чтобы длинная задача не держала за собой очередь
+    worker_prefetch_multiplier=1,
+    worker_max_tasks_per_child=1000,
 )
 
-# Импортируем расписание из celery_beat
+# Расписание периодических задач (celery_beat.py)
 from celery_beat import beat_schedule
 
-
-
+celery_app.conf.beat_schedule = beat_schedule
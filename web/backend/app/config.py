@@ -30,7 +30,50 @@ class Settings(BaseSettings):
     REDIS_HOST: str = os.getenv("REDIS_HOST", "redis")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
+    # Явный URL брокера Celery (по умолчанию redis://REDIS_HOST:REDIS_PORT/REDIS_DB)
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "")
     
+    # Исходящие сообщения Telegram (лимиты на процесс)
+    TELEGRAM_BOT_RATE: float = float(os.getenv("TELEGRAM_BOT_RATE", "25"))
+    TELEGRAM_BULK_RATE: float = float(os.getenv("TELEGRAM_BULK_RATE", "15"))
+    TELEGRAM_CHAT_RATE: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    TELEGRAM_MAX_RETRIES: int = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+    
+    # Пул ботов для исходящих сообщений (общее HTTP соединение с Bot API)
+    BOT_POOL_MAX_SIZE: int = int(os.getenv("BOT_POOL_MAX_SIZE", "500"))
+    BOT_POOL_IDLE_TTL: int = int(os.getenv("BOT_POOL_IDLE_TTL", "600"))
+    BOT_POOL_CONNECTIONS: int = int(os.getenv("BOT_POOL_CONNECTIONS", "100"))
+
+    # Кеш file_id загруженных в Telegram файлов (записей на процесс)
+    TELEGRAM_MEDIA_CACHE_SIZE: int = int(os.getenv("TELEGRAM_MEDIA_CACHE_SIZE", "10000"))
+
+    # Очередь напоминаний о записях: размер пачки, таймаут зависшей отправки (минуты), число попыток
+    # и задержка повтора после первой неудачной отправки (секунды, далее удваивается)
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "200"))
+    REMINDER_STALE_MINUTES: int = int(os.getenv("REMINDER_STALE_MINUTES", "10"))
+    REMINDER_MAX_ATTEMPTS: int = int(os.getenv("REMINDER_MAX_ATTEMPTS", "3"))
+    REMINDER_RETRY_BASE_SECONDS: int = int(os.getenv("REMINDER_RETRY_BASE_SECONDS", "120"))
+
+    # Массовые задачи по компаниям: одновременно обрабатываемых компаний,
+    # одновременных отправок внутри компании, таймаут компании (секунды)
+    TENANT_FANOUT_CONCURRENCY: int = int(os.getenv("TENANT_FANOUT_CONCURRENCY", "10"))
+    TENANT_SEND_CONCURRENCY: int = int(os.getenv("TENANT_SEND_CONCURRENCY", "10"))
+    TENANT_JOB_TIMEOUT: int = int(os.getenv("TENANT_JOB_TIMEOUT", "300"))
+
+    # Outbox уведомлений: период relay (секунды), размер пачки, число попыток,
+    # задержка после первой неудачи и аренда захваченной строки (секунды)
+    OUTBOX_RELAY_INTERVAL: int = int(os.getenv("OUTBOX_RELAY_INTERVAL", "5"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_BASE_SECONDS: int = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+
+    # Сводка новых записей администраторам: минимальное окно накопления
+    # (секунды, если notify_admin_delay_minutes меньше) и глубина поиска
+    # пропущенных ботом записей периодической задачей (минуты)
+    ADMIN_DIGEST_MIN_WINDOW: int = int(os.getenv("ADMIN_DIGEST_MIN_WINDOW", "60"))
+    ADMIN_DIGEST_LOOKBACK_MINUTES: int = int(os.getenv("ADMIN_DIGEST_LOOKBACK_MINUTES", "60"))
+
     # Договоры
     CONTRACTS_DIR: str = os.getenv("CONTRACTS_DIR", "/app/dogovor/generated")
     CONTRACTS_PUBLIC_BASE_URL: str = os.getenv(
@@ -7,11 +7,12 @@
 - Subscription - подписки компаний
 - Payment - платежи через Юкассу
 - SuperAdmin - супер-администраторы системы
+- Reminder - очередь напоминаний о записях всех компаний
 """
 
 from datetime import date
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Date, Numeric, Text, ARRAY, func
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Date, Numeric, Text, ARRAY, Index, UniqueConstraint, func, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.schema import MetaData
 from sqlalchemy.dialects.postgresql import JSONB
@@ -237,3 +238,53 @@ class ContractRequest(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class Reminder(Base):
+    """
+    Напоминание о записи в очереди отправки (public схема).
+    
+    Строка создается при подтверждении записи для каждого вида напоминания,
+    перенос записи меняет due_at, отмена - статус. Периодическая задача
+    забирает наступившие напоминания пачками (FOR UPDATE SKIP LOCKED).
+    """
+    __tablename__ = "reminders"
+    __table_args__ = (
+        UniqueConstraint("company_id", "booking_id", "kind", name="uq_reminders_booking_kind"),
+        Index("ix_reminders_due_pending", "due_at", postgresql_where=text("status IN ('pending', 'processing')")),
+        {"schema": "public"},
+    )
+    
+    id = Column(BigInteger, primary_key=True)
+    company_id = Column(Integer, ForeignKey("public.companies.id", ondelete="CASCADE"), nullable=False)
+    booking_id = Column(Integer, nullable=False)
+    
+    # Вид напоминания: day_before, 3_hours
+    kind = Column(String(32), nullable=False)
+    # Время отправки (локальное время сервера, как у записи)
+    due_at = Column(DateTime, nullable=False)
+    # pending, processing, sent, failed, cancelled
+    status = Column(String(16), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class TenantJobRun(Base):
+    """
+    Отметка ежедневного запуска задачи для компании (public схема).
+    
+    Периодическая задача проверяет время из настроек компании каждые
+    несколько минут; отметка last_run_on гарантирует, что за день
+    задача выполнится для компании один раз, даже при параллельных воркерах.
+    """
+    __tablename__ = "tenant_job_runs"
+    __table_args__ = {"schema": "public"}
+    
+    company_id = Column(Integer, ForeignKey("public.companies.id", ondelete="CASCADE"), primary_key=True)
+    # Вид задачи: work_orders
+    job = Column(String(32), primary_key=True)
+    last_run_on = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,225 @@
+"""
+Сводка новых записей для администраторов компании.
+
+Администраторы получают не сообщение на каждую запись, а одну сводку
+на пачку записей: бот копит новые записи компании в окне
+(bot.services.admin_digest), периодическая задача подбирает записи,
+которые бот не успел отправить (например, после перезапуска).
+
+Оба пути загружают записи одним запросом, отбрасывают уже уведомленные
+по журналу доставки, отправляют каждому администратору одно сообщение
+с кнопками действий и записывают итог в журнал пачкой.
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.notification_ledger import (
+    KIND_ADMIN_NEW_BOOKING,
+    delivery,
+    ledger_params,
+    not_notified_clause,
+    record_deliveries,
+)
+from app.services.telegram_gateway import get_telegram_gateway
+from app.services.tenant_fanout import send_concurrently
+
+logger = logging.getLogger(__name__)
+
+# Настройка компании: задержка уведомления администраторов (минуты)
+DELAY_SETTING_KEY = "notify_admin_delay_minutes"
+
+# Сколько записей показывать в сводке и сколько кнопок под ней
+DIGEST_MAX_ITEMS = 10
+
+# Колонки записей для сводки
+DIGEST_COLUMNS = """
+    b.id, b.booking_number, b.service_date, b.time,
+    c.full_name AS client_name, c.phone AS client_phone,
+    s.name AS service_name
+"""
+
+
+def digest_from_clause(schema_name: str) -> str:
+    """FROM с клиентами и услугами для выборки записей сводки."""
+    return f"""
+        FROM "{schema_name}".bookings b
+        LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
+        LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
+    """
+
+
+async def read_delay_minutes(session: AsyncSession, schema_name: str) -> int:
+    """
+    Задержка уведомления администраторов из настроек компании.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+
+    Returns:
+        Задержка в минутах (0, если не задана или некорректна)
+    """
+    result = await session.execute(
+        text(f'SELECT value FROM "{schema_name}".settings WHERE key = :key'),
+        {"key": DELAY_SETTING_KEY}
+    )
+    value = result.scalar_one_or_none()
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def digest_window_seconds(delay_minutes: int, min_window: int = settings.ADMIN_DIGEST_MIN_WINDOW) -> int:
+    """
+    Окно накопления записей перед отправкой сводки.
+
+    Args:
+        delay_minutes: Задержка из настроек компании (минуты)
+        min_window: Минимальное окно (секунды)
+
+    Returns:
+        Окно в секундах
+    """
+    return max(delay_minutes * 60, min_window)
+
+
+async def load_digest_bookings(session: AsyncSession, schema_name: str, booking_ids: Sequence[int]) -> List:
+    """
+    Загрузить новые записи для сводки, по которым администраторы еще не уведомлены.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        booking_ids: ID записей
+
+    Returns:
+        Строки (id, booking_number, service_date, time, client_name, client_phone, service_name)
+    """
+    if not booking_ids:
+        return []
+
+    result = await session.execute(
+        text(f"""
+            SELECT {DIGEST_COLUMNS}
+            {digest_from_clause(schema_name)}
+            WHERE b.id = ANY(:booking_ids)
+              AND b.status = 'new'
+              AND {not_notified_clause(schema_name)}
+            ORDER BY b.created_at
+        """),
+        {"booking_ids": list(booking_ids), **ledger_params(KIND_ADMIN_NEW_BOOKING)}
+    )
+    return list(result.fetchall())
+
+
+def render_admin_digest(rows: Sequence) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Текст и кнопки сводки.
+
+    Для одной записи - подробное сообщение с кнопками подтверждения
+    и отклонения, для нескольких - список с кнопками карточек записей.
+
+    Args:
+        rows: Записи (см. load_digest_bookings)
+
+    Returns:
+        (текст, клавиатура)
+    """
+    if len(rows) == 1:
+        booking_id, booking_number, service_date, booking_time, client_name, client_phone, service_name = rows[0]
+        message_text = "🔔 Новая запись!\n\n"
+        message_text += f"📋 {booking_number}\n"
+        message_text += f"   👤 {client_name or 'Неизвестно'}\n"
+        message_text += f"   📞 {client_phone or 'Не указан'}\n"
+        message_text += f"   📅 {service_date.strftime('%d.%m.%Y')} в {booking_time.strftime('%H:%M')}\n"
+        message_text += f"   🛠️ {service_name or 'Не указана'}\n"
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_{booking_id}"),
+            InlineKeyboardButton(text="❌ Отклонить", callback_data=f"reject_{booking_id}"),
+        ]])
+        return message_text, keyboard
+
+    shown = rows[:DIGEST_MAX_ITEMS]
+    message_text = f"🔔 Новые записи ({len(rows)})\n\n"
+    for _, booking_number, service_date, booking_time, client_name, client_phone, service_name in shown:
+        message_text += f"📋 {booking_number}\n"
+        message_text += f"   👤 {client_name or 'Неизвестно'}, 📞 {client_phone or 'Не указан'}\n"
+        message_text += f"   📅 {service_date.strftime('%d.%m.%Y')} в {booking_time.strftime('%H:%M')}\n"
+        message_text += f"   🛠️ {service_name or 'Не указана'}\n\n"
+
+    if len(rows) > DIGEST_MAX_ITEMS:
+        message_text += f"... и еще {len(rows) - DIGEST_MAX_ITEMS} записей"
+
+    # По две карточки записей в ряд
+    buttons = [
+        InlineKeyboardButton(text=f"📋 {row[1]}", callback_data=f"booking_{row[0]}")
+        for row in shown
+    ]
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[buttons[i:i + 2] for i in range(0, len(buttons), 2)])
+    return message_text, keyboard
+
+
+async def send_admin_digest(
+    session: AsyncSession,
+    schema_name: str,
+    bot: Bot,
+    rows: Sequence,
+) -> Tuple[int, int]:
+    """
+    Отправить сводку всем администраторам компании и записать итог в журнал.
+
+    Запись считается уведомленной, если сводку получил хотя бы один
+    администратор. Commit выполняет вызывающий код.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        bot: Бот компании
+        rows: Записи (см. load_digest_bookings)
+
+    Returns:
+        (отправлено сообщений, ошибок)
+    """
+    if not rows:
+        return 0, 0
+
+    # Администраторы компании (в tenant схемах используется role='admin')
+    admins_result = await session.execute(
+        text(f"""
+            SELECT id, telegram_id FROM "{schema_name}".users
+            WHERE role = 'admin' AND telegram_id IS NOT NULL
+        """)
+    )
+    admins = admins_result.fetchall()
+
+    if not admins:
+        logger.warning(f"Сводка новых записей ({schema_name}): нет администраторов с Telegram ID")
+        return 0, 0
+
+    message_text, keyboard = render_admin_digest(rows)
+    errors = await send_concurrently(
+        admins,
+        lambda admin: get_telegram_gateway().send_message(
+            bot, chat_id=admin[1], text=message_text, reply_markup=keyboard
+        ),
+    )
+    for admin, error in zip(admins, errors):
+        if error is not None:
+            logger.warning(f"Сводка новых записей ({schema_name}): администратор {admin[0]} не получил сообщение: {error}")
+
+    sent = sum(1 for error in errors if error is None)
+    error: Optional[BaseException] = None if sent else errors[0]
+    await record_deliveries(session, schema_name, KIND_ADMIN_NEW_BOOKING, [
+        delivery(row[0], message_text, error=error) for row in rows
+    ])
+
+    logger.info(f"Сводка новых записей ({schema_name}): записей {len(rows)}, отправлено {sent} из {len(admins)}")
+    return sent, len(admins) - sent
@@ -0,0 +1,175 @@
+"""
+Пул ботов для исходящих сообщений.
+
+Все экземпляры Bot процесса (задачи Celery, API, сервисы уведомлений)
+используют одну HTTP сессию aiohttp с keep-alive, поэтому сообщения
+идут по уже установленным TLS соединениям с api.telegram.org.
+Боты хранятся по токену, неиспользуемые удаляются по времени простоя
+и при превышении размера пула.
+
+Сессия aiohttp привязана к event loop, в котором создана: при смене
+loop пул создает новую сессию. Вызывающий код не должен закрывать
+bot.session — сессией владеет пул.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Время удержания простаивающего соединения (секунды)
+KEEPALIVE_TIMEOUT_SECONDS = 60
+
+
+class BotPool:
+    """
+    Реестр ботов по токену с общей HTTP сессией.
+
+    Args:
+        max_size: Максимальное количество ботов в пуле
+        idle_ttl: Время простоя (секунды), после которого бот удаляется
+        connections: Лимит одновременных соединений с Bot API
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.BOT_POOL_MAX_SIZE,
+        idle_ttl: int = settings.BOT_POOL_IDLE_TTL,
+        connections: int = settings.BOT_POOL_CONNECTIONS,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.connections = connections
+        self._bots: "OrderedDict[str, Tuple[Bot, float]]" = OrderedDict()
+        self._session: Optional[AiohttpSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _create_session(self) -> AiohttpSession:
+        """Создать HTTP сессию с keep-alive соединениями."""
+        session = AiohttpSession()
+        # Параметры TCPConnector, который aiogram создает при первом запросе
+        session._connector_init.update(
+            limit=self.connections,
+            keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS,
+        )
+        return session
+
+    def _ensure_loop(self) -> None:
+        """Пересоздать сессию, если изменился event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._session is not None:
+            return
+
+        if self._session is not None:
+            # Соединения прежнего loop недоступны из текущего
+            logger.debug("Event loop сменился, пул ботов создает новую HTTP сессию")
+            self._bots.clear()
+        self._session = self._create_session()
+        self._loop = loop
+
+    def _evict(self, now: float) -> None:
+        """Удалить простаивающих ботов и лишних сверх max_size."""
+        while self._bots:
+            token, (_, last_used) = next(iter(self._bots.items()))
+            if now - last_used <= self.idle_ttl and len(self._bots) <= self.max_size:
+                break
+            del self._bots[token]
+
+    def get_bot(self, token: str) -> Bot:
+        """
+        Получить бота для токена (вызывается из работающего event loop).
+
+        Args:
+            token: Токен Telegram бота
+
+        Returns:
+            Экземпляр Bot с общей HTTP сессией
+        """
+        self._ensure_loop()
+        now = time.monotonic()
+
+        entry = self._bots.pop(token, None)
+        bot = entry[0] if entry else Bot(token=token, session=self._session)
+        self._bots[token] = (bot, now)
+        self._evict(now)
+        return bot
+
+    def discard(self) -> None:
+        """Сбросить пул без закрытия сессии (event loop уже закрыт)."""
+        self._bots.clear()
+        self._session = None
+        self._loop = None
+
+    async def close(self) -> None:
+        """Закрыть HTTP сессию и очистить пул."""
+        session = self._session
+        self.discard()
+        if session is not None:
+            await session.close()
+            logger.info("HTTP сессия пула ботов закрыта")
+
+    def __len__(self) -> int:
+        return len(self._bots)
+
+
+# Глобальный экземпляр пула
+_bot_pool: Optional[BotPool] = None
+
+
+def get_bot_pool() -> BotPool:
+    """
+    Получить глобальный экземпляр BotPool.
+
+    Returns:
+        Экземпляр BotPool
+    """
+    global _bot_pool
+
+    if _bot_pool is None:
+        _bot_pool = BotPool()
+
+    return _bot_pool
+
+
+def get_pooled_bot(token: str) -> Bot:
+    """
+    Получить бота из глобального пула.
+
+    Args:
+        token: Токен Telegram бота
+
+    Returns:
+        Экземпляр Bot с общей HTTP сессией
+    """
+    return get_bot_pool().get_bot(token)
+
+
+async def close_bot_pool() -> None:
+    """Закрыть глобальный пул ботов (FastAPI lifespan)."""
+    if _bot_pool is not None:
+        await _bot_pool.close()
+
+
+def shutdown_bot_pool() -> None:
+    """
+    Закрыть глобальный пул ботов вне event loop (завершение процесса Celery).
+
+    Если loop пула еще открыт, сессия закрывается в нем, иначе
+    соединения уже недоступны и пул просто сбрасывается.
+    """
+    if _bot_pool is None:
+        return
+
+    loop = _bot_pool._loop
+    if loop is not None and not loop.is_closed() and not loop.is_running():
+        loop.run_until_complete(_bot_pool.close())
+    else:
+        _bot_pool.discard()
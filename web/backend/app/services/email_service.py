@@ -4,18 +4,114 @@
 Этот модуль предоставляет методы для:
 - Отправки приветственных писем с данными для входа
 - Отправки других уведомлений пользователям
+
+Письма отправляются асинхронно (aiosmtplib) и не блокируют event loop.
+Письма ставятся в очередь процесса, ее разбирают SMTP_POOL_SIZE
+обработчиков; у каждого свое SMTP соединение, которое переиспользуется
+для следующих писем и закрывается после SMTP_IDLE_TIMEOUT секунд простоя.
+Временные ошибки (обрыв соединения, таймаут, ответы 4xx) повторяются
+с экспоненциальной задержкой, постоянные (аутентификация, ответы 5xx) - нет.
 """
 
+import asyncio
 import logging
-from typing import Optional
-import smtplib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
 import os
 
+import aiosmtplib
+
 logger = logging.getLogger(__name__)
 
+# Ошибки соединения, после которых письмо можно отправить повторно
+TRANSIENT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Можно ли повторить отправку после ошибки.
+
+    Args:
+        error: Исключение отправки
+
+    Returns:
+        True для ошибок соединения и временных отказов сервера (4xx)
+    """
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(400 <= recipient.code < 500 for recipient in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+@dataclass
+class _OutgoingEmail:
+    """Письмо в очереди отправки."""
+    message: MIMEMultipart
+    # Результат для send_email (None - письмо отправлено без ожидания)
+    result: Optional["asyncio.Future[bool]"] = None
+
+
+def _resolve(item: _OutgoingEmail, sent: bool) -> None:
+    """Передать результат отправки ожидающему send_email."""
+    if item.result is not None and not item.result.done():
+        item.result.set_result(sent)
+
+
+class SMTPConnection:
+    """SMTP соединение, переиспользуемое для нескольких писем."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        start_tls: bool,
+        timeout: float,
+    ):
+        self._options = dict(
+            hostname=host,
+            port=port,
+            username=user or None,
+            password=password or None,
+            start_tls=start_tls,
+            timeout=timeout,
+        )
+        self._client: Optional[aiosmtplib.SMTP] = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Открыто ли соединение."""
+        return self._client is not None and self._client.is_connected
+
+    async def send(self, message: MIMEMultipart) -> None:
+        """Отправить письмо, при необходимости открыв соединение (STARTTLS, вход)."""
+        if not self.is_connected:
+            client = aiosmtplib.SMTP(**self._options)
+            await client.connect()
+            self._client = client
+        await self._client.send_message(message)
+
+    async def close(self) -> None:
+        """Закрыть соединение (QUIT, при ошибке - разрыв)."""
+        client, self._client = self._client, None
+        if client is None or not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            client.close()
+
 
 class EmailService:
     """
@@ -32,9 +128,138 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.smtp_from = os.getenv("SMTP_FROM", "noreply@barber-saas.com")
         self.smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+        # Таймаут SMTP операций (секунды)
+        self.smtp_timeout = float(os.getenv("SMTP_TIMEOUT", "30"))
+        # Обработчики очереди (по одному SMTP соединению на обработчик)
+        self.pool_size = max(1, int(os.getenv("SMTP_POOL_SIZE", "2")))
+        # Максимум писем в очереди
+        self.queue_size = int(os.getenv("SMTP_QUEUE_SIZE", "1000"))
+        # Повторы при временных ошибках и задержка перед первым повтором (секунды)
+        self.max_retries = int(os.getenv("SMTP_MAX_RETRIES", "3"))
+        self.retry_delay = float(os.getenv("SMTP_RETRY_DELAY", "2"))
+        # Простой соединения до закрытия (секунды)
+        self.idle_timeout = float(os.getenv("SMTP_IDLE_TIMEOUT", "30"))
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         logger.info(f"EmailService инициализирован: {self.smtp_host}")
     
+    def _connection(self) -> SMTPConnection:
+        """Новое SMTP соединение с настройками сервиса."""
+        return SMTPConnection(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            user=self.smtp_user,
+            password=self.smtp_password,
+            start_tls=self.smtp_use_tls,
+            timeout=self.smtp_timeout,
+        )
+    
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Сформировать письмо (текстовая и HTML части)."""
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = formataddr(("Barber SaaS", self.smtp_from))
+        message["To"] = to_email
+        
+        # Добавляем текстовую часть
+        if text_content:
+            message.attach(MIMEText(text_content, "plain", "utf-8"))
+        
+        # Добавляем HTML часть
+        message.attach(MIMEText(html_content, "html", "utf-8"))
+        return message
+    
+    def _ensure_workers(self) -> asyncio.Queue:
+        """Запустить обработчики очереди в текущем event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._workers = []
+        
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.pool_size:
+            self._workers.append(loop.create_task(self._worker(self._queue)))
+        return self._queue
+    
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        """Обработчик очереди: отправляет письма через свое соединение."""
+        connection = self._connection()
+        item: Optional[_OutgoingEmail] = None
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    # Простой: соединение закрывается, следующее письмо откроет новое
+                    await connection.close()
+                    continue
+                
+                try:
+                    _resolve(item, await self._deliver(connection, item.message))
+                finally:
+                    queue.task_done()
+                item = None
+        finally:
+            # Остановка во время отправки: ожидающий send_email получает False
+            if item is not None:
+                _resolve(item, False)
+            await connection.close()
+    
+    async def _deliver(self, connection: SMTPConnection, message: MIMEMultipart) -> bool:
+        """
+        Отправить письмо с повторами при временных ошибках.
+        
+        Args:
+            connection: SMTP соединение обработчика
+            message: Письмо
+        
+        Returns:
+            True если письмо отправлено, False в противном случае
+        """
+        to_email = message["To"]
+        for attempt in range(self.max_retries + 1):
+            try:
+                await connection.send(message)
+                logger.info(f"Email успешно отправлен на {to_email}")
+                return True
+            except aiosmtplib.SMTPAuthenticationError:
+                logger.error(f"Ошибка аутентификации SMTP: {self.smtp_user}")
+                await connection.close()
+                return False
+            except Exception as e:
+                if not isinstance(e, (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused)):
+                    # Соединение в неизвестном состоянии: следующая попытка откроет новое
+                    await connection.close()
+                if not is_transient_error(e) or attempt >= self.max_retries:
+                    logger.error(f"Ошибка отправки email на {to_email}: {e}")
+                    return False
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(
+                    f"Временная ошибка отправки email на {to_email} "
+                    f"(попытка {attempt + 1}): {e}, повтор через {delay:.1f} с"
+                )
+                await asyncio.sleep(delay)
+        return False
+    
+    def _put(self, item: _OutgoingEmail) -> bool:
+        """Поставить письмо в очередь; False, если очередь переполнена."""
+        try:
+            self._ensure_workers().put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            logger.error(f"Очередь email переполнена ({self.queue_size}), письмо на {item.message['To']} не отправлено")
+            return False
+    
     async def send_email(
         self,
         to_email: str,
@@ -43,7 +268,7 @@ class EmailService:
         text_content: Optional[str] = None
     ) -> bool:
         """
-        Отправить email.
+        Отправить email и дождаться результата.
         
         Args:
             to_email: Email получателя
@@ -63,40 +288,69 @@ class EmailService:
         """
         logger.info(f"Отправка email на {to_email}: {subject}")
         
-        # Создаем сообщение
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = formataddr(("Barber SaaS", self.smtp_from))
-        message["To"] = to_email
+        result = asyncio.get_running_loop().create_future()
+        if not self._put(_OutgoingEmail(self._build_message(to_email, subject, html_content, text_content), result)):
+            return False
+        return await result
+    
+    def enqueue_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> bool:
+        """
+        Поставить email в очередь без ожидания отправки.
         
-        # Добавляем текстовую часть
-        if text_content:
-            part_text = MIMEText(text_content, "plain", "utf-8")
-            message.attach(part_text)
+        Args:
+            to_email: Email получателя
+            subject: Тема письма
+            html_content: HTML содержание письма
+            text_content: Текстовое содержание (опционально)
         
-        # Добавляем HTML часть
-        part_html = MIMEText(html_content, "html", "utf-8")
-        message.attach(part_html)
+        Returns:
+            True если письмо поставлено в очередь
+        """
+        logger.info(f"Email на {to_email} поставлен в очередь: {subject}")
+        return self._put(_OutgoingEmail(self._build_message(to_email, subject, html_content, text_content)))
+    
+    def enqueue_batch(self, emails: List[Tuple[str, str, str, Optional[str]]]) -> int:
+        """
+        Поставить пачку писем в очередь: они уходят через открытые соединения пула.
+        
+        Args:
+            emails: (email получателя, тема, HTML, текст или None)
+        
+        Returns:
+            Количество поставленных в очередь писем
+        """
+        return sum(1 for email in emails if self.enqueue_email(*email))
+    
+    async def close(self, timeout: float = 10) -> None:
+        """
+        Дождаться отправки писем из очереди и закрыть соединения.
+        
+        Args:
+            timeout: Максимальное время ожидания очереди (секунды)
+        """
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
         
         try:
-            # Отправляем через SMTP
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.smtp_use_tls:
-                    server.starttls()
-                
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(message)
-                server.quit()
-            
-            logger.info(f"Email успешно отправлен на {to_email}")
-            return True
-            
-        except smtplib.SMTPAuthenticationError:
-            logger.error(f"Ошибка аутентификации SMTP: {self.smtp_user}")
-            return False
-        except smtplib.SMTPException as e:
-            logger.error(f"Ошибка отправки email: {e}")
-            return False
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"При остановке в очереди email осталось писем: {self._queue.qsize()}")
+            # Неотправленные письма: ожидающие send_email получают False
+            while not self._queue.empty():
+                _resolve(self._queue.get_nowait(), False)
+                self._queue.task_done()
+        
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
     
     async def send_welcome_email(
         self,
@@ -105,7 +359,8 @@ class EmailService:
         password: str,
         dashboard_url: str,
         plan_name: str,
-        subscription_end_date
+        subscription_end_date,
+        wait: bool = False
     ) -> bool:
         """
         Отправить приветственное письмо с данными для входа.
@@ -117,9 +372,10 @@ class EmailService:
             dashboard_url: Ссылка на админ-панель
             plan_name: Название тарифного плана
             subscription_end_date: Дата окончания подписки
+            wait: Дождаться отправки (по умолчанию письмо ставится в очередь)
         
         Returns:
-            True если письмо отправлено, False в противном случае
+            True если письмо отправлено (поставлено в очередь), False в противном случае
         
         Example:
             >>> await email_service.send_welcome_email(
@@ -191,18 +447,17 @@ class EmailService:
         </html>
         """
         
-        return await self.send_email(
-            to_email=email,
-            subject=subject,
-            html_content=html_content
-        )
+        if wait:
+            return await self.send_email(to_email=email, subject=subject, html_content=html_content)
+        return self.enqueue_email(to_email=email, subject=subject, html_content=html_content)
     
     async def send_payment_success_email(
         self,
         company_name: str,
         email: str,
         amount: float,
-        dashboard_url: str
+        dashboard_url: str,
+        wait: bool = False
     ) -> bool:
         """
         Отправить письмо об успешной оплате.
@@ -212,9 +467,10 @@ class EmailService:
             email: Email владельца
             amount: Сумма платежа
             dashboard_url: Ссылка на админ-панель
+            wait: Дождаться отправки (по умолчанию письмо ставится в очередь)
         
         Returns:
-            True если письмо отправлено, False в противном случае
+            True если письмо отправлено (поставлено в очередь), False в противном случае
         """
         subject = f"Оплата принята: {company_name}"
         
@@ -243,11 +499,9 @@ class EmailService:
         </html>
         """
         
-        return await self.send_email(
-            to_email=email,
-            subject=subject,
-            html_content=html_content
-        )
+        if wait:
+            return await self.send_email(to_email=email, subject=subject, html_content=html_content)
+        return self.enqueue_email(to_email=email, subject=subject, html_content=html_content)
 
 
 # Создание экземпляра сервиса (singleton)
@@ -269,6 +523,12 @@ def get_email_service() -> EmailService:
     return _email_service
 
 
+async def close_email_service() -> None:
+    """Дождаться отправки писем из очереди и закрыть SMTP соединения."""
+    if _email_service is not None:
+        await _email_service.close()
+
+
 async def send_welcome_email(
     company_name: str,
     email: str,
@@ -289,7 +549,7 @@ async def send_welcome_email(
         subscription_end_date: Дата окончания подписки
     
     Returns:
-        True если письмо отправлено, False в противном случае
+        True если письмо поставлено в очередь, False в противном случае
     """
     service = get_email_service()
     return await service.send_welcome_email(
@@ -0,0 +1,238 @@
+"""
+Журнал доставленных уведомлений (таблица notifications схемы компании).
+
+Уникальный индекс (booking_id, notification_type, channel) хранит одну
+строку на запись, вид уведомления и канал. Через журнал задачи:
+- отбирают записи, по которым уведомление еще не отправлено
+  (anti-join NOT EXISTS по уникальному индексу)
+- фиксируют итоги отправки пачкой (INSERT ... ON CONFLICT DO UPDATE);
+  уже отправленное уведомление не превращается в неотправленное
+  при повторной ошибке
+
+Функции не делают commit: журнал меняется в транзакции вызывающего кода.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Каналы доставки
+CHANNEL_TELEGRAM = "telegram"
+
+# Виды уведомлений (notification_type)
+KIND_REMINDER_DAY = "reminder_day"
+KIND_REMINDER_3_HOURS = "reminder_3_hours"
+KIND_ADMIN_NEW_BOOKING = "admin_new_booking"
+KIND_STATUS_CHANGE = "status_change"
+
+# Виды напоминаний, которые планируются заново при переносе записи
+REMINDER_KINDS = (KIND_REMINDER_DAY, KIND_REMINDER_3_HOURS)
+
+LEDGER_UNIQUE_INDEX = "uq_notifications_booking_kind_channel"
+
+
+def tenant_schema(company_id: int) -> str:
+    """Имя tenant схемы компании."""
+    return f"tenant_{company_id}"
+
+
+def ledger_ddl(schema_name: str) -> List[str]:
+    """
+    DDL журнала для схемы, в которую таблица notifications склонирована.
+
+    CREATE TABLE AS не переносит индексы, поэтому уникальный индекс
+    журнала создается отдельно (новая компания и миграция).
+
+    Args:
+        schema_name: Имя схемы
+
+    Returns:
+        Список SQL команд
+    """
+    return [
+        f"""ALTER TABLE "{schema_name}".notifications
+            ADD COLUMN IF NOT EXISTS channel VARCHAR(20) NOT NULL DEFAULT '{CHANNEL_TELEGRAM}'""",
+        f'ALTER TABLE "{schema_name}".notifications ALTER COLUMN user_id DROP NOT NULL',
+        f"""CREATE UNIQUE INDEX IF NOT EXISTS {LEDGER_UNIQUE_INDEX}
+            ON "{schema_name}".notifications (booking_id, notification_type, channel)""",
+    ]
+
+
+def not_notified_clause(
+    schema_name: str,
+    booking_column: str = "b.id",
+    kind_param: str = "ledger_kind",
+    channel_param: str = "ledger_channel",
+) -> str:
+    """
+    Условие NOT EXISTS для выборки записей без отправленного уведомления.
+
+    Параметры :ledger_kind и :ledger_channel передаются вызывающим кодом
+    (см. ledger_params).
+
+    Args:
+        schema_name: Имя схемы
+        booking_column: Колонка ID записи во внешнем запросе
+        kind_param: Имя параметра вида уведомления
+        channel_param: Имя параметра канала
+
+    Returns:
+        SQL фрагмент для WHERE
+    """
+    return f"""NOT EXISTS (
+        SELECT 1 FROM "{schema_name}".notifications n
+        WHERE n.booking_id = {booking_column}
+          AND n.notification_type = :{kind_param}
+          AND n.channel = :{channel_param}
+          AND n.is_sent = true
+    )"""
+
+
+def ledger_params(kind: str, channel: str = CHANNEL_TELEGRAM) -> Dict[str, str]:
+    """Параметры для not_notified_clause."""
+    return {"ledger_kind": kind, "ledger_channel": channel}
+
+
+async def filter_not_notified(
+    session: AsyncSession,
+    schema_name: str,
+    booking_ids: Iterable[int],
+    kind: str,
+    channel: str = CHANNEL_TELEGRAM,
+) -> List[int]:
+    """
+    Оставить записи, по которым уведомление еще не отправлено.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        booking_ids: ID записей
+        kind: Вид уведомления
+        channel: Канал доставки
+
+    Returns:
+        ID записей без отправленного уведомления (в исходном порядке)
+    """
+    booking_ids = list(booking_ids)
+    if not booking_ids:
+        return []
+
+    result = await session.execute(
+        text(f"""
+            SELECT b.id FROM unnest(CAST(:booking_ids AS integer[])) AS b(id)
+            WHERE {not_notified_clause(schema_name)}
+        """),
+        {"booking_ids": booking_ids, **ledger_params(kind, channel)}
+    )
+    pending = {row[0] for row in result.fetchall()}
+    return [booking_id for booking_id in booking_ids if booking_id in pending]
+
+
+def delivery(
+    booking_id: int,
+    message: str,
+    user_id: Optional[int] = None,
+    error: Optional[BaseException] = None,
+) -> Dict:
+    """
+    Итог отправки одного уведомления для record_deliveries.
+
+    Args:
+        booking_id: ID записи
+        message: Текст уведомления
+        user_id: ID получателя (None для уведомлений нескольким администраторам)
+        error: Исключение, если отправка не удалась
+
+    Returns:
+        Словарь параметров строки журнала
+    """
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "booking_id": booking_id,
+        "message": message,
+        "is_sent": error is None,
+        "sent_at": now if error is None else None,
+        "error_message": None if error is None else (str(error) or type(error).__name__),
+        "created_at": now,
+    }
+
+
+def build_record_sql(schema_name: str) -> str:
+    """
+    SQL записи итогов в журнал.
+
+    Args:
+        schema_name: Имя схемы
+
+    Returns:
+        INSERT ... ON CONFLICT (booking_id, notification_type, channel) DO UPDATE
+    """
+    return f"""
+        INSERT INTO "{schema_name}".notifications AS n
+            (user_id, booking_id, notification_type, channel, message, is_sent, sent_at, error_message, created_at)
+        VALUES
+            (:user_id, :booking_id, :kind, :channel, :message, :is_sent, :sent_at, :error_message, :created_at)
+        ON CONFLICT (booking_id, notification_type, channel) DO UPDATE SET
+            user_id = COALESCE(EXCLUDED.user_id, n.user_id),
+            message = CASE WHEN EXCLUDED.is_sent OR NOT n.is_sent THEN EXCLUDED.message ELSE n.message END,
+            sent_at = CASE WHEN EXCLUDED.is_sent THEN EXCLUDED.sent_at ELSE n.sent_at END,
+            error_message = CASE WHEN EXCLUDED.is_sent THEN NULL ELSE EXCLUDED.error_message END,
+            is_sent = n.is_sent OR EXCLUDED.is_sent
+    """
+
+
+async def record_deliveries(
+    session: AsyncSession,
+    schema_name: str,
+    kind: str,
+    deliveries: List[Dict],
+    channel: str = CHANNEL_TELEGRAM,
+) -> None:
+    """
+    Записать итоги отправки пачкой.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        kind: Вид уведомления
+        deliveries: Итоги отправки (см. delivery)
+        channel: Канал доставки
+    """
+    if not deliveries:
+        return
+
+    await session.execute(
+        text(build_record_sql(schema_name)),
+        [{**item, "kind": kind, "channel": channel} for item in deliveries]
+    )
+
+
+async def forget_deliveries(
+    session: AsyncSession,
+    schema_name: str,
+    booking_id: int,
+    kinds: Iterable[str] = REMINDER_KINDS,
+) -> None:
+    """
+    Удалить записи журнала, чтобы уведомление можно было отправить снова
+    (перенос записи на другое время - напоминания отправляются заново).
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        booking_id: ID записи
+        kinds: Виды уведомлений
+    """
+    await session.execute(
+        text(f"""
+            DELETE FROM "{schema_name}".notifications
+            WHERE booking_id = :booking_id AND notification_type = ANY(:kinds)
+        """),
+        {"booking_id": booking_id, "kinds": list(kinds)}
+    )
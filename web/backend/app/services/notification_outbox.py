@@ -0,0 +1,283 @@
+"""
+Transactional outbox уведомлений компании ("tenant_{id}".notification_outbox).
+
+Обработчик запроса не отправляет сообщение в Telegram сам: он добавляет
+строку в outbox в той же транзакции, что и изменение записи. Строка
+появляется только вместе с закоммиченным изменением, а ответ API не
+ждет Telegram.
+
+Relay (периодическая задача Celery) забирает строки пачками через
+FOR UPDATE SKIP LOCKED и отправляет их. Забранная строка получает
+аренду (available_at в будущем): если воркер упал во время отправки,
+строка снова станет доступна после окончания аренды. Ошибка отправки
+переносит строку с экспоненциальной задержкой, после
+OUTBOX_MAX_ATTEMPTS попыток строка помечается failed. Доставка -
+at-least-once: сообщение может уйти повторно, если воркер упал между
+отправкой и отметкой sent.
+"""
+
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.tenant_fanout import send_concurrently
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_TABLE = "notification_outbox"
+
+# Типы событий outbox
+EVENT_BOOKING_STATUS = "booking_status"
+
+# Максимальная задержка повторной отправки (секунды)
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+def outbox_ddl(schema_name: str) -> List[str]:
+    """
+    DDL таблицы outbox для tenant схемы.
+
+    Таблицы tenant схем клонируются из public без умолчаний и индексов,
+    поэтому outbox создается отдельным DDL (новая компания и миграция).
+
+    Args:
+        schema_name: Имя tenant схемы
+
+    Returns:
+        Список SQL команд
+    """
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS "{schema_name}".{OUTBOX_TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            event_type VARCHAR(32) NOT NULL,
+            booking_id INTEGER,
+            payload JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at TIMESTAMP NOT NULL DEFAULT now(),
+            last_error TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT now(),
+            sent_at TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS ix_{OUTBOX_TABLE}_pending
+        ON "{schema_name}".{OUTBOX_TABLE} (available_at)
+        WHERE status = 'pending'
+        """,
+    ]
+
+
+async def enqueue_notification(
+    session: AsyncSession,
+    company_id: int,
+    event_type: str,
+    booking_id: Optional[int] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Добавить уведомление в outbox компании (без commit).
+
+    Args:
+        session: Сессия БД, в транзакции которой меняется запись
+        company_id: ID компании
+        event_type: Тип события
+        booking_id: ID записи
+        payload: Данные для формирования сообщения
+    """
+    await session.execute(
+        text(f"""
+            INSERT INTO "tenant_{company_id}".{OUTBOX_TABLE} (event_type, booking_id, payload)
+            VALUES (:event_type, :booking_id, CAST(:payload AS jsonb))
+        """),
+        {
+            "event_type": event_type,
+            "booking_id": booking_id,
+            "payload": json.dumps(payload or {}),
+        }
+    )
+
+
+async def enqueue_booking_status_notification(
+    session: AsyncSession,
+    company_id: int,
+    booking_id: int,
+    new_status: str,
+) -> None:
+    """
+    Добавить уведомление клиента о смене статуса записи (без commit).
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        booking_id: ID записи
+        new_status: Новый статус записи
+    """
+    await enqueue_notification(session, company_id, EVENT_BOOKING_STATUS, booking_id, {"status": new_status})
+
+
+def build_claim_sql(company_id: int) -> str:
+    """
+    SQL захвата пачки готовых к отправке строк outbox.
+
+    Args:
+        company_id: ID компании
+
+    Returns:
+        UPDATE ... RETURNING с подзапросом FOR UPDATE SKIP LOCKED
+    """
+    table = f'"tenant_{company_id}".{OUTBOX_TABLE}'
+    return f"""
+        UPDATE {table}
+        SET attempts = attempts + 1,
+            available_at = now() + make_interval(secs => :lease)
+        WHERE id IN (
+            SELECT id FROM {table}
+            WHERE status = 'pending' AND available_at <= now()
+            ORDER BY id
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, event_type, booking_id, payload, attempts
+    """
+
+
+def retry_delay(attempts: int, base: int = settings.OUTBOX_RETRY_BASE_SECONDS) -> int:
+    """
+    Задержка перед следующей попыткой.
+
+    Args:
+        attempts: Количество уже сделанных попыток
+        base: Задержка после первой попытки (секунды)
+
+    Returns:
+        Задержка в секундах
+    """
+    return min(MAX_RETRY_DELAY_SECONDS, base * 2 ** max(0, attempts - 1))
+
+
+async def claim_outbox_batch(
+    session: AsyncSession,
+    company_id: int,
+    limit: int = settings.OUTBOX_BATCH_SIZE,
+    lease: int = settings.OUTBOX_LEASE_SECONDS,
+) -> List:
+    """
+    Забрать пачку строк outbox компании.
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        limit: Размер пачки
+        lease: Время аренды строки (секунды)
+
+    Returns:
+        Строки (id, event_type, booking_id, payload, attempts)
+    """
+    result = await session.execute(text(build_claim_sql(company_id)), {"limit": limit, "lease": lease})
+    return list(result.fetchall())
+
+
+async def mark_outbox_results(
+    session: AsyncSession,
+    company_id: int,
+    results: List[Tuple[int, int, Optional[str]]],
+    max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+) -> None:
+    """
+    Записать итоги отправки строк outbox.
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        results: (id, попыток, текст ошибки или None при успехе)
+        max_attempts: Максимум попыток отправки
+    """
+    table = f'"tenant_{company_id}".{OUTBOX_TABLE}'
+
+    sent_ids = [outbox_id for outbox_id, _, error in results if error is None]
+    if sent_ids:
+        await session.execute(
+            text(f"UPDATE {table} SET status = 'sent', sent_at = now(), last_error = NULL WHERE id = ANY(:ids)"),
+            {"ids": sent_ids}
+        )
+
+    failed = [
+        {
+            "id": outbox_id,
+            "status": "failed" if attempts >= max_attempts else "pending",
+            "delay": retry_delay(attempts),
+            "error": error[:1000],
+        }
+        for outbox_id, attempts, error in results
+        if error is not None
+    ]
+    if failed:
+        await session.execute(
+            text(f"""
+                UPDATE {table}
+                SET status = :status,
+                    available_at = now() + make_interval(secs => :delay),
+                    last_error = :error
+                WHERE id = :id
+            """),
+            failed
+        )
+
+
+async def relay_company_outbox(
+    session_maker,
+    company_id: int,
+    deliver: Callable[[int, Any], Awaitable[Any]],
+    limit: int = settings.OUTBOX_BATCH_SIZE,
+) -> Tuple[int, int]:
+    """
+    Отправить готовые строки outbox компании.
+
+    Строки захватываются в короткой транзакции, отправка идет без
+    блокировок, итоги записываются второй транзакцией.
+
+    Args:
+        session_maker: Фабрика сессий БД
+        company_id: ID компании
+        deliver: Корутина отправки (company_id, строка); исключение - повторить позже
+        limit: Размер пачки
+
+    Returns:
+        (отправлено, ошибок)
+    """
+    sent_total = 0
+    failed_total = 0
+
+    while True:
+        async with session_maker() as session:
+            claimed = await claim_outbox_batch(session, company_id, limit=limit)
+            await session.commit()
+
+        if not claimed:
+            break
+
+        errors = await send_concurrently(claimed, lambda row: deliver(company_id, row))
+        results = []
+        for row, error in zip(claimed, errors):
+            if error is not None:
+                logger.warning(f"Outbox компании {company_id}: строка {row.id} ({row.event_type}) не отправлена: {error}")
+            results.append((row.id, row.attempts, None if error is None else (str(error) or type(error).__name__)))
+
+        async with session_maker() as session:
+            await mark_outbox_results(session, company_id, results)
+            await session.commit()
+
+        failed = sum(1 for error in errors if error is not None)
+        sent_total += len(claimed) - failed
+        failed_total += failed
+
+        if len(claimed) < limit:
+            break
+
+    return sent_total, failed_total
@@ -0,0 +1,335 @@
+"""
+Очередь напоминаний о записях (public.reminders).
+
+Напоминания хранятся строками (company_id, booking_id, kind, due_at, status)
+вместо отложенных задач Celery с eta: воркеры не держат в памяти задачи
+на недели вперед, а перенос или отмена записи меняет строку, и старое
+напоминание не срабатывает.
+
+Жизненный цикл строки:
+- schedule_booking_reminders - подтверждение записи (upsert)
+- reschedule_booking_reminders - перенос даты/времени (UPDATE due_at)
+- cancel_booking_reminders - отмена или снятие подтверждения
+- claim_due_reminders - периодическая задача забирает наступившие строки
+  (FOR UPDATE SKIP LOCKED, параллельные воркеры не получают одну строку)
+- finish_reminder - итог отправки: sent; cancelled, если напоминание
+  уже не нужно; при ошибке - снова pending с отсрочкой, failed после
+  REMINDER_MAX_ATTEMPTS попыток
+
+Функции выполняются в сессии вызывающего кода и не делают commit,
+поэтому напоминания меняются в одной транзакции с записью.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.public_models import Reminder
+from app.services.notification_outbox import retry_delay
+from app.services.notification_ledger import (
+    KIND_REMINDER_3_HOURS,
+    KIND_REMINDER_DAY,
+    forget_deliveries,
+    tenant_schema,
+)
+
+logger = logging.getLogger(__name__)
+
+# Виды напоминаний
+REMINDER_DAY_BEFORE = "day_before"
+REMINDER_3_HOURS = "3_hours"
+
+# Вид уведомления в журнале доставки для каждого вида напоминания
+LEDGER_KINDS = {
+    REMINDER_DAY_BEFORE: KIND_REMINDER_DAY,
+    REMINDER_3_HOURS: KIND_REMINDER_3_HOURS,
+}
+
+# Итог отправки напоминания
+SEND_SENT = "sent"
+# Напоминание больше не нужно (запись отменена, уже отправлено, нет получателя)
+SEND_SKIPPED = "skipped"
+# Временная ошибка (Telegram недоступен, ошибка БД) - отправка повторяется
+SEND_ERROR = "error"
+
+# Напоминание за день отправляется в 18:00 накануне
+DAY_BEFORE_SEND_TIME = time(18, 0)
+
+
+def compute_reminder_times(booking_date: date, booking_time: time) -> Dict[str, datetime]:
+    """
+    Время отправки каждого вида напоминания.
+
+    Args:
+        booking_date: Дата записи
+        booking_time: Время начала записи
+
+    Returns:
+        Словарь {вид напоминания: время отправки}
+    """
+    return {
+        REMINDER_DAY_BEFORE: datetime.combine(booking_date - timedelta(days=1), DAY_BEFORE_SEND_TIME),
+        REMINDER_3_HOURS: datetime.combine(booking_date, booking_time) - timedelta(hours=3),
+    }
+
+
+async def schedule_booking_reminders(
+    session: AsyncSession,
+    company_id: int,
+    booking_id: int,
+    booking_date: date,
+    booking_time: time,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Запланировать напоминания для подтвержденной записи.
+
+    Уже отправленное напоминание с тем же временем не планируется повторно;
+    напоминания, время которых прошло, отменяются.
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        booking_id: ID записи
+        booking_date: Дата записи
+        booking_time: Время начала записи
+        now: Текущее время (для тестов)
+
+    Returns:
+        Количество запланированных напоминаний
+    """
+    now = now or datetime.now()
+    scheduled = 0
+
+    for kind, due_at in compute_reminder_times(booking_date, booking_time).items():
+        if due_at <= now:
+            await _cancel(session, company_id, booking_id, kind)
+            logger.info(f"Напоминание {kind} для записи {booking_id} пропущено (время прошло: {due_at})")
+            continue
+
+        statement = insert(Reminder).values(
+            company_id=company_id,
+            booking_id=booking_id,
+            kind=kind,
+            due_at=due_at,
+            status="pending",
+            attempts=0,
+        )
+        excluded = statement.excluded
+        await session.execute(
+            statement.on_conflict_do_update(
+                constraint="uq_reminders_booking_kind",
+                set_={
+                    "due_at": excluded.due_at,
+                    "status": "pending",
+                    "attempts": 0,
+                    "sent_at": None,
+                    "updated_at": func.now(),
+                },
+                where=or_(Reminder.status != "sent", Reminder.due_at != excluded.due_at),
+            )
+        )
+        scheduled += 1
+        logger.info(f"Запланировано напоминание {kind}: компания {company_id}, запись {booking_id}, время {due_at}")
+
+    return scheduled
+
+
+async def reschedule_booking_reminders(
+    session: AsyncSession,
+    company_id: int,
+    booking_id: int,
+    booking_date: date,
+    booking_time: time,
+    now: Optional[datetime] = None,
+) -> None:
+    """
+    Перенести напоминания записи на новое время.
+
+    Меняются только существующие неотмененные напоминания (запись
+    без подтверждения напоминаний не имеет).
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        booking_id: ID записи
+        booking_date: Новая дата записи
+        booking_time: Новое время начала записи
+        now: Текущее время (для тестов)
+    """
+    now = now or datetime.now()
+
+    for kind, due_at in compute_reminder_times(booking_date, booking_time).items():
+        if due_at <= now:
+            await _cancel(session, company_id, booking_id, kind)
+            continue
+
+        result = await session.execute(
+            update(Reminder)
+            .where(
+                Reminder.company_id == company_id,
+                Reminder.booking_id == booking_id,
+                Reminder.kind == kind,
+                Reminder.status != "cancelled",
+                Reminder.due_at != due_at,
+            )
+            .values(due_at=due_at, status="pending", attempts=0, sent_at=None, updated_at=func.now())
+            .returning(Reminder.id)
+        )
+        if result.first() is not None:
+            # Напоминание о прежнем времени не должно блокировать отправку о новом
+            await forget_deliveries(session, tenant_schema(company_id), booking_id, [LEDGER_KINDS[kind]])
+
+
+async def cancel_booking_reminders(session: AsyncSession, company_id: int, booking_id: int) -> None:
+    """
+    Отменить неотправленные напоминания записи.
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        booking_id: ID записи
+    """
+    await _cancel(session, company_id, booking_id)
+
+
+async def _cancel(session: AsyncSession, company_id: int, booking_id: int, kind: Optional[str] = None) -> None:
+    """Отменить ожидающие напоминания записи (всех видов или одного)."""
+    conditions = [
+        Reminder.company_id == company_id,
+        Reminder.booking_id == booking_id,
+        Reminder.status == "pending",
+    ]
+    if kind is not None:
+        conditions.append(Reminder.kind == kind)
+
+    await session.execute(
+        update(Reminder).where(*conditions).values(status="cancelled", updated_at=func.now())
+    )
+
+
+def build_claim_statement(
+    now: datetime,
+    limit: int = settings.REMINDER_BATCH_SIZE,
+    stale_minutes: int = settings.REMINDER_STALE_MINUTES,
+    max_attempts: int = settings.REMINDER_MAX_ATTEMPTS,
+):
+    """
+    Запрос захвата наступивших напоминаний.
+
+    Строки отмечаются как processing; строки, зависшие в processing
+    дольше stale_minutes (воркер упал во время отправки), забираются
+    повторно, пока не исчерпаны попытки.
+
+    Args:
+        now: Текущее время
+        limit: Размер пачки
+        stale_minutes: Через сколько минут processing считается зависшим
+        max_attempts: Максимум попыток отправки
+
+    Returns:
+        UPDATE ... RETURNING с подзапросом FOR UPDATE SKIP LOCKED
+    """
+    due = (
+        select(Reminder.id)
+        .where(
+            Reminder.due_at <= now,
+            Reminder.attempts < max_attempts,
+            or_(
+                Reminder.status == "pending",
+                and_(
+                    Reminder.status == "processing",
+                    Reminder.updated_at < func.now() - timedelta(minutes=stale_minutes),
+                ),
+            ),
+        )
+        .order_by(Reminder.due_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Reminder)
+        .where(Reminder.id.in_(due.scalar_subquery()))
+        .values(status="processing", attempts=Reminder.attempts + 1, updated_at=func.now())
+        .returning(Reminder.id, Reminder.company_id, Reminder.booking_id, Reminder.kind, Reminder.attempts)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def claim_due_reminders(session: AsyncSession, now: Optional[datetime] = None, limit: int = settings.REMINDER_BATCH_SIZE) -> List:
+    """
+    Забрать пачку наступивших напоминаний.
+
+    Args:
+        session: Сессия БД
+        now: Текущее время (для тестов)
+        limit: Размер пачки
+
+    Returns:
+        Строки (id, company_id, booking_id, kind, attempts)
+    """
+    result = await session.execute(build_claim_statement(now or datetime.now(), limit=limit))
+    return list(result.all())
+
+
+def reminder_outcome_values(
+    outcome: str,
+    attempts: int,
+    now: datetime,
+    max_attempts: int = settings.REMINDER_MAX_ATTEMPTS,
+    retry_base: int = settings.REMINDER_RETRY_BASE_SECONDS,
+) -> Dict:
+    """
+    Новые значения строки напоминания по итогу отправки.
+
+    Args:
+        outcome: SEND_SENT, SEND_SKIPPED или SEND_ERROR
+        attempts: Количество сделанных попыток (с текущей)
+        now: Текущее время
+        max_attempts: Максимум попыток отправки
+        retry_base: Задержка после первой неудачи (секунды)
+
+    Returns:
+        Значения для UPDATE
+    """
+    if outcome == SEND_SENT:
+        return {"status": "sent", "sent_at": now}
+    if outcome == SEND_SKIPPED:
+        return {"status": "cancelled"}
+    if attempts < max_attempts:
+        return {"status": "pending", "due_at": now + timedelta(seconds=retry_delay(attempts, base=retry_base))}
+    return {"status": "failed"}
+
+
+async def finish_reminder(
+    session: AsyncSession,
+    reminder_id: int,
+    outcome: str,
+    attempts: int,
+    now: Optional[datetime] = None,
+) -> None:
+    """
+    Записать итог отправки напоминания.
+
+    Args:
+        session: Сессия БД
+        reminder_id: ID напоминания
+        outcome: SEND_SENT, SEND_SKIPPED или SEND_ERROR
+        attempts: Количество сделанных попыток (из claim_due_reminders)
+        now: Текущее время (для тестов)
+    """
+    values = reminder_outcome_values(outcome, attempts, now or datetime.now())
+    if values["status"] == "pending":
+        logger.warning(f"Напоминание {reminder_id} не отправлено (попытка {attempts}), повтор в {values['due_at']}")
+    elif values["status"] == "failed":
+        logger.error(f"Напоминание {reminder_id} не отправлено после {attempts} попыток")
+    await session.execute(
+        update(Reminder)
+        .where(Reminder.id == reminder_id, Reminder.status == "processing")
+        .values(**values, updated_at=func.now())
+    )
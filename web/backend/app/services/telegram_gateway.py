@@ -0,0 +1,322 @@
+"""
+Шлюз исходящих сообщений Telegram.
+
+Все отправки (напоминания, уведомления админам, рассылки, системные
+сообщения) проходят через один шлюз процесса:
+- Token bucket на бота (~30 сообщений/сек у Telegram) и на чат (~1/сек)
+- Классы приоритета: транзакционные сообщения (запись, напоминание)
+  не стоят в очереди за массовой рассылкой, рассылка ограничена своей
+  долей лимита бота
+- 429 (retry_after) приостанавливает все отправки этого бота на указанное
+  время, 5xx и сетевые ошибки повторяются с экспоненциальной задержкой
+  и jitter
+
+Лимиты действуют в пределах процесса, поэтому значения по умолчанию
+ниже официальных лимитов Telegram.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import Message
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Корзины чатов, не использовавшиеся дольше этого времени, удаляются
+CHAT_BUCKET_TTL_SECONDS = 60
+
+# Максимальная задержка между повторами при 5xx/сетевых ошибках
+MAX_BACKOFF_SECONDS = 30
+
+
+class Priority(IntEnum):
+    """Класс приоритета исходящего сообщения."""
+    TRANSACTIONAL = 0  # Подтверждения, напоминания, уведомления админам
+    BULK = 1  # Рассылки и массовые уведомления
+
+
+class TokenBucket:
+    """
+    Token bucket с резервированием.
+
+    Args:
+        rate: Скорость пополнения (токенов в секунду)
+        capacity: Максимальный запас токенов (по умолчанию равен rate)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        """Пополнить запас токенов на момент now."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Зарезервировать токен, даже если его придется подождать.
+
+        Args:
+            now: Текущее время (time.monotonic())
+
+        Returns:
+            Время ожидания в секундах до момента, когда токен будет доступен
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def try_acquire(self, now: Optional[float] = None) -> float:
+        """
+        Взять токен, только если он доступен сейчас.
+
+        Args:
+            now: Текущее время (time.monotonic())
+
+        Returns:
+            0, если токен получен, иначе рекомендуемое время ожидания
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, seconds: float) -> None:
+        """
+        Приостановить выдачу токенов (ответ 429 от Telegram).
+
+        Args:
+            seconds: Длительность паузы
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float, ttl: float) -> bool:
+        """Корзина полна и не использовалась дольше ttl."""
+        return now - self.updated > ttl and self.blocked_until <= now
+
+
+class TelegramGateway:
+    """
+    Шлюз исходящих запросов к Bot API с ограничением скорости и повторами.
+
+    Args:
+        bot_rate: Лимит сообщений в секунду на бота
+        bulk_rate: Лимит массовых сообщений в секунду на бота
+        chat_rate: Лимит сообщений в секунду на чат
+        max_retries: Максимум повторов при 429/5xx/сетевых ошибках
+    """
+
+    def __init__(
+        self,
+        bot_rate: float = settings.TELEGRAM_BOT_RATE,
+        bulk_rate: float = settings.TELEGRAM_BULK_RATE,
+        chat_rate: float = settings.TELEGRAM_CHAT_RATE,
+        max_retries: int = settings.TELEGRAM_MAX_RETRIES,
+    ):
+        self.bot_rate = bot_rate
+        self.bulk_rate = bulk_rate
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self._bot_buckets: Dict[str, TokenBucket] = {}
+        self._bulk_buckets: Dict[str, TokenBucket] = {}
+        self._chat_buckets: Dict[tuple, TokenBucket] = {}
+        self._last_cleanup = time.monotonic()
+
+    @staticmethod
+    def _bot_key(token: str) -> str:
+        """Ключ бота (ID из токена, чтобы не хранить токены в ключах)."""
+        return token.split(":", 1)[0]
+
+    def _bucket(self, buckets: Dict[Any, TokenBucket], key: Any, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+        """Получить или создать корзину."""
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+    def _cleanup_chat_buckets(self, now: float) -> None:
+        """Удалить корзины неактивных чатов."""
+        if now - self._last_cleanup < CHAT_BUCKET_TTL_SECONDS:
+            return
+        self._last_cleanup = now
+        for key in [k for k, b in self._chat_buckets.items() if b.is_idle(now, CHAT_BUCKET_TTL_SECONDS)]:
+            del self._chat_buckets[key]
+
+    async def _acquire(self, token: str, chat_id: Union[int, str, None], priority: Priority) -> None:
+        """Дождаться разрешения на отправку."""
+        bot_key = self._bot_key(token)
+        bot_bucket = self._bucket(self._bot_buckets, bot_key, self.bot_rate)
+        now = time.monotonic()
+        self._cleanup_chat_buckets(now)
+
+        wait = 0.0
+        if chat_id is not None:
+            chat_bucket = self._bucket(self._chat_buckets, (bot_key, chat_id), self.chat_rate, 1.0)
+            wait = chat_bucket.reserve(now)
+
+        if priority == Priority.TRANSACTIONAL:
+            wait = max(wait, bot_bucket.reserve(now))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return
+
+        # Массовые сообщения: своя доля лимита, и токен бота берется только
+        # если он свободен, чтобы не задерживать транзакционные сообщения
+        bulk_bucket = self._bucket(self._bulk_buckets, bot_key, self.bulk_rate)
+        wait = max(wait, bulk_bucket.reserve(now))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        while True:
+            wait = bot_bucket.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def execute(
+        self,
+        token: str,
+        chat_id: Union[int, str, None],
+        request: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.TRANSACTIONAL,
+    ) -> T:
+        """
+        Выполнить запрос к Bot API с учетом лимитов и повторов.
+
+        Args:
+            token: Токен бота (ключ лимита бота)
+            chat_id: Чат-получатель (ключ лимита чата) или None
+            request: Фабрика корутины запроса (вызывается на каждую попытку)
+            priority: Класс приоритета
+
+        Returns:
+            Результат запроса
+
+        Raises:
+            TelegramAPIError: Если запрос не удался после всех повторов
+                или ошибка не подлежит повтору (403, 400 и т.п.)
+        """
+        attempt = 0
+        while True:
+            await self._acquire(token, chat_id, priority)
+            try:
+                return await request()
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = e.retry_after + random.uniform(0, 1)
+                # Telegram ограничил бота целиком — приостанавливаем все его отправки
+                self._bucket(self._bot_buckets, self._bot_key(token), self.bot_rate).block(delay)
+                logger.warning(
+                    f"Telegram 429 для бота {self._bot_key(token)}, чат {chat_id}: "
+                    f"повтор через {delay:.1f} сек (попытка {attempt})"
+                )
+            except (TelegramServerError, TelegramNetworkError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = min(MAX_BACKOFF_SECONDS, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Ошибка Telegram для бота {self._bot_key(token)}, чат {chat_id}: {e}; "
+                    f"повтор через {delay:.1f} сек (попытка {attempt})"
+                )
+                await asyncio.sleep(delay)
+
+    async def send_message(
+        self,
+        bot: Bot,
+        chat_id: Union[int, str],
+        text: str,
+        priority: Priority = Priority.TRANSACTIONAL,
+        **kwargs: Any,
+    ) -> Message:
+        """
+        Отправить текстовое сообщение через шлюз.
+
+        Args:
+            bot: Бот-отправитель
+            chat_id: ID чата
+            text: Текст сообщения
+            priority: Класс приоритета
+            **kwargs: Дополнительные параметры sendMessage
+
+        Returns:
+            Отправленное сообщение
+        """
+        return await self.execute(
+            bot.token,
+            chat_id,
+            lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs),
+            priority,
+        )
+
+    async def send_photo(
+        self,
+        bot: Bot,
+        chat_id: Union[int, str],
+        photo: Any,
+        priority: Priority = Priority.TRANSACTIONAL,
+        **kwargs: Any,
+    ) -> Message:
+        """
+        Отправить фото через шлюз.
+
+        Args:
+            bot: Бот-отправитель
+            chat_id: ID чата
+            photo: file_id, URL или InputFile
+            priority: Класс приоритета
+            **kwargs: Дополнительные параметры sendPhoto
+
+        Returns:
+            Отправленное сообщение
+        """
+        return await self.execute(
+            bot.token,
+            chat_id,
+            lambda: bot.send_photo(chat_id=chat_id, photo=photo, **kwargs),
+            priority,
+        )
+
+
+# Глобальный экземпляр шлюза
+_telegram_gateway: Optional[TelegramGateway] = None
+
+
+def get_telegram_gateway() -> TelegramGateway:
+    """
+    Получить глобальный экземпляр TelegramGateway.
+
+    Returns:
+        Экземпляр TelegramGateway
+    """
+    global _telegram_gateway
+
+    if _telegram_gateway is None:
+        _telegram_gateway = TelegramGateway()
+
+    return _telegram_gateway
@@ -0,0 +1,172 @@
+"""
+Реестр file_id для повторно отправляемых файлов Telegram.
+
+Приветственное фото /start и изображения рассылок раньше загружались
+заново при каждой отправке (multipart upload одних и тех же байтов).
+Реестр загружает файл один раз для каждого бота, запоминает file_id,
+который вернул Telegram, по ключу (bot_id, sha256 содержимого) и дальше
+отправляет только file_id. Ключ по хешу содержимого: замена файла
+на диске дает новую загрузку, а одинаковые файлы по разным путям —
+одну. Если Telegram отклоняет сохраненный file_id, файл загружается
+заново.
+
+file_id действителен только для бота, который его получил, поэтому
+бот входит в ключ.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Размер блока при чтении файла для хеширования
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SendMedia = Callable[[Any], Awaitable[Message]]
+
+
+def extract_file_id(message: Message) -> Optional[str]:
+    """
+    Получить file_id отправленного файла из сообщения.
+
+    Args:
+        message: Сообщение, которое вернул Telegram
+
+    Returns:
+        file_id фото (самого большого размера), документа, видео
+        или анимации, либо None
+    """
+    if message.photo:
+        return message.photo[-1].file_id
+    for media in (message.document, message.video, message.animation):
+        if media is not None:
+            return media.file_id
+    return None
+
+
+class MediaRegistry:
+    """
+    Кеш file_id по (bot_id, sha256 файла).
+
+    Args:
+        max_size: Максимальное количество сохраненных file_id
+    """
+
+    def __init__(self, max_size: int = settings.TELEGRAM_MEDIA_CACHE_SIZE):
+        self.max_size = max_size
+        self._file_ids: "OrderedDict[Tuple[int, str], str]" = OrderedDict()
+        # Хеши файлов по пути; пересчитываются при изменении mtime/размера
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+
+    def file_hash(self, path: str) -> str:
+        """
+        SHA-256 содержимого файла (с кешем по mtime и размеру).
+
+        Args:
+            path: Путь к файлу
+
+        Returns:
+            Хеш в шестнадцатеричном виде
+        """
+        stat = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        self._hashes[path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        return file_hash
+
+    def get_file_id(self, bot_id: int, file_hash: str) -> Optional[str]:
+        """Сохраненный file_id или None."""
+        key = (bot_id, file_hash)
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            self._file_ids.move_to_end(key)
+        return file_id
+
+    def remember(self, bot_id: int, file_hash: str, file_id: str) -> None:
+        """Сохранить file_id, вытесняя самые давние записи."""
+        self._file_ids[(bot_id, file_hash)] = file_id
+        self._file_ids.move_to_end((bot_id, file_hash))
+        while len(self._file_ids) > self.max_size:
+            evicted, _ = self._file_ids.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    def forget(self, bot_id: int, file_hash: str) -> None:
+        """Удалить сохраненный file_id."""
+        self._file_ids.pop((bot_id, file_hash), None)
+
+    async def send_file(self, bot: Bot, path: str, send: SendMedia) -> Message:
+        """
+        Отправить файл по сохраненному file_id или загрузить его.
+
+        Args:
+            bot: Бот-отправитель
+            path: Путь к файлу
+            send: Функция отправки, принимающая file_id или InputFile
+                (например, lambda photo: message.answer_photo(photo=photo))
+
+        Returns:
+            Отправленное сообщение
+        """
+        file_hash = self.file_hash(path)
+
+        file_id = self.get_file_id(bot.id, file_hash)
+        if file_id is not None:
+            try:
+                return await send(file_id)
+            except TelegramBadRequest as e:
+                if "file" not in e.message.lower():
+                    raise
+                logger.warning(f"file_id файла {path} отклонен ботом {bot.id}, загружаем заново: {e.message}")
+                self.forget(bot.id, file_hash)
+
+        # Параллельные отправки того же файла ждут первую загрузку
+        key = (bot.id, file_hash)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            file_id = self.get_file_id(bot.id, file_hash)
+            if file_id is not None:
+                return await send(file_id)
+
+            message = await send(FSInputFile(path))
+            file_id = extract_file_id(message)
+            if file_id is not None:
+                self.remember(bot.id, file_hash, file_id)
+                logger.debug(f"Файл {path} загружен ботом {bot.id}, file_id сохранен")
+            return message
+
+
+# Глобальный экземпляр реестра
+_media_registry: Optional[MediaRegistry] = None
+
+
+def get_media_registry() -> MediaRegistry:
+    """
+    Получить глобальный экземпляр MediaRegistry.
+
+    Returns:
+        Экземпляр MediaRegistry
+    """
+    global _media_registry
+
+    if _media_registry is None:
+        _media_registry = MediaRegistry()
+
+    return _media_registry
@@ -7,7 +7,11 @@
 
 import logging
 from typing import Optional
-import httpx
+
+from aiogram.exceptions import TelegramAPIError
+
+from app.services.bot_pool import get_pooled_bot
+from app.services.telegram_gateway import get_telegram_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +20,8 @@ class TelegramNotificationService:
     """
     Сервис для отправки уведомлений через Telegram API.
     
-    Использует API Telegram для отправки сообщений
-    пользователям через бота.
+    Отправляет сообщения пользователям через бота,
+    с учетом лимитов шлюза (app.services.telegram_gateway).
     """
     
     def __init__(self, bot_token: Optional[str] = None):
@@ -28,7 +32,6 @@ class TelegramNotificationService:
             bot_token: Токен Telegram бота (опционально)
         """
         self.bot_token = bot_token
-        self.api_url = "https://api.telegram.org"
         
         if bot_token:
             logger.info(f"TelegramNotificationService инициализирован с токеном: {bot_token[:10]}...")
@@ -63,28 +66,18 @@ class TelegramNotificationService:
         
         logger.info(f"Отправка Telegram сообщения в чат {chat_id}")
         
+        bot = get_pooled_bot(self.bot_token)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/bot{self.bot_token}/sendMessage",
-                    json={
-                        "chat_id": chat_id,
-                        "text": text,
-                        "parse_mode": parse_mode
-                    }
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json()
-                    logger.error(f"Ошибка отправки сообщения: {error_data}")
-                    return False
-                
-                result = response.json()
-                logger.info(f"Telegram сообщение отправлено успешно: {result.get('message_id')}")
-                return True
-                
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP ошибка при отправке сообщения: {e}")
+            result = await get_telegram_gateway().send_message(
+                bot,
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode
+            )
+            logger.info(f"Telegram сообщение отправлено успешно: {result.message_id}")
+            return True
+        except TelegramAPIError as e:
+            logger.error(f"Ошибка отправки сообщения: {e}")
             return False
         except Exception as e:
             logger.error(f"Ошибка отправки Telegram сообщения: {e}")
@@ -0,0 +1,129 @@
+"""
+Параллельная обработка компаний в массовых задачах.
+
+Задача разбивается на подзадачи по компаниям: не больше concurrency
+компаний обрабатываются одновременно, каждая в своей сессии БД, поэтому
+медленная компания не задерживает остальные. Внутри компании сообщения
+отправляются параллельно; лимиты Telegram соблюдает шлюз
+(app.services.telegram_gateway), здесь ограничивается только число
+одновременных отправок.
+
+По завершении в лог пишется сводка: время и результат каждой компании,
+самые медленные компании и ошибки.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Сколько самых медленных компаний выводить в сводке
+SUMMARY_SLOWEST = 5
+
+
+@dataclass
+class TenantRunResult:
+    """Результат обработки одной компании."""
+    company_id: int
+    sent: int = 0
+    failed: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+async def fan_out_tenants(
+    company_ids: Iterable[int],
+    job: Callable[[int], Awaitable[Tuple[int, int]]],
+    concurrency: int = settings.TENANT_FANOUT_CONCURRENCY,
+    timeout: Optional[float] = settings.TENANT_JOB_TIMEOUT,
+) -> List[TenantRunResult]:
+    """
+    Выполнить job для каждой компании с ограничением параллельности.
+
+    Ошибка или таймаут одной компании не прерывает остальные.
+
+    Args:
+        company_ids: ID компаний
+        job: Корутина обработки компании, возвращает (отправлено, ошибок)
+        concurrency: Максимум одновременно обрабатываемых компаний
+        timeout: Максимальное время обработки одной компании (секунды)
+
+    Returns:
+        Результаты по компаниям в порядке company_ids
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(company_id: int) -> TenantRunResult:
+        result = TenantRunResult(company_id=company_id)
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result.sent, result.failed = await asyncio.wait_for(job(company_id), timeout)
+            except asyncio.TimeoutError:
+                result.error = f"таймаут {timeout} с"
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+                logger.error(f"Ошибка обработки компании {company_id}: {e}", exc_info=True)
+            result.duration = time.monotonic() - started
+        return result
+
+    return list(await asyncio.gather(*(run(company_id) for company_id in company_ids)))
+
+
+async def send_concurrently(
+    items: Sequence[T],
+    send: Callable[[T], Awaitable[Any]],
+    concurrency: int = settings.TENANT_SEND_CONCURRENCY,
+) -> List[Optional[BaseException]]:
+    """
+    Отправить сообщения компании параллельно.
+
+    Args:
+        items: Данные сообщений
+        send: Корутина отправки одного сообщения
+        concurrency: Максимум одновременных отправок
+
+    Returns:
+        Для каждого элемента items: None при успехе или исключение
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: T) -> Optional[BaseException]:
+        async with semaphore:
+            try:
+                await send(item)
+            except Exception as e:
+                return e
+        return None
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
+
+
+def log_fanout_summary(job_name: str, results: Sequence[TenantRunResult], duration: float) -> None:
+    """
+    Записать в лог сводку по компаниям.
+
+    Args:
+        job_name: Название задачи
+        results: Результаты по компаниям
+        duration: Общее время выполнения (секунды)
+    """
+    sent = sum(r.sent for r in results)
+    failed = sum(r.failed for r in results)
+    errors = [r for r in results if r.error]
+
+    logger.info(
+        f"{job_name}: компаний {len(results)}, отправлено {sent}, ошибок отправки {failed}, "
+        f"ошибок компаний {len(errors)}, время {duration:.2f} с"
+    )
+    for r in sorted(results, key=lambda r: r.duration, reverse=True)[:SUMMARY_SLOWEST]:
+        logger.info(f"{job_name}: компания {r.company_id} - {r.duration:.2f} с, отправлено {r.sent}, ошибок {r.failed}")
+    for r in errors:
+        logger.warning(f"{job_name}: компания {r.company_id} не обработана: {r.error}")
@@ -12,13 +12,15 @@
 - Все методы (create, drop, clone) используют await self._get_async_session_maker()
 """
 import logging
-from typing import Optional, AsyncGenerator
+from typing import Iterable, List, Optional, AsyncGenerator, Set
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.public_models import Company
+from app.services.notification_ledger import ledger_ddl
+from app.services.notification_outbox import outbox_ddl
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +102,32 @@ class TenantService:
             logger.error(f"Ошибка при проверке существования схемы '{schema_name}': {e}")
             return False
     
+    async def existing_tenant_schemas(self, company_ids: Iterable[int]) -> Set[int]:
+        """
+        Проверить существование tenant схем для нескольких компаний одним запросом.
+        
+        Args:
+            company_ids: ID компаний
+            
+        Returns:
+            Множество ID компаний, у которых tenant схема существует
+        """
+        schema_names = {f"tenant_{company_id}": company_id for company_id in company_ids}
+        if not schema_names:
+            return set()
+        
+        try:
+            async_session_maker = await self._get_async_session_maker()
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    text("SELECT schema_name FROM information_schema.schemata WHERE schema_name = ANY(:schema_names)"),
+                    {"schema_names": list(schema_names)}
+                )
+                return {schema_names[name] for name in result.scalars().all()}
+        except Exception as e:
+            logger.error(f"Ошибка при проверке существования tenant схем: {e}")
+            return set()
+    
     async def create_tenant_schema(self, company_id: int) -> bool:
         """
         Создать tenant схему для новой компании.
@@ -180,6 +208,41 @@ class TenantService:
             logger.error(f"Ошибка при клонировании таблицы '{table_name}' в '{schema_name}': {e}")
             return False
     
+    async def create_notification_tables(self, company_id: int) -> bool:
+        """
+        Создать outbox и индекс журнала уведомлений в tenant схеме.
+        
+        DDL выполняется в двух транзакциях: ошибка индекса журнала
+        (ALTER клонированной таблицы notifications) не откатывает outbox,
+        без которого не сохраняется ни одно изменение статуса записи.
+        
+        Args:
+            company_id: ID компании
+            
+        Returns:
+            True, если outbox и журнал созданы, иначе False
+        """
+        schema_name = f"tenant_{company_id}"
+        
+        outbox_created = await self._execute_ddl(schema_name, "outbox уведомлений", outbox_ddl(schema_name))
+        ledger_created = await self._execute_ddl(schema_name, "журнал уведомлений", ledger_ddl(schema_name))
+        return outbox_created and ledger_created
+    
+    async def _execute_ddl(self, schema_name: str, name: str, statements: List[str]) -> bool:
+        """Выполнить DDL одной транзакцией (True, если выполнен)."""
+        try:
+            async_session_maker = await self._get_async_session_maker()
+            async with async_session_maker() as session:
+                for statement in statements:
+                    await session.execute(text(statement))
+                await session.commit()
+            
+            logger.info(f"{name.capitalize()} создан в '{schema_name}'")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при создании ({name}) в '{schema_name}': {e}")
+            return False
+    
     async def initialize_tenant_for_company(self, company_id: int) -> bool:
         """
         Инициализировать tenant схему для новой компании.
@@ -220,6 +283,12 @@ class TenantService:
                 else:
                     logger.error(f"Не удалось склонировать таблицу '{table_name}'")
             
+            # Outbox и индекс журнала создаются по DDL: клонированные таблицы теряют умолчания и индексы.
+            # Без них изменение статуса записи падает, поэтому компания не считается готовой
+            if not await self.create_notification_tables(company_id):
+                logger.error(f"Не удалось создать outbox и журнал уведомлений для компании {company_id}")
+                return False
+            
             logger.info(f"Инициализация tenant схемы завершена: {success_count}/{len(tables_to_clone)} таблиц склонировано")
             return True
             
@@ -0,0 +1,219 @@
+"""
+Лист-наряды мастеров компании.
+
+Записи дня всех мастеров компании загружаются одним запросом
+(мастера без записей тоже попадают в выборку и получают пустой
+лист-наряд), группируются по мастеру и отправляются параллельно.
+
+Время отправки берется из настройки компании work_order_time.
+Периодическая задача проверяет компании каждые несколько минут;
+отметка в public.tenant_job_runs (claim_daily_run) не дает отправить
+лист-наряды компании дважды за день. Отметка фиксируется после загрузки
+лист-нарядов и снимается (release_daily_run), если не удалась ни одна
+отправка, поэтому следующий запуск повторит ее.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Вид задачи в public.tenant_job_runs
+JOB_WORK_ORDERS = "work_orders"
+
+# Настройка компании: время отправки лист-нарядов (HH:MM)
+WORK_ORDER_SETTING_KEY = "work_order_time"
+DEFAULT_WORK_ORDER_TIME = time(8, 0)
+
+# Статусы записей, попадающих в лист-наряд
+WORK_ORDER_STATUSES = ("new", "confirmed")
+
+
+@dataclass
+class WorkOrder:
+    """Лист-наряд одного мастера."""
+    master_id: int
+    master_name: str
+    telegram_id: int
+    bookings: List = field(default_factory=list)
+
+
+def parse_setting_time(value: Optional[str], default: time = DEFAULT_WORK_ORDER_TIME) -> time:
+    """
+    Разобрать время из настройки компании.
+
+    Args:
+        value: Значение настройки (HH:MM)
+        default: Время по умолчанию, если значение не задано или некорректно
+
+    Returns:
+        Время
+    """
+    try:
+        return datetime.strptime((value or "").strip(), "%H:%M").time()
+    except ValueError:
+        return default
+
+
+async def read_work_order_time(session: AsyncSession, schema_name: str) -> time:
+    """
+    Время отправки лист-нарядов из настроек компании.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+
+    Returns:
+        Время отправки
+    """
+    result = await session.execute(
+        text(f'SELECT value FROM "{schema_name}".settings WHERE key = :key'),
+        {"key": WORK_ORDER_SETTING_KEY}
+    )
+    return parse_setting_time(result.scalar_one_or_none())
+
+
+async def claim_daily_run(session: AsyncSession, company_id: int, job: str, day: date) -> bool:
+    """
+    Отметить запуск задачи компании за день (без commit).
+
+    Отметка ставится одним INSERT ... ON CONFLICT DO UPDATE с условием
+    на дату, поэтому из параллельных запусков ее получает только один.
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        job: Вид задачи
+        day: День запуска
+
+    Returns:
+        True, если за этот день задача еще не запускалась
+    """
+    result = await session.execute(
+        text("""
+            INSERT INTO public.tenant_job_runs AS r (company_id, job, last_run_on, updated_at)
+            VALUES (:company_id, :job, :day, now())
+            ON CONFLICT (company_id, job) DO UPDATE
+                SET last_run_on = EXCLUDED.last_run_on, updated_at = now()
+                WHERE r.last_run_on < EXCLUDED.last_run_on
+            RETURNING r.company_id
+        """),
+        {"company_id": company_id, "job": job, "day": day}
+    )
+    return result.first() is not None
+
+
+async def release_daily_run(session: AsyncSession, company_id: int, job: str, day: date) -> None:
+    """
+    Снять отметку запуска задачи компании за день (без commit).
+
+    Args:
+        session: Сессия БД
+        company_id: ID компании
+        job: Вид задачи
+        day: День, отметку которого нужно снять
+    """
+    await session.execute(
+        text("""
+            UPDATE public.tenant_job_runs
+            SET last_run_on = :previous_day, updated_at = now()
+            WHERE company_id = :company_id AND job = :job AND last_run_on = :day
+        """),
+        {"company_id": company_id, "job": job, "day": day, "previous_day": day - timedelta(days=1)}
+    )
+
+
+async def load_work_orders(session: AsyncSession, schema_name: str, day: date) -> List[WorkOrder]:
+    """
+    Загрузить лист-наряды всех мастеров компании на день одним запросом.
+
+    Args:
+        session: Сессия БД
+        schema_name: Имя схемы
+        day: День лист-наряда
+
+    Returns:
+        Лист-наряды мастеров с Telegram ID
+    """
+    result = await session.execute(
+        text(f"""
+            SELECT m.id AS master_id, m.full_name AS master_name,
+                   COALESCE(m.telegram_id, u.telegram_id) AS telegram_id,
+                   b.id AS booking_id, b.time, b.end_time, b.status, b.comment,
+                   c.full_name AS client_name, c.phone AS client_phone,
+                   s.name AS service_name,
+                   p.number AS post_number, p.name AS post_name
+            FROM "{schema_name}".masters m
+            LEFT JOIN "{schema_name}".users u ON m.user_id = u.id
+            LEFT JOIN "{schema_name}".bookings b
+                ON b.master_id = m.id
+               AND b.service_date = :day
+               AND b.status = ANY(:statuses)
+            LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
+            LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
+            LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
+            WHERE COALESCE(m.telegram_id, u.telegram_id) IS NOT NULL
+            ORDER BY m.id, b.time
+        """),
+        {"day": day, "statuses": list(WORK_ORDER_STATUSES)}
+    )
+    return group_work_orders(result.fetchall())
+
+
+def group_work_orders(rows: Sequence) -> List[WorkOrder]:
+    """
+    Сгруппировать строки load_work_orders по мастерам.
+
+    Args:
+        rows: Строки, отсортированные по мастеру и времени
+
+    Returns:
+        Лист-наряды в порядке мастеров
+    """
+    orders: Dict[int, WorkOrder] = {}
+    for row in rows:
+        order = orders.get(row.master_id)
+        if order is None:
+            order = WorkOrder(master_id=row.master_id, master_name=row.master_name, telegram_id=row.telegram_id)
+            orders[row.master_id] = order
+        if row.booking_id is not None:
+            order.bookings.append(row)
+    return list(orders.values())
+
+
+def render_work_order(day: date, bookings: Sequence) -> str:
+    """
+    Текст лист-наряда мастера.
+
+    Args:
+        day: День лист-наряда
+        bookings: Записи мастера (строки load_work_orders)
+
+    Returns:
+        Текст сообщения
+    """
+    message_text = f"📋 Лист-наряд на {day.strftime('%d.%m.%Y')}\n\n"
+
+    if not bookings:
+        return message_text + "✅ На сегодня записей нет"
+
+    for i, booking in enumerate(bookings, 1):
+        end_time = f" - {booking.end_time.strftime('%H:%M')}" if booking.end_time else ""
+        message_text += f"{i}. ⏰ {booking.time.strftime('%H:%M')}{end_time}\n"
+        message_text += f"   🛠️ {booking.service_name or 'Не указана'}\n"
+        message_text += f"   👤 {booking.client_name or 'Неизвестно'}\n"
+        if booking.client_phone:
+            message_text += f"   📞 {booking.client_phone}\n"
+        if booking.post_number:
+            message_text += f"   🏢 Пост №{booking.post_number} {booking.post_name or ''}\n"
+        message_text += f"   📊 Статус: {booking.status}\n"
+        if booking.comment:
+            message_text += f"   💬 {booking.comment}\n"
+        message_text += "\n"
+
+    return message_text
@@ -4,4 +4,21 @@
 Содержит:
 - subscription_notifications.py - задачи для напоминаний о подписках
 - payment_tasks.py - задачи для обработки платежей
+- runtime.py - event loop процесса worker для async задач
 """
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.tasks.runtime import start_task_runtime, stop_task_runtime
+
+
+@worker_process_init.connect
+def start_runtime_on_init(**kwargs):
+    """Запустить event loop процесса worker после fork."""
+    start_task_runtime()
+
+
+@worker_process_shutdown.connect
+def stop_runtime_on_shutdown(**kwargs):
+    """Закрыть пул ботов, движок БД и event loop при завершении процесса worker."""
+    stop_task_runtime()
@@ -1,155 +1,286 @@
 """Задачи для отправки уведомлений через Telegram"""
-import asyncio
+import logging
 import os
-from datetime import date, datetime, timedelta, time as time_type
+import time
+from datetime import date, datetime, timedelta
 from typing import List
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import select, and_
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from shared.database.models import Booking, Client, User, Master
+from shared.database.models import Booking, Client, User
 from app.models.public_models import Company
 from sqlalchemy import text
 
-# TODO: Создать модель Notification (пока заглушка)
-class Notification:
-    """Временная заглушка для модели Notification"""
-    def __init__(self, **kwargs):
-        pass
-from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from celery import shared_task
+from app.services.bot_pool import get_pooled_bot
+from app.services.telegram_gateway import get_telegram_gateway
+from app.services.tenant_fanout import fan_out_tenants, log_fanout_summary, send_concurrently
+from app.services.notification_outbox import EVENT_BOOKING_STATUS, relay_company_outbox
+from app.services.work_orders import (
+    JOB_WORK_ORDERS,
+    claim_daily_run,
+    load_work_orders,
+    read_work_order_time,
+    release_daily_run,
+    render_work_order,
+)
+from app.services.admin_digest import (
+    DIGEST_COLUMNS,
+    digest_from_clause,
+    digest_window_seconds,
+    read_delay_minutes,
+    send_admin_digest,
+)
+from app.services.notification_ledger import (
+    KIND_ADMIN_NEW_BOOKING,
+    KIND_REMINDER_3_HOURS,
+    KIND_REMINDER_DAY,
+    KIND_STATUS_CHANGE,
+    delivery,
+    ledger_params,
+    not_notified_clause,
+    record_deliveries,
+)
+from app.services.reminders import (
+    REMINDER_3_HOURS,
+    REMINDER_DAY_BEFORE,
+    SEND_ERROR,
+    SEND_SENT,
+    SEND_SKIPPED,
+    claim_due_reminders,
+    finish_reminder,
+)
+from app.config import settings
+from app.database import get_async_session_maker
+from app.tasks.runtime import run_async
+
+logger = logging.getLogger(__name__)
 
-# Получаем настройки из переменных окружения
-DB_HOST = os.getenv("DB_HOST", "postgres")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "barber_db")
-DB_USER = os.getenv("DB_USER", "barber_user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 
-# Формируем URL базы данных
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Общий движок процесса: пул соединений живет в event loop worker (app.tasks.runtime)
+async_session_maker = get_async_session_maker()
 
-# Создаем движок для задач
-engine = create_async_engine(DATABASE_URL, echo=False)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+def get_bot():
+    """Получить экземпляр бота (из пула, с общей HTTP сессией)"""
+    return get_pooled_bot(BOT_TOKEN)
 
-# Инициализируем бота только при необходимости
-_bot_instance = None
 
-def get_bot():
-    """Получить экземпляр бота (lazy initialization)"""
-    global _bot_instance
-    if _bot_instance is None:
-        _bot_instance = Bot(token=BOT_TOKEN)
-    return _bot_instance
+async def get_active_company_bots() -> List:
+    """Активные компании с токеном бота: строки (id, name, telegram_bot_token)"""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            text("""
+                SELECT id, name, telegram_bot_token FROM public.companies
+                WHERE is_active = true AND telegram_bot_token IS NOT NULL AND telegram_bot_token <> ''
+            """)
+        )
+        return result.fetchall()
+
+
+def attendance_keyboard(booking_id: int) -> InlineKeyboardMarkup:
+    """Кнопки подтверждения явки и отказа для напоминания"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Подтверждаю", callback_data=f"confirm_attendance_{booking_id}")],
+        [InlineKeyboardButton(text="❌ Отказ", callback_data=f"cancel_booking_{booking_id}")],
+    ])
+
+
+async def run_tenant_fanout(job_name: str, tenant_job) -> int:
+    """
+    Выполнить задачу по всем активным компаниям параллельно.
+
+    Args:
+        job_name: Название задачи для сводки
+        tenant_job: Корутина (company_id, bot_token) -> (отправлено, ошибок)
+
+    Returns:
+        Количество отправленных сообщений
+    """
+    started = time.monotonic()
+    tokens = {company_id: bot_token for company_id, _, bot_token in await get_active_company_bots()}
+
+    results = await fan_out_tenants(
+        tokens.keys(),
+        lambda company_id: tenant_job(company_id, tokens[company_id]),
+    )
+    log_fanout_summary(job_name, results, time.monotonic() - started)
+    return sum(r.sent for r in results)
+
+
+async def send_reminder_day_before_for_company(company_id: int, bot_token: str, tomorrow: date):
+    """
+    Отправить напоминания за день для одной компании.
+
+    Returns:
+        (отправлено, ошибок)
+    """
+    schema_name = f"tenant_{company_id}"
+    async with async_session_maker() as session:
+        bookings_result = await session.execute(
+            text(f"""
+                SELECT b.id, c.user_id, b.time, u.telegram_id,
+                       s.name as service_name,
+                       m.full_name as master_name,
+                       p.number as post_number
+                FROM "{schema_name}".bookings b
+                LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
+                LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
+                LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
+                LEFT JOIN "{schema_name}".masters m ON b.master_id = m.id
+                LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
+                WHERE b.service_date = :tomorrow
+                  AND b.status = 'confirmed'
+                  AND u.telegram_id IS NOT NULL
+                  AND {not_notified_clause(schema_name)}
+            """),
+            {"tomorrow": tomorrow, **ledger_params(KIND_REMINDER_DAY)}
+        )
+        bookings = bookings_result.fetchall()
+
+    if not bookings:
+        return 0, 0
+
+    # Бот компании из пула (общая HTTP сессия)
+    bot = get_pooled_bot(bot_token)
+    date_str = tomorrow.strftime("%d.%m.%Y")
+    messages = {}
+
+    async def send(booking_row):
+        booking_id, user_id, booking_time, telegram_id, service_name, master_name, post = booking_row
+        post_number = f"Пост №{post}" if post else "Не назначен"
+
+        message_text = "🔔 Напоминание о записи\n\n"
+        message_text += f"Завтра {date_str} в {booking_time.strftime('%H:%M')}\n"
+        message_text += f"Услуга: {service_name or 'Услуга'}\n"
+        message_text += f"Мастер: {master_name or 'Не назначен'}\n"
+        message_text += f"{post_number}\n\n"
+        message_text += "Ждем вас в салоне красоты!"
+        messages[booking_id] = message_text
+
+        await get_telegram_gateway().send_message(
+            bot,
+            chat_id=telegram_id,
+            text=message_text,
+            reply_markup=attendance_keyboard(booking_id)
+        )
+
+    errors = await send_concurrently(bookings, send)
+    for booking_row, error in zip(bookings, errors):
+        if error is not None:
+            logger.error(f"Ошибка отправки напоминания за день для записи {booking_row[0]} (компания {company_id}): {error}")
+
+    # Журнал доставки одной вставкой: отправленные не будут отправлены повторно
+    async with async_session_maker() as session:
+        await record_deliveries(session, schema_name, KIND_REMINDER_DAY, [
+            delivery(booking_row[0], messages.get(booking_row[0], ""), booking_row[1], error)
+            for booking_row, error in zip(bookings, errors)
+        ])
+        await session.commit()
+
+    failed = sum(1 for error in errors if error is not None)
+    return len(bookings) - failed, failed
 
 
 async def send_reminder_day_before():
-    """Отправить напоминания за день до записи (мульти-тенантная версия)"""
-    today = date.today()
-    tomorrow = today + timedelta(days=1)
+    """Отправить напоминания за день до записи (мульти-тенантная версия)
     
+    Компании обрабатываются параллельно (app.services.tenant_fanout),
+    каждая в своей сессии БД.
+    """
+    tomorrow = date.today() + timedelta(days=1)
+    total_reminders = await run_tenant_fanout(
+        "Напоминания за день",
+        lambda company_id, bot_token: send_reminder_day_before_for_company(company_id, bot_token, tomorrow),
+    )
+    logger.info(f"Всего отправлено напоминаний за день: {total_reminders}")
+
+
+async def send_reminder_3_hours_before_for_company(company_id: int, bot_token: str, now: datetime):
+    """
+    Отправить напоминания за 3 часа для одной компании.
+
+    Отправленные и неудачные напоминания записываются в notifications
+    одной вставкой после отправки.
+
+    Returns:
+        (отправлено, ошибок)
+    """
+    # Записи, которые начинаются через 3 часа (±3 минуты для точности)
+    target_time_start = (now + timedelta(hours=3, minutes=-3)).time()
+    target_time_end = (now + timedelta(hours=3, minutes=3)).time()
+    schema_name = f"tenant_{company_id}"
+
     async with async_session_maker() as session:
-        # Получаем все активные компании
-        await session.execute(text('SET search_path TO public'))
-        companies_result = await session.execute(
-            text('SELECT id, name, telegram_bot_token FROM public.companies WHERE is_active = true')
+        # Исключаем записи, для которых уже было отправлено напоминание за 3 часа
+        bookings_result = await session.execute(
+            text(f"""
+                SELECT b.id, b.time, c.user_id, u.telegram_id,
+                       s.name as service_name,
+                       p.number as post_number
+                FROM "{schema_name}".bookings b
+                LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
+                LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
+                LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
+                LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
+                WHERE b.service_date = :today
+                  AND b.status = 'confirmed'
+                  AND b.time >= :target_time_start
+                  AND b.time <= :target_time_end
+                  AND u.telegram_id IS NOT NULL
+                  AND {not_notified_clause(schema_name)}
+            """),
+            {
+                "today": now.date(),
+                "target_time_start": target_time_start,
+                "target_time_end": target_time_end,
+                **ledger_params(KIND_REMINDER_3_HOURS),
+            }
         )
-        companies = companies_result.fetchall()
-        
-        total_reminders = 0
-        
-        for company_row in companies:
-            company_id = company_row[0]
-            company_name = company_row[1]
-            bot_token = company_row[2]
-            
-            if not bot_token:
-                continue
-            
-            try:
-                # Переключаемся на tenant схему компании
-                schema_name = f"tenant_{company_id}"
-                await session.execute(text(f'SET search_path TO "{schema_name}", public'))
-                
-                # Находим подтвержденные записи на завтра в этой компании
-                bookings_result = await session.execute(
-                    text(f"""
-                        SELECT b.id, b.booking_number, b.service_date, b.time, b.client_id, b.service_id, 
-                               b.master_id, b.post_id, b.status,
-                               c.user_id,
-                               u.telegram_id,
-                               s.name as service_name,
-                               m.full_name as master_name,
-                               p.number as post_number
-                        FROM "{schema_name}".bookings b
-                        LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
-                        LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
-                        LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
-                        LEFT JOIN "{schema_name}".masters m ON b.master_id = m.id
-                        LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
-                        WHERE b.service_date = :tomorrow
-                          AND b.status = 'confirmed'
-                          AND u.telegram_id IS NOT NULL
-                    """),
-                    {"tomorrow": tomorrow}
-                )
-                bookings = bookings_result.fetchall()
-                
-                if not bookings:
-                    continue
-                
-                # Создаем бот для этой компании
-                bot = Bot(token=bot_token)
-                
-                for booking_row in bookings:
-                    booking_id = booking_row[0]
-                    booking_number = booking_row[1]
-                    booking_date = booking_row[2]
-                    booking_time = booking_row[3]  # Исправлено: time это индекс 3, не 4
-                    telegram_id = booking_row[10]
-                    service_name = booking_row[11] or "Услуга"
-                    master_name = booking_row[12] or "Не назначен"
-                    post_number = f"Пост №{booking_row[13]}" if booking_row[13] else "Не назначен"
-                    
-                    try:
-                        # Формируем сообщение
-                        date_str = booking_date.strftime("%d.%m.%Y")
-                        time_str = booking_time.strftime("%H:%M")
-                        
-                        text = "🔔 Напоминание о записи\n\n"
-                        text += f"Завтра {date_str} в {time_str}\n"
-                        text += f"Услуга: {service_name}\n"
-                        text += f"Мастер: {master_name}\n"
-                        text += f"{post_number}\n\n"
-                        text += "Ждем вас в салоне красоты!"
-                        
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="✅ Подтверждаю", callback_data=f"confirm_attendance_{booking_id}")],
-                            [InlineKeyboardButton(text="❌ Отказ", callback_data=f"cancel_booking_{booking_id}")],
-                        ])
-                        
-                        await bot.send_message(
-                            chat_id=telegram_id,
-                            text=text,
-                            reply_markup=keyboard
-                        )
-                        
-                        total_reminders += 1
-                        print(f"✅ Напоминание за день отправлено: компания {company_name}, запись {booking_id}")
-                        
-                    except Exception as e:
-                        print(f"❌ Ошибка отправки напоминания за день для записи {booking_id} (компания {company_id}): {e}")
-                
-                await bot.session.close()
-                
-            except Exception as e:
-                print(f"❌ Ошибка обработки компании {company_id}: {e}")
-                continue
-        
-        print(f"📊 Всего отправлено напоминаний за день: {total_reminders}")
+        bookings = bookings_result.fetchall()
+
+    if not bookings:
+        return 0, 0
+
+    # Бот компании из пула (общая HTTP сессия)
+    bot = get_pooled_bot(bot_token)
+    messages = {}
+
+    async def send(booking_row):
+        booking_id, booking_time, _, telegram_id, service_name, post = booking_row
+        post_number = f"Пост №{post}" if post else "Не назначен"
+
+        message_text = "🔔 Напоминание о записи\n\n"
+        message_text += "Через 3 часа ваша запись!\n"
+        message_text += f"⏰ Время: {booking_time.strftime('%H:%M')}\n"
+        message_text += f"🛠️ Услуга: {service_name or 'Услуга'}\n"
+        message_text += f"🏢 {post_number}\n\n"
+        message_text += "Пожалуйста, подтвердите явку или отмените запись:"
+        messages[booking_id] = message_text
+
+        await get_telegram_gateway().send_message(
+            bot,
+            chat_id=telegram_id,
+            text=message_text,
+            reply_markup=attendance_keyboard(booking_id)
+        )
+
+    errors = await send_concurrently(bookings, send)
+    for booking_row, error in zip(bookings, errors):
+        if error is not None:
+            logger.error(f"Ошибка отправки напоминания за 3 часа для записи {booking_row[0]} (компания {company_id}): {error}")
+
+    # Журнал доставки одной вставкой: отправленные не будут отправлены повторно
+    async with async_session_maker() as session:
+        await record_deliveries(session, schema_name, KIND_REMINDER_3_HOURS, [
+            delivery(booking_row[0], messages.get(booking_row[0], ""), booking_row[2], error)
+            for booking_row, error in zip(bookings, errors)
+        ])
+        await session.commit()
+
+    failed = sum(1 for error in errors if error is not None)
+    return len(bookings) - failed, failed
 
 
 async def send_reminder_3_hours_before():
@@ -157,158 +288,14 @@ async def send_reminder_3_hours_before():
     
     Запускается каждые 5-10 минут, проверяет записи, которые начинаются ровно через 3 часа.
     Проверяет таблицу notifications, чтобы не отправлять повторные напоминания.
+    Компании обрабатываются параллельно (app.services.tenant_fanout).
     """
     now = datetime.now()
-    # Проверяем записи, которые начинаются ровно через 3 часа (±3 минуты для точности)
-    target_time_start = (now + timedelta(hours=3, minutes=-3)).time()
-    target_time_end = (now + timedelta(hours=3, minutes=3)).time()
-    today = date.today()
-    
-    async with async_session_maker() as session:
-        # Получаем все активные компании
-        await session.execute(text('SET search_path TO public'))
-        companies_result = await session.execute(
-            text('SELECT id, name, telegram_bot_token FROM public.companies WHERE is_active = true')
-        )
-        companies = companies_result.fetchall()
-        
-        total_reminders = 0
-        
-        for company_row in companies:
-            company_id = company_row[0]
-            company_name = company_row[1]
-            bot_token = company_row[2]
-            
-            if not bot_token:
-                continue
-            
-            try:
-                # Переключаемся на tenant схему компании
-                schema_name = f"tenant_{company_id}"
-                await session.execute(text(f'SET search_path TO "{schema_name}", public'))
-                
-                # Находим подтвержденные записи на сегодня в нужном временном диапазоне
-                # Исключаем записи, для которых уже было отправлено напоминание за 3 часа
-                bookings_result = await session.execute(
-                    text(f"""
-                        SELECT b.id, b.booking_number, b.service_date, b.time, b.client_id, b.service_id, 
-                               b.post_id, b.status,
-                               c.user_id,
-                               u.telegram_id,
-                               s.name as service_name,
-                               p.number as post_number
-                        FROM "{schema_name}".bookings b
-                        LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
-                        LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
-                        LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
-                        LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
-                        WHERE b.service_date = :today
-                          AND b.status = 'confirmed'
-                          AND b.time >= :target_time_start
-                          AND b.time <= :target_time_end
-                          AND u.telegram_id IS NOT NULL
-                          AND NOT EXISTS (
-                              SELECT 1 FROM "{schema_name}".notifications n
-                              WHERE n.booking_id = b.id
-                                AND n.notification_type = 'reminder_3_hours'
-                                AND n.is_sent = true
-                          )
-                    """),
-                    {
-                        "today": today,
-                        "target_time_start": target_time_start,
-                        "target_time_end": target_time_end
-                    }
-                )
-                bookings = bookings_result.fetchall()
-                
-                if not bookings:
-                    continue
-                
-                # Создаем бот для этой компании
-                bot = Bot(token=bot_token)
-                
-                for booking_row in bookings:
-                    booking_id = booking_row[0]
-                    booking_number = booking_row[1]
-                    booking_date = booking_row[2]
-                    booking_time = booking_row[3]
-                    user_id = booking_row[8]
-                    telegram_id = booking_row[9]
-                    service_name = booking_row[10] or "Услуга"
-                    post_number = f"Пост №{booking_row[11]}" if booking_row[11] else "Не назначен"
-                    
-                    try:
-                        # Формируем сообщение
-                        time_str = booking_time.strftime("%H:%M")
-                        
-                        text = "🔔 Напоминание о записи\n\n"
-                        text += f"Через 3 часа ваша запись!\n"
-                        text += f"⏰ Время: {time_str}\n"
-                        text += f"🛠️ Услуга: {service_name}\n"
-                        text += f"🏢 {post_number}\n\n"
-                        text += "Пожалуйста, подтвердите явку или отмените запись:"
-                        
-                        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="✅ Подтверждаю", callback_data=f"confirm_attendance_{booking_id}")],
-                            [InlineKeyboardButton(text="❌ Отказ", callback_data=f"cancel_booking_{booking_id}")],
-                        ])
-                        
-                        await bot.send_message(
-                            chat_id=telegram_id,
-                            text=text,
-                            reply_markup=keyboard
-                        )
-                        
-                        # Сохраняем в историю уведомлений, чтобы не отправлять повторно
-                        await session.execute(
-                            text(f"""
-                                INSERT INTO "{schema_name}".notifications 
-                                (user_id, booking_id, notification_type, message, is_sent, sent_at, created_at)
-                                VALUES (:user_id, :booking_id, 'reminder_3_hours', :message, true, :sent_at, :created_at)
-                            """),
-                            {
-                                "user_id": user_id,
-                                "booking_id": booking_id,
-                                "message": text,
-                                "sent_at": datetime.utcnow(),
-                                "created_at": datetime.utcnow()
-                            }
-                        )
-                        await session.commit()
-                        
-                        total_reminders += 1
-                        print(f"✅ Напоминание за 3 часа отправлено: компания {company_name}, запись {booking_id}")
-                        
-                    except Exception as e:
-                        print(f"❌ Ошибка отправки напоминания за 3 часа для записи {booking_id} (компания {company_id}): {e}")
-                        # Сохраняем ошибку в историю
-                        try:
-                            await session.execute(
-                                text(f"""
-                                    INSERT INTO "{schema_name}".notifications 
-                                    (user_id, booking_id, notification_type, message, is_sent, error_message, created_at)
-                                    VALUES (:user_id, :booking_id, 'reminder_3_hours', :message, false, :error_message, :created_at)
-                                """),
-                                {
-                                    "user_id": user_id,
-                                    "booking_id": booking_id,
-                                    "message": text,
-                                    "error_message": str(e),
-                                    "created_at": datetime.utcnow()
-                                }
-                            )
-                            await session.commit()
-                        except:
-                            pass
-                
-                await bot.session.close()
-                
-            except Exception as e:
-                print(f"❌ Ошибка обработки компании {company_id}: {e}")
-                continue
-        
-        print(f"📊 Всего отправлено напоминаний за 3 часа: {total_reminders}")
+    total_reminders = await run_tenant_fanout(
+        "Напоминания за 3 часа",
+        lambda company_id, bot_token: send_reminder_3_hours_before_for_company(company_id, bot_token, now),
+    )
+    logger.info(f"Всего отправлено напоминаний за 3 часа: {total_reminders}")
 
 
 async def send_status_change_notification(booking_id: int, new_status: str):
@@ -386,281 +373,182 @@ async def send_status_change_notification(booking_id: int, new_status: str):
         }
         
         message = status_messages.get(new_status, f"Статус записи изменен: {new_status}")
+        message_text = ""
         
         try:
             date_str = booking.service_date.strftime("%d.%m.%Y")
             time_str = booking.time.strftime("%H:%M")
             service_name = booking.service.name if booking.service else "Услуга"
             
-            text = f"{message}\n\n"
-            text += f"Номер записи: {booking.booking_number}\n"
-            text += f"Дата: {date_str}\n"
-            text += f"Время: {time_str}\n"
-            text += f"Услуга: {service_name}\n"
+            message_text = f"{message}\n\n"
+            message_text += f"Номер записи: {booking.booking_number}\n"
+            message_text += f"Дата: {date_str}\n"
+            message_text += f"Время: {time_str}\n"
+            message_text += f"Услуга: {service_name}\n"
             
-            print(f"[DEBUG] Отправляем сообщение в Telegram: chat_id={target_user.telegram_id}, text_length={len(text)}")
+            print(f"[DEBUG] Отправляем сообщение в Telegram: chat_id={target_user.telegram_id}, text_length={len(message_text)}")
             bot = get_bot()
-            result = await bot.send_message(
+            result = await get_telegram_gateway().send_message(
+                bot,
                 chat_id=target_user.telegram_id,
-                text=text
+                text=message_text
             )
             print(f"[SUCCESS] Сообщение отправлено успешно: message_id={result.message_id}")
             
-            notification = Notification(
-                user_id=target_user.id,
-                booking_id=booking.id,
-                notification_type="status_change",
-                message=text,
-                is_sent=True,
-                sent_at=datetime.utcnow()
-            )
-            session.add(notification)
+            await record_deliveries(session, "public", KIND_STATUS_CHANGE, [delivery(booking.id, message_text, target_user.id)])
             await session.commit()
-            print(f"[SUCCESS] Уведомление сохранено в БД: notification_id={notification.id}")
             
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
             print(f"[ERROR] Ошибка отправки уведомления об изменении статуса для записи {booking.id}: {e}")
             print(f"[ERROR] Traceback: {error_trace}")
-            notification = Notification(
-                user_id=target_user.id,
-                booking_id=booking.id,
-                notification_type="status_change",
-                message=text,
-                is_sent=False,
-                error_message=str(e)
-            )
-            session.add(notification)
+            await record_deliveries(session, "public", KIND_STATUS_CHANGE, [delivery(booking.id, message_text, target_user.id, e)])
             await session.commit()
 
 
-# Функции для отправки одного напоминания (для отложенных задач)
-async def send_single_reminder_day_before(company_id: int, booking_id: int):
-    """Отправить напоминание за день до записи для одной записи"""
+# Функции для отправки одного напоминания (для отложенных задач и очереди public.reminders)
+async def load_single_reminder(company_id: int, booking_id: int, kind: str, columns: str):
+    """
+    Загрузить bot token компании и запись для напоминания.
+
+    Сессия БД закрывается до отправки: соединение из пула не держится,
+    пока шлюз ждет Telegram (в том числе паузы retry_after).
+
+    Args:
+        company_id: ID компании
+        booking_id: ID записи
+        kind: Вид уведомления в журнале доставки
+        columns: Дополнительные колонки выборки
+
+    Returns:
+        (bot_token, строка записи) или None, если напоминание не нужно
+    """
+    schema_name = f"tenant_{company_id}"
     async with async_session_maker() as session:
-        try:
-            # Получаем компанию и bot token
-            await session.execute(text('SET search_path TO public'))
-            company_result = await session.execute(
-                text('SELECT id, name, telegram_bot_token FROM public.companies WHERE id = :company_id'),
-                {"company_id": company_id}
-            )
-            company_row = company_result.fetchone()
-            
-            if not company_row or not company_row[2]:
-                print(f"❌ Компания {company_id} не найдена или нет bot token")
-                return
-            
-            bot_token = company_row[2]
-            company_name = company_row[1]
-            
-            # Переключаемся на tenant схему
-            schema_name = f"tenant_{company_id}"
-            await session.execute(text(f'SET search_path TO "{schema_name}", public'))
-            
-            # Получаем данные записи
-            booking_result = await session.execute(
-                text(f"""
-                    SELECT b.id, b.booking_number, b.service_date, b.time, b.client_id, b.service_id, 
-                           b.master_id, b.post_id, b.status,
-                           c.user_id,
-                           u.telegram_id,
-                           s.name as service_name,
-                           m.full_name as master_name,
-                           p.number as post_number
-                    FROM "{schema_name}".bookings b
-                    LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
-                    LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
-                    LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
-                    LEFT JOIN "{schema_name}".masters m ON b.master_id = m.id
-                    LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
-                    WHERE b.id = :booking_id
-                      AND b.status = 'confirmed'
-                      AND u.telegram_id IS NOT NULL
-                """),
-                {"booking_id": booking_id}
-            )
-            booking_row = booking_result.fetchone()
-            
-            if not booking_row:
-                print(f"❌ Запись {booking_id} не найдена, уже отменена или напоминание уже отправлено")
-                return
-            
-            booking_id_db = booking_row[0]
-            booking_number = booking_row[1]
-            booking_date = booking_row[2]
-            booking_time = booking_row[3]
-            user_id = booking_row[9]
-            telegram_id = booking_row[10]
-            service_name = booking_row[11] or "Услуга"
-            master_name = booking_row[12] or "Не назначен"
-            post_number = f"Пост №{booking_row[13]}" if booking_row[13] else "Не назначен"
-            
-            # Формируем сообщение
-            date_str = booking_date.strftime("%d.%m.%Y")
-            time_str = booking_time.strftime("%H:%M")
-            
-            message_text = "🔔 Напоминание о записи\n\n"
-            message_text += f"Завтра {date_str} в {time_str}\n"
-            message_text += f"Услуга: {service_name}\n"
-            message_text += f"Мастер: {master_name}\n"
-            message_text += f"{post_number}\n\n"
-            message_text += "Ждем вас в салоне красоты!"
-            
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="✅ Подтверждаю", callback_data=f"confirm_attendance_{booking_id_db}")],
-                [InlineKeyboardButton(text="❌ Отказ", callback_data=f"cancel_booking_{booking_id_db}")],
-            ])
-            
-            # Отправляем сообщение
-            bot = Bot(token=bot_token)
-            await bot.send_message(
-                chat_id=telegram_id,
-                text=message_text,
-                reply_markup=keyboard
-            )
-            await bot.session.close()
-            
-            # Сохраняем в историю
-            await session.execute(
-                text(f"""
-                    INSERT INTO "{schema_name}".notifications 
-                    (user_id, booking_id, notification_type, message, is_sent, sent_at, created_at)
-                    VALUES (:user_id, :booking_id, 'reminder_day', :message, true, :sent_at, :created_at)
-                """),
-                {
-                    "user_id": user_id,
-                    "booking_id": booking_id_db,
-                    "message": message_text,
-                    "sent_at": datetime.utcnow(),
-                    "created_at": datetime.utcnow()
-                }
-            )
+        company_result = await session.execute(
+            text('SELECT telegram_bot_token FROM public.companies WHERE id = :company_id'),
+            {"company_id": company_id}
+        )
+        bot_token = company_result.scalar_one_or_none()
+        if not bot_token:
+            logger.warning(f"Компания {company_id} не найдена или нет bot token, напоминание для записи {booking_id} пропущено")
+            return None
+
+        # Полные имена таблиц, без search_path
+        booking_result = await session.execute(
+            text(f"""
+                SELECT b.id, b.service_date, b.time, c.user_id, u.telegram_id, {columns}
+                FROM "{schema_name}".bookings b
+                LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
+                LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
+                LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
+                LEFT JOIN "{schema_name}".masters m ON b.master_id = m.id
+                LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
+                WHERE b.id = :booking_id
+                  AND b.status = 'confirmed'
+                  AND u.telegram_id IS NOT NULL
+                  AND {not_notified_clause(schema_name)}
+            """),
+            {"booking_id": booking_id, **ledger_params(kind)}
+        )
+        booking_row = booking_result.fetchone()
+
+    if not booking_row:
+        logger.info(f"Запись {booking_id} не найдена, уже отменена или напоминание уже отправлено (компания {company_id})")
+        return None
+    return bot_token, booking_row
+
+
+async def send_single_reminder(company_id: int, booking_id: int, kind: str, booking_row, bot_token: str, message_text: str) -> str:
+    """
+    Отправить напоминание и записать его в журнал доставки отдельной сессией.
+
+    Returns:
+        SEND_SENT или SEND_ERROR
+    """
+    user_id = booking_row.user_id
+    error = None
+    try:
+        await get_telegram_gateway().send_message(
+            get_pooled_bot(bot_token),
+            chat_id=booking_row.telegram_id,
+            text=message_text,
+            reply_markup=attendance_keyboard(booking_row.id)
+        )
+    except Exception as e:
+        error = e
+        logger.error(f"Ошибка отправки напоминания {kind} для записи {booking_id} (компания {company_id}): {e}")
+
+    try:
+        async with async_session_maker() as session:
+            await record_deliveries(session, f"tenant_{company_id}", kind, [delivery(booking_row.id, message_text, user_id, error)])
             await session.commit()
-            
-            print(f"✅ Напоминание за день отправлено: компания {company_name}, запись {booking_id_db}")
-            
-        except Exception as e:
-            print(f"❌ Ошибка отправки напоминания за день для записи {booking_id} (компания {company_id}): {e}")
+    except Exception as e:
+        logger.error(f"Ошибка записи напоминания {kind} для записи {booking_id} в журнал (компания {company_id}): {e}")
+        return SEND_ERROR
 
+    return SEND_SENT if error is None else SEND_ERROR
 
-async def send_single_reminder_3_hours_before(company_id: int, booking_id: int):
-    """Отправить напоминание за 3 часа до записи для одной записи"""
-    async with async_session_maker() as session:
-        try:
-            # Получаем компанию и bot token
-            await session.execute(text('SET search_path TO public'))
-            company_result = await session.execute(
-                text('SELECT id, name, telegram_bot_token FROM public.companies WHERE id = :company_id'),
-                {"company_id": company_id}
-            )
-            company_row = company_result.fetchone()
-            
-            if not company_row or not company_row[2]:
-                print(f"❌ Компания {company_id} не найдена или нет bot token")
-                return
-            
-            bot_token = company_row[2]
-            company_name = company_row[1]
-            
-            # Переключаемся на tenant схему
-            schema_name = f"tenant_{company_id}"
-            await session.execute(text(f'SET search_path TO "{schema_name}", public'))
-            
-            # Получаем данные записи
-            booking_result = await session.execute(
-                text(f"""
-                    SELECT b.id, b.booking_number, b.service_date, b.time, b.client_id, b.service_id, 
-                           b.post_id, b.status,
-                           c.user_id,
-                           u.telegram_id,
-                           s.name as service_name,
-                           p.number as post_number
-                    FROM "{schema_name}".bookings b
-                    LEFT JOIN "{schema_name}".clients c ON b.client_id = c.id
-                    LEFT JOIN "{schema_name}".users u ON c.user_id = u.id
-                    LEFT JOIN "{schema_name}".services s ON b.service_id = s.id
-                    LEFT JOIN "{schema_name}".posts p ON b.post_id = p.id
-                    WHERE b.id = :booking_id
-                      AND b.status = 'confirmed'
-                      AND u.telegram_id IS NOT NULL
-                """),
-                {"booking_id": booking_id}
-            )
-            booking_row = booking_result.fetchone()
-            
-            if not booking_row:
-                print(f"❌ Запись {booking_id} не найдена, уже отменена или напоминание уже отправлено")
-                return
-            
-            booking_id_db = booking_row[0]
-            booking_number = booking_row[1]
-            booking_date = booking_row[2]
-            booking_time = booking_row[3]
-            user_id = booking_row[8]
-            telegram_id = booking_row[9]
-            service_name = booking_row[10] or "Услуга"
-            post_number = f"Пост №{booking_row[11]}" if booking_row[11] else "Не назначен"
-            
-            # Формируем сообщение
-            time_str = booking_time.strftime("%H:%M")
-            
-            message_text = "🔔 Напоминание о записи\n\n"
-            message_text += f"Через 3 часа ваша запись!\n"
-            message_text += f"⏰ Время: {time_str}\n"
-            message_text += f"🛠️ Услуга: {service_name}\n"
-            message_text += f"🏢 {post_number}\n\n"
-            message_text += "Пожалуйста, подтвердите явку или отмените запись:"
-            
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="✅ Подтверждаю", callback_data=f"confirm_attendance_{booking_id_db}")],
-                [InlineKeyboardButton(text="❌ Отказ", callback_data=f"cancel_booking_{booking_id_db}")],
-            ])
-            
-            # Отправляем сообщение
-            bot = Bot(token=bot_token)
-            await bot.send_message(
-                chat_id=telegram_id,
-                text=message_text,
-                reply_markup=keyboard
-            )
-            await bot.session.close()
-            
-            # Сохраняем в историю (если таблица существует)
-            try:
-                await session.execute(
-                    text(f"""
-                        INSERT INTO "{schema_name}".notifications 
-                        (user_id, booking_id, notification_type, message, is_sent, sent_at, created_at)
-                        VALUES (:user_id, :booking_id, 'reminder_3_hours', :message, true, :sent_at, :created_at)
-                    """),
-                    {
-                        "user_id": user_id,
-                        "booking_id": booking_id_db,
-                        "message": message_text,
-                        "sent_at": datetime.utcnow(),
-                        "created_at": datetime.utcnow()
-                    }
-                )
-                await session.commit()
-            except Exception as e:
-                # Если таблица не существует - просто пропускаем сохранение
-                print(f"⚠️ Не удалось сохранить в notifications (таблица может не существовать): {e}")
-                pass
-            
-            print(f"✅ Напоминание за 3 часа отправлено: компания {company_name}, запись {booking_id_db}")
-            
-        except Exception as e:
-            print(f"❌ Ошибка отправки напоминания за 3 часа для записи {booking_id} (компания {company_id}): {e}")
+
+async def send_single_reminder_day_before(company_id: int, booking_id: int) -> str:
+    """Отправить напоминание за день до записи для одной записи (SEND_SENT, SEND_SKIPPED или SEND_ERROR)"""
+    try:
+        loaded = await load_single_reminder(
+            company_id, booking_id, KIND_REMINDER_DAY,
+            "s.name AS service_name, m.full_name AS master_name, p.number AS post_number",
+        )
+    except Exception as e:
+        logger.error(f"Ошибка загрузки записи {booking_id} для напоминания за день (компания {company_id}): {e}")
+        return SEND_ERROR
+    if loaded is None:
+        return SEND_SKIPPED
+    bot_token, booking = loaded
+
+    post_number = f"Пост №{booking.post_number}" if booking.post_number else "Не назначен"
+    message_text = "🔔 Напоминание о записи\n\n"
+    message_text += f"Завтра {booking.service_date.strftime('%d.%m.%Y')} в {booking.time.strftime('%H:%M')}\n"
+    message_text += f"Услуга: {booking.service_name or 'Услуга'}\n"
+    message_text += f"Мастер: {booking.master_name or 'Не назначен'}\n"
+    message_text += f"{post_number}\n\n"
+    message_text += "Ждем вас в салоне красоты!"
+
+    return await send_single_reminder(company_id, booking_id, KIND_REMINDER_DAY, booking, bot_token, message_text)
 
 
-# Celery задачи для отложенных напоминаний (одна запись)
+async def send_single_reminder_3_hours_before(company_id: int, booking_id: int) -> str:
+    """Отправить напоминание за 3 часа до записи для одной записи (SEND_SENT, SEND_SKIPPED или SEND_ERROR)"""
+    try:
+        loaded = await load_single_reminder(
+            company_id, booking_id, KIND_REMINDER_3_HOURS,
+            "s.name AS service_name, p.number AS post_number",
+        )
+    except Exception as e:
+        logger.error(f"Ошибка загрузки записи {booking_id} для напоминания за 3 часа (компания {company_id}): {e}")
+        return SEND_ERROR
+    if loaded is None:
+        return SEND_SKIPPED
+    bot_token, booking = loaded
+
+    post_number = f"Пост №{booking.post_number}" if booking.post_number else "Не назначен"
+    message_text = "🔔 Напоминание о записи\n\n"
+    message_text += "Через 3 часа ваша запись!\n"
+    message_text += f"⏰ Время: {booking.time.strftime('%H:%M')}\n"
+    message_text += f"🛠️ Услуга: {booking.service_name or 'Услуга'}\n"
+    message_text += f"🏢 {post_number}\n\n"
+    message_text += "Пожалуйста, подтвердите явку или отмените запись:"
+
+    return await send_single_reminder(company_id, booking_id, KIND_REMINDER_3_HOURS, booking, bot_token, message_text)
+
+
+# Celery задачи для отложенных напоминаний (одна запись).
+# Новые напоминания планируются в public.reminders; задачи оставлены,
+# чтобы уже поставленные с eta задачи выполнились после обновления.
 @shared_task
 def send_single_reminder_day_before_task(company_id: int, booking_id: int):
     """Celery задача для отправки напоминания за день для одной записи"""
     try:
-        asyncio.run(send_single_reminder_day_before(company_id, booking_id))
+        run_async(send_single_reminder_day_before(company_id, booking_id))
     except Exception as e:
         print(f"Ошибка в задаче send_single_reminder_day_before_task: {e}")
         raise
@@ -670,65 +558,75 @@ def send_single_reminder_day_before_task(company_id: int, booking_id: int):
 def send_single_reminder_3_hours_before_task(company_id: int, booking_id: int):
     """Celery задача для отправки напоминания за 3 часа для одной записи"""
     try:
-        asyncio.run(send_single_reminder_3_hours_before(company_id, booking_id))
+        run_async(send_single_reminder_3_hours_before(company_id, booking_id))
     except Exception as e:
         print(f"Ошибка в задаче send_single_reminder_3_hours_before_task: {e}")
         raise
 
 
-def schedule_booking_reminders(company_id: int, booking_id: int, booking_date: date, booking_time: time_type):
+# Отправители напоминаний по видам (public.reminders.kind)
+REMINDER_SENDERS = {
+    REMINDER_DAY_BEFORE: send_single_reminder_day_before,
+    REMINDER_3_HOURS: send_single_reminder_3_hours_before,
+}
+
+
+async def dispatch_due_reminders() -> int:
     """
-    Запланировать напоминания для записи при её подтверждении.
+    Отправить наступившие напоминания из очереди public.reminders.
     
-    Создает две отложенные Celery задачи:
-    1. Напоминание за день - отправляется в 18:00 за день до записи
-    2. Напоминание за 3 часа - отправляется за 3 часа до начала записи
+    Напоминания забираются пачками (FOR UPDATE SKIP LOCKED), поэтому
+    несколько воркеров не отправляют одно напоминание дважды. Строки
+    захватываются в короткой транзакции, отправка идет уже без блокировок.
     
-    Args:
-        company_id: ID компании
-        booking_id: ID записи
-        booking_date: Дата записи
-        booking_time: Время начала записи
+    Returns:
+        Количество отправленных напоминаний
     """
-    try:
-        from datetime import datetime, time
+    sent_total = 0
+    
+    while True:
+        async with async_session_maker() as session:
+            claimed = await claim_due_reminders(session)
+            await session.commit()
         
-        # Вычисляем время для напоминания за день (18:00 за день до записи)
-        reminder_day_date = booking_date - timedelta(days=1)
-        reminder_day_datetime = datetime.combine(reminder_day_date, time(18, 0))  # 18:00
+        if not claimed:
+            break
         
-        # Вычисляем время для напоминания за 3 часа (за 3 часа до начала записи)
-        booking_datetime = datetime.combine(booking_date, booking_time)
-        reminder_3h_datetime = booking_datetime - timedelta(hours=3)
+        outcomes = {}
         
-        now = datetime.now()
+        async def send(row):
+            reminder_id, company_id, booking_id, kind, _attempts = row
+            sender = REMINDER_SENDERS.get(kind)
+            outcomes[reminder_id] = await sender(company_id, booking_id) if sender else SEND_SKIPPED
         
-        # Планируем напоминание за день, только если оно в будущем
-        if reminder_day_datetime > now:
-            eta_day = reminder_day_datetime
-            send_single_reminder_day_before_task.apply_async(
-                args=[company_id, booking_id],
-                eta=eta_day
-            )
-            print(f"📅 Запланировано напоминание за день: запись {booking_id}, время отправки: {eta_day}")
-        else:
-            print(f"⚠️ Напоминание за день пропущено (уже прошло): запись {booking_id}, было бы: {reminder_day_datetime}")
+        # Напоминания разных компаний отправляются параллельно, лимиты Telegram соблюдает шлюз
+        await send_concurrently(claimed, send, concurrency=settings.TENANT_FANOUT_CONCURRENCY)
+        # Отправка, упавшая исключением, считается временной ошибкой и повторяется
+        results = [(row[0], row[4], outcomes.get(row[0], SEND_ERROR)) for row in claimed]
         
-        # Планируем напоминание за 3 часа, только если оно в будущем
-        if reminder_3h_datetime > now:
-            eta_3h = reminder_3h_datetime
-            send_single_reminder_3_hours_before_task.apply_async(
-                args=[company_id, booking_id],
-                eta=eta_3h
-            )
-            print(f"⏰ Запланировано напоминание за 3 часа: запись {booking_id}, время отправки: {eta_3h}")
-        else:
-            print(f"⚠️ Напоминание за 3 часа пропущено (уже прошло): запись {booking_id}, было бы: {reminder_3h_datetime}")
-            
+        async with async_session_maker() as session:
+            for reminder_id, attempts, outcome in results:
+                await finish_reminder(session, reminder_id, outcome, attempts)
+            await session.commit()
+        
+        sent_count = sum(1 for _, _, outcome in results if outcome == SEND_SENT)
+        sent_total += sent_count
+        logger.info(f"Очередь напоминаний: обработано {len(claimed)}, отправлено {sent_count}")
+        
+        if len(claimed) < settings.REMINDER_BATCH_SIZE:
+            break
+    
+    return sent_total
+
+
+@shared_task
+def dispatch_due_reminders_task():
+    """Celery задача: отправка наступивших напоминаний из очереди (по расписанию beat)"""
+    try:
+        run_async(dispatch_due_reminders())
     except Exception as e:
-        print(f"❌ Ошибка планирования напоминаний для записи {booking_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Ошибка в задаче dispatch_due_reminders_task: {e}", exc_info=True)
+        raise
 
 
 # Старые массовые задачи (оставляем для обратной совместимости, но не используем в расписании)
@@ -736,7 +634,7 @@ def schedule_booking_reminders(company_id: int, booking_id: int, booking_date: d
 def send_reminder_day_before_task():
     """Celery задача для отправки напоминаний за день (массовая, устаревшая)"""
     try:
-        asyncio.run(send_reminder_day_before())
+        run_async(send_reminder_day_before())
     except Exception as e:
         print(f"Ошибка в задаче send_reminder_day_before_task: {e}")
         raise
@@ -746,17 +644,20 @@ def send_reminder_day_before_task():
 def send_reminder_3_hours_before_task():
     """Celery задача для отправки напоминаний за 3 часа (массовая, устаревшая)"""
     try:
-        asyncio.run(send_reminder_3_hours_before())
+        run_async(send_reminder_3_hours_before())
     except Exception as e:
         print(f"Ошибка в задаче send_reminder_3_hours_before_task: {e}")
         raise
 
 
-async def send_status_change_notification_tenant(company_id: int, booking_id: int, new_status: str):
-    """Отправить уведомление об изменении статуса записи клиенту (для tenant схем)"""
-    from app.models.public_models import Company
-    from aiogram import Bot
+async def send_status_change_notification_tenant(company_id: int, booking_id: int, new_status: str) -> bool:
+    """Отправить уведомление об изменении статуса записи клиенту (для tenant схем)
     
+    Returns:
+        True если сообщение отправлено, False если отправлять некому
+        (нет компании, записи или telegram_id клиента).
+        Ошибки Telegram пробрасываются, чтобы outbox повторил отправку.
+    """
     async with async_session_maker() as session:
         # Получаем компанию и bot token из public схемы
         company_result = await session.execute(
@@ -766,84 +667,115 @@ async def send_status_change_notification_tenant(company_id: int, booking_id: in
         company_row = company_result.fetchone()
         
         if not company_row or not company_row[2]:
-            print(f"[ERROR] Компания {company_id} не найдена или нет bot token")
-            return
+            logger.warning(f"Компания {company_id} не найдена или нет bot token, уведомление о статусе записи {booking_id} пропущено")
+            return False
         
         bot_token = company_row[2]
         
-        # Устанавливаем search_path для tenant схемы
-        await session.execute(text(f'SET search_path TO "tenant_{company_id}", public'))
-        
-        # Получаем запись с клиентом
+        # Запись, услуга и telegram_id клиента одним запросом (полные имена таблиц, без search_path)
         booking_result = await session.execute(
-            select(Booking)
-            .where(Booking.id == booking_id)
-            .options(
-                selectinload(Booking.client),
-                selectinload(Booking.service),
-            )
+            text(f"""
+                SELECT b.booking_number, b.service_date, b.time, s.name, c.user_id, u.telegram_id
+                FROM "tenant_{company_id}".bookings b
+                LEFT JOIN "tenant_{company_id}".services s ON b.service_id = s.id
+                LEFT JOIN "tenant_{company_id}".clients c ON b.client_id = c.id
+                LEFT JOIN "tenant_{company_id}".users u ON c.user_id = u.id
+                WHERE b.id = :booking_id
+            """),
+            {"booking_id": booking_id}
         )
-        booking = booking_result.scalar_one_or_none()
-        
-        if not booking:
-            print(f"[ERROR] Запись {booking_id} не найдена в tenant_{company_id}")
-            return
-        
-        # Получаем telegram_id клиента
-        telegram_id = None
-        if booking.client and booking.client.user_id:
-            # Получаем User из tenant схемы
-            user_result = await session.execute(
-                text(f'SELECT telegram_id FROM "tenant_{company_id}".users WHERE id = :user_id'),
-                {"user_id": booking.client.user_id}
-            )
-            user_row = user_result.fetchone()
-            if user_row and user_row[0]:
-                telegram_id = user_row[0]
-        
-        if not telegram_id:
-            print(f"[ERROR] Не найден telegram_id для клиента записи {booking_id}")
-            return
-        
-        # Формируем сообщение
-        status_messages = {
-            "new": "🆕 Ваша запись создана и ожидает подтверждения.",
-            "confirmed": "✅ Ваша запись подтверждена!",
-            "completed": "✔️ Запись завершена. Спасибо за визит!",
-            "cancelled": "❌ Запись отменена",
-            "no_show": "⚠️ Вы не явились на запись",
-        }
-        
-        message = status_messages.get(new_status, f"Статус записи изменен: {new_status}")
-        
-        try:
-            date_str = booking.service_date.strftime("%d.%m.%Y")
-            time_str = booking.time.strftime("%H:%M")
-            service_name = booking.service.name if booking.service else "Услуга"
-            
-            text = f"{message}\n\n"
-            text += f"Номер записи: {booking.booking_number}\n"
-            text += f"Дата: {date_str}\n"
-            text += f"Время: {time_str}\n"
-            text += f"Услуга: {service_name}\n"
-            
-            print(f"[DEBUG] Отправляем сообщение в Telegram: company_id={company_id}, chat_id={telegram_id}, text_length={len(text)}")
-            
-            # Создаем бота с токеном компании
-            bot = Bot(token=bot_token)
-            result = await bot.send_message(
-                chat_id=telegram_id,
-                text=text
-            )
-            await bot.session.close()
-            
-            print(f"[SUCCESS] Сообщение отправлено успешно: message_id={result.message_id}")
-            
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"[ERROR] Ошибка отправки уведомления об изменении статуса для записи {booking_id}: {e}")
-            print(f"[ERROR] Traceback: {error_trace}")
+        booking_row = booking_result.fetchone()
+    
+    if not booking_row:
+        logger.warning(f"Запись {booking_id} не найдена в tenant_{company_id}")
+        return False
+    
+    booking_number, service_date, booking_time, service_name, user_id, telegram_id = booking_row
+    
+    if not telegram_id:
+        logger.debug(f"Не найден telegram_id для клиента записи {booking_id} (компания {company_id})")
+        return False
+    
+    # Формируем сообщение
+    status_messages = {
+        "new": "🆕 Ваша запись создана и ожидает подтверждения.",
+        "confirmed": "✅ Ваша запись подтверждена!",
+        "completed": "✔️ Запись завершена. Спасибо за визит!",
+        "cancelled": "❌ Запись отменена",
+        "no_show": "⚠️ Вы не явились на запись",
+    }
+    
+    message = status_messages.get(new_status, f"Статус записи изменен: {new_status}")
+    
+    message_text = f"{message}\n\n"
+    message_text += f"Номер записи: {booking_number}\n"
+    message_text += f"Дата: {service_date.strftime('%d.%m.%Y')}\n"
+    message_text += f"Время: {booking_time.strftime('%H:%M')}\n"
+    message_text += f"Услуга: {service_name or 'Услуга'}\n"
+    
+    # Бот компании из пула (общая HTTP сессия)
+    bot = get_pooled_bot(bot_token)
+    error = None
+    try:
+        await get_telegram_gateway().send_message(
+            bot,
+            chat_id=telegram_id,
+            text=message_text
+        )
+    except Exception as e:
+        error = e
+    
+    # Журнал доставки: последнее уведомление о статусе записи
+    async with async_session_maker() as session:
+        await record_deliveries(
+            session, f"tenant_{company_id}", KIND_STATUS_CHANGE,
+            [delivery(booking_id, message_text, user_id, error)]
+        )
+        await session.commit()
+    
+    if error is not None:
+        raise error
+    return True
+
+
+async def deliver_outbox_event(company_id: int, row) -> None:
+    """Отправить событие из outbox компании (исключение - повторить позже)"""
+    if row.event_type == EVENT_BOOKING_STATUS:
+        await send_status_change_notification_tenant(company_id, row.booking_id, row.payload["status"])
+    else:
+        logger.warning(f"Неизвестный тип события outbox: {row.event_type} (компания {company_id})")
+
+
+async def relay_notification_outbox() -> int:
+    """
+    Отправить накопленные уведомления из outbox всех компаний.
+    
+    Компании обрабатываются параллельно (app.services.tenant_fanout),
+    сводка пишется в лог, только если что-то было отправлено.
+    
+    Returns:
+        Количество отправленных уведомлений
+    """
+    started = time.monotonic()
+    companies = await get_active_company_bots()
+    
+    results = await fan_out_tenants(
+        [company_id for company_id, _, _ in companies],
+        lambda company_id: relay_company_outbox(async_session_maker, company_id, deliver_outbox_event),
+    )
+    if any(r.sent or r.failed or r.error for r in results):
+        log_fanout_summary("Outbox уведомлений", results, time.monotonic() - started)
+    return sum(r.sent for r in results)
+
+
+@shared_task
+def relay_notification_outbox_task():
+    """Celery задача: отправка уведомлений из outbox компаний (по расписанию beat)"""
+    try:
+        run_async(relay_notification_outbox())
+    except Exception as e:
+        logger.error(f"Ошибка в задаче relay_notification_outbox_task: {e}", exc_info=True)
+        raise
 
 
 @shared_task
@@ -851,7 +783,7 @@ def send_status_change_notification_task(company_id: int, booking_id: int, new_s
     """Celery задача для отправки уведомления об изменении статуса (для tenant схем)"""
     print(f"[CELERY TASK] Начало выполнения send_status_change_notification_task: company_id={company_id}, booking_id={booking_id}, status={new_status}")
     try:
-        asyncio.run(send_status_change_notification_tenant(company_id, booking_id, new_status))
+        run_async(send_status_change_notification_tenant(company_id, booking_id, new_status))
         print(f"[CELERY TASK] Успешно выполнена send_status_change_notification_task: booking_id={booking_id}")
     except Exception as e:
         import traceback
@@ -861,182 +793,116 @@ def send_status_change_notification_task(company_id: int, booking_id: int, new_s
         raise
 
 
-async def send_work_orders_to_masters():
-    """Отправить лист-наряды всем мастерам на сегодня"""
-    today = date.today()
+async def send_work_orders_for_company(company_id: int, bot_token: str, now: datetime):
+    """
+    Отправить лист-наряды мастерам компании, если наступило время work_order_time.
+
+    Returns:
+        (отправлено, ошибок)
+    """
+    schema_name = f"tenant_{company_id}"
+    today = now.date()
     
     async with async_session_maker() as session:
-        # Получаем всех мастеров (в модели Master нет поля is_active)
-        result = await session.execute(
-            select(Master)
-            .options(selectinload(Master.user))
-        )
-        masters = result.scalars().all()
-        
-        bot = get_bot()
-        
-        for master in masters:
-            if not master.user or not master.user.telegram_id:
-                continue
-            
-            try:
-                # Получаем записи мастера на сегодня
-                bookings_result = await session.execute(
-                    select(Booking)
-                    .where(
-                        and_(
-                            Booking.master_id == master.id,
-                            Booking.service_date == today,
-                            Booking.status.in_(["confirmed", "new"])
-                        )
-                    )
-                    .order_by(Booking.time.asc())
-                    .options(
-                        selectinload(Booking.client).selectinload(Client.user),
-                        selectinload(Booking.service),
-                        selectinload(Booking.post),
-                    )
-                )
-                bookings = list(bookings_result.scalars().all())
-                
-                # Формируем текст лист-наряда
-                text = f"📋 Лист-наряд на {today.strftime('%d.%m.%Y')}\n\n"
-                
-                if not bookings:
-                    text += "✅ На сегодня записей нет"
-                else:
-                    for i, booking in enumerate(bookings, 1):
-                        client = booking.client
-                        service = booking.service
-                        post = booking.post
-                        
-                        text += f"{i}. ⏰ {booking.time.strftime('%H:%M')} - {booking.end_time.strftime('%H:%M')}\n"
-                        text += f"   🛠️ {service.name if service else 'Не указана'}\n"
-                        text += f"   👤 {client.full_name if client else 'Неизвестно'}\n"
-                        if client and client.phone:
-                            text += f"   📞 {client.phone}\n"
-                        if client and client.car_number:
-                            text += f"   🚗 {client.car_number}\n"
-                        if post:
-                            text += f"   🏢 Пост №{post.number} {post.name or ''}\n"
-                        text += f"   📊 Статус: {booking.status}\n"
-                        if booking.comment:
-                            text += f"   💬 {booking.comment}\n"
-                        text += "\n"
-                
-                # Отправляем лист-наряд мастеру
-                await bot.send_message(
-                    chat_id=master.user.telegram_id,
-                    text=text
-                )
-                
-                print(f"Лист-наряд отправлен мастеру {master.id} ({master.full_name})")
-                
-            except Exception as e:
-                print(f"Ошибка отправки лист-наряда мастеру {master.id}: {e}")
+        if now.time() < await read_work_order_time(session, schema_name):
+            return 0, 0
+        
+        # Отметка дня ставится до отправки: параллельный запуск не отправит лист-наряды повторно.
+        # Commit после загрузки: если запрос упадет, отметка откатится и запуск повторится
+        if not await claim_daily_run(session, company_id, JOB_WORK_ORDERS, today):
+            return 0, 0
+        orders = await load_work_orders(session, schema_name, today)
+        await session.commit()
+    
+    if not orders:
+        return 0, 0
+    
+    bot = get_pooled_bot(bot_token)
+    errors = await send_concurrently(
+        orders,
+        lambda order: get_telegram_gateway().send_message(
+            bot, chat_id=order.telegram_id, text=render_work_order(today, order.bookings)
+        ),
+    )
+    for order, error in zip(orders, errors):
+        if error is not None:
+            logger.error(f"Ошибка отправки лист-наряда мастеру {order.master_id} (компания {company_id}): {error}")
+    
+    failed = sum(1 for error in errors if error is not None)
+    if failed == len(orders):
+        # Не отправлено ни одного лист-наряда (отозван токен, Telegram недоступен):
+        # отметка снимается, следующий запуск по расписанию повторит отправку
+        async with async_session_maker() as session:
+            await release_daily_run(session, company_id, JOB_WORK_ORDERS, today)
+            await session.commit()
+        logger.warning(f"Лист-наряды компании {company_id} не отправлены, отправка будет повторена")
+    return len(orders) - failed, failed
 
 
-async def notify_admin_new_bookings():
-    """Уведомить администраторов о новых записях"""
-    from datetime import timedelta
+async def send_work_orders_to_masters():
+    """Отправить лист-наряды на сегодня мастерам компаний, у которых наступило время отправки"""
+    # Локальное время сервера, как у времени записей
+    now = datetime.now()
     
-    # Записи со статусом "new", созданные не более 10 минут назад (чтобы не пропустить новые)
-    cutoff_time = datetime.utcnow() - timedelta(minutes=10)
+    await run_tenant_fanout(
+        "Лист-наряды мастерам",
+        lambda company_id, bot_token: send_work_orders_for_company(company_id, bot_token, now),
+    )
+
+
+async def notify_admin_new_bookings_for_company(company_id: int, bot_token: str, now: datetime):
+    """
+    Отправить сводку новых записей, которые бот не отправил администраторам.
+
+    Бот копит новые записи в окне notify_admin_delay_minutes и отправляет
+    сводку сам; здесь подбираются только записи старше этого окна (с запасом
+    ADMIN_DIGEST_MIN_WINDOW) без отметки admin_new_booking в журнале доставки (например, бот
+    перезапускался до отправки сводки).
+
+    Returns:
+        (отправлено сообщений, ошибок)
+    """
+    schema_name = f"tenant_{company_id}"
     
     async with async_session_maker() as session:
-        # Находим новые записи, которые еще не были уведомлены
+        window = digest_window_seconds(await read_delay_minutes(session, schema_name))
+        # Запас сверх окна бота: сводка, которую бот отправляет прямо сейчас,
+        # еще не записана в журнал, и ее записи не должны уйти повторно
+        settled_before = now - timedelta(seconds=window + settings.ADMIN_DIGEST_MIN_WINDOW)
+        cutoff_time = settled_before - timedelta(minutes=settings.ADMIN_DIGEST_LOOKBACK_MINUTES)
+        
+        # Новые записи без отправленного уведомления (anti-join по журналу)
         result = await session.execute(
-            select(Booking)
-            .where(
-                and_(
-                    Booking.status == "new",
-                    Booking.created_at >= cutoff_time,  # Изменено: >= вместо <=
-                    # Проверяем, что нет уведомления об этой записи
-                    ~Booking.id.in_(
-                        select(Notification.booking_id)
-                        .where(Notification.notification_type == "admin_new_booking")
-                    )
-                )
-            )
-            .options(
-                selectinload(Booking.client).selectinload(Client.user),
-                selectinload(Booking.service),
-            )
-            .order_by(Booking.created_at.desc())
+            text(f"""
+                SELECT {DIGEST_COLUMNS}
+                {digest_from_clause(schema_name)}
+                WHERE b.status = 'new'
+                  AND b.created_at >= :cutoff_time
+                  AND b.created_at < :settled_before
+                  AND {not_notified_clause(schema_name)}
+                ORDER BY b.created_at
+            """),
+            {"cutoff_time": cutoff_time, "settled_before": settled_before, **ledger_params(KIND_ADMIN_NEW_BOOKING)}
         )
-        new_bookings = result.scalars().all()
+        new_bookings = result.fetchall()
         
         if not new_bookings:
-            return
-        
-        # Получаем всех администраторов
-        admins_result = await session.execute(
-            select(User).where(
-                and_(
-                    User.is_admin == True,
-                    User.telegram_id.isnot(None)
-                )
-            )
-        )
-        admins = admins_result.scalars().all()
-        
-        if not admins:
-            return
-        
-        bot = get_bot()
-        
-        # Формируем сообщение
-        text = f"🔔 Новые записи ({len(new_bookings)})\n\n"
-        
-        for booking in new_bookings[:10]:  # Показываем максимум 10 последних
-            date_str = booking.service_date.strftime("%d.%m.%Y")
-            time_str = booking.time.strftime("%H:%M")
-            client_name = booking.client.full_name if booking.client else "Неизвестно"
-            service_name = booking.service.name if booking.service else "Не указана"
-            
-            text += f"📋 {booking.booking_number}\n"
-            text += f"   👤 {client_name}\n"
-            text += f"   📅 {date_str} в {time_str}\n"
-            text += f"   🛠️ {service_name}\n\n"
-        
-        if len(new_bookings) > 10:
-            text += f"... и еще {len(new_bookings) - 10} записей"
-        
-        # Отправляем уведомление всем администраторам
-        for admin in admins:
-            try:
-                await bot.send_message(
-                    chat_id=admin.telegram_id,
-                    text=text
-                )
-                
-                # Сохраняем уведомления в БД
-                for booking in new_bookings:
-                    notification = Notification(
-                        user_id=admin.id,
-                        booking_id=booking.id,
-                        notification_type="admin_new_booking",
-                        message=text,
-                        is_sent=True,
-                        sent_at=datetime.utcnow()
-                    )
-                    session.add(notification)
-                
-            except Exception as e:
-                print(f"Ошибка отправки уведомления администратору {admin.id}: {e}")
-                # Сохраняем ошибку
-                for booking in new_bookings:
-                    notification = Notification(
-                        user_id=admin.id,
-                        booking_id=booking.id,
-                        notification_type="admin_new_booking",
-                        message=text,
-                        is_sent=False,
-                        error_message=str(e)
-                    )
-                    session.add(notification)
+            return 0, 0
         
+        sent, failed = await send_admin_digest(session, schema_name, get_pooled_bot(bot_token), new_bookings)
         await session.commit()
+    
+    return sent, failed
+
+
+async def notify_admin_new_bookings():
+    """Уведомить администраторов о новых записях, пропущенных ботом (мульти-тенантная версия)"""
+    now = datetime.utcnow()
+    
+    await run_tenant_fanout(
+        "Уведомления администраторам о новых записях",
+        lambda company_id, bot_token: notify_admin_new_bookings_for_company(company_id, bot_token, now),
+    )
 
 
 # Celery задачи для новых функций
@@ -1044,7 +910,7 @@ async def notify_admin_new_bookings():
 def send_work_orders_to_masters_task():
     """Celery задача для отправки лист-нарядов мастерам"""
     try:
-        asyncio.run(send_work_orders_to_masters())
+        run_async(send_work_orders_to_masters())
     except Exception as e:
         print(f"Ошибка в задаче send_work_orders_to_masters_task: {e}")
         raise
@@ -1054,7 +920,7 @@ def send_work_orders_to_masters_task():
 def notify_admin_new_bookings_task():
     """Celery задача для уведомления администраторов о новых записях"""
     try:
-        asyncio.run(notify_admin_new_bookings())
+        run_async(notify_admin_new_bookings())
     except Exception as e:
         print(f"Ошибка в задаче notify_admin_new_bookings_task: {e}")
         raise
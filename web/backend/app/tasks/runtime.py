@@ -0,0 +1,177 @@
+"""
+Среда выполнения async кода в процессе Celery worker.
+
+Задачи Celery синхронные, а рассылки и работа с БД асинхронные.
+asyncio.run() в каждой задаче создает и закрывает новый event loop,
+а движок БД (пул asyncpg) и HTTP сессия пула ботов остаются привязаны
+к закрытому loop: следующая задача получает ошибки вида
+"attached to a different loop" и заново устанавливает соединения.
+
+Здесь на процесс worker запускается один event loop в фоновом потоке.
+Задачи передают в него корутины через run_async(), поэтому соединения
+с PostgreSQL и keep-alive соединения с Telegram живут все время жизни
+процесса. При завершении процесса пул ботов и движок БД закрываются
+в этом же loop.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Время ожидания закрытия ресурсов при завершении процесса (секунды)
+SHUTDOWN_TIMEOUT_SECONDS = 10
+
+
+class TaskRuntime:
+    """
+    Долгоживущий event loop процесса в отдельном потоке.
+
+    Поток создается при первом вызове run() (или в worker_process_init),
+    поэтому после fork у дочернего процесса свой loop.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop процесса (запускается при необходимости)."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self) -> None:
+        """Запустить loop в фоновом потоке."""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=serve, name="celery-async-loop", daemon=True)
+        thread.start()
+        ready.wait()
+
+        self._loop = loop
+        self._thread = thread
+        logger.info("Запущен event loop для async задач Celery")
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Выполнить корутину в loop процесса и дождаться результата.
+
+        Если ожидание прервано (например, SoftTimeLimitExceeded),
+        корутина отменяется, чтобы не продолжать работу после таймаута задачи.
+
+        Args:
+            coro: Корутина
+            timeout: Максимальное время ожидания (секунды)
+
+        Returns:
+            Результат корутины
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run_async нельзя вызывать из event loop задач")
+
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        """Закрыть ресурсы процесса, остановить loop и поток."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_resources(), loop).result(SHUTDOWN_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.error(f"Ошибка закрытия ресурсов async задач: {e}", exc_info=True)
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(SHUTDOWN_TIMEOUT_SECONDS)
+        if not loop.is_running():
+            loop.close()
+        logger.info("Event loop async задач Celery остановлен")
+
+
+async def close_resources() -> None:
+    """Закрыть HTTP сессию пула ботов и соединения с БД."""
+    from app.database import engine
+    from app.services.bot_pool import close_bot_pool
+
+    await close_bot_pool()
+    await engine.dispose()
+
+
+async def reset_engine_after_fork() -> None:
+    """
+    Забыть соединения БД, унаследованные от родительского процесса.
+
+    Соединения не закрываются (close=False): их сокеты принадлежат
+    родителю, дочерний процесс открывает собственные.
+    """
+    from app.database import engine
+
+    await engine.dispose(close=False)
+
+
+# Глобальный экземпляр среды выполнения
+_runtime: Optional[TaskRuntime] = None
+
+
+def get_task_runtime() -> TaskRuntime:
+    """
+    Получить глобальный экземпляр TaskRuntime.
+
+    Returns:
+        Экземпляр TaskRuntime
+    """
+    global _runtime
+
+    if _runtime is None:
+        _runtime = TaskRuntime()
+
+    return _runtime
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Выполнить корутину из синхронной задачи Celery.
+
+    Args:
+        coro: Корутина
+        timeout: Максимальное время ожидания (секунды)
+
+    Returns:
+        Результат корутины
+    """
+    return get_task_runtime().run(coro, timeout)
+
+
+def start_task_runtime() -> None:
+    """Запустить loop процесса worker (worker_process_init)."""
+    runtime = get_task_runtime()
+    runtime.run(reset_engine_after_fork())
+
+
+def stop_task_runtime() -> None:
+    """Закрыть ресурсы и остановить loop процесса worker (worker_process_shutdown)."""
+    if _runtime is not None:
+        _runtime.stop()
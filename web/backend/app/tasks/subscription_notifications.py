@@ -1,541 +1,278 @@
 """
-Celery задачи для напоминаний о подписках и обработки webhook от Юкассы.
-
-Этот модуль обеспечивает:
-- Асинхронную отправку напоминаний о подписках
-- Периодическую проверку статуса подписок
-- Автоматическое обновление статуса подписок
-- Отправку уведомлений через Telegram Bot API
-- Обработку webhook от Юкассы
+Celery задачи жизненного цикла подписок компаний.
+
+Ежедневный проход (run_subscription_lifecycle):
+- Один SQL запрос считает days_left по последней подписке каждой
+  активной компании
+- Компании раскладываются по этапам: за 7, 3 и 1 день до окончания,
+  последний день, истечение и напоминание о неоплате каждые 3 дня
+- Флаг can_create_bookings переключается пачкой (UPDATE ... WHERE id = ANY)
+- Уведомления администраторам компаний отправляются параллельно через
+  шлюз Telegram
 """
 import logging
-from datetime import date, timedelta, datetime
-from typing import List, Optional
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
 
 from celery import shared_task
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
 
-from app.config import settings
 from app.database import get_async_session_maker
-from app.models.public_models import Company, Subscription, Plan
-from aiogram import Bot
+from app.services.bot_pool import get_pooled_bot
+from app.services.telegram_gateway import get_telegram_gateway
+from app.services.tenant_fanout import send_concurrently
+from app.tasks.runtime import run_async
 
 logger = logging.getLogger(__name__)
 
+# Этапы жизненного цикла подписки
+STAGE_7_DAYS = "7_days"
+STAGE_3_DAYS = "3_days"
+STAGE_1_DAY = "1_day"
+STAGE_LAST_DAY = "last_day"
+STAGE_EXPIRED = "expired"
+STAGE_PAYMENT = "payment"
+
+# Этапы напоминаний до окончания по дням до окончания
+REMINDER_STAGES = {7: STAGE_7_DAYS, 3: STAGE_3_DAYS, 1: STAGE_1_DAY}
+
+# Интервал напоминаний о неоплате после окончания подписки (дни)
+PAYMENT_REMINDER_INTERVAL = 3
+
+# Последняя подписка каждой активной компании и дней до ее окончания
+LIFECYCLE_SQL = """
+    SELECT c.id, c.name, c.telegram_bot_token, c.admin_telegram_id, c.can_create_bookings,
+           s.status, s.start_date, s.end_date,
+           s.end_date - CAST(:today AS date) AS days_left
+    FROM public.companies c
+    JOIN LATERAL (
+        SELECT status, start_date, end_date
+        FROM public.subscriptions
+        WHERE company_id = c.id
+        ORDER BY start_date DESC, id DESC
+        LIMIT 1
+    ) s ON true
+    WHERE c.is_active = true AND c.telegram_bot_token IS NOT NULL
+"""
 
-# ==================== Helper функции ====================
 
-async def get_active_companies() -> List[Company]:
-    """
-    Получить список всех активных компаний.
-    
-    Returns:
-        Список активных компаний
-    """
-    async_session_maker = get_async_session_maker()
-    async with async_session_maker() as session:
-        result = await session.execute(
-            select(Company).where(
-                and_(
-                    Company.is_active == True,
-                    Company.telegram_bot_token.isnot(None)
-                )
-            )
-        )
-        companies = result.scalars().all()
-    
-    logger.info(f"Найдено {len(companies)} активных компаний")
-    return companies
+@dataclass
+class LifecyclePlan:
+    """Результат разбора подписок: уведомления и переключения флага."""
+    notices: List[Tuple[object, str]] = field(default_factory=list)
+    block_ids: List[int] = field(default_factory=list)
+    unblock_ids: List[int] = field(default_factory=list)
 
 
-async def get_company_subscription(session: AsyncSession, company_id: int) -> Optional[Subscription]:
+def lifecycle_stage(days_left: int) -> Optional[str]:
     """
-    Получить текущую подписку компании.
-    
+    Этап подписки, о котором сегодня нужно уведомить компанию.
+
+    Подписка действует по end_date включительно: days_left == 0 -
+    последний день, days_left < 0 - подписка истекла.
+
     Args:
-        session: Асинхронная сессия БД
-        company_id: ID компании
-    
+        days_left: Дней до окончания подписки
+
     Returns:
-        Объект подписки или None
+        Этап или None, если уведомлять не нужно
     """
-    result = await session.execute(
-        select(Subscription)
-        .where(Subscription.company_id == company_id)
-        .order_by(Subscription.start_date.desc())
-        .limit(1)
-    )
-    subscription = result.scalar_one_or_none()
-    
-    if subscription:
-        logger.info(f"Подписка компании {company_id}: статус={subscription.status}, окончание={subscription.end_date}")
-    
-    return subscription
+    if days_left in REMINDER_STAGES:
+        return REMINDER_STAGES[days_left]
+    if days_left == 0:
+        return STAGE_LAST_DAY
+    if days_left == -1:
+        return STAGE_EXPIRED
+
+    days_passed = -days_left
+    if days_passed >= PAYMENT_REMINDER_INTERVAL and days_passed % PAYMENT_REMINDER_INTERVAL == 0:
+        return STAGE_PAYMENT
+    return None
 
 
-async def update_company_can_create_bookings(session: AsyncSession, company_id: int, can_create: bool) -> None:
+def plan_lifecycle(rows: Sequence, today: date) -> LifecyclePlan:
     """
-    Обновить флаг can_create_bookings компании.
-    
+    Разложить компании по этапам и определить переключения can_create_bookings.
+
     Args:
-        session: Асинхронная сессия БД
-        company_id: ID компании
-        can_create: Может ли создавать записи
-    
+        rows: Строки LIFECYCLE_SQL
+        today: Текущая дата
+
     Returns:
-        None
+        LifecyclePlan
     """
-    result = await session.execute(
-            select(Company).where(Company.id == company_id)
-        )
-    company = result.scalar_one_or_none()
-    
-    if company:
-        company.can_create_bookings = can_create
-        await session.commit()
-        
-        logger.info(f"Компания {company_id}: can_create_bookings обновлен на {can_create}")
-    else:
-        logger.warning(f"Компания {company_id} не найдена")
+    plan = LifecyclePlan()
+
+    for row in rows:
+        is_active = row.status == "active" and row.start_date <= today and row.days_left >= 0
+        if row.can_create_bookings is not False and not is_active:
+            plan.block_ids.append(row.id)
+        elif is_active and row.can_create_bookings is False:
+            plan.unblock_ids.append(row.id)
+
+        # Об отмененных подписках не напоминаем
+        if row.status == "cancelled":
+            continue
+        stage = lifecycle_stage(row.days_left)
+        if stage is not None:
+            plan.notices.append((row, stage))
+
+    return plan
 
 
-def format_reminder_text(company_name: str, days_left: int, end_date: date) -> str:
+def format_lifecycle_text(company_name: str, stage: str, days_left: int, end_date: date) -> str:
     """
-    Сформировать текст напоминания.
-    
+    Сформировать текст уведомления об этапе подписки.
+
     Args:
         company_name: Название компании
+        stage: Этап подписки
         days_left: Дней до окончания
         end_date: Дата окончания подписки
-    
+
     Returns:
-        Текст напоминания
+        Текст уведомления
     """
     formatted_date = end_date.strftime("%d.%m.%Y")
-    
-    if days_left <= 0:
-        return f"""⚠️ **Напоминание о подписке**
+
+    if stage == STAGE_LAST_DAY:
+        return f"""🚨 Последний день!
 
 💼 Компания: {company_name}
 
-📅 Ваша подписка истекла!
+📅 Ваша подписка истекает сегодня!
 
 Дата окончания: {formatted_date}
 
-Пожалуйста, продлите подписку для продолжения работы сервиса.
+⚠️ Срочно продлите подписку!
 
-🔗 Для оплаты перейдите в админ-панель.
-"""
-    else:
-        return f"""📋 **Напоминание о подписке**
+🔗 Для оплаты перейдите в админ-панель."""
+
+    if stage == STAGE_EXPIRED:
+        return f"""🚫 Подписка истекла!
 
 💼 Компания: {company_name}
 
-⏰ Ваша подписка истекает через {days_left} дней!
+❌ Ваша подписка истекла!
 
 Дата окончания: {formatted_date}
 
-Пожалуйста, продлите подписку для продолжения работы сервиса.
-
-🔗 Для оплаты перейдите в админ-панель.
-"""
-
+⚠️ Сервис создания записей заблокирован!
 
-# ==================== Celery задачи ====================
+🔗 Для продления подписки перейдите в админ-панель."""
 
-@shared_task(name="app.tasks.subscription_notifications.send_reminder_7_days_before", bind=True)
-def send_reminder_7_days_before():
-    """
-    Отправить напоминание за 7 дней до окончания подписки.
-    
-    Процесс:
-    1. Получить список всех активных компаний
-    2. Для каждой компании проверить подписку
-    3. Если до окончания ≤ 7 дней → отправить напоминание
-    """
-    import asyncio
-    logger.info("Запуск задачи: send_reminder_7_days_before")
-    
-    try:
-        # Запускаем async функцию
-        return asyncio.run(_send_reminder_7_days_before_async())
-    except Exception as e:
-        logger.error(f"Ошибка в задаче send_reminder_7_days_before: {e}", exc_info=True)
-        raise
+    if stage == STAGE_PAYMENT:
+        return f"""📢 Напоминание о неоплате
 
+💼 Компания: {company_name}
 
-async def _send_reminder_7_days_before_async():
-    """Асинхронная часть задачи send_reminder_7_days_before"""
-    try:
-        # Получаем активные компании
-        companies = await get_active_companies()
-        
-        reminders_sent = 0
-        
-        async_session_maker = get_async_session_maker()
-        async with async_session_maker() as session:
-            for company in companies:
-                # Получаем текущую подписку
-                subscription = await get_company_subscription(session, company.id)
-                
-                if not subscription:
-                    logger.warning(f"У компании {company.name} нет подписки")
-                    continue
-                
-                # Проверяем дату окончания
-                if subscription.end_date:
-                    days_left = (subscription.end_date - date.today()).days
-                    
-                    # Отправляем напоминание, если осталось 7 дней или меньше
-                    if days_left <= 7 and days_left > 0:
-                        if company.admin_telegram_id and company.telegram_bot_token:
-                            try:
-                                # Создаем бота с токеном компании
-                                bot = Bot(token=company.telegram_bot_token)
-                                
-                                # Формируем текст напоминания
-                                reminder_text = format_reminder_text(
-                                    company.name,
-                                    days_left,
-                                    subscription.end_date
-                                )
-                                
-                                # Отправляем напоминание напрямую через Telegram Bot API
-                                await bot.send_message(
-                                    chat_id=company.admin_telegram_id,
-                                    text=reminder_text
-                                )
-                                
-                                logger.info(f"✅ Напоминание отправлено компании {company.name} (за 7 дней)")
-                                reminders_sent += 1
-                                
-                                # Закрываем сессию бота
-                                await bot.session.close()
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка отправки напоминания компании {company.name}: {e}", exc_info=True)
-                        else:
-                            logger.warning(f"⚠️ У компании {company.name} нет admin_telegram_id или telegram_bot_token")
-                    else:
-                        logger.info(f"У компании {company.name} подписка истекла или нет даты окончания")
-        
-        logger.info(f"Завершено: отправлено {reminders_sent} напоминаний из {len(companies)} компаний")
-        return f"Отправлено {reminders_sent} напоминаний"
-    
-    except Exception as e:
-        logger.error(f"Ошибка в _send_reminder_7_days_before_async: {e}", exc_info=True)
-        raise
+❌ Подписка истекла {-days_left} дней назад!
 
+Дата окончания: {formatted_date}
 
-@shared_task(name="app.tasks.subscription_notifications.send_reminder_3_days_before", bind=True)
-async def send_reminder_3_days_before():
-    """
-    Отправить напоминание за 3 дня до окончания подписки.
-    
-    Процесс:
-    1. Получить список всех активных компаний
-    2. Для каждой компании проверить подписку
-    3. Если до окончания ≤ 3 дней → отправить напоминание
-    """
-    logger.info("Запуск задачи: send_reminder_3_days_before")
-    
-    try:
-        # Получаем активные компании
-        companies = await get_active_companies()
-        
-        reminders_sent = 0
-        
-        async_session_maker = get_async_session_maker()
-        async with async_session_maker() as session:
-            for company in companies:
-                # Получаем текущую подписку
-                subscription = await get_company_subscription(session, company.id)
-                
-                if not subscription:
-                    logger.warning(f"У компании {company.name} нет подписки")
-                    continue
-                
-                # Проверяем дату окончания
-                if subscription.end_date:
-                    days_left = (subscription.end_date - date.today()).days
-                    
-                    # Отправляем напоминание, если осталось 3 дня или меньше
-                    if days_left <= 3 and days_left > 0:
-                        if company.admin_telegram_id and company.telegram_bot_token:
-                            try:
-                                bot = Bot(token=company.telegram_bot_token)
-                                
-                                reminder_text = format_reminder_text(
-                                    company.name,
-                                    days_left,
-                                    subscription.end_date
-                                )
-                                
-                                await bot.send_message(
-                                    chat_id=company.admin_telegram_id,
-                                    text=reminder_text
-                                )
-                                
-                                logger.info(f"✅ Напоминание отправлено компании {company.name} (за 3 дня)")
-                                reminders_sent += 1
-                                
-                                await bot.session.close()
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка отправки напоминания компании {company.name}: {e}", exc_info=True)
-                        else:
-                            logger.warning(f"⚠️ У компании {company.name} нет admin_telegram_id или telegram_bot_token")
-                    else:
-                        logger.info(f"У компании {company.name} подписка истекла или нет даты окончания")
-        
-        logger.info(f"Завершено: отправлено {reminders_sent} напоминаний из {len(companies)} компаний")
-        return f"Отправлено {reminders_sent} напоминаний"
-    
-    except Exception as e:
-        logger.error(f"Ошибка в _send_reminder_3_days_before_async: {e}", exc_info=True)
-        raise
+⚠️ Сервис создания записей заблокирован!
 
+🔗 Для продления подписки перейдите в админ-панель.
 
-@shared_task(name="app.tasks.subscription_notifications.send_reminder_1_day_before", bind=True)
-def send_reminder_1_day_before():
-    """
-    Отправить напоминание за 1 день до окончания подписки.
-    
-    Процесс:
-    1. Получить список всех активных компаний
-    2. Для каждой компании проверить подписку
-    3. Если до окончания ≤ 1 день → отправить напоминание
-    """
-    import asyncio
-    logger.info("Запуск задачи: send_reminder_1_day_before")
-    
-    try:
-        return asyncio.run(_send_reminder_1_day_before_async())
-    except Exception as e:
-        logger.error(f"Ошибка в задаче send_reminder_1_day_before: {e}", exc_info=True)
-        raise
+📞 Пожалуйста, продлите подписку как можно скорее!"""
 
+    return f"""📋 Напоминание о подписке
 
-async def _send_reminder_1_day_before_async():
-    """Асинхронная часть задачи send_reminder_1_day_before"""
-    try:
-        # Получаем активные компании
-        companies = await get_active_companies()
-        
-        reminders_sent = 0
-        
-        async_session_maker = get_async_session_maker()
-        async with async_session_maker() as session:
-            for company in companies:
-                # Получаем текущую подписку
-                subscription = await get_company_subscription(session, company.id)
-                
-                if not subscription:
-                    logger.warning(f"У компании {company.name} нет подписки")
-                    continue
-                
-                # Проверяем дату окончания
-                if subscription.end_date:
-                    days_left = (subscription.end_date - date.today()).days
-                    
-                    # Отправляем напоминание, если остался 1 день или сегодня
-                    if days_left <= 1:
-                        if company.admin_telegram_id and company.telegram_bot_token:
-                            try:
-                                bot = Bot(token=company.telegram_bot_token)
-                                
-                                reminder_text = f"""🚨 Последний день!
-
-💼 Компания: {company.name}
+💼 Компания: {company_name}
 
-📅 Ваша подписка истекает сегодня!
+⏰ Ваша подписка истекает через {days_left} дн.!
 
-Дата окончания: {subscription.end_date.strftime("%d.%m.%Y")}
+Дата окончания: {formatted_date}
 
-⚠️ Срочно продлите подписку!
+Пожалуйста, продлите подписку для продолжения работы сервиса.
 
 🔗 Для оплаты перейдите в админ-панель."""
-                                
-                                await bot.send_message(
-                                    chat_id=company.admin_telegram_id,
-                                    text=reminder_text
-                                )
-                                
-                                logger.info(f"✅ Напоминание отправлено компании {company.name} (за 1 день)")
-                                reminders_sent += 1
-                                
-                                await bot.session.close()
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка отправки напоминания компании {company.name}: {e}", exc_info=True)
-                        else:
-                            logger.warning(f"⚠️ У компании {company.name} нет admin_telegram_id или telegram_bot_token")
-                    else:
-                        logger.info(f"У компании {company.name} подписка истекла или нет даты окончания")
-        
-        logger.info(f"Завершено: отправлено {reminders_sent} напоминаний из {len(companies)} компаний")
-        return f"Отправлено {reminders_sent} напоминаний"
-    
-    except Exception as e:
-        logger.error(f"Ошибка в _send_reminder_1_day_before_async: {e}", exc_info=True)
-        raise
 
 
-@shared_task(name="app.tasks.subscription_notifications.send_reminder_expiration", bind=True)
-async def send_reminder_expiration():
+async def apply_booking_flags(session: AsyncSession, plan: LifecyclePlan) -> None:
     """
-    Отправить напоминание об окончании подписки.
-    
-    Процесс:
-    1. Получить список всех активных компаний
-    2. Для каждой компании проверить подписку
-    3. Если подписка истекла сегодня → отправить напоминание
+    Переключить can_create_bookings пачкой (без commit).
+
+    Args:
+        session: Сессия БД
+        plan: Результат plan_lifecycle
     """
-    logger.info("Запуск задачи: send_reminder_expiration")
-    
-    try:
-        # Получаем активные компании
-        companies = await get_active_companies()
-        
-        reminders_sent = 0
-        
-        async_session_maker = get_async_session_maker()
-        async with async_session_maker() as session:
-            for company in companies:
-                # Получаем текущую подписку
-                subscription = await get_company_subscription(session, company.id)
-                
-                if not subscription:
-                    logger.warning(f"У компании {company.name} нет подписки")
-                    continue
-                
-                # Проверяем дату окончания
-                if subscription.end_date:
-                    days_left = (subscription.end_date - date.today()).days
-                    
-                    # Отправляем напоминание, если подписка истекла сегодня
-                    if days_left <= 0:
-                        if company.admin_telegram_id and company.telegram_bot_token:
-                            try:
-                                bot = Bot(token=company.telegram_bot_token)
-                                
-                                reminder_text = f"""🚫 Подписка истекла!
-
-💼 Компания: {company.name}
+    for ids, value in ((plan.block_ids, False), (plan.unblock_ids, True)):
+        if ids:
+            await session.execute(
+                text("UPDATE public.companies SET can_create_bookings = :value WHERE id = ANY(:ids)"),
+                {"value": value, "ids": ids}
+            )
 
-❌ Ваша подписка истекла!
 
-Дата окончания: {subscription.end_date.strftime("%d.%m.%Y")}
+async def send_lifecycle_notice(row, stage: str) -> None:
+    """Отправить уведомление об этапе подписки администратору компании."""
+    await get_telegram_gateway().send_message(
+        get_pooled_bot(row.telegram_bot_token),
+        chat_id=row.admin_telegram_id,
+        text=format_lifecycle_text(row.name, stage, row.days_left, row.end_date),
+    )
 
-⚠️ Сервис создания записей заблокирован!
 
-🔗 Для продления подписки перейдите в админ-панель."""
-                                
-                                await bot.send_message(
-                                    chat_id=company.admin_telegram_id,
-                                    text=reminder_text
-                                )
-                                
-                                logger.info(f"✅ Напоминание об окончании отправлено компании {company.name}")
-                                reminders_sent += 1
-                                
-                                await bot.session.close()
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка отправки напоминания компании {company.name}: {e}", exc_info=True)
-                        else:
-                            logger.warning(f"⚠️ У компании {company.name} нет admin_telegram_id или telegram_bot_token")
-                    else:
-                        logger.info(f"У компании {company.name} подписка неактивна или нет даты окончания")
-        
-        logger.info(f"Завершено: отправлено {reminders_sent} напоминаний из {len(companies)} компаний")
-        return f"Отправлено {reminders_sent} напоминаний"
-    
-    except Exception as e:
-        logger.error(f"Ошибка в _send_reminder_expiration_async: {e}", exc_info=True)
-        raise
+async def run_subscription_lifecycle_async(today: Optional[date] = None) -> dict:
+    """
+    Проход по подпискам: один запрос, переключение флагов, отправка уведомлений.
 
+    Args:
+        today: Текущая дата (по умолчанию date.today())
 
-@shared_task(name="app.tasks.subscription_notifications.send_payment_reminder", bind=True)
-def send_payment_reminder():
-    """
-    Отправить напоминание о неоплате (каждые 3 дня после окончания).
-    
-    Процесс:
-    1. Получить список компаний с истекшей подпиской
-    2. Проверяем, прошло ли 3 дня с момента окончания
-    3. Если прошло → отправить напоминание о неоплате
+    Returns:
+        Сводка прохода
     """
-    import asyncio
-    logger.info("Запуск задачи: send_payment_reminder")
-    
-    try:
-        return asyncio.run(_send_payment_reminder_async())
-    except Exception as e:
-        logger.error(f"Ошибка в задаче send_payment_reminder: {e}", exc_info=True)
-        raise
+    today = today or date.today()
+    started = time.monotonic()
 
+    async_session_maker = get_async_session_maker()
+    async with async_session_maker() as session:
+        result = await session.execute(text(LIFECYCLE_SQL), {"today": today})
+        rows = result.fetchall()
 
-async def _send_payment_reminder_async():
-    """Асинхронная часть задачи send_payment_reminder"""
-    try:
-        # Получаем активные компании
-        companies = await get_active_companies()
-        
-        reminders_sent = 0
-        
-        async_session_maker = get_async_session_maker()
-        async with async_session_maker() as session:
-            for company in companies:
-                # Получаем текущую подписку
-                subscription = await get_company_subscription(session, company.id)
-                
-                if not subscription:
-                    logger.warning(f"У компании {company.name} нет подписки")
-                    continue
-                
-                # Проверяем дату окончания
-                if subscription.end_date:
-                    days_passed = (date.today() - subscription.end_date).days
-                    
-                    # Отправляем напоминание, если прошло 3 дня после окончания
-                    # и если прошло 6, 9, 12 дней (кратные 3 дня)
-                    if days_passed >= 3 and days_passed % 3 == 0:
-                        if company.admin_telegram_id and company.telegram_bot_token:
-                            try:
-                                bot = Bot(token=company.telegram_bot_token)
-                                
-                                reminder_text = f"""📢 Напоминание о неоплате
-
-💼 Компания: {company.name}
-
-❌ Подписка истекла {days_passed} дней назад!
-
-Дата окончания: {subscription.end_date.strftime("%d.%m.%Y")}
+        plan = plan_lifecycle(rows, today)
+        await apply_booking_flags(session, plan)
+        await session.commit()
 
-⚠️ Сервис создания записей заблокирован!
+    notices = [(row, stage) for row, stage in plan.notices if row.admin_telegram_id]
+    for row, stage in plan.notices:
+        if not row.admin_telegram_id:
+            logger.warning(f"⚠️ У компании {row.name} нет admin_telegram_id, уведомление '{stage}' не отправлено")
+
+    errors = await send_concurrently(notices, lambda notice: send_lifecycle_notice(*notice))
+    for (row, stage), error in zip(notices, errors):
+        if error is not None:
+            logger.error(f"❌ Ошибка отправки уведомления '{stage}' компании {row.name}: {error}")
+
+    summary = {
+        "companies": len(rows),
+        "blocked": len(plan.block_ids),
+        "unblocked": len(plan.unblock_ids),
+        "sent": sum(1 for error in errors if error is None),
+        "failed": sum(1 for error in errors if error is not None),
+    }
+    logger.info(
+        f"Жизненный цикл подписок: компаний {summary['companies']}, заблокировано {summary['blocked']}, "
+        f"разблокировано {summary['unblocked']}, отправлено {summary['sent']}, ошибок {summary['failed']}, "
+        f"время {time.monotonic() - started:.2f} с"
+    )
+    return summary
 
-🔗 Для продления подписки перейдите в админ-панель.
 
-📞 Пожалуйста, продлите подписку как можно скорее!"""
-                                
-                                await bot.send_message(
-                                    chat_id=company.admin_telegram_id,
-                                    text=reminder_text
-                                )
-                                
-                                logger.info(f"✅ Напоминание о неоплате отправлено компании {company.name}")
-                                reminders_sent += 1
-                                
-                                await bot.session.close()
-                            except Exception as e:
-                                logger.error(f"❌ Ошибка отправки напоминания компании {company.name}: {e}", exc_info=True)
-                        else:
-                            logger.warning(f"⚠️ У компании {company.name} нет admin_telegram_id или telegram_bot_token")
-                    else:
-                        logger.info(f"У компании {company.name} подписка неактивна или нет даты окончания")
-        
-        logger.info(f"Завершено: отправлено {reminders_sent} напоминаний из {len(companies)} компаний")
-        return f"Отправлено {reminders_sent} напоминаний"
-    
+# ==================== Celery задачи ====================
+
+@shared_task(name="app.tasks.subscription_notifications.run_subscription_lifecycle")
+def run_subscription_lifecycle():
+    """Ежедневный проход по подпискам компаний."""
+    logger.info("Запуск задачи: run_subscription_lifecycle")
+
+    try:
+        return run_async(run_subscription_lifecycle_async())
     except Exception as e:
-        logger.error(f"Ошибка в _send_payment_reminder_async: {e}", exc_info=True)
+        logger.error(f"Ошибка в задаче run_subscription_lifecycle: {e}", exc_info=True)
         raise
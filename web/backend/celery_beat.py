@@ -2,79 +2,23 @@
 Конфигурация Celery Beat для планирования задач.
 
 Этот файл определяет расписание автоматических задач:
-- Напоминания за 7 дней до окончания подписки (каждый день в 9:00)
-- Напоминания за 1 день до окончания подписки (каждый день в 9:00)
-- Уведомления об истечении подписки (каждый день в 9:00)
-- Уведомления о неактивных подписках (каждый день в 9:00)
-- Уведомления о неудачных платежах (каждый день в 9:00)
+- Жизненный цикл подписок: напоминания, истечение, неоплата,
+  переключение can_create_bookings (каждый день в 09:00 МСК)
 """
 
 from celery.schedules import crontab
 
-from app.tasks.subscription_notifications import (
-    send_reminder_7_days_before,
-    send_reminder_day_before,
-    send_expired_notification,
-    send_inactive_subscription_notification,
-    send_failed_payment_notification
-)
-from app.tasks.notifications import (
-    send_reminder_day_before_task,
-    send_reminder_3_hours_before_task,
-    send_work_orders_to_masters_task,
-    notify_admin_new_bookings_task
-)
+from app.config import settings
 
 # ==================== Настройки расписания ====================
 
 # Задачи для подписок (SaaS)
-# Запускаются ежедневно в 9:00 по московскому времени
 
-# Напоминания за 7 дней до окончания подписки
-# Запускается каждый день в 09:00
-schedule_reminder_7_days = {
-    'task': 'app.tasks.subscription_notifications.send_reminder_7_days_before',
-    'schedule': crontab(hour=9, minute=0),  # 09:00 ежедневно
-    'options': {
-        'expires': 86400,  # 24 часа (task expires)
-    }
-}
-
-# Напоминания за 1 день до окончания подписки
-# Запускается каждый день в 09:00
-schedule_reminder_day_before = {
-    'task': 'app.tasks.subscription_notifications.send_reminder_day_before',
-    'schedule': crontab(hour=9, minute=0),  # 09:00 ежедневно
-    'options': {
-        'expires': 86400,  # 24 часа
-    }
-}
-
-# Уведомления об истечении подписки
-# Запускается каждый день в 09:00
-schedule_expired_notification = {
-    'task': 'app.tasks.subscription_notifications.send_expired_notification',
-    'schedule': crontab(hour=9, minute=0),  # 09:00 ежедневно
-    'options': {
-        'expires': 86400,  # 24 часа
-    }
-}
-
-# Уведомления о неактивных подписках
-# Запускается каждый день в 09:00
-schedule_inactive_subscription = {
-    'task': 'app.tasks.subscription_notifications.send_inactive_subscription_notification',
-    'schedule': crontab(hour=9, minute=0),  # 09:00 ежедневно
-    'options': {
-        'expires': 86400,  # 24 часа
-    }
-}
-
-# Уведомления о неудачных платежах
-# Запускается каждый день в 09:00
-schedule_failed_payment = {
-    'task': 'app.tasks.subscription_notifications.send_failed_payment_notification',
-    'schedule': crontab(hour=9, minute=0),  # 09:00 ежедневно
+# Жизненный цикл подписок: один проход по всем компаниям
+# Запускается каждый день в 06:00 UTC (09:00 МСК)
+schedule_subscription_lifecycle = {
+    'task': 'app.tasks.subscription_notifications.run_subscription_lifecycle',
+    'schedule': crontab(hour=6, minute=0),  # 06:00 UTC ежедневно
     'options': {
         'expires': 86400,  # 24 часа
     }
@@ -102,13 +46,34 @@ schedule_reminder_3_hours_booking = {
     }
 }
 
+# Очередь напоминаний о записях (public.reminders)
+# Запускается каждую минуту, отправляет наступившие напоминания пачками
+schedule_booking_reminders_queue = {
+    'task': 'app.tasks.notifications.dispatch_due_reminders_task',
+    'schedule': crontab(),  # Каждую минуту
+    'options': {
+        'expires': 55,  # Не копим пропущенные запуски
+    }
+}
+
+# Outbox уведомлений компаний (смена статуса записи)
+# Запускается каждые OUTBOX_RELAY_INTERVAL секунд
+schedule_notification_outbox = {
+    'task': 'app.tasks.notifications.relay_notification_outbox_task',
+    'schedule': float(settings.OUTBOX_RELAY_INTERVAL),
+    'options': {
+        'expires': settings.OUTBOX_RELAY_INTERVAL,  # Не копим пропущенные запуски
+    }
+}
+
 # Отправка лист-нарядов мастерам
-# Запускается каждый день в 08:00
+# Запускается каждые 5 минут; компания получает лист-наряды один раз в день
+# после времени work_order_time из своих настроек
 schedule_work_orders = {
     'task': 'app.tasks.notifications.send_work_orders_to_masters_task',
-    'schedule': crontab(hour=8, minute=0),  # 08:00 ежедневно
+    'schedule': crontab(minute='*/5'),  # Каждые 5 минут
     'options': {
-        'expires': 86400,  # 24 часа
+        'expires': 240,  # Не копим пропущенные запуски
     }
 }
 
@@ -126,16 +91,14 @@ schedule_admin_new_bookings = {
 
 beat_schedule = {
     # Задачи для подписок (новые для SaaS)
-    'subscription-reminder-7-days': schedule_reminder_7_days,
-    'subscription-reminder-1-day': schedule_reminder_day_before,
-    'subscription-expired': schedule_expired_notification,
-    'subscription-inactive': schedule_inactive_subscription,
-    'subscription-payment-failed': schedule_failed_payment,
+    'subscription-lifecycle': schedule_subscription_lifecycle,
     
     # Существующие задачи для записей
-    # Напоминания теперь планируются при подтверждении записи (отложенные задачи), а не периодически
-    # 'booking-reminder-1-day': schedule_reminder_1_day_booking,  # Отключено - используем отложенные задачи
-    # 'booking-reminder-3-hours': schedule_reminder_3_hours_booking,  # Отключено - используем отложенные задачи
+    # Напоминания планируются при подтверждении записи в public.reminders и отправляются из очереди
+    # 'booking-reminder-1-day': schedule_reminder_1_day_booking,  # Отключено - используем очередь напоминаний
+    # 'booking-reminder-3-hours': schedule_reminder_3_hours_booking,  # Отключено - используем очередь напоминаний
+    'booking-reminders-queue': schedule_booking_reminders_queue,
+    'notification-outbox': schedule_notification_outbox,
     'work-orders': schedule_work_orders,
     'admin-new-bookings': schedule_admin_new_bookings,
 }
@@ -149,51 +112,32 @@ beat_schedule = {
 ─────────────────────────────────────────
 ⏰ Время: Ежедневно в 09:00 (по МСК)
 
-1. send_reminder_7_days_before
-   • Частота: Ежедневно в 09:00
-   • Описание: Напоминания за 7 дней до окончания подписки
-   • Затратность: ~1-2 минуты (зависит от количества компаний)
-
-2. send_reminder_day_before
-   • Частота: Ежедневно в 09:00
-   • Описание: Напоминания за 1 день до окончания подписки
-   • Затратность: ~1-2 минуты
-
-3. send_expired_notification
-   • Частота: Ежедневно в 09:00
-   • Описание: Уведомления об истечении подписки
-   • Затратность: ~1-2 минуты
-
-4. send_inactive_subscription_notification
-   • Частота: Ежедневно в 09:00
-   • Описание: Уведомления о неактивных подписках
-   • Затратность: ~1-2 минуты
-
-5. send_failed_payment_notification
+1. run_subscription_lifecycle
    • Частота: Ежедневно в 09:00
-   • Описание: Уведомления о неудачных платежах за 7 дней
-   • Затратность: ~1-2 минуты
+   • Описание: Один запрос по подпискам всех компаний: напоминания за 7/3/1 день,
+     последний день, истечение, неоплата каждые 3 дня; переключение can_create_bookings
+   • Затратность: один SQL запрос + отправка уведомлений
 
 Записи (существующие):
 ─────────────────────────────────────────
 ⏰ Время: Различное
 
-6. send_reminder_day_before_task
+2. send_reminder_day_before_task
    • Частота: Ежедневно в 18:00
    • Описание: Напоминания за 1 день до записи
    • Затратность: ~2-3 минуты
 
-7. send_reminder_3_hours_before_task
+3. send_reminder_3_hours_before_task
    • Частота: Каждые 5 минут с 06:00 до 21:00
    • Описание: Напоминания за 3 часа до записи с кнопками подтверждения/отказа (отправляется один раз для каждой записи)
    • Затратность: ~1-2 минуты каждые 5 минут
 
-8. send_work_orders_to_masters_task
-   • Частота: Ежедневно в 08:00
-   • Описание: Отправка лист-нарядов мастерам
-   • Затратность: ~5-10 минут
+4. send_work_orders_to_masters_task
+   • Частота: Каждые 5 минут (компания - один раз в день в work_order_time)
+   • Описание: Отправка лист-нарядов мастерам, один запрос на компанию
+   • Затратность: ~1 запрос на компанию при каждой проверке
 
-9. notify_admin_new_bookings_task
+5. notify_admin_new_bookings_task
    • Частота: Каждые 10 минут
    • Описание: Уведомления администраторов о новых записях
    • Затратность: ~1-2 минуты каждые 10 минут
@@ -1,4 +1,6 @@
 """FastAPI приложение"""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,13 +11,24 @@ from app.api import auth, bookings, blocks, promocodes, promotions, broadcasts,
 from app.api import masters_tenant, posts_tenant, clients_tenant, services_tenant, users_tenant
 from app.api import settings as settings_api
 from app.middleware.tenant import TenantMiddleware
+from app.services.bot_pool import close_bot_pool
+from app.services.email_service import close_email_service
 
 # ✅ Исправлена архитектура моделей - используем полноценные API
 from app.api import public, webhooks, super_admin
 
 from app.api import webhooks
 
-app = FastAPI(title="Barber API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Жизненный цикл приложения: закрытие общих соединений при остановке"""
+    yield
+    await close_email_service()
+    await close_bot_pool()
+
+
+app = FastAPI(title="Barber API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -189,9 +189,7 @@ class TestBookingFlow:
         )
         
         # Мокаем уведомления
-        with patch('app.api.bookings.send_booking_status_notification', new_callable=AsyncMock) as mock_notify:
-            mock_notify.return_value = True
-            
+        with patch('app.api.bookings.enqueue_booking_status_notification', new_callable=AsyncMock) as mock_notify:
             updated_booking = await update_booking(
                 request=mock_request,
                 booking_id=booking_id,
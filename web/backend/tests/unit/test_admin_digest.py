@@ -0,0 +1,105 @@
+"""
+Unit тесты для сводки новых записей администраторам.
+
+Проверяет:
+- Накопление записей компании в одну сводку за окно
+- Раздельные сводки для разных компаний
+- Отправку открытых окон при остановке
+- Окно по настройке notify_admin_delay_minutes и текст сводки
+"""
+import asyncio
+from datetime import date, time
+from types import SimpleNamespace
+
+from app.services.admin_digest import DIGEST_MAX_ITEMS, digest_window_seconds, render_admin_digest
+from bot.services.admin_digest import AdminDigest
+
+
+def make_digest(window: float):
+    """AdminDigest с фиксированным окном и записью отправленных сводок."""
+    delivered = []
+
+    async def read_window(company_id):
+        return window
+
+    async def deliver(bot, company_id, booking_ids):
+        delivered.append((bot.id, company_id, booking_ids))
+
+    return AdminDigest(window=read_window, deliver=deliver), delivered
+
+
+def booking_row(booking_id: int):
+    """Строка записи в формате load_digest_bookings."""
+    return (booking_id, f"B-{booking_id}", date(2025, 1, 10), time(12, 30), "Иван", "+79990000000", "Стрижка")
+
+
+class TestAdminDigest:
+    """Тесты для AdminDigest."""
+
+    async def test_burst_is_coalesced_per_company(self):
+        """Тест: записи одного окна уходят одной сводкой на компанию."""
+        digest, delivered = make_digest(window=0.05)
+        bot = SimpleNamespace(id=100)
+        other_bot = SimpleNamespace(id=200)
+
+        for booking_id in range(1, 21):
+            digest.add(bot, 1, booking_id)
+        digest.add(other_bot, 2, 500)
+
+        assert delivered == []
+        assert digest.pending_count == 21
+
+        await asyncio.sleep(0.2)
+
+        assert sorted(delivered) == [(100, 1, list(range(1, 21))), (200, 2, [500])]
+        assert digest.pending_count == 0
+
+    async def test_new_window_after_flush(self):
+        """Тест: запись после отправки сводки открывает новое окно."""
+        digest, delivered = make_digest(window=0.02)
+        bot = SimpleNamespace(id=100)
+
+        digest.add(bot, 1, 1)
+        await asyncio.sleep(0.1)
+        digest.add(bot, 1, 2)
+        await asyncio.sleep(0.1)
+
+        assert delivered == [(100, 1, [1]), (100, 1, [2])]
+
+    async def test_flush_all_sends_open_windows(self):
+        """Тест: при остановке открытые окна отправляются без ожидания."""
+        digest, delivered = make_digest(window=60)
+        bot = SimpleNamespace(id=100)
+
+        digest.add(bot, 1, 1)
+        digest.add(bot, 1, 2)
+        await asyncio.wait_for(digest.flush_all(), timeout=1)
+
+        assert delivered == [(100, 1, [1, 2])]
+        assert digest.pending_count == 0
+
+
+class TestDigestRendering:
+    """Тесты для окна и текста сводки."""
+
+    def test_window_honors_delay_setting(self):
+        """Тест: окно не короче минимального и равно задержке компании, если она больше."""
+        assert digest_window_seconds(0, min_window=60) == 60
+        assert digest_window_seconds(5, min_window=60) == 300
+
+    def test_single_booking_has_confirm_actions(self):
+        """Тест: сводка из одной записи содержит кнопки подтверждения и отклонения."""
+        message_text, keyboard = render_admin_digest([booking_row(7)])
+
+        assert "B-7" in message_text
+        assert [button.callback_data for button in keyboard.inline_keyboard[0]] == ["confirm_7", "reject_7"]
+
+    def test_many_bookings_are_capped(self):
+        """Тест: в сводке не больше DIGEST_MAX_ITEMS записей и кнопок."""
+        rows = [booking_row(i) for i in range(1, DIGEST_MAX_ITEMS + 6)]
+        message_text, keyboard = render_admin_digest(rows)
+
+        buttons = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+        assert f"Новые записи ({len(rows)})" in message_text
+        assert "и еще 5 записей" in message_text
+        assert buttons == [f"booking_{i}" for i in range(1, DIGEST_MAX_ITEMS + 1)]
@@ -0,0 +1,120 @@
+"""
+Unit тесты для метрик ботов (bot.metrics).
+
+Проверяет:
+- Подсчет обновлений и SQL запросов на обновление
+- Метки роутера и обработчика из HandlerObject
+- Коды ошибок Bot API и подсчет состояний FSM
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.methods import SendMessage
+from aiogram.types import Chat, Message, Update
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from bot.metrics import (
+    HandlerMetricsMiddleware,
+    MetricsServer,
+    UpdateMetricsMiddleware,
+    count_fsm_states,
+    install_db_query_counter,
+    telegram_error_code,
+)
+from bot.sharding import configure_shard
+
+
+def make_update(update_id: int) -> Update:
+    """Создать обновление с текстовым сообщением."""
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=100, type="private"),
+            text="Записаться",
+        ),
+    )
+
+
+class TestUpdateMetrics:
+    """Тесты для UpdateMetricsMiddleware и HandlerMetricsMiddleware."""
+
+    async def test_update_counts_db_queries(self):
+        """Тест: SQL запросы обработчика учитываются в метрике обновления."""
+        install_db_query_counter()
+        engine = create_engine("sqlite://")
+        bot = MagicMock()
+        bot.id = 424242
+
+        async def handler(event, data):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+        before_sum = REGISTRY.get_sample_value(
+            "bot_db_queries_per_update_sum", {"update_type": "message"}
+        ) or 0
+        await UpdateMetricsMiddleware()(handler, make_update(1), {"bot": bot})
+
+        assert REGISTRY.get_sample_value(
+            "bot_updates_total", {"company_id": "unknown", "update_type": "message"}
+        ) >= 1
+        assert REGISTRY.get_sample_value(
+            "bot_db_queries_per_update_sum", {"update_type": "message"}
+        ) - before_sum == 2
+
+    async def test_handler_labels_from_handler_object(self):
+        """Тест: метки роутера и обработчика берутся из функции обработчика."""
+
+        async def show_calendar(event, data):
+            return "ok"
+
+        handler_object = SimpleNamespace(callback=show_calendar)
+        result = await HandlerMetricsMiddleware()(show_calendar, make_update(2).message, {"handler": handler_object})
+
+        assert result == "ok"
+        assert REGISTRY.get_sample_value(
+            "bot_handler_duration_seconds_count",
+            {"router": __name__, "handler": "show_calendar"},
+        ) == 1
+
+
+class TestMetricsHelpers:
+    """Тесты для вспомогательных функций метрик."""
+
+    def test_telegram_error_code(self):
+        """Тест: исключения aiogram сопоставляются кодам Bot API."""
+        method = SendMessage(chat_id=1, text="test")
+
+        assert telegram_error_code(TelegramRetryAfter(method, "Flood", retry_after=5)) == "429"
+        assert telegram_error_code(TelegramForbiddenError(method, "blocked")) == "403"
+        assert telegram_error_code(ValueError()) == "ValueError"
+
+    async def test_count_fsm_states_memory(self):
+        """Тест: подсчет пользователей по состояниям в MemoryStorage."""
+        storage = MemoryStorage()
+        for user_id, state in ((1, "Booking:date"), (2, "Booking:date"), (3, "Booking:time")):
+            await storage.set_state(StorageKey(bot_id=1, chat_id=user_id, user_id=user_id), state)
+        await storage.set_state(StorageKey(bot_id=1, chat_id=4, user_id=4), None)
+
+        assert await count_fsm_states(storage) == {"Booking:date": 2, "Booking:time": 1}
+
+    def test_shared_fsm_states_counted_by_first_shard(self):
+        """Тест: общий Redis сканирует только шард 0, MemoryStorage — каждый воркер."""
+        redis_storage = RedisStorage(redis=MagicMock())
+        try:
+            configure_shard(1, 2)
+            assert not MetricsServer(storage=redis_storage)._counts_fsm_states()
+            assert MetricsServer(storage=MemoryStorage())._counts_fsm_states()
+
+            configure_shard(0, 2)
+            assert MetricsServer(storage=redis_storage)._counts_fsm_states()
+        finally:
+            configure_shard(0, 1)
@@ -0,0 +1,65 @@
+"""
+Unit тесты для пула ботов (app.services.bot_pool).
+
+Проверяет:
+- Повторное использование бота и общей HTTP сессии
+- Удаление ботов по времени простоя и размеру пула
+- Новую сессию при смене event loop
+"""
+import asyncio
+
+from app.services.bot_pool import BotPool
+
+TOKEN_A = "111:AAA"
+TOKEN_B = "222:BBB"
+TOKEN_C = "333:CCC"
+
+
+class TestBotPool:
+    """Тесты для BotPool."""
+
+    async def test_reuses_bot_and_session(self):
+        """Тест: один токен — один бот, все боты на общей сессии."""
+        pool = BotPool(max_size=10, idle_ttl=60)
+        bot_a = pool.get_bot(TOKEN_A)
+
+        assert pool.get_bot(TOKEN_A) is bot_a
+        assert pool.get_bot(TOKEN_B).session is bot_a.session
+        await pool.close()
+
+    async def test_evicts_least_recently_used(self):
+        """Тест: при превышении размера удаляется давно неиспользуемый бот."""
+        pool = BotPool(max_size=2, idle_ttl=60)
+        bot_a = pool.get_bot(TOKEN_A)
+        pool.get_bot(TOKEN_B)
+        pool.get_bot(TOKEN_A)
+        pool.get_bot(TOKEN_C)
+
+        assert len(pool) == 2
+        assert pool.get_bot(TOKEN_A) is bot_a
+        assert TOKEN_B not in pool._bots
+        await pool.close()
+
+    async def test_evicts_idle(self):
+        """Тест: простаивающий дольше idle_ttl бот удаляется."""
+        pool = BotPool(max_size=10, idle_ttl=0)
+        pool.get_bot(TOKEN_A)
+        pool._bots[TOKEN_A] = (pool._bots[TOKEN_A][0], 0.0)
+        pool.get_bot(TOKEN_B)
+
+        assert list(pool._bots) == [TOKEN_B]
+        await pool.close()
+
+
+def test_new_session_per_event_loop():
+    """Тест: после смены event loop пул создает новую сессию."""
+    pool = BotPool()
+
+    async def get_session():
+        return pool.get_bot(TOKEN_A).session
+
+    first = asyncio.run(get_session())
+    second = asyncio.run(get_session())
+
+    assert first is not second
+    asyncio.run(pool.close())
@@ -0,0 +1,81 @@
+"""
+Unit тесты для защиты от повторных нажатий (bot.middleware.callback_dedup).
+
+Проверяет:
+- Отбрасывание повторного нажатия той же кнопки
+- Блокировку параллельных изменяющих действий пользователя
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from bot.middleware.callback_dedup import (
+    IN_FLIGHT_TEXT,
+    CallbackDedupMiddleware,
+    MemoryCallbackDedupStore,
+)
+
+
+def make_callback(data: str, message_id: int = 10) -> MagicMock:
+    """Callback-заглушка с сообщением в личном чате."""
+    callback = MagicMock()
+    callback.data = data
+    callback.message.chat.id = 100
+    callback.message.message_id = message_id
+    callback.from_user.id = 100
+    callback.answer = AsyncMock()
+    return callback
+
+
+def make_data() -> dict:
+    """Данные middleware с ботом-заглушкой."""
+    bot = MagicMock()
+    bot.id = 42
+    return {"bot": bot}
+
+
+class TestCallbackDedupMiddleware:
+    """Тесты для CallbackDedupMiddleware."""
+
+    async def test_repeated_tap_is_dropped(self):
+        """Тест: повторное нажатие отвечается сразу и не доходит до обработчика."""
+        middleware = CallbackDedupMiddleware(store=MemoryCallbackDedupStore(), ttl=60)
+        handler = AsyncMock(return_value="ok")
+
+        first = make_callback("calendar_date_2025_03_10")
+        second = make_callback("calendar_date_2025_03_10")
+        assert await middleware(handler, first, make_data()) == "ok"
+        assert await middleware(handler, second, make_data()) is None
+
+        handler.assert_awaited_once()
+        second.answer.assert_awaited_once_with()
+
+        # Другая кнопка того же сообщения обрабатывается
+        await middleware(handler, make_callback("calendar_month_2025_04"), make_data())
+        assert handler.await_count == 2
+
+    async def test_parallel_stateful_action_is_locked(self):
+        """Тест: второе изменяющее действие ждет завершения первого."""
+        middleware = CallbackDedupMiddleware(store=MemoryCallbackDedupStore(), ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_handler(event, data):
+            started.set()
+            await release.wait()
+
+        task = asyncio.ensure_future(middleware(slow_handler, make_callback("time_10:00", 1), make_data()))
+        await started.wait()
+
+        locked = make_callback("confirm_attendance_5", 2)
+        handler = AsyncMock()
+        await middleware(handler, locked, make_data())
+
+        handler.assert_not_awaited()
+        locked.answer.assert_awaited_once_with(IN_FLIGHT_TEXT)
+
+        release.set()
+        await task
+
+        # После завершения первого действия блокировка снята
+        await middleware(handler, make_callback("cancel_booking_5", 3), make_data())
+        handler.assert_awaited_once()
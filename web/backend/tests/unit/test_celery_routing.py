@@ -0,0 +1,40 @@
+"""
+Unit тесты для конфигурации Celery (app.celery_app).
+
+Проверяет:
+- Срочные и массовые задачи попадают в разные очереди
+- Каждая задача расписания beat зарегистрирована и имеет очередь
+"""
+from app.celery_app import (
+    QUEUE_BULK,
+    QUEUE_MAINTENANCE,
+    QUEUE_REALTIME,
+    QUEUE_SCHEDULED,
+    celery_app,
+)
+
+DECLARED_QUEUES = {QUEUE_REALTIME, QUEUE_SCHEDULED, QUEUE_BULK, QUEUE_MAINTENANCE}
+
+
+def queue_of(task_name: str) -> str:
+    """Очередь, в которую маршрутизируется задача."""
+    return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+
+class TestCeleryRouting:
+    """Тесты маршрутизации и расписания."""
+
+    def test_realtime_tasks_are_isolated_from_bulk(self):
+        """Тест: срочные уведомления не делят очередь с массовыми задачами."""
+        assert queue_of("app.tasks.notifications.dispatch_due_reminders_task") == QUEUE_REALTIME
+        assert queue_of("app.tasks.notifications.relay_notification_outbox_task") == QUEUE_REALTIME
+        assert queue_of("app.tasks.notifications.send_reminder_day_before_task") == QUEUE_BULK
+        assert queue_of("app.tasks.subscription_notifications.run_subscription_lifecycle") == QUEUE_MAINTENANCE
+
+    def test_beat_schedule_tasks_are_registered(self):
+        """Тест: задачи расписания существуют и маршрутизируются в объявленные очереди."""
+        celery_app.loader.import_default_modules()
+
+        for entry in celery_app.conf.beat_schedule.values():
+            assert entry["task"] in celery_app.tasks
+            assert queue_of(entry["task"]) in DECLARED_QUEUES
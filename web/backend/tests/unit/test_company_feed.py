@@ -0,0 +1,46 @@
+"""
+Unit тесты для ленты изменений компаний (bot.company_feed).
+
+Проверяет:
+- Объединение нескольких уведомлений об одной компании
+- Изоляцию ошибок обработчика по компаниям
+"""
+import json
+from unittest.mock import AsyncMock
+
+from bot.company_feed import CHANNEL, CompanyChangeFeed
+
+
+def notify(feed: CompanyChangeFeed, payload) -> None:
+    """Передать уведомление в ленту, как это делает asyncpg."""
+    feed._listener(None, 1, CHANNEL, json.dumps(payload))
+
+
+class TestCompanyChangeFeed:
+    """Тесты для применения накопившихся изменений."""
+
+    async def test_drain_coalesces_and_isolates_errors(self):
+        """Тест: один вызов на компанию с объединенными полями, ошибка компании не мешает остальным."""
+        calls = {}
+
+        async def on_change(company_id, op, changed):
+            calls[company_id] = (op, set(changed))
+            if company_id == 2:
+                raise RuntimeError("bot start failed")
+
+        feed = CompanyChangeFeed(on_change=on_change, on_resync=AsyncMock())
+        notify(feed, {"id": 1, "op": "INSERT", "changed": ["telegram_bot_token"]})
+        notify(feed, {"id": 2, "op": "UPDATE", "changed": ["is_active"]})
+        notify(feed, {"id": 1, "op": "UPDATE", "changed": ["can_create_bookings"]})
+        notify(feed, {"id": 3, "op": "DELETE"})
+        notify(feed, {"id": 1, "op": "UPDATE", "changed": ["is_active"]})
+        feed._listener(None, 1, CHANNEL, "not json")
+
+        await feed._drain()
+
+        assert calls == {
+            1: ("UPDATE", {"telegram_bot_token", "can_create_bookings", "is_active"}),
+            2: ("UPDATE", {"is_active"}),
+            3: ("DELETE", set()),
+        }
+        assert feed._queue.empty()
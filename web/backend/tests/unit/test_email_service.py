@@ -0,0 +1,123 @@
+"""
+Unit тесты для отправки email (app.services.email_service).
+
+Проверяет на локальном SMTP сервере (aiosmtpd):
+- Пачка писем уходит через одно переиспользуемое соединение
+- Временный отказ (4xx) повторяется, постоянный (5xx) - нет
+- Остановка сервиса не оставляет send_email без результата
+"""
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller
+
+from app.services.email_service import EmailService, is_transient_error
+import aiosmtplib
+
+
+class RecordingHandler:
+    """Обработчик SMTP: запоминает письма и отвечает заданными отказами."""
+
+    def __init__(self):
+        self.ehlo_count = 0
+        self.recipients = []
+        self.responses = []
+        self.delay = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.ehlo_count += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.responses:
+            return self.responses.pop(0)
+        self.recipients.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port() -> int:
+    """Свободный локальный порт."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def email_service(smtp_server, monkeypatch):
+    monkeypatch.setenv("SMTP_HOST", smtp_server.hostname)
+    monkeypatch.setenv("SMTP_PORT", str(smtp_server.port))
+    monkeypatch.setenv("SMTP_USER", "")
+    monkeypatch.setenv("SMTP_PASSWORD", "")
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    monkeypatch.setenv("SMTP_POOL_SIZE", "1")
+    monkeypatch.setenv("SMTP_RETRY_DELAY", "0")
+    return EmailService()
+
+
+class TestEmailService:
+    """Тесты очереди и повторов отправки."""
+
+    async def test_batch_reuses_connection(self, smtp_server, email_service):
+        """Тест: письма пачки отправляются через одно SMTP соединение."""
+        emails = [(f"user{i}@example.com", "Тема", "<p>Привет</p>", None) for i in range(5)]
+
+        assert email_service.enqueue_batch(emails) == 5
+        await email_service.close()
+
+        assert smtp_server.handler.recipients == [email[0] for email in emails]
+        assert smtp_server.handler.ehlo_count == 1
+
+    async def test_transient_error_is_retried(self, smtp_server, email_service):
+        """Тест: после временного отказа письмо отправляется повторно."""
+        smtp_server.handler.responses = ["451 Try again later"]
+
+        assert await email_service.send_email("user@example.com", "Тема", "<p>Привет</p>") is True
+        await email_service.close()
+
+        assert smtp_server.handler.recipients == ["user@example.com"]
+
+    async def test_permanent_error_is_not_retried(self, smtp_server, email_service):
+        """Тест: постоянный отказ возвращает False без повторов."""
+        smtp_server.handler.responses = ["550 Mailbox unavailable", "550 Mailbox unavailable"]
+
+        assert await email_service.send_email("user@example.com", "Тема", "<p>Привет</p>") is False
+        await email_service.close()
+
+        assert smtp_server.handler.responses == ["550 Mailbox unavailable"]
+        assert smtp_server.handler.recipients == []
+
+    async def test_close_resolves_pending_sends(self, smtp_server, email_service):
+        """Тест: при остановке по таймауту отправляемое и ожидающее письма получают False."""
+        smtp_server.handler.delay = 2
+        sends = [
+            asyncio.ensure_future(email_service.send_email(f"user{i}@example.com", "Тема", "<p>Привет</p>"))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0.2)
+
+        await email_service.close(timeout=0.1)
+
+        assert await asyncio.wait_for(asyncio.gather(*sends), 1) == [False, False]
+
+    def test_is_transient_error(self):
+        """Тест: классификация ошибок отправки."""
+        assert is_transient_error(aiosmtplib.SMTPServerDisconnected("closed"))
+        assert is_transient_error(aiosmtplib.SMTPDataError(451, "later"))
+        assert not is_transient_error(aiosmtplib.SMTPDataError(554, "rejected"))
+        assert not is_transient_error(ValueError("bad"))
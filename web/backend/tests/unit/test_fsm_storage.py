@@ -0,0 +1,54 @@
+"""
+Unit тесты для сериализации данных FSM (bot.fsm_storage).
+
+Проверяет:
+- Сохранение дат и времени ISO-строками
+- Восстановление исходных типов при чтении
+- Отказ сериализовать неподдерживаемые типы
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+from bot.fsm_storage import fsm_json_dumps, fsm_json_loads
+
+
+class TestFsmJsonCodec:
+    """Тесты для fsm_json_dumps / fsm_json_loads."""
+
+    def test_roundtrip_booking_data(self):
+        """Тест восстановления данных диалога записи."""
+        data = {
+            "service_id": 5,
+            "booking_date": date(2025, 3, 14),
+            "booking_time": time(10, 30),
+            "created_at": datetime(2025, 3, 1, 12, 0, 5),
+            "price": Decimal("1500.00"),
+            "contract_data": {"contract_date": date(2025, 1, 2), "name": "Салон"},
+        }
+
+        restored = fsm_json_loads(fsm_json_dumps(data))
+
+        assert restored == data
+        assert type(restored["booking_date"]) is date
+        assert type(restored["created_at"]) is datetime
+
+    def test_dates_stored_as_iso_strings(self):
+        """Тест компактного формата без pickle."""
+        raw = fsm_json_dumps({"booking_date": date(2025, 3, 14)})
+
+        assert raw == '{"booking_date":{"__t":"d","v":"2025-03-14"}}'
+        assert json.loads(raw)["booking_date"]["v"] == "2025-03-14"
+
+    def test_loads_accepts_bytes(self):
+        """Тест чтения bytes, которые возвращает Redis."""
+        raw = fsm_json_dumps({"booking_time": time(9, 0)}).encode()
+
+        assert fsm_json_loads(raw) == {"booking_time": time(9, 0)}
+
+    def test_unsupported_type(self):
+        """Тест ошибки для неподдерживаемого типа."""
+        with pytest.raises(TypeError):
+            fsm_json_dumps({"value": object()})
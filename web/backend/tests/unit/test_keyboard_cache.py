@@ -0,0 +1,72 @@
+"""
+Unit тесты для кеша клавиатур календаря и выбора времени.
+
+Проверяет:
+- Повторное использование клавиатуры при той же доступности
+- Новую клавиатуру при изменении доступных дат
+- Совпадение текста и callback кнопок времени с прежним форматом
+"""
+from datetime import date, time, timedelta
+
+from bot.keyboards.client import get_time_slots_keyboard
+from bot.utils.calendar import generate_calendar
+
+
+def next_month(today: date) -> date:
+    """Первое число следующего месяца."""
+    return (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class TestCalendarCache:
+    """Тесты для кеша generate_calendar."""
+
+    def test_same_availability_reuses_markup(self):
+        """Тест: одинаковая доступность дает тот же объект клавиатуры."""
+        first = next_month(date.today())
+        available = {first, first + timedelta(days=2)}
+
+        markup = generate_calendar(first.year, first.month, available)
+
+        assert generate_calendar(first.year, first.month, set(available)) is markup
+        days = [
+            button.callback_data
+            for row in markup.inline_keyboard
+            for button in row
+            if button.callback_data.startswith("calendar_date_")
+        ]
+        assert days == [
+            f"calendar_date_{first.year}_{first.month}_1",
+            f"calendar_date_{first.year}_{first.month}_3",
+        ]
+
+    def test_changed_availability_builds_new_markup(self):
+        """Тест: изменение доступных дат или префиксов дает новую клавиатуру."""
+        first = next_month(date.today())
+
+        markup = generate_calendar(first.year, first.month, {first})
+
+        assert generate_calendar(first.year, first.month, {first + timedelta(days=1)}) is not markup
+        master_markup = generate_calendar(
+            first.year,
+            first.month,
+            {first},
+            date_callback_prefix="master_calendar_date",
+        )
+        assert master_markup is not markup
+
+
+class TestTimeSlotsKeyboardCache:
+    """Тесты для кеша get_time_slots_keyboard."""
+
+    def test_slots_keyboard_format_and_reuse(self):
+        """Тест: формат кнопок сохранен, одинаковые слоты дают один объект."""
+        slots = [(time(9, 0), time(10, 30)), (time(14, 5), time(15, 0))]
+
+        markup = get_time_slots_keyboard(slots)
+
+        assert get_time_slots_keyboard(list(slots)) is markup
+        first = markup.inline_keyboard[0][0]
+        assert first.text == "09:00 - 10:30"
+        assert first.callback_data == "time_9_0"
+        assert markup.inline_keyboard[1][0].callback_data == "time_14_5"
+        assert markup.inline_keyboard[-1][0].callback_data == "cancel"
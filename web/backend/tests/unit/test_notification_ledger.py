@@ -0,0 +1,66 @@
+"""
+Unit тесты для журнала доставки уведомлений (app.services.notification_ledger).
+
+Проверяет:
+- Anti-join по уникальному ключу журнала
+- Upsert итогов без потери отметки об отправке
+- Пакетную запись одной командой
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.notification_ledger import (
+    KIND_REMINDER_DAY,
+    build_record_sql,
+    delivery,
+    filter_not_notified,
+    not_notified_clause,
+    record_deliveries,
+)
+
+
+class TestNotificationLedger:
+    """Тесты для журнала доставки."""
+
+    def test_not_notified_clause_matches_unique_key(self):
+        """Тест: условие использует booking_id, вид и канал - колонки уникального индекса."""
+        clause = not_notified_clause("tenant_5")
+
+        assert 'FROM "tenant_5".notifications n' in clause
+        assert "n.booking_id = b.id" in clause
+        assert "n.notification_type = :ledger_kind" in clause
+        assert "n.channel = :ledger_channel" in clause
+
+    def test_upsert_keeps_sent_flag(self):
+        """Тест: повторная ошибка не снимает отметку об успешной отправке."""
+        sql = build_record_sql("tenant_5")
+
+        assert "ON CONFLICT (booking_id, notification_type, channel) DO UPDATE" in sql
+        assert "is_sent = n.is_sent OR EXCLUDED.is_sent" in sql
+
+    async def test_record_deliveries_is_one_batch(self):
+        """Тест: итоги пачки записываются одной командой executemany."""
+        session = AsyncMock()
+
+        await record_deliveries(session, "tenant_5", KIND_REMINDER_DAY, [
+            delivery(1, "Напоминание", user_id=10),
+            delivery(2, "Напоминание", user_id=11, error=RuntimeError("blocked")),
+        ])
+
+        session.execute.assert_awaited_once()
+        params = session.execute.await_args.args[1]
+        assert [(p["booking_id"], p["is_sent"], p["error_message"]) for p in params] == [
+            (1, True, None),
+            (2, False, "blocked"),
+        ]
+        assert all(p["kind"] == KIND_REMINDER_DAY and p["channel"] == "telegram" for p in params)
+
+    async def test_filter_not_notified_keeps_order(self):
+        """Тест: возвращаются только записи без уведомления, в исходном порядке."""
+        session = AsyncMock()
+        result = MagicMock()
+        result.fetchall.return_value = [(3,), (1,)]
+        session.execute.return_value = result
+
+        pending = await filter_not_notified(session, "tenant_5", [1, 2, 3], KIND_REMINDER_DAY)
+
+        assert pending == [1, 3]
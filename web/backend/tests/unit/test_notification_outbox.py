@@ -0,0 +1,77 @@
+"""
+Unit тесты для outbox уведомлений (app.services.notification_outbox).
+
+Проверяет:
+- Захват строк через FOR UPDATE SKIP LOCKED с арендой
+- Повтор с экспоненциальной задержкой и отметку failed
+- Отправку пачки relay
+"""
+from collections import namedtuple
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.notification_outbox import (
+    build_claim_sql,
+    mark_outbox_results,
+    relay_company_outbox,
+    retry_delay,
+)
+
+OutboxRow = namedtuple("OutboxRow", "id event_type booking_id payload attempts")
+
+
+def make_session_maker(session):
+    """Фабрика, возвращающая одну и ту же сессию-заглушку."""
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=session)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=context)
+
+
+class TestNotificationOutbox:
+    """Тесты для outbox уведомлений."""
+
+    def test_claim_uses_skip_locked_and_lease(self):
+        """Тест: захват не блокируется на чужих строках и продлевает available_at."""
+        sql = build_claim_sql(7)
+
+        assert '"tenant_7".notification_outbox' in sql
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "available_at = now() + make_interval(secs => :lease)" in sql
+
+    def test_retry_delay_grows_exponentially(self):
+        """Тест: задержка удваивается с каждой попыткой и ограничена сверху."""
+        assert [retry_delay(n, base=30) for n in (1, 2, 3)] == [30, 60, 120]
+        assert retry_delay(20, base=30) == 3600
+
+    async def test_exhausted_attempts_are_marked_failed(self):
+        """Тест: после последней попытки строка получает статус failed."""
+        session = AsyncMock()
+
+        await mark_outbox_results(session, 7, [(1, 1, None), (2, 2, "timeout"), (3, 5, "blocked")], max_attempts=5)
+
+        sent_call, failed_call = session.execute.await_args_list
+        assert sent_call.args[1] == {"ids": [1]}
+        assert [(row["id"], row["status"]) for row in failed_call.args[1]] == [(2, "pending"), (3, "failed")]
+
+    async def test_relay_delivers_claimed_batch(self):
+        """Тест: relay отправляет захваченные строки и считает ошибки."""
+        rows = [
+            OutboxRow(1, "booking_status", 10, {"status": "confirmed"}, 1),
+            OutboxRow(2, "booking_status", 11, {"status": "cancelled"}, 1),
+        ]
+        session = AsyncMock()
+        claimed = MagicMock()
+        claimed.fetchall.return_value = rows
+        session.execute.side_effect = [claimed, None, None]
+        delivered = []
+
+        async def deliver(company_id, row):
+            if row.booking_id == 11:
+                raise RuntimeError("Telegram недоступен")
+            delivered.append((company_id, row.payload["status"]))
+
+        result = await relay_company_outbox(make_session_maker(session), 7, deliver, limit=10)
+
+        assert result == (1, 1)
+        assert delivered == [(7, "confirmed")]
+        assert session.commit.await_count == 2
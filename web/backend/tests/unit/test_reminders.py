@@ -0,0 +1,93 @@
+"""
+Unit тесты для очереди напоминаний (app.services.reminders).
+
+Проверяет:
+- Расчет времени напоминаний
+- Upsert будущих и отмену прошедших напоминаний
+- Захват наступивших строк через FOR UPDATE SKIP LOCKED
+- Повтор отправки после ошибки и отмену ненужных напоминаний
+"""
+from datetime import date, datetime, time, timedelta
+from unittest.mock import AsyncMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.reminders import (
+    REMINDER_3_HOURS,
+    REMINDER_DAY_BEFORE,
+    SEND_ERROR,
+    SEND_SENT,
+    SEND_SKIPPED,
+    build_claim_statement,
+    compute_reminder_times,
+    finish_reminder,
+    reminder_outcome_values,
+    schedule_booking_reminders,
+)
+
+
+def compile_sql(statement) -> str:
+    """SQL запроса для PostgreSQL."""
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestReminderQueue:
+    """Тесты для очереди напоминаний."""
+
+    def test_compute_reminder_times(self):
+        """Тест: за день - в 18:00 накануне, за 3 часа - от начала записи."""
+        times = compute_reminder_times(date(2026, 3, 10), time(11, 30))
+
+        assert times[REMINDER_DAY_BEFORE] == datetime(2026, 3, 9, 18, 0)
+        assert times[REMINDER_3_HOURS] == datetime(2026, 3, 10, 8, 30)
+
+    async def test_schedule_upserts_future_and_cancels_past(self):
+        """Тест: прошедшее напоминание отменяется, будущее вставляется с ON CONFLICT."""
+        session = AsyncMock()
+
+        scheduled = await schedule_booking_reminders(
+            session,
+            company_id=1,
+            booking_id=7,
+            booking_date=date(2026, 3, 10),
+            booking_time=time(11, 30),
+            now=datetime(2026, 3, 9, 20, 0),
+        )
+
+        assert scheduled == 1
+        statements = [compile_sql(call.args[0]) for call in session.execute.await_args_list]
+        assert statements[0].startswith("UPDATE public.reminders SET status=")
+        assert statements[1].startswith("INSERT INTO public.reminders")
+        assert "ON CONFLICT ON CONSTRAINT uq_reminders_booking_kind DO UPDATE" in statements[1]
+
+    def test_claim_uses_skip_locked(self):
+        """Тест: захват строк не блокируется на строках других воркеров."""
+        sql = compile_sql(build_claim_statement(datetime(2026, 3, 10, 8, 30), limit=50))
+
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "RETURNING public.reminders.id" in sql
+
+    def test_outcome_values(self):
+        """Тест: ошибка возвращает строку в pending с удваивающейся отсрочкой, затем failed."""
+        now = datetime(2026, 3, 10, 8, 30)
+
+        assert reminder_outcome_values(SEND_SENT, 1, now) == {"status": "sent", "sent_at": now}
+        assert reminder_outcome_values(SEND_SKIPPED, 1, now) == {"status": "cancelled"}
+        assert reminder_outcome_values(SEND_ERROR, 1, now, max_attempts=3, retry_base=60) == {
+            "status": "pending",
+            "due_at": now + timedelta(seconds=60),
+        }
+        assert reminder_outcome_values(SEND_ERROR, 2, now, max_attempts=3, retry_base=60)["due_at"] == now + timedelta(seconds=120)
+        assert reminder_outcome_values(SEND_ERROR, 3, now, max_attempts=3, retry_base=60) == {"status": "failed"}
+
+    async def test_finish_error_requeues_reminder(self):
+        """Тест: после ошибки отправки строка снова pending и будет захвачена повторно."""
+        session = AsyncMock()
+
+        await finish_reminder(session, reminder_id=5, outcome=SEND_ERROR, attempts=1, now=datetime(2026, 3, 10, 8, 30))
+
+        statement = session.execute.await_args.args[0]
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["status"] == "pending"
+        assert params["due_at"] > datetime(2026, 3, 10, 8, 30)
+        assert "reminders.status = %(status_1)s" in compile_sql(statement)
@@ -0,0 +1,68 @@
+"""
+Unit тесты для распределения компаний по воркерам (bot.sharding).
+
+Проверяет:
+- Стабильность назначения компании воркеру
+- Равномерность распределения
+- Минимальное перемещение компаний при добавлении воркера
+"""
+from collections import Counter
+
+import pytest
+
+from bot.sharding import HashRing, configure_shard, owns_company
+
+
+class TestHashRing:
+    """Тесты для HashRing."""
+
+    def test_assignment_is_stable(self):
+        """Тест одинакового назначения на разных экземплярах кольца."""
+        first = HashRing(range(4))
+        second = HashRing(range(4))
+
+        assert all(first.get_node(cid) == second.get_node(cid) for cid in range(1, 500))
+
+    def test_distribution_is_balanced(self):
+        """Тест равномерного распределения компаний."""
+        ring = HashRing(range(4))
+
+        counts = Counter(ring.get_node(cid) for cid in range(1, 4001))
+
+        assert set(counts) == {0, 1, 2, 3}
+        assert max(counts.values()) < 1.3 * min(counts.values())
+
+    def test_adding_worker_moves_few_companies(self):
+        """Тест перемещения только части компаний на новый воркер."""
+        before = HashRing(range(4))
+        after = HashRing(range(5))
+
+        moved = [cid for cid in range(1, 2001) if before.get_node(cid) != after.get_node(cid)]
+
+        assert all(after.get_node(cid) == 4 for cid in moved)
+        assert len(moved) < 2000 * 0.3
+
+    def test_empty_ring(self):
+        """Тест ошибки при отсутствии воркеров."""
+        with pytest.raises(ValueError):
+            HashRing([]).get_node(1)
+
+
+class TestOwnsCompany:
+    """Тесты для owns_company."""
+
+    def test_each_company_has_one_owner(self):
+        """Тест того, что каждую компанию обслуживает ровно один воркер."""
+        owners = Counter()
+        for index in range(3):
+            configure_shard(index, 3)
+            owners.update(cid for cid in range(1, 300) if owns_company(cid))
+        configure_shard(0, 1)
+
+        assert all(owners[cid] == 1 for cid in range(1, 300))
+
+    def test_single_worker_owns_all(self):
+        """Тест режима без шардирования."""
+        configure_shard(0, 1)
+
+        assert owns_company(12345)
@@ -0,0 +1,87 @@
+"""
+Unit тесты для прохода по подпискам (app.tasks.subscription_notifications).
+
+Проверяет:
+- Этапы уведомлений по days_left
+- Переключение can_create_bookings по состоянию подписки
+"""
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.tasks.subscription_notifications import (
+    STAGE_1_DAY,
+    STAGE_3_DAYS,
+    STAGE_7_DAYS,
+    STAGE_EXPIRED,
+    STAGE_LAST_DAY,
+    STAGE_PAYMENT,
+    lifecycle_stage,
+    plan_lifecycle,
+)
+
+TODAY = date(2025, 3, 10)
+
+
+def subscription_row(company_id: int, days_left: int, status: str = "active", can_create_bookings=True):
+    """Строка LIFECYCLE_SQL."""
+    return SimpleNamespace(
+        id=company_id,
+        name=f"Компания {company_id}",
+        telegram_bot_token=f"token-{company_id}",
+        admin_telegram_id=1000 + company_id,
+        can_create_bookings=can_create_bookings,
+        status=status,
+        start_date=TODAY - timedelta(days=30),
+        end_date=TODAY + timedelta(days=days_left),
+        days_left=days_left,
+    )
+
+
+class TestLifecycleStage:
+    """Тесты для lifecycle_stage."""
+
+    def test_stages_by_days_left(self):
+        """Тест: каждому дню соответствует не больше одного этапа."""
+        stages = {days_left: lifecycle_stage(days_left) for days_left in range(-10, 11)}
+
+        assert stages[10] is None
+        assert stages[7] == STAGE_7_DAYS
+        assert stages[5] is None
+        assert stages[3] == STAGE_3_DAYS
+        assert stages[1] == STAGE_1_DAY
+        assert stages[0] == STAGE_LAST_DAY
+        assert stages[-1] == STAGE_EXPIRED
+        assert stages[-2] is None
+        assert [d for d, stage in stages.items() if stage == STAGE_PAYMENT] == [-9, -6, -3]
+
+
+class TestPlanLifecycle:
+    """Тесты для plan_lifecycle."""
+
+    def test_expired_companies_are_blocked(self):
+        """Тест: истекшие и неактивные подписки блокируют создание записей."""
+        rows = [
+            subscription_row(1, days_left=7),
+            subscription_row(2, days_left=0),
+            subscription_row(3, days_left=-1),
+            subscription_row(4, days_left=-5, can_create_bookings=False),
+            subscription_row(5, days_left=20, status="cancelled"),
+        ]
+
+        plan = plan_lifecycle(rows, TODAY)
+
+        assert plan.block_ids == [3, 5]
+        assert plan.unblock_ids == []
+        assert [(row.id, stage) for row, stage in plan.notices] == [
+            (1, STAGE_7_DAYS),
+            (2, STAGE_LAST_DAY),
+            (3, STAGE_EXPIRED),
+        ]
+
+    def test_renewed_company_is_unblocked(self):
+        """Тест: продленная подписка снова разрешает создание записей."""
+        plan = plan_lifecycle([subscription_row(1, days_left=30, can_create_bookings=False)], TODAY)
+
+        assert plan.unblock_ids == [1]
+        assert plan.block_ids == []
+        assert plan.notices == []
@@ -0,0 +1,59 @@
+"""
+Unit тесты для event loop процесса Celery worker (app.tasks.runtime).
+
+Проверяет:
+- Выполнение всех корутин в одном loop
+- Отмену корутины при прерывании ожидания
+"""
+import asyncio
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from app.tasks.runtime import TaskRuntime
+
+
+@pytest.fixture
+def runtime():
+    """Среда выполнения, которая останавливается после теста."""
+    runtime = TaskRuntime()
+    yield runtime
+    with runtime._lock:
+        loop, thread = runtime._loop, runtime._thread
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+class TestTaskRuntime:
+    """Тесты для TaskRuntime."""
+
+    def test_loop_is_reused_between_tasks(self, runtime):
+        """Тест: задачи выполняются в одном loop, а не в новом на каждую задачу."""
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = runtime.run(current_loop())
+        second = runtime.run(current_loop())
+
+        assert first is second
+        assert not first.is_closed()
+
+    def test_interrupted_wait_cancels_coroutine(self, runtime):
+        """Тест: при таймауте ожидания корутина отменяется."""
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(FutureTimeoutError):
+            runtime.run(slow(), timeout=0.05)
+
+        runtime.run(asyncio.sleep(0.01))
+        assert cancelled.is_set()
+
@@ -0,0 +1,90 @@
+"""
+Unit тесты для шлюза исходящих сообщений Telegram (app.services.telegram_gateway).
+
+Проверяет:
+- Выдачу токенов и ожидание в TokenBucket
+- Приостановку бота после 429
+- Повторы при 5xx и отсутствие повторов при 403
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter, TelegramServerError
+
+from app.services.telegram_gateway import TelegramGateway, TokenBucket
+
+TOKEN = "123456:TEST"
+
+
+class TestTokenBucket:
+    """Тесты для TokenBucket."""
+
+    def test_reserve_within_capacity(self):
+        """Тест: в пределах запаса ожидание не требуется."""
+        bucket = TokenBucket(rate=2)
+        now = bucket.updated
+        assert bucket.reserve(now) == 0
+        assert bucket.reserve(now) == 0
+
+    def test_reserve_over_capacity_waits(self):
+        """Тест: сверх запаса ожидание растет на 1/rate за каждый запрос."""
+        bucket = TokenBucket(rate=2)
+        now = bucket.updated
+        bucket.reserve(now)
+        bucket.reserve(now)
+        assert bucket.reserve(now) == pytest.approx(0.5)
+        assert bucket.reserve(now) == pytest.approx(1.0)
+
+    def test_try_acquire_does_not_go_negative(self):
+        """Тест: try_acquire не занимает токен, если его нет."""
+        bucket = TokenBucket(rate=1)
+        now = bucket.updated
+        assert bucket.try_acquire(now) == 0
+        assert bucket.try_acquire(now) == pytest.approx(1.0)
+        assert bucket.tokens == pytest.approx(0)
+
+    def test_block(self):
+        """Тест: после block токены не выдаются до окончания паузы."""
+        bucket = TokenBucket(rate=10)
+        bucket.block(5)
+        assert bucket.try_acquire() > 4
+
+
+class TestTelegramGateway:
+    """Тесты для TelegramGateway.execute."""
+
+    async def test_retry_after_blocks_bot(self):
+        """Тест: 429 приостанавливает бота и запрос повторяется."""
+        gateway = TelegramGateway(bot_rate=100, bulk_rate=50, chat_rate=100, max_retries=3)
+        request = AsyncMock(side_effect=[
+            TelegramRetryAfter(method=None, message="Too Many Requests", retry_after=3),
+            "ok",
+        ])
+
+        with patch("app.services.telegram_gateway.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await gateway.execute(TOKEN, 1, request) == "ok"
+
+        assert request.await_count == 2
+        assert gateway._bot_buckets["123456"].blocked_until > 0
+        assert max(call.args[0] for call in sleep.await_args_list) >= 3
+
+    async def test_server_error_retried_until_limit(self):
+        """Тест: 5xx повторяется не более max_retries раз."""
+        gateway = TelegramGateway(bot_rate=100, bulk_rate=50, chat_rate=100, max_retries=2)
+        request = AsyncMock(side_effect=TelegramServerError(method=None, message="Bad Gateway"))
+
+        with patch("app.services.telegram_gateway.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(TelegramServerError):
+                await gateway.execute(TOKEN, 1, request)
+
+        assert request.await_count == 3
+
+    async def test_forbidden_not_retried(self):
+        """Тест: 403 (бот заблокирован пользователем) не повторяется."""
+        gateway = TelegramGateway(bot_rate=100, bulk_rate=50, chat_rate=100, max_retries=5)
+        request = AsyncMock(side_effect=TelegramForbiddenError(method=None, message="Forbidden"))
+
+        with pytest.raises(TelegramForbiddenError):
+            await gateway.execute(TOKEN, 1, request)
+
+        assert request.await_count == 1
@@ -0,0 +1,88 @@
+"""
+Unit тесты для реестра file_id (app.services.telegram_media).
+
+Проверяет:
+- Однократную загрузку файла на бота
+- Повторную загрузку при отклоненном file_id
+"""
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+from aiogram.types import Chat, FSInputFile, Message, PhotoSize
+
+from app.services.telegram_media import MediaRegistry
+
+
+def make_photo_message(file_id: str) -> Message:
+    """Сообщение с фото, которое возвращает Telegram."""
+    return Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=100, type="private"),
+        photo=[
+            PhotoSize(file_id=f"{file_id}_small", file_unique_id="s", width=90, height=90),
+            PhotoSize(file_id=file_id, file_unique_id="b", width=800, height=800),
+        ],
+    )
+
+
+def make_bot(bot_id: int) -> MagicMock:
+    """Бот-заглушка."""
+    bot = MagicMock()
+    bot.id = bot_id
+    return bot
+
+
+@pytest.fixture
+def image(tmp_path):
+    """Временный файл изображения."""
+    path = tmp_path / "salon.jpg"
+    path.write_bytes(b"\xff\xd8fake-jpeg")
+    return str(path)
+
+
+class TestMediaRegistry:
+    """Тесты для MediaRegistry."""
+
+    async def test_uploads_once_per_bot(self, image):
+        """Тест: файл загружается один раз на бота, дальше отправляется file_id."""
+        registry = MediaRegistry(max_size=10)
+        sent = []
+
+        async def send(photo):
+            sent.append(photo)
+            return make_photo_message(f"file_{len(sent)}")
+
+        await registry.send_file(make_bot(1), image, send)
+        await registry.send_file(make_bot(1), image, send)
+        await registry.send_file(make_bot(2), image, send)
+
+        assert isinstance(sent[0], FSInputFile)
+        assert sent[1] == "file_1"
+        # file_id одного бота не подходит другому
+        assert isinstance(sent[2], FSInputFile)
+
+    async def test_stale_file_id_is_reuploaded(self, image):
+        """Тест: отклоненный file_id заменяется новой загрузкой."""
+        registry = MediaRegistry(max_size=10)
+        bot = make_bot(1)
+        registry.remember(bot.id, registry.file_hash(image), "stale")
+        sent = []
+
+        async def send(photo):
+            sent.append(photo)
+            if photo == "stale":
+                raise TelegramBadRequest(
+                    SendPhoto(chat_id=100, photo=photo),
+                    "Bad Request: wrong file identifier/HTTP URL specified",
+                )
+            return make_photo_message("fresh")
+
+        await registry.send_file(bot, image, send)
+
+        assert sent[0] == "stale"
+        assert isinstance(sent[1], FSInputFile)
+        assert registry.get_file_id(bot.id, registry.file_hash(image)) == "fresh"
@@ -0,0 +1,63 @@
+"""
+Unit тесты для параллельной обработки компаний (app.services.tenant_fanout).
+
+Проверяет:
+- Ограничение числа одновременно обрабатываемых компаний
+- Изоляцию ошибок и таймаутов компаний
+- Результаты параллельной отправки внутри компании
+"""
+import asyncio
+
+from app.services.tenant_fanout import fan_out_tenants, send_concurrently
+
+
+class TestTenantFanout:
+    """Тесты для fan_out_tenants и send_concurrently."""
+
+    async def test_concurrency_is_bounded(self):
+        """Тест: одновременно обрабатывается не больше concurrency компаний."""
+        active = 0
+        peak = 0
+
+        async def job(company_id):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return company_id, 0
+
+        results = await fan_out_tenants(range(1, 11), job, concurrency=3, timeout=None)
+
+        assert peak == 3
+        assert [r.sent for r in results] == list(range(1, 11))
+
+    async def test_failed_and_slow_tenants_do_not_stop_others(self):
+        """Тест: ошибка и таймаут компании попадают в результат, остальные обрабатываются."""
+        async def job(company_id):
+            if company_id == 1:
+                raise RuntimeError("нет схемы")
+            if company_id == 2:
+                await asyncio.sleep(10)
+            return 5, 1
+
+        results = await fan_out_tenants([1, 2, 3], job, concurrency=3, timeout=0.05)
+
+        assert results[0].error == "нет схемы"
+        assert "таймаут" in results[1].error
+        assert (results[2].sent, results[2].failed, results[2].error) == (5, 1, None)
+
+    async def test_send_concurrently_returns_errors_per_item(self):
+        """Тест: ошибка одного сообщения не мешает отправке остальных."""
+        sent = []
+
+        async def send(item):
+            if item == "b":
+                raise ValueError("chat not found")
+            sent.append(item)
+
+        errors = await send_concurrently(["a", "b", "c"], send, concurrency=2)
+
+        assert sorted(sent) == ["a", "c"]
+        assert errors[0] is None and errors[2] is None
+        assert isinstance(errors[1], ValueError)
@@ -52,6 +52,19 @@ class TestTenantServiceCreation:
         # Удаляем схему после теста
         await tenant_service.drop_tenant_schema(998)
 
+    @pytest.mark.asyncio
+    async def test_existing_tenant_schemas(self, tenant_service):
+        """Тест пакетной проверки существования tenant схем."""
+        await tenant_service.create_tenant_schema(995)
+
+        existing = await tenant_service.existing_tenant_schemas([995, 994])
+
+        assert existing == {995}, "Должна найтись только созданная схема"
+        assert await tenant_service.existing_tenant_schemas([]) == set()
+
+        # Удаляем схему после теста
+        await tenant_service.drop_tenant_schema(995)
+
 
 class TestTenantServiceDeletion:
     """Тесты для удаления tenant схем."""
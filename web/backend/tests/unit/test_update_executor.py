@@ -0,0 +1,102 @@
+"""
+Unit тесты для исполнителя обновлений (bot.update_executor).
+
+Проверяет:
+- Последовательную обработку обновлений одного чата
+- Параллельную обработку разных чатов
+- Отбрасывание обновлений при переполнении очереди чата
+"""
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from aiogram.types import Chat, Message, Update
+
+from bot.update_executor import UpdateExecutor
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    """Создать обновление с текстовым сообщением."""
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            text="Записаться",
+        ),
+    )
+
+
+def make_bot() -> MagicMock:
+    """Бот-заглушка без сетевых вызовов."""
+    bot = MagicMock()
+    bot.id = 42
+    bot.send_message = AsyncMock()
+    return bot
+
+
+class TestUpdateExecutor:
+    """Тесты для UpdateExecutor."""
+
+    async def test_same_chat_is_serialized(self):
+        """Тест: обновления одного чата выполняются строго по очереди."""
+        executor = UpdateExecutor(max_in_flight=10, max_queued=100, max_chat_queued=10)
+        bot = make_bot()
+        events = []
+
+        async def handler(name: str):
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+
+        executor.submit(bot, make_update(1, 100), lambda: handler("a"))
+        executor.submit(bot, make_update(2, 100), lambda: handler("b"))
+        await executor.wait()
+
+        assert events == ["start a", "end a", "start b", "end b"]
+        assert executor.stats()["updates_processed"] == 2
+        assert executor.stats()["updates_queued"] == 0
+
+    async def test_other_chats_not_blocked(self):
+        """Тест: медленный чат не задерживает другие чаты."""
+        executor = UpdateExecutor(max_in_flight=10, max_queued=100, max_chat_queued=10)
+        bot = make_bot()
+        slow_started = asyncio.Event()
+        release = asyncio.Event()
+        fast_done = asyncio.Event()
+
+        async def slow():
+            slow_started.set()
+            await release.wait()
+
+        async def fast():
+            fast_done.set()
+
+        executor.submit(bot, make_update(1, 100), slow)
+        await slow_started.wait()
+        executor.submit(bot, make_update(2, 200), fast)
+
+        await asyncio.wait_for(fast_done.wait(), timeout=1)
+        release.set()
+        await executor.wait()
+
+    async def test_chat_queue_overflow_is_shed(self):
+        """Тест: при переполнении очереди чата обновление отбрасывается с ответом."""
+        executor = UpdateExecutor(max_in_flight=10, max_queued=100, max_chat_queued=1)
+        bot = make_bot()
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        assert executor.submit(bot, make_update(1, 100), blocked) is True
+        await asyncio.sleep(0)
+        assert executor.submit(bot, make_update(2, 100), blocked) is True
+        assert executor.submit(bot, make_update(3, 100), blocked) is False
+
+        release.set()
+        await executor.wait()
+
+        assert executor.stats()["updates_shed"] == 1
+        bot.send_message.assert_awaited_once()
@@ -0,0 +1,96 @@
+"""
+Unit тесты для webhook-мультиплексора (bot.webhook).
+
+Проверяет:
+- Проверку секрета в пути и в заголовке
+- Ответ 200 для незарегистрированного бота и некорректного тела
+- Передачу корректного обновления в UpdateExecutor
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram import Bot
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot import webhook
+from bot.webhook import SECRET_HEADER, WebhookMultiplexer, get_secret_token
+
+SECRET = "test-secret"
+BOT_ID = 42
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 1700000000,
+        "chat": {"id": 100, "type": "private"},
+        "text": "Записаться",
+    },
+}
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = MagicMock()
+    monkeypatch.setattr(webhook, "get_update_executor", lambda: executor)
+    return executor
+
+
+@pytest.fixture
+async def client(executor):
+    multiplexer = WebhookMultiplexer(secret=SECRET)
+    # Регистрация без вызова setWebhook
+    multiplexer._bots[BOT_ID] = (Bot(token=f"{BOT_ID}:TEST"), MagicMock())
+    client = TestClient(TestServer(multiplexer.create_app()))
+    await client.start_server()
+    yield client
+    await client.close()
+
+
+def headers(bot_id: int = BOT_ID) -> dict:
+    """Заголовок с секретом бота."""
+    return {SECRET_HEADER: get_secret_token(bot_id, SECRET)}
+
+
+class TestWebhookMultiplexer:
+    """Тесты для приема обновлений."""
+
+    async def test_wrong_path_secret(self, client, executor):
+        """Тест: неверный секрет в пути отклоняется."""
+        response = await client.post(f"/tg/wrong/{BOT_ID}", json=UPDATE, headers=headers())
+
+        assert response.status == 401
+        executor.submit.assert_not_called()
+
+    async def test_wrong_header_secret(self, client, executor):
+        """Тест: токен заголовка другого бота отклоняется."""
+        response = await client.post(f"/tg/{SECRET}/{BOT_ID}", json=UPDATE, headers=headers(BOT_ID + 1))
+
+        assert response.status == 401
+        executor.submit.assert_not_called()
+
+    async def test_unregistered_bot(self, client, executor):
+        """Тест: обновление снятого бота подтверждается без обработки."""
+        response = await client.post(f"/tg/{SECRET}/7", json=UPDATE, headers=headers(7))
+
+        assert response.status == 200
+        executor.submit.assert_not_called()
+
+    async def test_malformed_body(self, client, executor):
+        """Тест: некорректное тело подтверждается, чтобы Telegram не повторял доставку."""
+        invalid_json = await client.post(f"/tg/{SECRET}/{BOT_ID}", data="{not json", headers=headers())
+        invalid_update = await client.post(f"/tg/{SECRET}/{BOT_ID}", json={"message": "x"}, headers=headers())
+
+        assert invalid_json.status == 200
+        assert invalid_update.status == 200
+        executor.submit.assert_not_called()
+
+    async def test_valid_update_submitted(self, client, executor):
+        """Тест: корректное обновление передается в исполнитель один раз."""
+        response = await client.post(f"/tg/{SECRET}/{BOT_ID}", json=UPDATE, headers=headers())
+
+        assert response.status == 200
+        executor.submit.assert_called_once()
+        bot, update = executor.submit.call_args.args[:2]
+        assert bot.id == BOT_ID
+        assert update.update_id == 1
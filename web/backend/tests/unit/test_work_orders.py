@@ -0,0 +1,99 @@
+"""
+Unit тесты для лист-нарядов мастеров (app.services.work_orders).
+
+Проверяет:
+- Разбор времени отправки из настроек компании
+- Группировку записей по мастерам
+- Текст лист-наряда
+- Снятие отметки дня для повторной отправки
+"""
+from datetime import date, time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.services.work_orders import (
+    DEFAULT_WORK_ORDER_TIME,
+    JOB_WORK_ORDERS,
+    group_work_orders,
+    parse_setting_time,
+    release_daily_run,
+    render_work_order,
+)
+
+
+def work_order_row(master_id: int, booking_id=None, booking_time=None, **extra):
+    """Строка load_work_orders."""
+    values = dict(
+        master_id=master_id,
+        master_name=f"Мастер {master_id}",
+        telegram_id=5000 + master_id,
+        booking_id=booking_id,
+        time=booking_time,
+        end_time=None,
+        status="confirmed",
+        comment=None,
+        client_name="Иван",
+        client_phone=None,
+        service_name="Стрижка",
+        post_number=None,
+        post_name=None,
+    )
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+
+class TestWorkOrders:
+    """Тесты для разбора, группировки и текста лист-нарядов."""
+
+    def test_parse_setting_time(self):
+        """Тест: некорректное или пустое значение заменяется временем по умолчанию."""
+        assert parse_setting_time("07:30") == time(7, 30)
+        assert parse_setting_time(" 21:05 ") == time(21, 5)
+        assert parse_setting_time(None) == DEFAULT_WORK_ORDER_TIME
+        assert parse_setting_time("25:00") == DEFAULT_WORK_ORDER_TIME
+
+    def test_group_by_master(self):
+        """Тест: записи группируются по мастеру, мастер без записей получает пустой лист-наряд."""
+        rows = [
+            work_order_row(1, booking_id=10, booking_time=time(9, 0)),
+            work_order_row(1, booking_id=11, booking_time=time(11, 0)),
+            work_order_row(2),
+            work_order_row(3, booking_id=12, booking_time=time(10, 0)),
+        ]
+
+        orders = group_work_orders(rows)
+
+        assert [(o.master_id, [b.booking_id for b in o.bookings]) for o in orders] == [
+            (1, [10, 11]),
+            (2, []),
+            (3, [12]),
+        ]
+        assert orders[0].telegram_id == 5001
+
+    def test_render(self):
+        """Тест: текст лист-наряда содержит записи по порядку или сообщение об их отсутствии."""
+        day = date(2025, 3, 10)
+        bookings = [
+            work_order_row(1, booking_id=10, booking_time=time(9, 0), end_time=time(10, 0), client_phone="+7999"),
+            work_order_row(1, booking_id=11, booking_time=time(11, 0), post_number=2, comment="VIP"),
+        ]
+
+        message_text = render_work_order(day, bookings)
+
+        assert message_text.startswith("📋 Лист-наряд на 10.03.2025")
+        assert "1. ⏰ 09:00 - 10:00" in message_text
+        assert "2. ⏰ 11:00" in message_text
+        assert "📞 +7999" in message_text
+        assert "Пост №2" in message_text and "💬 VIP" in message_text
+        assert "записей нет" in render_work_order(day, [])
+
+    async def test_release_daily_run(self):
+        """Тест: отметка дня сдвигается на предыдущий день, только если стоит на этот день."""
+        session = AsyncMock()
+
+        await release_daily_run(session, 5, JOB_WORK_ORDERS, date(2025, 3, 10))
+
+        statement, params = session.execute.await_args.args
+        assert "last_run_on = :day" in str(statement)
+        assert params["previous_day"] == date(2025, 3, 9)
+        assert params["company_id"] == 5 and params["job"] == JOB_WORK_ORDERS